@@ -0,0 +1,119 @@
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import unquote, urlsplit
+
+import redis
+
+from cache_manager import create_redis_client
+from logger import get_sampled_logger
+
+cache_log = get_sampled_logger('cache')
+
+# Множество ключей кэша ответов API, построенных по одной статье (для сброса при ее обновлении)
+ARTICLE_INDEX_PREFIX = 'api_article:'
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_redis_client():
+    """Клиент Redis кэша ответов API для процессов без api_server (refresh.py)"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = create_redis_client()
+    return _client
+
+def api_cache_key(name, body=b'', query_string=b''):
+    """
+    Ключ кэша ответа: имя view и хеш параметров запроса
+
+    JSON тела приводится к каноническому виду (порядок ключей, пробелы), чтобы запросы
+    разных клиентов и прогрев кэша (cache_warmer.py) давали один ключ.
+    """
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    except ValueError:
+        pass
+    return f"{name}:{hashlib.sha256(body + query_string).hexdigest()}"
+
+def article_id(url: str) -> Optional[str]:
+    """Идентификатор статьи по адресу: 'en.wikipedia.org/python (programming language)'"""
+    parts = urlsplit(url or '')
+    if not parts.netloc or not parts.path.startswith('/wiki/'):
+        return None
+    title = ' '.join(unquote(parts.path[len('/wiki/'):]).replace('_', ' ').split())
+    return f"{parts.netloc.lower()}/{title.casefold()}"
+
+def article_index_key(url: str) -> Optional[str]:
+    """Ключ множества ключей кэша статьи"""
+    article = article_id(url)
+    if article is None:
+        return None
+    return ARTICLE_INDEX_PREFIX + hashlib.sha256(article.encode('utf-8')).hexdigest()
+
+def index_article_response(client, url: str, cache_key: str, ttl: int):
+    """
+    Запоминает ключ ответа в множестве ключей статьи, которую нашел запрос
+
+    Так при обновлении статьи сбрасываются ответы на любой запрос, который к ней привел
+    (не только на запрос ее точным заголовком), включая /api/search.
+    """
+    index = article_index_key(url)
+    if index is None:
+        return
+    client.sadd(index, cache_key)
+    client.expire(index, ttl)
+
+def article_cache_keys(queries: Iterable[str], sections: Iterable[Dict[str, Any]] = ()) -> List[str]:
+    """
+    Ключи кэша ответов /api/contents и /api/paragraphs на запросы заголовком статьи (GET и POST
+    с теми же параметрами дают один ключ): без раздела и для каждого номера и якоря раздела
+
+    Нужны для записей, сохраненных до появления множеств ключей статьи.
+    """
+    keys = []
+    sections = list(sections)
+    for query in dict.fromkeys(queries):
+        keys.append(api_cache_key('api_contents', json.dumps({'query': query}).encode('utf-8')))
+        keys.append(api_cache_key('api_paragraphs', json.dumps({'query': query}).encode('utf-8')))
+        for entry in sections:
+            # GET передает раздел строкой, POST - также числом
+            values = {entry['number'], entry['anchor']}
+            if entry['number'].isdigit():
+                values.add(int(entry['number']))
+            for section in values:
+                params = json.dumps({'query': query, 'section': section}, ensure_ascii=False).encode('utf-8')
+                keys.append(api_cache_key('api_paragraphs', params))
+    return keys
+
+def invalidate_article(url: str, queries: Iterable[str] = (), sections: Iterable[Dict[str, Any]] = (),
+                       client=None) -> int:
+    """
+    Удаляет кэшированные ответы API статьи после ее обновления (refresh.py)
+
+    Args:
+        url: Адрес статьи: сбрасываются все ответы из множества ключей статьи
+        queries: Заголовки статьи для записей без множества ключей
+        sections: Разделы статьи (ParsedPage.sections)
+        client: Клиент Redis (по умолчанию get_redis_client())
+
+    Returns:
+        Количество удаленных записей
+    """
+    client = client or get_redis_client()
+    queries = list(dict.fromkeys(queries))
+    keys = set(article_cache_keys(queries, sections))
+    index = article_index_key(url)
+    try:
+        if index is not None:
+            keys.update(key.decode('utf-8') if isinstance(key, bytes) else key for key in client.smembers(index))
+            keys.add(index)
+        deleted = client.delete(*keys)
+    except redis.RedisError as e:
+        cache_log.info(f"Cache invalidation failed for {url}: {e}")
+        return 0
+    cache_log.info(f"Cache invalidated for {url}: {deleted} entries")
+    return deleted
@@ -1,34 +1,131 @@
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, Response, g, request, jsonify, render_template_string
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 import redis
+import gzip
+import hashlib
+import hmac
 import json
+import threading
 import time
-from datetime import datetime
+from collections import OrderedDict
+from datetime import datetime, timezone
 from functools import wraps
+from itertools import islice
+from urllib.parse import urljoin
 
-from main import create_driver, search_wikipedia, print_contents, print_paragraphs, print_links
-from logger import setup_logger
-from data_manager import DataManager
+from main import create_driver, search_wikipedia, print_contents, print_paragraphs, print_links, quit_driver
+from api_cache import api_cache_key, index_article_response
+from cache_manager import NegativeResult, create_redis_client
+from page_parser import get_parsed_page
+from logger import get_logger, get_sampled_logger, log_performance
+from timing import timed, registry as timing_registry, start_request, finish_request, server_timing_header
+from metrics import observe_request, record_cache, render_metrics
+import profiler
+from circuit_breaker import breakers_snapshot
+from scheduler import SchedulerRejected, get_scheduler
+from data_manager import DataManager, iter_csv_lines, iter_jsonl_lines, gzip_stream
 from config import Config
 
+try:
+    import brotli
+except ImportError:  # brotli необязателен, без него ответы кэша сжимаются gzip
+    brotli = None
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON-провайдер Flask, замеряющий этап сериализации ответа"""
+    
+    def dumps(self, obj, **kwargs):
+        with timed('serialization'):
+            return super().dumps(obj, **kwargs)
+
 app = Flask(__name__)
+app.json = TimedJSONProvider(app)
+app.config['RATELIMIT_ENABLED'] = Config.RATELIMIT_ENABLED
+app.config['RATELIMIT_HEADERS_ENABLED'] = True
 CORS(app)
 
-# Настройка лимитера запросов
+# Настройка лимитера запросов: счетчики в Redis общие для всех воркеров gunicorn;
+# при недоступном Redis - временно в памяти процесса (лимиты действуют в каждом воркере)
 limiter = Limiter(
     app=app,
     key_func=get_remote_address,
-    default_limits=["200 per day", "50 per hour"]
+    default_limits=["200 per day", "50 per hour"],
+    storage_uri=Config.RATELIMIT_STORAGE_URI,
+    key_prefix=Config.RATELIMIT_KEY_PREFIX,
+    in_memory_fallback_enabled=True
 )
 
-# Инициализация Redis для кэширования
-redis_client = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
+def reset_rate_limits():
+    """Сбрасывает счетчики лимитера (при недоступном Redis - счетчики в памяти процесса)"""
+    try:
+        limiter.reset()
+    except redis.RedisError as e:
+        logger.warning(f"Rate limit storage unavailable: {e}")
+        if limiter.limiter.storage is not limiter.storage:
+            limiter.limiter.storage.reset()
+
+def request_cost():
+    """
+    Стоимость запроса в единицах лимита
+    
+    До выполнения view проверяется наличие хотя бы одной единицы квоты, после -
+    списывается фактическая стоимость (g.rate_cost, см. end_request_timing).
+    """
+    return g.get('rate_cost', 1)
+
+def browser_limit(launches_per_minute):
+    """
+    Лимит маршрута с браузером: квота - launches_per_minute запусков браузера в минуту
+    
+    Запрос, запустивший браузер, расходует RATELIMIT_COST_BROWSER единиц, ответ из кэша -
+    RATELIMIT_COST_CACHE_HIT, поэтому повторные запросы почти не расходуют квоту.
+    """
+    return limiter.limit(f"{launches_per_minute * Config.RATELIMIT_COST_BROWSER} per minute",
+                         cost=request_cost, deduct_when=lambda response: response.status_code != 429)
+
+def charge_request(stages):
+    """Фактическая стоимость запроса по этапам: запуск браузера, ответ из кэша или обычная работа"""
+    if any(stage == 'driver_launch' for stage, _ in stages):
+        return Config.RATELIMIT_COST_BROWSER
+    if g.get('cache_hit'):
+        return Config.RATELIMIT_COST_CACHE_HIT
+    return Config.RATELIMIT_COST_DEFAULT
+
+# Инициализация Redis для кэширования: те же хост, таймаут и отказ от повторов, что у
+# кэша поиска (cache_manager) - при недоступном Redis запрос не ждет переподключений
+redis_client = create_redis_client()
 
-# Инициализация логгера и менеджера данных
-logger = setup_logger()
-data_manager = DataManager()
+# Инициализация логгера; менеджер данных (SQLite, output/, фоновый поток записи) создается
+# при первом запросе, которому он нужен - импорт модуля и fork воркеров его не создают
+logger = get_logger()
+cache_log = get_sampled_logger('cache')
+_data_manager = None
+_data_manager_lock = threading.Lock()
+
+def get_data_manager():
+    """Менеджер данных процесса (создается при первом обращении)"""
+    global _data_manager
+    if _data_manager is None:
+        with _data_manager_lock:
+            if _data_manager is None:
+                _data_manager = DataManager()
+    return _data_manager
+
+def set_data_manager(manager):
+    """Подменяет менеджер данных (бенчмарки, нагрузочные тесты); возвращает прежний (None - не создавался)"""
+    global _data_manager
+    with _data_manager_lock:
+        previous, _data_manager = _data_manager, manager
+    return previous
+
+def __getattr__(name):
+    # Совместимость: api_server.data_manager
+    if name == 'data_manager':
+        return get_data_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # HTML шаблон для веб-интерфейса
 HTML_TEMPLATE = """
@@ -63,6 +160,10 @@ HTML_TEMPLATE = """
                 <label for="query">Поисковый запрос:</label>
                 <input type="text" id="query" placeholder="Введите запрос...">
             </div>
+            <div class="form-group">
+                <label for="section">Раздел (для параграфов, например 2.1):</label>
+                <input type="text" id="section" placeholder="Необязательно">
+            </div>
             <div class="form-group">
                 <label for="action">Действие:</label>
                 <select id="action">
@@ -70,6 +171,8 @@ HTML_TEMPLATE = """
                     <option value="contents">Получить оглавление</option>
                     <option value="paragraphs">Получить параграфы</option>
                     <option value="links">Получить ссылки</option>
+                    <option value="local_search">Поиск по сохраненным статьям</option>
+                    <option value="related">Похожие статьи (по сохраненным)</option>
                 </select>
             </div>
             <button onclick="performAction()">Выполнить</button>
@@ -85,6 +188,7 @@ HTML_TEMPLATE = """
         async function performAction() {
             const query = document.getElementById('query').value;
             const action = document.getElementById('action').value;
+            const section = document.getElementById('section').value;
             const loading = document.getElementById('loading');
             const results = document.getElementById('results');
 
@@ -99,8 +203,8 @@ HTML_TEMPLATE = """
             try {
                 const response = await fetch(`/api/${action}`, {
                     method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ query: query })
+                    headers: { 'Content-Type': 'application/json', 'X-Priority': 'interactive' },
+                    body: JSON.stringify({ query: query, section: section || undefined })
                 });
 
                 const data = await response.json();
@@ -125,7 +229,8 @@ HTML_TEMPLATE = """
                 html += '<div class="result">';
                 if (Array.isArray(data.results)) {
                     data.results.forEach((item, index) => {
-                        html += `<p><strong>${index + 1}.</strong> ${item}</p>`;
+                        const text = typeof item === 'object' ? JSON.stringify(item) : item;
+                        html += `<p><strong>${index + 1}.</strong> ${text}</p>`;
                     });
                 } else {
                     html += `<pre>${JSON.stringify(data.results, null, 2)}</pre>`;
@@ -140,27 +245,314 @@ HTML_TEMPLATE = """
 </html>
 """
 
+@app.before_request
+def begin_request_timing():
+    """Начинает сбор длительностей этапов запроса"""
+    request.environ['timing.token'] = start_request()
+    request.environ['timing.start'] = time.perf_counter()
+
+@app.after_request
+def end_request_timing(response):
+    """Записывает общую длительность запроса и добавляет заголовок Server-Timing"""
+    start = request.environ.get('timing.start')
+    if start is None:
+        return response
+    total = time.perf_counter() - start
+    stages = finish_request(request.environ.get('timing.token'))
+    # Списание квоты лимитера выполняется после этого обработчика
+    g.rate_cost = charge_request(stages)
+    route = request.endpoint or 'unknown'
+    timing_registry.observe(f"request:{route}", total)
+    observe_request(route, request.method, response.status_code, total)
+    stages.append(('total', total))
+    response.headers['Server-Timing'] = server_timing_header(stages)
+    if route.startswith('api_'):
+        log_performance(logger, route, total)
+    return response
+
+@app.before_request
+def begin_request_profile():
+    """Профилирует запрос, если выполняется сеанс /admin/profile (иначе - одна проверка)"""
+    session = profiler.active_session()
+    if session is not None:
+        request.environ['profile.session'] = session
+        request.environ['profile.token'] = session.begin_request(request.endpoint)
+
+@app.teardown_request
+def end_request_profile(exc=None):
+    """Завершает профилирование запроса (вызывается и при необработанном исключении)"""
+    session = request.environ.get('profile.session')
+    if session is not None:
+        session.end_request(request.environ.get('profile.token'))
+
+def request_priority():
+    """
+    Класс приоритета запроса: класс API-ключа (X-API-Key), без ключа - SCHEDULER_DEFAULT_CLASS
+    
+    X-Priority не проверяется, поэтому им можно только понизить класс (bulk для фоновых
+    задач), но не повысить его. Прогрев кэша (cache_warm_request) всегда понижается до bulk.
+    """
+    weights = get_scheduler().weights
+    base = Config.API_KEY_CLASSES.get(request.headers.get('X-API-Key', ''), Config.SCHEDULER_DEFAULT_CLASS)
+    if base not in weights:
+        base = Config.SCHEDULER_DEFAULT_CLASS
+    priority = 'bulk' if cache_warm_request() else request.headers.get('X-Priority', '').strip().lower()
+    if priority in weights and weights[priority] < weights.get(base, 0):
+        return priority
+    return base
+
+def scheduled(func):
+    """Декоратор: view с браузером выполняется в слоте планировщика по классу приоритета запроса"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        priority = request_priority()
+        scheduler = get_scheduler()
+        try:
+            scheduler.acquire(priority)
+        except SchedulerRejected as e:
+            response = jsonify({'error': str(e), 'reason': 'overloaded', 'priority': priority})
+            response.status_code = 503
+            response.headers['Retry-After'] = str(Config.NEGATIVE_CACHE_TTL['transient'])
+            return response
+        try:
+            return func(*args, **kwargs)
+        finally:
+            scheduler.release(priority)
+    return wrapper
+
+def note_article(driver):
+    """Запоминает адрес найденной статьи для множества ключей кэша статьи (см. store_response)"""
+    g.article_url = driver.current_url
+
+def store_article(driver):
+    """Сохраняет текущую статью в локальное хранилище (повторы не дублируются)"""
+    try:
+        page = get_parsed_page(driver)
+        # Разбор выполняется сейчас (драйвер скоро закроется), сжатие и запись - в фоне
+        data_manager = get_data_manager()
+        data_manager.submit(data_manager.save_page_content, page.title or driver.title, page.to_content())
+    except Exception as e:
+        logger.error(f"Article store error: {e}")
+
+# HTTP-статус ответа на отрицательный результат поиска
+NEGATIVE_STATUS = {'not_found': 404, 'disambiguation': 404, 'transient': 503}
+
+def search_failure_response(result):
+    """Ответ API на неудачный поиск: отрицательный результат (кэшируется) или ошибка браузера"""
+    if not isinstance(result, NegativeResult):
+        return jsonify({'error': 'Failed to initialize browser'}), 500
+    g.negative_result = result
+    response = jsonify({'error': result.message, 'reason': result.kind, **result.details})
+    response.status_code = NEGATIVE_STATUS[result.kind]
+    if result.kind == 'transient':
+        response.headers['Retry-After'] = str(result.details.get('retry_after', result.ttl))
+    return response
+
+def request_params():
+    """Параметры запроса: строка запроса для GET, JSON-тело для POST"""
+    if request.method in ('GET', 'HEAD'):
+        return request.args.to_dict()
+    return request.get_json()
+
+def cache_key_params():
+    """Данные для ключа кэша: у GET-варианта маршрута тот же ключ, что у POST с такими же параметрами"""
+    if request.method in ('GET', 'HEAD'):
+        return json.dumps(request.args.to_dict()).encode('utf-8'), b''
+    return request.get_data(), request.query_string
+
+def content_etag(body):
+    """ETag по содержимому несжатого тела ответа"""
+    return hashlib.sha256(body).hexdigest()[:32]
+
+def compress_payload(body):
+    """
+    Сжимает тело ответа для кэша один раз: (кодировка, байты)
+    
+    Ответы меньше API_CACHE_COMPRESS_MIN_SIZE хранятся без сжатия; brotli - если
+    выбран в API_CACHE_ENCODING и установлен, иначе gzip.
+    """
+    if len(body) < Config.API_CACHE_COMPRESS_MIN_SIZE:
+        return 'identity', body
+    with timed('compression'):
+        if Config.API_CACHE_ENCODING == 'br' and brotli is not None:
+            return 'br', brotli.compress(body)
+        return 'gzip', gzip.compress(body, compresslevel=Config.API_CACHE_COMPRESS_LEVEL, mtime=0)
+
+def decompress_payload(payload, encoding):
+    """Несжатое тело для клиента, не принимающего кодировку записи кэша"""
+    if encoding == 'identity':
+        return payload
+    with timed('decompression'):
+        if encoding == 'br':
+            return brotli.decompress(payload)
+        return gzip.decompress(payload)
+
+def pack_cached(payload, stored, encoding, etag, modified=None):
+    """
+    Запись кэша: заголовок "время_записи кодировка etag время_изменения" и (сжатое) тело
+    
+    Время записи определяет свежесть (API_CACHE_TTL), время изменения - Last-Modified.
+    """
+    modified = stored if modified is None else modified
+    return f"{int(stored)} {encoding} {etag} {int(modified)}\n".encode('ascii') + payload
+
+def unpack_cached(value):
+    """
+    (тело, время записи, кодировка, etag, время изменения) записи кэша
+    
+    У отрицательных результатов и записей без заголовка времени нет - (JSON, None, 'identity', None, None);
+    у записей без времени изменения оно совпадает со временем записи.
+    None - запись не может быть отдана этим процессом (сжата brotli, а он не установлен).
+    """
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+    head, sep, payload = value.partition(b'\n')
+    fields = head.decode('ascii', 'replace').split(' ')
+    if not sep or not fields[0].isdigit():
+        return value, None, 'identity', None, None
+    stored = int(fields[0])
+    if len(fields) == 1:
+        return payload, stored, 'identity', None, stored
+    if len(fields) not in (3, 4) or (fields[1] == 'br' and brotli is None):
+        return None
+    modified = int(fields[3]) if len(fields) == 4 and fields[3].isdigit() else stored
+    return payload, stored, fields[1], fields[2], modified
+
+def conditional_response(response, modified=None, etag=None):
+    """
+    ETag (хеш тела) и Last-Modified успешного JSON-ответа; условный GET получает 304 без тела
+    
+    GET-ответы разрешено хранить промежуточным кэшам API_HTTP_MAX_AGE секунд.
+    """
+    if response.status_code != 200 or not response.is_json:
+        return response
+    response.set_etag(etag or content_etag(response.get_data()))
+    if modified is not None:
+        response.last_modified = datetime.fromtimestamp(int(modified), timezone.utc)
+    if request.method in ('GET', 'HEAD'):
+        response.cache_control.public = True
+        response.cache_control.max_age = Config.API_HTTP_MAX_AGE
+    return response.make_conditional(request)
+
+def is_fresh(modified):
+    """Свежа ли запись кэша (устаревшие отдаются только при недоступном upstream)"""
+    return modified is None or time.time() - modified <= Config.API_CACHE_TTL
+
+def cached_response(payload, modified, encoding, etag):
+    """
+    Ответ из записи кэша: сжатые байты отдаются как есть клиенту, принимающему их кодировку
+    (Accept-Encoding), остальным - распакованными; у каждого представления свой ETag
+    """
+    if encoding != 'identity' and request.accept_encodings[encoding] <= 0:
+        payload, encoding = decompress_payload(payload, encoding), 'identity'
+    response = app.response_class(payload, mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+        etag = f"{etag}-{encoding}"
+    return conditional_response(response, modified, etag)
+
+def cache_hit_response(cache_key, entry):
+    """Ответ из свежей записи кэша: сохраненный отрицательный результат или тело как есть"""
+    record_cache('hit', cache='api')
+    g.cache_hit = True
+    payload, stored, encoding, etag, modified = entry
+    if stored is None:
+        negative = NegativeResult.from_cache(json.loads(payload))
+        if negative is not None:
+            cache_log.info(f"Negative cache hit for {cache_key} ({negative.kind})")
+            return search_failure_response(negative)
+    cache_log.info(f"Cache hit for {cache_key}")
+    return cached_response(payload, modified, encoding, etag or content_etag(payload))
+
+def upstream_failed(response, negative):
+    """Новый ответ не получен: ошибка сервера или временный сбой поиска (в т.ч. открытый автомат)"""
+    return response.status_code >= 500 or (negative is not None and negative.kind == 'transient')
+
+def stale_response(cache_key, response, stale):
+    """Устаревшая запись кэша вместо ответа при сбое upstream"""
+    cache_log.info(f"Serving stale cache for {cache_key}: {response.status_code}")
+    record_cache('stale', cache='api')
+    g.cache_hit = True
+    payload, _, encoding, etag, modified = stale
+    response = cached_response(payload, modified, encoding, etag or content_etag(payload))
+    response.headers['Warning'] = '110 - "Response is Stale"'
+    response.cache_control.max_age = 0
+    return response
+
+def store_negative(cache_key, negative):
+    """Сохраняет отрицательный результат поиска на срок по его виду"""
+    # Отказ открытого автомата защиты не кэшируется: автомат сам отвечает быстро и закроется после проб
+    if 'circuit' in negative.details:
+        return
+    try:
+        redis_client.setex(cache_key, negative.ttl, json.dumps(negative.to_cache()))
+        cache_log.info(f"Negative result for {cache_key} ({negative.kind}), stored for {negative.ttl}s")
+    except redis.RedisError as e:
+        cache_log.info(f"Cache store failed for {cache_key}: {e}")
+
+def store_response(cache_key, response, previous=None):
+    """
+    Сохраняет успешный JSON-ответ сжатым на API_CACHE_TTL (и еще API_CACHE_STALE_TTL на случай
+    сбоя upstream) и отдает его так же, как ответ из кэша
+    
+    Last-Modified - время изменения содержимого: если тело совпадает с прежней (устаревшей)
+    записью previous, сохраняется ее время изменения, и If-Modified-Since по-прежнему дает 304.
+    """
+    stored = time.time()
+    body = response.get_data()
+    etag = content_etag(body)
+    modified = stored
+    if previous is not None and previous[4] is not None and previous[3] == etag:
+        modified = previous[4]
+    encoding, payload = compress_payload(body)
+    ttl = Config.API_CACHE_TTL + Config.API_CACHE_STALE_TTL
+    try:
+        redis_client.setex(cache_key, ttl, pack_cached(payload, stored, encoding, etag, modified))
+        # Ключ запоминается за найденной статьей: refresh.py сбросит его при ее обновлении
+        if g.get('article_url'):
+            index_article_response(redis_client, g.article_url, cache_key, ttl)
+        cache_log.info(f"Cache miss for {cache_key}, stored result ({encoding}, {len(payload)} bytes)")
+    except redis.RedisError as e:
+        cache_log.info(f"Cache store failed for {cache_key}: {e}")
+    return cached_response(payload, modified, encoding, etag)
+
 def cache_result(func):
-    """Декоратор для кэширования результатов"""
+    """
+    Декоратор для кэширования результатов
+    
+    Успешный ответ хранится сериализованным и сжатым: ответ из кэша отдается без разбора,
+    повторной сериализации JSON и повторного сжатия, а условный GET с совпадающим ETag -
+    304 без тела. Устаревший ответ (старше API_CACHE_TTL) отдается, только если новый
+    получить не удалось: временный сбой, открытый автомат защиты или ошибка сервера.
+    """
     @wraps(func)
     def wrapper(*args, **kwargs):
-        # Создаем ключ кэша
-        cache_key = f"{func.__name__}:{hash(str(args) + str(kwargs))}"
-        
-        # Проверяем кэш
-        cached_result = redis_client.get(cache_key)
-        if cached_result:
-            logger.info(f"Cache hit for {cache_key}")
-            return json.loads(cached_result)
-        
-        # Выполняем функцию
-        result = func(*args, **kwargs)
-        
-        # Сохраняем в кэш на 1 час
-        redis_client.setex(cache_key, 3600, json.dumps(result))
-        logger.info(f"Cache miss for {cache_key}, stored result")
-        
-        return result
+        # Создаем ключ кэша (аргументы view пусты - параметры запроса в теле или строке запроса)
+        cache_key = api_cache_key(func.__name__, *cache_key_params())
+        
+        # Проверяем кэш; недоступный Redis - промах, а не ошибка запроса
+        try:
+            cached_result = redis_client.get(cache_key)
+        except redis.RedisError as e:
+            record_cache('error', cache='api')
+            cache_log.info(f"Cache unavailable for {cache_key}: {e}")
+            return conditional_response(app.make_response(func(*args, **kwargs)), time.time())
+        entry = unpack_cached(cached_result) if cached_result else None
+        if entry is not None and is_fresh(entry[1]):
+            return cache_hit_response(cache_key, entry)
+        record_cache('miss', cache='api')
+        
+        # Выполняем функцию; оставшаяся запись кэша - устаревшая
+        response = app.make_response(func(*args, **kwargs))
+        negative = g.pop('negative_result', None)
+        if entry is not None and upstream_failed(response, negative):
+            return stale_response(cache_key, response, entry)
+        if negative is not None:
+            store_negative(cache_key, negative)
+        elif response.status_code == 200 and response.is_json:
+            response = store_response(cache_key, response, entry)
+        return response
     return wrapper
 
 @app.route('/')
@@ -169,8 +561,9 @@ def index():
     return render_template_string(HTML_TEMPLATE)
 
 @app.route('/api/search', methods=['POST'])
-@limiter.limit("10 per minute")
+@browser_limit(10)
 @cache_result
+@scheduled
 def api_search():
     """API для поиска статей"""
     try:
@@ -185,33 +578,38 @@ def api_search():
         # Выполняем поиск
         driver = search_wikipedia(query)
         if not driver:
-            return jsonify({'error': 'Failed to initialize browser'}), 500
+            return search_failure_response(driver)
+        note_article(driver)
         
-        # Получаем заголовок страницы
+        # Получаем заголовок и адрес страницы (до закрытия браузера)
         title = driver.title
+        url = driver.current_url
         
-        # Сохраняем историю поиска
-        data_manager.save_search_history(query, [{'title': title, 'url': driver.current_url}])
+        # Сохраняем историю поиска (кроме прогрева кэша - он не должен влиять на рейтинг запросов)
+        if not cache_warm_request():
+            get_data_manager().save_search_history(query, [{'title': title, 'url': url}])
         
-        driver.quit()
+        quit_driver(driver)
         
         return jsonify({
             'success': True,
             'query': query,
             'title': title,
-            'url': driver.current_url
+            'url': url
         })
         
     except Exception as e:
         logger.error(f"API search error: {e}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/contents', methods=['POST'])
-@limiter.limit("20 per minute")
+@app.route('/api/contents', methods=['GET', 'POST'])
+@browser_limit(20)
+@cache_result
+@scheduled
 def api_contents():
     """API для получения оглавления"""
     try:
-        data = request.get_json()
+        data = request_params()
         query = data.get('query')
         
         if not query:
@@ -221,12 +619,13 @@ def api_contents():
         
         driver = search_wikipedia(query)
         if not driver:
-            return jsonify({'error': 'Failed to initialize browser'}), 500
+            return search_failure_response(driver)
+        note_article(driver)
         
-        contents = print_contents(driver)
-        contents_text = [item.text for item in contents] if contents else []
+        contents = get_parsed_page(driver).sections
+        contents_text = [f"{item['number']}. {item['title']}" for item in contents]
         
-        driver.quit()
+        quit_driver(driver)
         
         return jsonify({
             'success': True,
@@ -238,12 +637,14 @@ def api_contents():
         logger.error(f"API contents error: {e}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/paragraphs', methods=['POST'])
-@limiter.limit("15 per minute")
+@app.route('/api/paragraphs', methods=['GET', 'POST'])
+@browser_limit(15)
+@cache_result
+@scheduled
 def api_paragraphs():
     """API для получения параграфов"""
     try:
-        data = request.get_json()
+        data = request_params()
         query = data.get('query')
         
         if not query:
@@ -253,20 +654,38 @@ def api_paragraphs():
         
         driver = search_wikipedia(query)
         if not driver:
-            return jsonify({'error': 'Failed to initialize browser'}), 500
-        
-        paragraphs = driver.find_elements('tag name', 'p')
-        paragraphs_text = [p.text for p in paragraphs if p.text.strip()]
-        
-        # Экспортируем в CSV
-        data_manager.export_paragraphs_to_csv(paragraphs_text)
-        
-        driver.quit()
+            return search_failure_response(driver)
+        note_article(driver)
+        
+        # Тексты берутся из разобранной страницы (она же сохраняется в хранилище): браузер можно
+        # закрыть сразу, а экспорт в фоне читает параграфы генератором, не собирая список
+        page = get_parsed_page(driver)
+        section = data.get('section')
+        if section:
+            # Только параграфы выбранного раздела (номер "2.1" или якорь)
+            entry = page.resolve_section(str(section))
+            if entry is None:
+                quit_driver(driver)
+                return jsonify({'error': f'Section not found: {section}'}), 404
+            paragraphs = page.get_section_paragraphs(entry['anchor'])
+            results = paragraphs[:10]
+        else:
+            paragraphs = page.iter_paragraph_text()
+            results = list(islice(page.iter_paragraph_text(), 10))
+        
+        # Сохранение статьи (и CSV, если включен API_EXPORT_CSV) - в фоновом потоке (при ответе из кэша не повторяются)
+        if Config.API_EXPORT_CSV:
+            data_manager = get_data_manager()
+            data_manager.submit(data_manager.export_paragraphs_to_csv, paragraphs)
+        store_article(driver)
+        
+        quit_driver(driver)
         
         return jsonify({
             'success': True,
             'query': query,
-            'results': paragraphs_text[:10]  # Возвращаем первые 10 параграфов
+            'section': section,
+            'results': results  # Возвращаем первые 10 параграфов
         })
         
     except Exception as e:
@@ -274,7 +693,8 @@ def api_paragraphs():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/links', methods=['POST'])
-@limiter.limit("15 per minute")
+@browser_limit(15)
+@scheduled
 def api_links():
     """API для получения ссылок"""
     try:
@@ -288,34 +708,115 @@ def api_links():
         
         driver = search_wikipedia(query)
         if not driver:
-            return jsonify({'error': 'Failed to initialize browser'}), 500
+            return search_failure_response(driver)
+        note_article(driver)
+        
+        # Ссылки - генератором по разобранной странице (абсолютные адреса, как у WebElement.get_attribute)
+        page = get_parsed_page(driver)
         
-        links = driver.find_elements('css selector', "a[href^='/wiki/']")
-        links_data = [
-            {'text': link.text, 'url': link.get_attribute('href')}
-            for link in links if link.text.strip()
-        ]
+        def links():
+            for link in page.iter_links():
+                yield {'text': link['text'], 'url': urljoin(page.url or '', link['url'])}
         
-        # Экспортируем в CSV
-        data_manager.export_links_to_csv(links_data)
+        # Сохранение статьи (и CSV, если включен API_EXPORT_CSV) - в фоновом потоке (при ответе из кэша не повторяются)
+        if Config.API_EXPORT_CSV:
+            data_manager = get_data_manager()
+            data_manager.submit(data_manager.export_links_to_csv, links())
+        store_article(driver)
         
-        driver.quit()
+        quit_driver(driver)
         
         return jsonify({
             'success': True,
             'query': query,
-            'results': links_data[:20]  # Возвращаем первые 20 ссылок
+            'results': list(islice(links(), 20))  # Возвращаем первые 20 ссылок
         })
         
     except Exception as e:
         logger.error(f"API links error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/local_search', methods=['POST'])
+@limiter.limit("60 per minute")
+def api_local_search():
+    """API для поиска по сохраненным статьям (без запуска браузера)"""
+    try:
+        data = request.get_json()
+        query = data.get('query')
+        
+        if not query:
+            return jsonify({'error': 'Query parameter is required'}), 400
+        
+        limit = min(int(data.get('limit', 10)), 100)
+        logger.info(f"API local search request: {query}")
+        
+        return jsonify({
+            'success': True,
+            'query': query,
+            'results': get_data_manager().search_local(query, limit)
+        })
+        
+    except Exception as e:
+        logger.error(f"API local search error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/related', methods=['POST'])
+@limiter.limit("60 per minute")
+def api_related():
+    """API для похожих статей из локального корпуса (без запуска браузера)"""
+    try:
+        data = request.get_json()
+        titles = data.get('titles') or ([data['query']] if data.get('query') else [])
+        if isinstance(titles, str):
+            titles = [titles]
+        
+        if not titles:
+            return jsonify({'error': 'Query or titles parameter is required'}), 400
+        
+        limit = min(int(data.get('limit', 10)), 100)
+        related = get_data_manager().related_articles(titles, limit)
+        
+        return jsonify({
+            'success': True,
+            'query': titles[0] if len(titles) == 1 else titles,
+            'results': related[titles[0]] if len(titles) == 1 else related
+        })
+        
+    except Exception as e:
+        logger.error(f"API related error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/export', methods=['GET'])
+@limiter.limit("5 per minute")
+def api_export():
+    """API для потоковой выгрузки сохраненных статей (JSONL или CSV, опционально gzip)"""
+    export_format = request.args.get('format', 'jsonl')
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+    
+    if export_format == 'jsonl':
+        chunks = iter_jsonl_lines(get_data_manager().iter_stored_articles())
+        mimetype = 'application/x-ndjson'
+    elif export_format == 'csv':
+        chunks = iter_csv_lines(['Title', 'Section', 'Index', 'Paragraph'], get_data_manager().iter_paragraph_rows())
+        mimetype = 'text/csv'
+    else:
+        return jsonify({'error': 'Unsupported format, use jsonl or csv'}), 400
+    
+    filename = f"articles.{export_format}"
+    if compress:
+        chunks = gzip_stream(chunks)
+        mimetype = 'application/gzip'
+        filename += '.gz'
+    
+    logger.info(f"API export request: format={export_format}, gzip={compress}")
+    return Response(chunks, mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
 @app.route('/api/stats', methods=['GET'])
 def api_stats():
     """API для получения статистики"""
     try:
-        stats = data_manager.get_search_statistics()
+        stats = get_data_manager().get_search_statistics()
         return jsonify({
             'success': True,
             'statistics': stats
@@ -324,13 +825,188 @@ def api_stats():
         logger.error(f"API stats error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/timings', methods=['GET'])
+def api_timings():
+    """API для гистограмм длительностей по этапам (секунды)"""
+    return jsonify({
+        'success': True,
+        'timings': timing_registry.snapshot()
+    })
+
+@app.route('/api/scheduler', methods=['GET'])
+def api_scheduler():
+    """API для состояния планировщика браузерной работы: слоты, очереди и ожидание по классам"""
+    return jsonify({
+        'success': True,
+        'scheduler': get_scheduler().snapshot()
+    })
+
+@app.route('/metrics', methods=['GET'])
+@limiter.exempt
+def metrics_endpoint():
+    """Метрики в формате Prometheus (агрегируются по всем воркерам gunicorn)"""
+    body, content_type = render_metrics()
+    return Response(body, mimetype=content_type.split(';')[0], headers={'Content-Type': content_type})
+
+def admin_authorized():
+    """Проверка токена администратора (X-Admin-Token или Authorization: Bearer)"""
+    token = request.headers.get('X-Admin-Token', '')
+    authorization = request.headers.get('Authorization', '')
+    if not token and authorization.startswith('Bearer '):
+        token = authorization[len('Bearer '):]
+    return hmac.compare_digest(token.encode('utf-8'), Config.ADMIN_TOKEN.encode('utf-8'))
+
+# Ключ WSGI-окружения запросов прогрева из процесса сервера (cache_warmer.api_search_warmer)
+CACHE_WARM_ENVIRON_KEY = 'wikinav.cache_warm'
+
+def cache_warm_request():
+    """
+    Запрос прогрева кэша (не записывается в историю поиска)
+
+    Прогрев в процессе сервера (cache_warmer.py) помечается ключом WSGI-окружения, который
+    нельзя передать по HTTP; внешний клиент должен вместе с X-Cache-Warm: 1 передать токен
+    администратора, иначе любой клиент мог бы скрыть свои запросы из истории.
+    """
+    if request.environ.get(CACHE_WARM_ENVIRON_KEY):
+        return True
+    return (request.headers.get('X-Cache-Warm') == '1' and bool(Config.ADMIN_TOKEN)
+            and admin_authorized())
+
+@limiter.request_filter
+def cache_warm_in_process():
+    """Прогрев в процессе сервера (cache_warmer.api_search_warmer) не расходует квоту лимитера"""
+    return bool(request.environ.get(CACHE_WARM_ENVIRON_KEY))
+
+# Результаты сеансов профилирования, если Redis недоступен (последние несколько, в этом воркере)
+PROFILE_RESULT_PREFIX = 'profile:'
+PROFILE_LOCAL_RESULTS = 8
+_profile_results = OrderedDict()
+_profile_results_lock = threading.Lock()
+
+def pack_profile_result(body, mimetype, headers):
+    return json.dumps({'mimetype': mimetype, 'headers': headers}).encode('utf-8') + b'\n' + body
+
+def save_profile_result(session_id, result, ttl):
+    """Сохраняет результат сеанса (None - сеанс выполняется) в Redis, при сбое - в памяти воркера"""
+    value = b'' if result is None else pack_profile_result(*result)
+    with _profile_results_lock:
+        _profile_results[session_id] = value
+        _profile_results.move_to_end(session_id)
+        while len(_profile_results) > PROFILE_LOCAL_RESULTS:
+            _profile_results.popitem(last=False)
+    try:
+        redis_client.setex(PROFILE_RESULT_PREFIX + session_id, ttl, value)
+    except redis.RedisError as e:
+        logger.warning(f"Profile result kept in worker memory: {e}")
+
+def load_profile_result(session_id):
+    """Результат сеанса: (тело, тип, заголовки), b'' - сеанс выполняется, None - сеанс неизвестен"""
+    with _profile_results_lock:
+        value = _profile_results.get(session_id)
+    if value is None:
+        try:
+            value = redis_client.get(PROFILE_RESULT_PREFIX + session_id)
+        except redis.RedisError:
+            return None
+    if value is None or value == b'':
+        return value
+    meta, body = value.split(b'\n', 1)
+    meta = json.loads(meta)
+    return body, meta['mimetype'], meta['headers']
+
+@app.route('/admin/profile', methods=['POST'])
+@limiter.limit("6 per minute")
+def admin_profile():
+    """
+    Запуск профилирования работающего сервера на N секунд или N запросов (только администратор)
+    
+    Параметры (query string): mode=sampling|cprofile, seconds, requests, route (например
+    api_paragraphs), interval, format. Результат sampling - свернутые стеки для flamegraph.pl
+    или speedscope (format=collapsed) либо сводка (format=json); cprofile - файл pstats
+    (format=pstats) либо текстовый отчет (format=text).
+    
+    Сеанс выполняется в фоновом потоке: ответ 202 содержит идентификатор сеанса, результат
+    отдает GET /admin/profile/<session> после завершения (до этого - 202).
+    """
+    if not Config.ADMIN_TOKEN:
+        return jsonify({'error': 'Not found'}), 404
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    args = request.args
+    mode = args.get('mode', 'sampling')
+    output_format = args.get('format', 'collapsed' if mode == 'sampling' else 'pstats')
+    formats = ('collapsed', 'json') if mode == 'sampling' else ('pstats', 'text', 'json')
+    try:
+        if output_format not in formats:
+            raise ValueError(f"Unsupported format for {mode}: {output_format}")
+        session = profiler.ProfileSession(
+            mode=mode,
+            seconds=args.get('seconds', type=float),
+            requests=args.get('requests', type=int),
+            route=args.get('route') or None,
+            interval=args.get('interval', type=float),
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    ttl = int(session.seconds) + Config.PROFILE_RESULT_TTL
+    
+    def finish(session):
+        logger.warning(f"Profiling finished: {session.requests_profiled} requests, {session.samples} samples")
+        save_profile_result(session.id, render_profile(session, output_format), ttl)
+    
+    try:
+        profiler.start_session(session, on_finish=finish)
+    except profiler.ProfilerBusyError as e:
+        return jsonify({'error': str(e)}), 409
+    save_profile_result(session.id, None, ttl)
+    logger.warning(f"Profiling started: session={session.id}, mode={mode}, seconds={session.seconds}, "
+                   f"requests={session.requests}, route={session.route}")
+    location = f"/admin/profile/{session.id}"
+    return jsonify({'success': True, 'session': session.id, 'status': 'running',
+                    'seconds': session.seconds, 'result': location}), 202, {'Location': location}
+
+@app.route('/admin/profile/<session_id>', methods=['GET'])
+@limiter.exempt
+def admin_profile_result(session_id):
+    """Результат сеанса профилирования (202 - сеанс еще выполняется)"""
+    if not Config.ADMIN_TOKEN:
+        return jsonify({'error': 'Not found'}), 404
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    result = load_profile_result(session_id)
+    if result is None:
+        return jsonify({'error': 'Unknown profiling session'}), 404
+    if result == b'':
+        return jsonify({'session': session_id, 'status': 'running'}), 202, {'Retry-After': '1'}
+    body, mimetype, headers = result
+    return Response(body, mimetype=mimetype, headers=headers)
+
+def render_profile(session, output_format):
+    """Результат сеанса профилирования в выбранном формате: (тело, тип, заголовки)"""
+    headers = {'X-Profile-Requests': str(session.requests_profiled)}
+    if output_format == 'json':
+        body = json.dumps({'success': True, 'profile': session.summary()}, ensure_ascii=False)
+        return body.encode('utf-8'), 'application/json', headers
+    if output_format == 'collapsed':
+        headers['X-Profile-Samples'] = str(session.samples)
+        return session.collapsed().encode('utf-8'), 'text/plain', headers
+    if output_format == 'text':
+        return session.text_report().encode('utf-8'), 'text/plain', headers
+    headers['Content-Disposition'] = 'attachment; filename=profile.pstats'
+    return session.pstats_bytes(), 'application/octet-stream', headers
+
 @app.route('/health', methods=['GET'])
+@limiter.exempt
 def health_check():
     """Проверка здоровья сервиса"""
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'redis_connected': redis_client.ping()
+        'redis_connected': redis_client.ping(),
+        'circuits': breakers_snapshot()
     })
 
 if __name__ == '__main__':
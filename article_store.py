@@ -0,0 +1,287 @@
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+try:
+    import zstandard
+except ImportError:  # zstd необязателен, без него используем zlib
+    zstandard = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: между процессами индекс не блокируется, остается блокировка потоков
+    fcntl = None
+
+CODEC_EXTENSIONS = {'zstd': '.zst', 'zlib': '.zz'}
+INDEX_FILENAME = 'index.jsonl'
+
+class ArticleStore:
+    """Хранилище статей с адресацией по содержимому и сжатием"""
+
+    def __init__(self, base_dir: str = "output/articles", codec: Optional[str] = None, level: int = 6):
+        """
+        Инициализация хранилища
+
+        Args:
+            base_dir: Директория хранилища
+            codec: 'zstd' или 'zlib' (None - zstd, если установлен)
+            level: Уровень сжатия
+        """
+        if codec is None:
+            codec = 'zstd' if zstandard is not None else 'zlib'
+        if codec not in CODEC_EXTENSIONS or (codec == 'zstd' and zstandard is None):
+            raise ValueError(f"Unsupported codec: {codec}")
+
+        self.base_dir = base_dir
+        self.objects_dir = os.path.join(base_dir, 'objects')
+        self.index_path = os.path.join(base_dir, INDEX_FILENAME)
+        self.codec = codec
+        self.level = level
+        self._index = {}
+        self._index_lines = 0
+        # Прочитанная часть файла индекса: (inode, смещение конца последней полной строки)
+        self._index_position = (None, 0)
+        self._lock = threading.Lock()
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._load_index()
+
+    @contextmanager
+    def _locked_index(self):
+        """
+        Монопольный доступ к индексу: блокировка потоков и flock файла index.jsonl.lock
+
+        Воркеры gunicorn дописывают общий индекс; сжатие индекса (os.replace) под той же
+        блокировкой не теряет их записи.
+        """
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            fd = os.open(self.index_path + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                os.close(fd)  # Закрытие дескриптора снимает flock
+
+    def _index_changed(self) -> bool:
+        """Изменился ли файл индекса с последнего чтения (запись другого процесса или сжатие)"""
+        try:
+            stat = os.stat(self.index_path)
+        except FileNotFoundError:
+            return self._index_position[1] > 0
+        inode, offset = self._index_position
+        return stat.st_ino != inode or stat.st_size != offset
+
+    def _read_index(self):
+        """
+        Дочитывает индекс title -> последний хеш (последняя запись побеждает)
+
+        Если файл заменен сжатием или укорочен, индекс читается заново; иначе - только
+        строки, дописанные после прошлого чтения. Вызывается под _locked_index.
+        """
+        try:
+            stat = os.stat(self.index_path)
+        except FileNotFoundError:
+            self._index, self._index_lines, self._index_position = {}, 0, (None, 0)
+            return
+        # Файл не заменяется между stat и open: сжатие выполняется под той же блокировкой
+        with open(self.index_path, 'rb') as f:
+            inode, offset = self._index_position
+            if stat.st_ino != inode or stat.st_size < offset:
+                self._index, self._index_lines, offset = {}, 0, 0
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Недописанная последняя строка: дочитывается при следующем изменении файла
+                    break
+                offset += len(line)
+                if not line.strip():
+                    continue
+                self._index_lines += 1
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Поврежденная строка после аварийного завершения
+                    continue
+                self._index[record['title']] = record
+            self._index_position = (stat.st_ino, offset)
+
+    def _refresh_index(self):
+        """Перечитывает индекс, если его изменил другой процесс"""
+        if self._index_changed():
+            with self._locked_index():
+                self._read_index()
+
+    def _load_index(self):
+        """Загружает индекс; устаревших записей больше, чем актуальных - индекс переписывается"""
+        if not os.path.exists(self.index_path):
+            return
+        with self._locked_index():
+            self._read_index()
+            if self._index_lines > 2 * len(self._index):
+                self._compact_locked()
+
+    @staticmethod
+    def content_hash(payload: bytes) -> str:
+        """Хеш содержимого (sha256)"""
+        return hashlib.sha256(payload).hexdigest()
+
+    @staticmethod
+    def _serialize(title: str, content: Dict[str, Any]) -> bytes:
+        """Каноническая сериализация: одинаковое содержимое дает одинаковые байты"""
+        return json.dumps(
+            {'title': title, 'content': content},
+            ensure_ascii=False, sort_keys=True, separators=(',', ':'), default=str
+        ).encode('utf-8')
+
+    def _compress(self, payload: bytes) -> bytes:
+        if self.codec == 'zstd':
+            return zstandard.ZstdCompressor(level=self.level, write_checksum=True).compress(payload)
+        return zlib.compress(payload, self.level)
+
+    @staticmethod
+    def _decompress(codec: str, data) -> bytes:
+        if codec == 'zstd':
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read .zst blobs")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return zlib.decompress(data)
+
+    def _object_path(self, digest: str, codec: str) -> str:
+        """Путь к блобу: objects/ab/cdef...<ext>"""
+        return os.path.join(self.objects_dir, digest[:2], digest[2:] + CODEC_EXTENSIONS[codec])
+
+    def _find_object(self, digest: str):
+        """Находит блоб с любым поддерживаемым кодеком"""
+        for codec in CODEC_EXTENSIONS:
+            path = self._object_path(digest, codec)
+            if os.path.exists(path):
+                return path, codec
+        return None, None
+
+    def exists(self, digest: str) -> bool:
+        """Проверка наличия блоба"""
+        return self._find_object(digest)[0] is not None
+
+    def put(self, title: str, content: Dict[str, Any]) -> str:
+        """
+        Сохраняет статью (одинаковое содержимое не дублируется)
+
+        Args:
+            title: Заголовок статьи
+            content: Содержимое статьи
+
+        Returns:
+            Хеш содержимого
+        """
+        payload = self._serialize(title, content)
+        digest = self.content_hash(payload)
+
+        if not self.exists(digest):
+            self._write_object(self._object_path(digest, self.codec), self._compress(payload))
+
+        record = {'title': title, 'hash': digest, 'fetched_at': datetime.now().isoformat()}
+        with self._locked_index():
+            self._read_index()
+            latest = self._index.get(title)
+            if latest is not None and latest['hash'] == digest:
+                # Содержимое не изменилось - индекс не растет (fetched_at - время первого сохранения версии)
+                return digest
+            with open(self.index_path, 'ab') as f:
+                f.write((json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8'))
+            self._read_index()
+        return digest
+
+    @staticmethod
+    def _write_object(path: str, data: bytes):
+        """
+        Атомарная запись блоба: временный файл в той же директории, fsync и os.replace
+
+        Блоб по пути хеша всегда полный: после сбоя остается только временный файл, а
+        параллельные записи одного блоба заменяют его одинаковым содержимым.
+        """
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def get(self, digest: str, use_mmap: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Читает статью по хешу
+
+        Args:
+            digest: Хеш содержимого
+            use_mmap: Читать блоб через mmap вместо копирования в память
+
+        Returns:
+            Словарь {'title', 'content'} или None
+        """
+        path, codec = self._find_object(digest)
+        if path is None:
+            return None
+
+        with open(path, 'rb') as f:
+            if use_mmap and os.fstat(f.fileno()).st_size > 0:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    payload = self._decompress(codec, data)
+            else:
+                payload = self._decompress(codec, f.read())
+        return json.loads(payload.decode('utf-8'))
+
+    def latest(self, title: str) -> Optional[Dict[str, Any]]:
+        """Запись индекса для статьи: {'title', 'hash', 'fetched_at'}"""
+        self._refresh_index()
+        return self._index.get(title)
+
+    def get_latest(self, title: str, use_mmap: bool = False) -> Optional[Dict[str, Any]]:
+        """Последняя сохраненная версия статьи"""
+        record = self.latest(title)
+        if record is None:
+            return None
+        return self.get(record['hash'], use_mmap=use_mmap)
+
+    def version(self):
+        """Версия индекса (inode, прочитанное смещение): меняется при каждой записи любого процесса"""
+        self._refresh_index()
+        return self._index_position
+
+    def titles(self) -> List[str]:
+        """Список сохраненных статей"""
+        self._refresh_index()
+        return list(self._index)
+
+    def compact_index(self):
+        """Переписывает индекс, оставляя только последнюю запись для каждой статьи"""
+        with self._locked_index():
+            self._read_index()
+            self._compact_locked()
+
+    def _compact_locked(self):
+        """Сжатие индекса под _locked_index: записи других процессов уже прочитаны"""
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            for record in self._index.values():
+                f.write((json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8'))
+        os.replace(tmp_path, self.index_path)
+        self._index_position = (None, 0)
+        self._read_index()
@@ -0,0 +1,191 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from config import Config
+from logger import get_logger
+
+logger = get_logger()
+
+_STOP = object()
+
+# Работающие экземпляры останавливаются при выходе одним обработчиком atexit (как в history_db)
+_open_writers = set()
+_open_lock = threading.Lock()
+_atexit_registered = False
+
+def _close_all():
+    """Дописывает очереди и останавливает потоки всех открытых экземпляров"""
+    with _open_lock:
+        writers = list(_open_writers)
+    for writer in writers:
+        writer.close()
+
+class BackgroundWriter:
+    """Фоновая запись: пакеты записей в JSONL сегменты и отложенные задачи экспорта"""
+
+    def __init__(self, directory: str, prefix: str = "history",
+                 on_batch: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                 queue_size: Optional[int] = None, batch_size: Optional[int] = None,
+                 put_timeout: Optional[float] = None, max_segment_bytes: Optional[int] = None,
+                 max_segment_age: Optional[float] = None):
+        """
+        Инициализация фоновой записи
+
+        Args:
+            directory: Директория для JSONL сегментов
+            prefix: Префикс имен сегментов
+            on_batch: Обработчик каждого записанного пакета (например, вставка в SQLite)
+            queue_size: Размер очереди; при заполнении производитель ждет (backpressure)
+            batch_size: Максимальное количество элементов в пакете
+            put_timeout: Сколько ждать места в очереди, прежде чем отказаться от записи
+            max_segment_bytes: Размер сегмента, после которого начинается новый
+            max_segment_age: Возраст сегмента (сек), после которого начинается новый
+        """
+        self.directory = directory
+        self.prefix = prefix
+        self.on_batch = on_batch
+        self.batch_size = batch_size or Config.WRITER_BATCH_SIZE
+        self.put_timeout = put_timeout if put_timeout is not None else Config.WRITER_PUT_TIMEOUT
+        self.max_segment_bytes = max_segment_bytes or Config.HISTORY_SEGMENT_MAX_BYTES
+        self.max_segment_age = max_segment_age or Config.HISTORY_SEGMENT_MAX_AGE
+        self.dropped = 0
+
+        self._queue = queue.Queue(maxsize=queue_size or Config.WRITER_QUEUE_SIZE)
+        self._segment = None
+        self._segment_path = None
+        self._segment_opened_at = 0.0
+        self._segment_seq = 0
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name=f"{prefix}-writer", daemon=True)
+        self._thread.start()
+        global _atexit_registered
+        with _open_lock:
+            _open_writers.add(self)
+            if not _atexit_registered:
+                atexit.register(_close_all)
+                _atexit_registered = True
+
+    def write(self, record: Dict[str, Any]) -> bool:
+        """Ставит запись в очередь; False, если очередь переполнена дольше put_timeout"""
+        return self._put(('record', record))
+
+    def submit(self, func: Callable, *args, **kwargs) -> bool:
+        """Ставит произвольную задачу записи (например, экспорт CSV) в очередь"""
+        return self._put(('job', (func, args, kwargs)))
+
+    def _put(self, item) -> bool:
+        if self._closed:
+            return False
+        try:
+            self._queue.put(item, timeout=self.put_timeout)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f"Background writer queue is full, item dropped (total dropped: {self.dropped})")
+            return False
+
+    def flush(self):
+        """Ждет, пока все поставленные в очередь элементы будут записаны"""
+        self._queue.join()
+
+    def close(self):
+        """Записывает остаток очереди, закрывает сегмент и останавливает поток"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        with _open_lock:
+            _open_writers.discard(self)
+
+    @property
+    def segment_path(self) -> Optional[str]:
+        """Путь к текущему сегменту"""
+        return self._segment_path
+
+    def _run(self):
+        """Цикл фонового потока"""
+        running = True
+        while running:
+            try:
+                first = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                self._rotate_if_needed()
+                continue
+
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if any(item is _STOP for item in batch):
+                running = False
+            items = [item for item in batch if item is not _STOP]
+            try:
+                self._process(items)
+            except Exception as e:
+                logger.error(f"Background writer error: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+        self._close_segment()
+
+    def _process(self, items):
+        """Записывает пакет записей одним вызовом write и выполняет задачи"""
+        records = [payload for kind, payload in items if kind == 'record']
+        if records:
+            # Сбой записи сегмента или on_batch (например, занятая SQLite) не должен отменять задачи пакета
+            try:
+                self._rotate_if_needed()
+                segment = self._open_segment()
+                segment.write("".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in records))
+                segment.flush()
+                if self.on_batch is not None:
+                    self.on_batch(records)
+            except Exception as e:
+                logger.error(f"Background writer failed to store {len(records)} records: {e}")
+
+        for kind, payload in items:
+            if kind != 'job':
+                continue
+            func, args, kwargs = payload
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                logger.error(f"Background job {getattr(func, '__name__', func)} failed: {e}")
+
+    def _open_segment(self):
+        """Открывает текущий сегмент на дозапись"""
+        if self._segment is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._segment_seq += 1
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            self._segment_path = os.path.join(
+                self.directory, f"{self.prefix}_{timestamp}_{os.getpid()}_{self._segment_seq:04d}.jsonl"
+            )
+            self._segment = open(self._segment_path, 'a', encoding='utf-8')
+            self._segment_opened_at = time.monotonic()
+        return self._segment
+
+    def _rotate_if_needed(self):
+        """Закрывает сегмент по размеру или возрасту"""
+        if self._segment is None:
+            return
+        too_old = time.monotonic() - self._segment_opened_at >= self.max_segment_age
+        if too_old or self._segment.tell() >= self.max_segment_bytes:
+            self._close_segment()
+
+    def _close_segment(self):
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
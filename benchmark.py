@@ -0,0 +1,294 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from config import Config
+from timing import percentile
+from wiki_stub import WikiStubServer, DEFAULT_PAGES_DIR
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RESULTS_DIR = os.path.join(PROJECT_DIR, 'benchmarks', 'results')
+SUITES = ['cli', 'cache', 'api']
+
+def summarize(name: str, samples: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    """Сводка по замерам: пропускная способность и перцентили задержки (мс)"""
+    ordered = sorted(samples)
+    latency = {}
+    for key, q in (('min', 0), ('p50', 50), ('p90', 90), ('p95', 95), ('p99', 99), ('max', 100)):
+        value = percentile(ordered, q)
+        latency[key] = round(value * 1000, 3) if value is not None else None
+    latency['mean'] = round(sum(ordered) / len(ordered) * 1000, 3) if ordered else None
+    return {
+        'name': name,
+        'iterations': len(samples) + errors,
+        'errors': errors,
+        'elapsed_seconds': round(elapsed, 4),
+        'throughput_per_second': round(len(samples) / elapsed, 2) if elapsed > 0 else None,
+        'latency_ms': latency
+    }
+
+def run_case(name: str, func: Callable[[], Any], iterations: int, warmup: int = 1) -> Dict[str, Any]:
+    """
+    Последовательно выполняет func и замеряет каждый вызов
+
+    Вызов считается ошибкой, если бросил исключение или вернул False.
+    """
+    for _ in range(warmup):
+        with contextlib.suppress(Exception):
+            func()
+
+    samples, errors = [], 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        try:
+            ok = func()
+        except Exception:
+            ok = False
+        if ok is False:
+            errors += 1
+        else:
+            samples.append(time.perf_counter() - start)
+    return summarize(name, samples, errors, time.perf_counter() - started)
+
+def _quiet(func: Callable) -> Callable[[], Any]:
+    """Вызов функции CLI без вывода в консоль"""
+    def wrapper():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func()
+    return wrapper
+
+@contextlib.contextmanager
+def stub_environment(stub: WikiStubServer):
+    """Направляет поиск и извлечение на локальную замену Wikipedia"""
+    names = ('WIKIPEDIA_URL', 'DRIVER_BACKEND', 'NAVIGATION_DELAY')
+    saved = {name: getattr(Config, name) for name in names}
+    Config.WIKIPEDIA_URL = stub.url
+    Config.DRIVER_BACKEND = 'http'
+    Config.NAVIGATION_DELAY = 0
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(Config, name, value)
+
+def bench_cli(stub: WikiStubServer, query: str, iterations: int, warmup: int) -> List[Dict[str, Any]]:
+    """Функции CLI: поиск, оглавление, параграфы, ссылки и разбор страницы без кэша"""
+    import main
+    from page_parser import ParsedPage
+
+    def search():
+        driver = main.search_wikipedia(query)
+        if not driver:
+            return False
+        main.quit_driver(driver)
+
+    results = [run_case('search_wikipedia', search, iterations, warmup)]
+
+    driver = main.search_wikipedia(query)
+    if not driver:
+        return results
+    try:
+        results.append(run_case('print_contents', _quiet(lambda: main.print_contents(driver)), iterations, warmup))
+        results.append(run_case('print_paragraphs', _quiet(lambda: main.print_paragraphs(driver)), iterations, warmup))
+        results.append(run_case('print_links', _quiet(lambda: main.print_links(driver)), iterations, warmup))
+
+        html, url = driver.page_source, driver.current_url
+
+        def parse():
+            page = ParsedPage(html, url)
+            return page.sections is not None and page.paragraph_index is not None
+
+        results.append(run_case('parse_page', parse, iterations, warmup))
+    finally:
+        main.quit_driver(driver)
+    return results
+
+def bench_cache(iterations: int, warmup: int) -> List[Dict[str, Any]]:
+    """Слой кэша: декоратор cache_result и операции Redis (если доступен)"""
+    from cache_manager import get_cache_manager, cache_result
+
+    @cache_result(prefix='benchmark', ttl=60)
+    def cached_call(value):
+        return {'value': value}
+
+    manager = get_cache_manager()
+    results = [run_case('cache_result', lambda: cached_call(1), iterations, warmup)]
+    if manager.redis_client is None:
+        results.append({'name': 'redis', 'skipped': 'Redis недоступен'})
+        return results
+
+    payloads = {'small': {'title': 'Python'}, 'large': {'paragraphs': ['x' * 200] * 200}}
+    try:
+        for size, payload in payloads.items():
+            key = f"benchmark:{size}"
+            results.append(run_case(f'set_{size}', lambda: manager.set(key, payload, 60), iterations, warmup))
+            results.append(run_case(f'get_{size}', lambda: manager.get(key) is not None, iterations, warmup))
+    finally:
+        manager.clear_pattern('benchmark:*')
+    return results
+
+def bench_api(stub: WikiStubServer, query: str, iterations: int, warmup: int) -> List[Dict[str, Any]]:
+    """Маршруты /api/* через тестовый клиент Flask (лимитер отключен, данные во временной папке)"""
+    import api_server
+    from data_manager import DataManager
+
+    article = stub.find_article(query)
+    title = article['title'].replace('_', ' ') if article else query
+    output_dir = tempfile.mkdtemp(prefix='benchmark_')
+    data_manager = DataManager(output_dir)
+    saved_data_manager, saved_enabled = api_server.set_data_manager(data_manager), api_server.limiter.enabled
+    api_server.limiter.enabled = False
+    client = api_server.app.test_client()
+
+    def call(method: str, path: str, **kwargs):
+        def request():
+            response = client.open(path, method=method, **kwargs)
+            response.get_data()
+            return response.status_code < 400
+        return request
+
+    routes = [
+        ('POST /api/search', call('POST', '/api/search', json={'query': query})),
+        ('POST /api/contents', call('POST', '/api/contents', json={'query': query})),
+        ('POST /api/paragraphs', call('POST', '/api/paragraphs', json={'query': query})),
+        ('POST /api/paragraphs (section)', call('POST', '/api/paragraphs', json={'query': query, 'section': '1'})),
+        ('POST /api/links', call('POST', '/api/links', json={'query': query})),
+        ('POST /api/local_search', call('POST', '/api/local_search', json={'query': 'language'})),
+        ('POST /api/related', call('POST', '/api/related', json={'query': title})),
+        ('GET /api/export', call('GET', '/api/export?format=jsonl')),
+        ('GET /api/stats', call('GET', '/api/stats')),
+        ('GET /api/timings', call('GET', '/api/timings')),
+        ('GET /metrics', call('GET', '/metrics')),
+    ]
+    results = []
+    try:
+        for name, request in routes:
+            if name == 'POST /api/local_search':
+                # Статьи сохраняются в фоне: дожидаемся записи перед локальным поиском
+                data_manager.flush()
+            results.append(run_case(name, request, iterations, warmup))
+    finally:
+        data_manager.writer.close()
+        api_server.set_data_manager(saved_data_manager)
+        api_server.limiter.enabled = saved_enabled
+        shutil.rmtree(output_dir, ignore_errors=True)
+    return results
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def run_benchmarks(suites: List[str], query: str = 'Python', iterations: int = 20, warmup: int = 1,
+                   pages_dir: Optional[str] = None, latency: float = 0.0) -> Dict[str, Any]:
+    """
+    Запускает наборы бенчмарков против локальной замены Wikipedia
+
+    Returns:
+        {'meta': {...}, 'suites': {suite: [результат случая, ...]}}
+    """
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'query': query,
+            'iterations': iterations,
+            'stub_latency': latency
+        },
+        'suites': {}
+    }
+    with WikiStubServer(pages_dir or DEFAULT_PAGES_DIR, latency=latency) as stub, stub_environment(stub):
+        for suite in suites:
+            if suite == 'cli':
+                report['suites'][suite] = bench_cli(stub, query, iterations, warmup)
+            elif suite == 'cache':
+                report['suites'][suite] = bench_cache(iterations, warmup)
+            elif suite == 'api':
+                report['suites'][suite] = bench_api(stub, query, iterations, warmup)
+            else:
+                raise ValueError(f"Unknown suite: {suite}")
+    return report
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Изменение p50/p99 и пропускной способности относительно базового прогона (в процентах)"""
+    def change(old, new):
+        return round((new - old) / old * 100, 1) if old and new is not None else None
+
+    rows = []
+    for suite, cases in current['suites'].items():
+        previous = {case['name']: case for case in baseline.get('suites', {}).get(suite, [])}
+        for case in cases:
+            old = previous.get(case['name'])
+            if old is None or 'latency_ms' not in case or 'latency_ms' not in old:
+                continue
+            rows.append({
+                'suite': suite,
+                'name': case['name'],
+                'p50': change(old['latency_ms']['p50'], case['latency_ms']['p50']),
+                'p99': change(old['latency_ms']['p99'], case['latency_ms']['p99']),
+                'throughput': change(old['throughput_per_second'], case['throughput_per_second'])
+            })
+    return rows
+
+def print_report(report: Dict[str, Any]):
+    for suite, cases in report['suites'].items():
+        print(f"\n[{suite}]")
+        print(f"  {'case':<32} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'ops/s':>9} {'errors':>7}")
+        for case in cases:
+            if 'skipped' in case:
+                print(f"  {case['name']:<32} пропущено: {case['skipped']}")
+                continue
+            latency = case['latency_ms']
+            print(f"  {case['name']:<32} {latency['p50'] or 0:>9.2f} {latency['p90'] or 0:>9.2f} "
+                  f"{latency['p99'] or 0:>9.2f} {case['throughput_per_second'] or 0:>9.1f} {case['errors']:>7}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки CLI, кэша и API против локальной замены Wikipedia")
+    parser.add_argument('--suite', nargs='+', choices=SUITES, default=SUITES, help='Наборы бенчмарков')
+    parser.add_argument('--query', default='Python', help='Поисковый запрос')
+    parser.add_argument('--iterations', type=int, default=20, help='Замеров на случай')
+    parser.add_argument('--warmup', type=int, default=1, help='Прогревочных вызовов на случай')
+    parser.add_argument('--pages-dir', default=DEFAULT_PAGES_DIR, help='Директория сохраненных статей')
+    parser.add_argument('--latency', type=float, default=0.0, help='Задержка ответов заглушки (сек)')
+    parser.add_argument('--output', help='Файл результатов JSON (по умолчанию benchmarks/results/...)')
+    parser.add_argument('--baseline', help='Результаты предыдущего прогона для сравнения')
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.suite, args.query, args.iterations, args.warmup, args.pages_dir, args.latency)
+    print_report(report)
+
+    output = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nРезультаты сохранены: {output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            rows = compare(json.load(f), report)
+        print(f"\nСравнение с {args.baseline} (%, отрицательное p50/p99 - быстрее):")
+
+        def fmt(value):
+            return f"{value:+7.1f}" if value is not None else '      -'
+
+        for row in rows:
+            print(f"  {row['suite']}/{row['name']:<32} p50 {fmt(row['p50'])}  p99 {fmt(row['p99'])}  "
+                  f"ops/s {fmt(row['throughput'])}")
+
+if __name__ == '__main__':
+    main()
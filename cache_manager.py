@@ -1,46 +1,109 @@
-import redis
 import json
 import pickle
 import hashlib
+import threading
 from datetime import datetime, timedelta
 from typing import Any, Optional, Dict, List
 from functools import wraps
 import time
 
-from logger import setup_logger
+from config import Config
+from logger import get_logger, get_sampled_logger
+from timing import timed, record_stage
+from metrics import record_cache
 
-logger = setup_logger()
+logger = get_logger()
+# Сообщения на каждое обращение к кэшу - с ограничением частоты
+cache_log = get_sampled_logger('cache')
+
+# Признак отрицательного результата в сохраненном значении
+NEGATIVE_MARKER = '__negative__'
+
+class NegativeResult:
+    """
+    Отрицательный результат поиска: статьи нет (not_found), страница неоднозначности
+    (disambiguation) или временный сбой (transient)
+    
+    Декоратор cache_result сохраняет его на Config.NEGATIVE_CACHE_TTL[kind] секунд, и
+    повторные запросы не запускают браузер. В логическом контексте ложен, как None,
+    поэтому проверки "if not driver" вызывающего кода не меняются.
+    """
+    
+    KINDS = ('not_found', 'disambiguation', 'transient')
+    
+    def __init__(self, kind: str, message: str = '', details: Optional[Dict[str, Any]] = None):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown negative result kind: {kind}")
+        self.kind = kind
+        self.message = message
+        self.details = details or {}
+    
+    def __bool__(self):
+        return False
+    
+    def __eq__(self, other):
+        return (isinstance(other, NegativeResult) and
+                (self.kind, self.message, self.details) == (other.kind, other.message, other.details))
+    
+    def __repr__(self):
+        return f"NegativeResult({self.kind!r}, {self.message!r})"
+    
+    @property
+    def ttl(self) -> int:
+        """Время жизни в кэше (сек)"""
+        return Config.NEGATIVE_CACHE_TTL[self.kind]
+    
+    def to_cache(self) -> Dict[str, Any]:
+        return {NEGATIVE_MARKER: self.kind, 'message': self.message, 'details': self.details}
+    
+    @classmethod
+    def from_cache(cls, value: Any) -> Optional['NegativeResult']:
+        """Восстанавливает результат из значения кэша (None - значение не отрицательное)"""
+        if isinstance(value, dict) and value.get(NEGATIVE_MARKER) in cls.KINDS:
+            return cls(value[NEGATIVE_MARKER], value.get('message', ''), value.get('details'))
+        return None
+
+def create_redis_client(host=None, port=None, db=None):
+    """
+    Клиент Redis кэша с коротким таймаутом и без повторов: при недоступном Redis
+    обращение к кэшу сразу завершается ошибкой, и запрос идет мимо кэша
+    
+    Значения хранятся байтами (pickle, сжатые ответы API), поэтому без decode_responses.
+    """
+    import redis
+    from redis.backoff import NoBackoff
+    from redis.retry import Retry
+    return redis.Redis(host=host or Config.REDIS_HOST,
+                       port=port or Config.REDIS_PORT,
+                       db=db if db is not None else Config.REDIS_DB,
+                       socket_connect_timeout=Config.REDIS_SOCKET_TIMEOUT,
+                       socket_timeout=Config.REDIS_SOCKET_TIMEOUT,
+                       retry=Retry(NoBackoff(), 0))
 
 class CacheManager:
     """Менеджер кэширования с использованием Redis"""
     
-    def __init__(self, host='localhost', port=6379, db=0, default_ttl=3600):
+    def __init__(self, host=None, port=None, db=None, default_ttl=3600):
         """
         Инициализация менеджера кэша
         
         Args:
-            host: Хост Redis сервера
-            port: Порт Redis сервера
-            db: Номер базы данных Redis
+            host: Хост Redis сервера (по умолчанию Config.REDIS_HOST)
+            port: Порт Redis сервера (по умолчанию Config.REDIS_PORT)
+            db: Номер базы данных Redis (по умолчанию Config.REDIS_DB)
             default_ttl: Время жизни кэша по умолчанию (в секундах)
         """
-        self.redis_client = redis.Redis(
-            host=host, 
-            port=port, 
-            db=db, 
-            decode_responses=False,  # Для поддержки pickle
-            socket_connect_timeout=5,
-            socket_timeout=5
-        )
+        self.redis_client = create_redis_client(host, port, db)
         self.default_ttl = default_ttl
         self._test_connection()
     
     def _test_connection(self):
         """Тестирование подключения к Redis"""
+        import redis
         try:
             self.redis_client.ping()
-            logger.info("Redis connection established")
-        except redis.ConnectionError:
+            cache_log.info("Redis connection established")
+        except redis.RedisError:
             logger.warning("Redis connection failed, using in-memory cache")
             self.redis_client = None
     
@@ -51,6 +114,7 @@ class CacheManager:
         # Хешируем для получения короткого ключа
         return hashlib.md5(key_data.encode()).hexdigest()
     
+    @timed('cache_get')
     def get(self, key: str) -> Optional[Any]:
         """
         Получение значения из кэша
@@ -62,22 +126,27 @@ class CacheManager:
             Значение из кэша или None если не найдено
         """
         if not self.redis_client:
+            record_cache('miss')
             return None
             
         try:
             data = self.redis_client.get(key)
             if data:
+                record_cache('hit')
                 # Пытаемся десериализовать как JSON
                 try:
                     return json.loads(data.decode('utf-8'))
                 except (json.JSONDecodeError, UnicodeDecodeError):
                     # Если не JSON, пробуем pickle
                     return pickle.loads(data)
+            record_cache('miss')
             return None
         except Exception as e:
+            record_cache('error')
             logger.error(f"Error getting cache key {key}: {e}")
             return None
     
+    @timed('cache_set')
     def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
         """
         Сохранение значения в кэш
@@ -105,7 +174,7 @@ class CacheManager:
                 data = pickle.dumps(value)
                 self.redis_client.setex(key, ttl, data)
             
-            logger.info(f"Cache set: {key} (TTL: {ttl}s)")
+            cache_log.debug(f"Cache set: {key} (TTL: {ttl}s)")
             return True
         except Exception as e:
             logger.error(f"Error setting cache key {key}: {e}")
@@ -127,7 +196,7 @@ class CacheManager:
         try:
             result = self.redis_client.delete(key)
             if result:
-                logger.info(f"Cache deleted: {key}")
+                cache_log.info(f"Cache deleted: {key}")
             return bool(result)
         except Exception as e:
             logger.error(f"Error deleting cache key {key}: {e}")
@@ -218,19 +287,19 @@ class CacheManager:
             logger.error(f"Error getting cache stats: {e}")
             return {"status": "error", "error": str(e)}
 
-def cache_result(prefix: str = "default", ttl: Optional[int] = None):
+def cache_result(prefix: str = "default", ttl: Optional[int] = None, negative_only: bool = False):
     """
     Декоратор для кэширования результатов функций
     
     Args:
         prefix: Префикс для ключей кэша
         ttl: Время жизни кэша в секундах
+        negative_only: Кэшировать только отрицательные результаты (успешный результат не сериализуем)
     """
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # Создаем экземпляр менеджера кэша
-            cache_manager = CacheManager()
+            cache_manager = get_cache_manager()
             
             # Генерируем ключ кэша
             cache_key = cache_manager._generate_key(prefix, *args, **kwargs)
@@ -238,29 +307,65 @@ def cache_result(prefix: str = "default", ttl: Optional[int] = None):
             # Пытаемся получить результат из кэша
             cached_result = cache_manager.get(cache_key)
             if cached_result is not None:
-                logger.info(f"Cache hit for {func.__name__}: {cache_key}")
+                negative = NegativeResult.from_cache(cached_result)
+                if negative is not None:
+                    cache_log.info(f"Negative cache hit for {func.__name__}: {cache_key} ({negative.kind})")
+                    return negative
+                cache_log.info(f"Cache hit for {func.__name__}: {cache_key}")
                 return cached_result
             
             # Выполняем функцию
-            start_time = time.time()
+            start_time = time.perf_counter()
             result = func(*args, **kwargs)
-            execution_time = time.time() - start_time
+            execution_time = time.perf_counter() - start_time
+            record_stage(f"call:{func.__name__}", execution_time)
             
-            # Сохраняем результат в кэш
+            # Сохраняем результат в кэш (отрицательный - на срок по его виду); отказ открытого
+            # автомата не кэшируется - после закрытия автомата запрос выполняется сразу
+            if isinstance(result, NegativeResult):
+                if 'circuit' in result.details:
+                    return result
+                cache_manager.set(cache_key, result.to_cache(), result.ttl)
+                cache_log.info(f"Negative result for {func.__name__}: {cache_key} ({result.kind}, TTL: {result.ttl}s)")
+                return result
+            if negative_only:
+                return result
             cache_manager.set(cache_key, result, ttl)
-            logger.info(f"Cache miss for {func.__name__}: {cache_key} (execution time: {execution_time:.2f}s)")
+            cache_log.info(f"Cache miss for {func.__name__}: {cache_key} (execution time: {execution_time:.2f}s)")
             
             return result
         return wrapper
     return decorator
 
 def cache_search_results(ttl: int = 3600):
-    """Специализированный декоратор для кэширования результатов поиска"""
-    return cache_result(prefix="search", ttl=ttl)
+    """
+    Специализированный декоратор для кэширования результатов поиска
+    
+    Кэшируются только отрицательные результаты: найденная статья - открытый драйвер,
+    его нельзя сохранить в Redis (ответы API кэшируются в api_server.cache_result).
+    """
+    return cache_result(prefix="search", ttl=ttl, negative_only=True)
 
 def cache_navigation_results(ttl: int = 1800):
     """Специализированный декоратор для кэширования результатов навигации"""
     return cache_result(prefix="navigation", ttl=ttl)
 
-# Глобальный экземпляр менеджера кэша
-cache_manager = CacheManager()
+# Глобальный экземпляр менеджера кэша создается при первом обращении:
+# импорт модуля не подключается к Redis
+_cache_manager = None
+_cache_manager_lock = threading.Lock()
+
+def get_cache_manager() -> CacheManager:
+    """Глобальный экземпляр менеджера кэша"""
+    global _cache_manager
+    if _cache_manager is None:
+        with _cache_manager_lock:
+            if _cache_manager is None:
+                _cache_manager = CacheManager()
+    return _cache_manager
+
+def __getattr__(name):
+    # Совместимость: cache_manager.cache_manager
+    if name == 'cache_manager':
+        return get_cache_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
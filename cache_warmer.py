@@ -0,0 +1,218 @@
+import argparse
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from config import Config
+from logger import get_logger
+
+logger = get_logger()
+
+def rank_queries(activity, limit: Optional[int] = None, half_life_hours: Optional[float] = None,
+                 now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """
+    Рейтинг запросов по частоте и давности
+
+    Каждый поиск дает вес 0.5 ** (возраст / период полураспада): частый вчерашний
+    запрос важнее одиночного сегодняшнего, но давно забытый уступает текущим.
+
+    Args:
+        activity: Пары (запрос, время ISO 8601) - HistoryDB.search_activity()
+        limit: Количество запросов в результате (None - все)
+        half_life_hours: Период полураспада веса (часы)
+        now: Текущее время (для воспроизводимости)
+
+    Returns:
+        [{'query', 'count', 'last_seen', 'score'}] по убыванию score
+    """
+    half_life = (half_life_hours or Config.WARM_HALF_LIFE_HOURS) * 3600
+    now = now or datetime.now()
+    ranked = {}
+    for query, timestamp in activity:
+        query = (query or '').strip()
+        if not query:
+            continue
+        try:
+            age = max(0.0, (now - datetime.fromisoformat(timestamp)).total_seconds())
+        except (TypeError, ValueError):
+            continue
+        entry = ranked.setdefault(query, {'query': query, 'count': 0, 'last_seen': timestamp, 'score': 0.0})
+        entry['count'] += 1
+        entry['last_seen'] = max(entry['last_seen'], timestamp)
+        entry['score'] += 0.5 ** (age / half_life)
+
+    result = sorted(ranked.values(), key=lambda entry: (-entry['score'], entry['query']))
+    for entry in result:
+        entry['score'] = round(entry['score'], 4)
+    return result[:limit] if limit is not None else result
+
+class CacheWarmer:
+    """
+    Прогрев кэша для списка запросов с ограничением параллелизма и времени
+
+    Уже закэшированные запросы пропускаются; по истечении бюджета новые прогревы не
+    начинаются (выполняющиеся завершаются - браузер не прерывается на середине).
+    """
+
+    def __init__(self, warm: Callable[[str], str], is_cached: Callable[[str], bool],
+                 concurrency: Optional[int] = None, budget: Optional[float] = None):
+        """
+        Инициализация
+
+        Args:
+            warm: Прогрев одного запроса; возвращает warmed, negative или failed
+            is_cached: Есть ли ответ на запрос в кэше
+            concurrency: Одновременных прогревов
+            budget: Ограничение длительности (сек)
+        """
+        self.warm_query = warm
+        self.is_cached = is_cached
+        self.concurrency = max(1, concurrency or Config.WARM_CONCURRENCY)
+        self.budget = budget if budget is not None else Config.WARM_TIME_BUDGET
+
+    def _warm(self, query: str) -> str:
+        try:
+            return self.warm_query(query)
+        except Exception as e:
+            logger.warning(f"Cache warm failed for {query!r}: {e}")
+            return 'failed'
+
+    def run(self, ranked: List[Dict[str, Any]], total_searches: Optional[int] = None,
+            total_score: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Прогревает запросы в порядке рейтинга
+
+        Args:
+            ranked: Запросы из rank_queries
+            total_searches: Всего поисков в истории (для покрытия трафика; по умолчанию - по ranked)
+            total_score: Суммарный вес всех запросов истории
+
+        Returns:
+            Отчет: количество по статусам, покрытие запросов и поискового трафика
+        """
+        start = time.monotonic()
+        deadline = start + self.budget
+        statuses = {}
+        pending = {}
+        queue = iter(ranked)
+        exhausted = False
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='cache-warm') as pool:
+            while True:
+                while not exhausted and len(pending) < self.concurrency and time.monotonic() < deadline:
+                    entry = next(queue, None)
+                    if entry is None:
+                        exhausted = True
+                    elif self.is_cached(entry['query']):
+                        statuses[entry['query']] = 'cached'
+                    else:
+                        pending[pool.submit(self._warm, entry['query'])] = entry['query']
+                if not pending:
+                    break
+                # После истечения бюджета дожидаемся только уже начатых прогревов
+                remaining = deadline - time.monotonic()
+                done, _ = wait(pending, timeout=remaining if remaining > 0 else None, return_when=FIRST_COMPLETED)
+                for future in done:
+                    statuses[pending.pop(future)] = future.result()
+
+        for entry in ranked:
+            statuses.setdefault(entry['query'], 'skipped')
+        elapsed = time.monotonic() - start
+        return self.report(ranked, statuses, elapsed, total_searches, total_score)
+
+    def report(self, ranked: List[Dict[str, Any]], statuses: Dict[str, str], elapsed: float,
+               total_searches: Optional[int] = None, total_score: Optional[float] = None) -> Dict[str, Any]:
+        """Отчет о прогреве; покрытие проверяется по кэшу после прогрева"""
+        counts = {status: 0 for status in ('cached', 'warmed', 'negative', 'failed', 'skipped')}
+        for status in statuses.values():
+            counts[status] = counts.get(status, 0) + 1
+        warm = [entry for entry in ranked if self.is_cached(entry['query'])]
+        if total_searches is None:
+            total_searches = sum(entry['count'] for entry in ranked)
+        if total_score is None:
+            total_score = sum(entry['score'] for entry in ranked)
+        return {
+            'queries': len(ranked),
+            **counts,
+            'elapsed': round(elapsed, 3),
+            'warm_queries': len(warm),
+            # Доля запросов и доля поискового трафика (по истории и с учетом давности) с ответом в кэше
+            'coverage': round(len(warm) / len(ranked), 4) if ranked else 0.0,
+            'traffic_coverage': round(sum(entry['count'] for entry in warm) / total_searches, 4) if total_searches else 0.0,
+            'weighted_coverage': round(sum(entry['score'] for entry in warm) / total_score, 4) if total_score else 0.0,
+            'statuses': statuses,
+        }
+
+def api_search_warmer():
+    """
+    Прогрев кэша /api/search в текущем процессе (тот же Redis, что у API-сервера)
+
+    Запросы прогрева помечаются ключом WSGI-окружения: они не пишутся в историю поиска, не
+    расходуют квоту лимитера (api_server.cache_warm_in_process; сам лимитер не отключается)
+    и ждут браузер в очереди bulk планировщика, не вытесняя интерактивные запросы.
+
+    Returns:
+        (warm, is_cached, data_manager): функции для CacheWarmer и DataManager API-сервера
+        (история поиска для рейтинга запросов)
+    """
+    import api_server
+
+    def warm(query: str) -> str:
+        response = api_server.app.test_client().post('/api/search', json={'query': query},
+                                                     environ_base={api_server.CACHE_WARM_ENVIRON_KEY: True})
+        if response.status_code == 200:
+            return 'warmed'
+        reason = (response.get_json(silent=True) or {}).get('reason')
+        return 'negative' if reason in ('not_found', 'disambiguation') else 'failed'
+
+    def is_cached(query: str) -> bool:
+        key = api_server.api_cache_key('api_search', json.dumps({'query': query}).encode('utf-8'))
+        try:
+            value = api_server.redis_client.get(key)
+        except api_server.redis.RedisError:
+            return False
+        # Устаревший ответ хранится на случай сбоя upstream, но прогревается заново
+        entry = api_server.unpack_cached(value) if value else None
+        return entry is not None and api_server.is_fresh(entry[1])
+
+    return warm, is_cached, api_server.get_data_manager()
+
+def main():
+    parser = argparse.ArgumentParser(description="Прогрев кэша /api/search по истории поиска")
+    parser.add_argument('--top', type=int, default=Config.WARM_TOP_N, help='Количество запросов')
+    parser.add_argument('--concurrency', type=int, default=Config.WARM_CONCURRENCY, help='Одновременных прогревов')
+    parser.add_argument('--budget', type=float, default=Config.WARM_TIME_BUDGET, help='Ограничение времени (сек)')
+    parser.add_argument('--half-life', type=float, default=Config.WARM_HALF_LIFE_HOURS,
+                        help='Период полураспада веса по давности (часы)')
+    parser.add_argument('--lookback-days', type=float, default=Config.WARM_LOOKBACK_DAYS, help='Глубина истории (дни)')
+    parser.add_argument('--dry-run', action='store_true', help='Только показать рейтинг запросов')
+    parser.add_argument('--json', action='store_true', help='Отчет в JSON')
+    args = parser.parse_args()
+
+    warm, is_cached, data_manager = api_search_warmer()
+    since = (datetime.now() - timedelta(days=args.lookback_days)).isoformat()
+    ranked = rank_queries(data_manager.history.search_activity(since), half_life_hours=args.half_life)
+    total_searches = sum(entry['count'] for entry in ranked)
+    total_score = sum(entry['score'] for entry in ranked)
+    ranked = ranked[:args.top]
+
+    if args.dry_run:
+        for index, entry in enumerate(ranked, 1):
+            print(f"{index}. {entry['query']} (поисков: {entry['count']}, вес: {entry['score']})")
+        return
+
+    report = CacheWarmer(warm, is_cached, args.concurrency, args.budget).run(ranked, total_searches, total_score)
+    data_manager.flush()
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+    print(f"Запросов: {report['queries']}, прогрето: {report['warmed']}, отрицательных: {report['negative']}, "
+          f"уже в кэше: {report['cached']}, ошибок: {report['failed']}, пропущено по времени: {report['skipped']} "
+          f"({report['elapsed']:.1f} с)")
+    print(f"Покрытие: запросов {report['coverage']:.0%}, трафика {report['traffic_coverage']:.0%}, "
+          f"с учетом давности {report['weighted_coverage']:.0%}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from config import Config
+from logger import get_logger
+from metrics import record_circuit_rejection, record_circuit_state
+
+logger = get_logger()
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+class CircuitBreaker:
+    """
+    Автомат защиты вызовов одного upstream или источника драйвера
+
+    closed - вызовы проходят, исходы за последние window секунд учитываются; если доля
+    отказов достигла failure_rate (при не менее min_calls вызовах), автомат открывается.
+    open - вызовы сразу отклоняются open_seconds секунд.
+    half_open - пропускается до half_open_probes пробных вызовов: успех закрывает
+    автомат, отказ снова открывает.
+    """
+
+    def __init__(self, name: str, failure_rate: Optional[float] = None, min_calls: Optional[int] = None,
+                 window: Optional[float] = None, open_seconds: Optional[float] = None,
+                 half_open_probes: Optional[int] = None, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_rate = failure_rate or Config.CIRCUIT_FAILURE_RATE
+        self.min_calls = min_calls or Config.CIRCUIT_MIN_CALLS
+        self.window = window or Config.CIRCUIT_WINDOW
+        self.open_seconds = Config.CIRCUIT_OPEN_SECONDS if open_seconds is None else open_seconds
+        self.half_open_probes = half_open_probes or Config.CIRCUIT_HALF_OPEN_PROBES
+        self.clock = clock
+        self._state = CLOSED
+        self._outcomes = deque()  # (время, успех)
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def _set_state(self, state: str):
+        if state != self._state:
+            logger.warning(f"Circuit {self.name}: {self._state} -> {state}")
+            self._state = state
+            record_circuit_state(self.name, state)
+
+    def _refresh(self, now: float):
+        """Переход open -> half_open по истечении open_seconds и удаление устаревших исходов"""
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._set_state(HALF_OPEN)
+            self._probes = 0
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            self._outcomes.popleft()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh(self.clock())
+            return self._state
+
+    def allow(self) -> bool:
+        """Можно ли выполнить вызов (в half_open - резервирует пробный вызов)"""
+        with self._lock:
+            self._refresh(self.clock())
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+        record_circuit_rejection(self.name)
+        return False
+
+    def cancel(self):
+        """Отменяет разрешенный вызов, который не был выполнен (освобождает пробный вызов)"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_success(self):
+        with self._lock:
+            now = self.clock()
+            self._refresh(now)
+            if self._state == HALF_OPEN:
+                self._outcomes.clear()
+                self._set_state(CLOSED)
+            self._outcomes.append((now, True))
+
+    def record_failure(self):
+        with self._lock:
+            now = self.clock()
+            self._refresh(now)
+            if self._state == HALF_OPEN:
+                self._open(now)
+                return
+            self._outcomes.append((now, False))
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            if (self._state == CLOSED and len(self._outcomes) >= self.min_calls
+                    and failures / len(self._outcomes) >= self.failure_rate):
+                self._open(now)
+
+    def _open(self, now: float):
+        self._opened_at = now
+        self._outcomes.clear()
+        self._set_state(OPEN)
+
+    def retry_after(self) -> float:
+        """Секунд до пробного вызова (0 - вызовы разрешены)"""
+        with self._lock:
+            self._refresh(self.clock())
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self.open_seconds - (self.clock() - self._opened_at))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh(self.clock())
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            return {
+                'name': self.name,
+                'state': self._state,
+                'calls': len(self._outcomes),
+                'failures': failures,
+            }
+
+def first_open(*breakers: Optional[CircuitBreaker]) -> Optional[CircuitBreaker]:
+    """
+    Разрешение вызова у всех автоматов (None пропускаются)
+
+    Returns:
+        Первый отказавший автомат (разрешения остальных отменяются) или None - вызов разрешен
+    """
+    allowed = []
+    for breaker in breakers:
+        if breaker is None:
+            continue
+        if not breaker.allow():
+            for other in allowed:
+                other.cancel()
+            return breaker
+        allowed.append(breaker)
+    return None
+
+def record_outcome(breaker: Optional[CircuitBreaker], ok: Optional[bool]):
+    """Исход вызова: True - успех, False - отказ, None - вызов не состоялся"""
+    if breaker is None:
+        return
+    if ok is None:
+        breaker.cancel()
+    elif ok:
+        breaker.record_success()
+    else:
+        breaker.record_failure()
+
+class RetryBudget:
+    """
+    Общий бюджет повторных вызовов процесса
+
+    Каждый первичный вызов добавляет ratio повтора, кроме того баланс пополняется на
+    min_per_second в секунду (повторы при малом трафике); баланс не больше burst. При
+    массовом сбое повторы быстро исчерпываются, и ошибки возвращаются сразу.
+    """
+
+    def __init__(self, ratio: Optional[float] = None, min_per_second: Optional[float] = None,
+                 burst: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.ratio = Config.RETRY_BUDGET_RATIO if ratio is None else ratio
+        self.min_per_second = Config.RETRY_BUDGET_MIN_PER_SECOND if min_per_second is None else min_per_second
+        self.burst = Config.RETRY_BUDGET_BURST if burst is None else burst
+        self.clock = clock
+        self.balance = float(self.burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.balance = min(self.burst, self.balance + (now - self._updated) * self.min_per_second)
+        self._updated = now
+
+    def deposit(self):
+        with self._lock:
+            self._refill()
+            self.balance = min(self.burst, self.balance + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Резервирует повтор; False - бюджет исчерпан"""
+        with self._lock:
+            self._refill()
+            if self.balance < 1:
+                return False
+            self.balance -= 1
+            return True
+
+def backoff_delay(attempt: int, base: Optional[float] = None, cap: Optional[float] = None,
+                  rng: random.Random = random) -> float:
+    """Задержка перед повтором attempt (1, 2, ...): экспоненциальная с полным джиттером"""
+    base = Config.RETRY_BACKOFF_BASE if base is None else base
+    cap = Config.RETRY_BACKOFF_CAP if cap is None else cap
+    return rng.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+def retry_call(func: Callable[[], Any], should_retry: Callable[[Any], bool], max_attempts: Optional[int] = None,
+               budget: Optional['RetryBudget'] = None, sleep: Callable[[float], None] = time.sleep):
+    """
+    Вызов с повторами по результату
+
+    Повтор выполняется, только если should_retry(результат) и в бюджете есть повтор;
+    перед повтором - задержка backoff_delay.
+    """
+    budget = budget or get_retry_budget()
+    max_attempts = max_attempts or Config.RETRY_MAX_ATTEMPTS
+    budget.deposit()
+    result = func()
+    for attempt in range(1, max_attempts):
+        if not should_retry(result) or not budget.withdraw():
+            break
+        sleep(backoff_delay(attempt))
+        result = func()
+    return result
+
+_breakers = {}
+_retry_budget = None
+_lock = threading.Lock()
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Автомат по имени (upstream:<хост>, backend:<источник драйвера>); создается при первом обращении"""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _lock:
+            breaker = _breakers.setdefault(name, CircuitBreaker(name))
+    return breaker
+
+def get_retry_budget() -> RetryBudget:
+    global _retry_budget
+    if _retry_budget is None:
+        with _lock:
+            if _retry_budget is None:
+                _retry_budget = RetryBudget()
+    return _retry_budget
+
+def breakers_snapshot() -> List[Dict[str, Any]]:
+    return [breaker.snapshot() for _, breaker in sorted(_breakers.items())]
+
+def reset_breakers():
+    """Сбрасывает все автоматы и бюджет повторов (тесты, ручное восстановление)"""
+    global _retry_budget
+    with _lock:
+        _breakers.clear()
+        _retry_budget = None
@@ -18,15 +18,178 @@ class Config:
         '--disable-blink-features=AutomationControlled'
     ]
     
-    # Настройки Wikipedia
-    WIKIPEDIA_URL = "https://www.wikipedia.org/"
+    # Настройки Wikipedia (для бенчмарков - адрес wiki_stub.py)
+    WIKIPEDIA_URL = os.environ.get('WIKIPEDIA_URL', "https://www.wikipedia.org/")
     SEARCH_TIMEOUT = 10
-    NAVIGATION_DELAY = 3
+    NAVIGATION_DELAY = float(os.environ.get('NAVIGATION_DELAY', 3))  # Ожидание результатов поиска (сек)
+    
+    # Источник драйвера: chrome - локальный Chrome, http - загрузка страниц без браузера (http_driver.py),
+    # fake - имитация браузера с задержками и отказами для нагрузочных тестов (fake_driver.py),
+    # remote - удаленные WebDriver с выбором наименее загруженного хоста (remote_driver.py)
+    DRIVER_BACKEND = os.environ.get('DRIVER_BACKEND', 'chrome')
+    
+    # Настройки удаленных WebDriver: "http://host1:4444|8,http://host2:4444" (после | - число слотов)
+    REMOTE_DRIVER_URLS = os.environ.get('REMOTE_DRIVER_URLS', 'http://localhost:4444')
+    REMOTE_DRIVER_CAPACITY = int(os.environ.get('REMOTE_DRIVER_CAPACITY', 4))  # Слотов на хост по умолчанию
+    REMOTE_DRIVER_FAILURE_THRESHOLD = 3  # Подряд отказов до вывода хоста из ротации
+    REMOTE_DRIVER_HEALTH_INTERVAL = float(os.environ.get('REMOTE_DRIVER_HEALTH_INTERVAL', 10))  # Проверка /status (сек)
+    REMOTE_DRIVER_STATUS_TIMEOUT = 2  # Таймаут /status (сек)
+    REMOTE_DRIVER_LATENCY_ALPHA = 0.3  # Сглаживание длительности создания сеанса
+    
+    # Дублирование загрузки статьи (hedging.py): если первая попытка не завершилась за
+    # HEDGE_PERCENTILE-й перцентиль длительности загрузки, запускается вторая и берется первый результат
+    HEDGE_ENABLED = os.environ.get('HEDGE_ENABLED', '0').lower() in ('1', 'true', 'yes')
+    HEDGE_BACKEND = os.environ.get('HEDGE_BACKEND', '')  # Источник драйвера второй попытки ('' - как у первой)
+    HEDGE_PERCENTILE = float(os.environ.get('HEDGE_PERCENTILE', 95))
+    HEDGE_MIN_SAMPLES = 20  # Пока замеров меньше - задержка HEDGE_DEFAULT_DELAY
+    HEDGE_WINDOW = int(os.environ.get('HEDGE_WINDOW', 200))  # Перцентиль - по последним N успешным загрузкам
+    HEDGE_DEFAULT_DELAY = float(os.environ.get('HEDGE_DEFAULT_DELAY', 10))  # сек
+    HEDGE_MIN_DELAY = 0.5  # Нижняя граница задержки (сек)
+    HEDGE_BUDGET_RATIO = float(os.environ.get('HEDGE_BUDGET_RATIO', 0.1))  # Доля запросов со второй попыткой
+    HEDGE_BUDGET_BURST = 5  # Запас вторых попыток
+    
+    # Автоматы защиты (circuit_breaker.py) для upstream (WIKIPEDIA_URL) и каждого источника драйвера:
+    # при доле отказов >= CIRCUIT_FAILURE_RATE за CIRCUIT_WINDOW сек вызовы отклоняются сразу
+    CIRCUIT_BREAKER_ENABLED = os.environ.get('CIRCUIT_BREAKER_ENABLED', '1').lower() not in ('0', 'false', 'no')
+    CIRCUIT_FAILURE_RATE = float(os.environ.get('CIRCUIT_FAILURE_RATE', 0.5))
+    CIRCUIT_MIN_CALLS = int(os.environ.get('CIRCUIT_MIN_CALLS', 10))  # Минимум вызовов в окне для открытия
+    CIRCUIT_WINDOW = 60  # сек
+    CIRCUIT_OPEN_SECONDS = float(os.environ.get('CIRCUIT_OPEN_SECONDS', 30))  # До пробных вызовов
+    CIRCUIT_HALF_OPEN_PROBES = 1  # Одновременных пробных вызовов
+    # Повторы временных сбоев поиска: не больше RETRY_BUDGET_RATIO от числа запросов, задержка с джиттером
+    RETRY_MAX_ATTEMPTS = int(os.environ.get('RETRY_MAX_ATTEMPTS', 2))
+    RETRY_BUDGET_RATIO = float(os.environ.get('RETRY_BUDGET_RATIO', 0.2))
+    RETRY_BUDGET_MIN_PER_SECOND = 0.1
+    RETRY_BUDGET_BURST = 10
+    RETRY_BACKOFF_BASE = 0.5  # сек
+    RETRY_BACKOFF_CAP = 5.0  # сек
+    # Redis кэша (cache_manager.CacheManager и кэш ответов api_server)
+    REDIS_HOST = os.environ.get('REDIS_HOST', 'localhost')
+    REDIS_PORT = int(os.environ.get('REDIS_PORT', 6379))
+    REDIS_DB = int(os.environ.get('REDIS_DB', 0))
+    # Таймаут операций Redis кэша (сек); повторов нет - при недоступном Redis запрос сразу идет мимо кэша
+    REDIS_SOCKET_TIMEOUT = float(os.environ.get('REDIS_SOCKET_TIMEOUT', 0.5))
+    # Ответы кэша API свежие API_CACHE_TTL сек; устаревшие хранятся еще API_CACHE_STALE_TTL и
+    # отдаются, если upstream недоступен (временный сбой или открытый автомат)
+    API_CACHE_TTL = 3600
+    API_CACHE_STALE_TTL = int(os.environ.get('API_CACHE_STALE_TTL', 86400))
+    
+    # Планировщик браузерной работы API (scheduler.py): слоты на процесс, веса классов приоритета,
+    # защита от голодания и пределы очередей
+    SERVER_THREADS = int(os.environ.get('GUNICORN_THREADS', 8))  # Потоков воркера gunicorn
+    SCHEDULER_SLOTS = int(os.environ.get('SCHEDULER_SLOTS', 4))
+    # Потоки, которые bulk-запросы не могут занять: bulk в слотах и в очереди - не больше
+    # SERVER_THREADS - SCHEDULER_INTERACTIVE_THREADS, иначе interactive ждал бы в backlog gunicorn
+    SCHEDULER_INTERACTIVE_THREADS = int(os.environ.get('SCHEDULER_INTERACTIVE_THREADS', 2))
+    SCHEDULER_WEIGHTS = {
+        'interactive': float(os.environ.get('SCHEDULER_WEIGHT_INTERACTIVE', 4)),
+        'bulk': float(os.environ.get('SCHEDULER_WEIGHT_BULK', 1)),
+    }
+    # Класс запросов без API-ключа: interactive, чтобы существующие клиенты не попадали в малую очередь bulk
+    SCHEDULER_DEFAULT_CLASS = os.environ.get('SCHEDULER_DEFAULT_CLASS', 'interactive')
+    SCHEDULER_STARVATION_SECONDS = float(os.environ.get('SCHEDULER_STARVATION_SECONDS', 10))
+    SCHEDULER_MAX_QUEUE = {
+        'interactive': int(os.environ.get('SCHEDULER_MAX_QUEUE_INTERACTIVE', 100)),
+        'bulk': int(os.environ.get('SCHEDULER_MAX_QUEUE_BULK',
+                                   max(0, SERVER_THREADS - SCHEDULER_SLOTS - SCHEDULER_INTERACTIVE_THREADS))),
+    }
+    SCHEDULER_MAX_WAIT = float(os.environ.get('SCHEDULER_MAX_WAIT', 30))  # Предел ожидания слота (сек)
+    # Классы приоритета по API-ключу (заголовок X-API-Key): "key1:bulk,key2:interactive".
+    # X-Priority не проверяется и может только понизить класс ключа (или класс по умолчанию)
+    API_KEY_CLASSES = dict(item.strip().split(':', 1) for item in os.environ.get('API_KEY_CLASSES', '').split(',')
+                           if ':' in item)
+    
+    # Настройки имитации браузера (распределения задержек в секундах, см. fake_driver.latency_distribution)
+    FAKE_DRIVER_PAGES_DIR = os.environ.get('FAKE_DRIVER_PAGES_DIR')  # По умолчанию benchmarks/pages
+    FAKE_DRIVER_LAUNCH_LATENCY = os.environ.get('FAKE_DRIVER_LAUNCH_LATENCY', 'lognormal:1.0,0.3')
+    FAKE_DRIVER_PAGE_LATENCY = os.environ.get('FAKE_DRIVER_PAGE_LATENCY', 'lognormal:0.3,0.5')
+    FAKE_DRIVER_QUIT_LATENCY = os.environ.get('FAKE_DRIVER_QUIT_LATENCY', 'const:0.05')
+    FAKE_DRIVER_LAUNCH_FAILURE_RATE = float(os.environ.get('FAKE_DRIVER_LAUNCH_FAILURE_RATE', 0.01))
+    FAKE_DRIVER_PAGE_FAILURE_RATE = float(os.environ.get('FAKE_DRIVER_PAGE_FAILURE_RATE', 0.01))
+    
+    # Лимитер запросов API (отключается для нагрузочных тестов пропускной способности)
+    RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', '1').lower() not in ('0', 'false', 'no')
+    # Хранилище счетчиков лимитера, общее для воркеров (memory:// - отдельные счетчики в каждом процессе)
+    RATELIMIT_STORAGE_URI = os.environ.get('RATELIMIT_STORAGE_URI', 'redis://localhost:6379/0')
+    RATELIMIT_KEY_PREFIX = 'wikinav'
+    # Стоимость запроса в единицах лимита: запуск браузера, ответ из кэша API, прочие запросы
+    RATELIMIT_COST_BROWSER = int(os.environ.get('RATELIMIT_COST_BROWSER', 10))
+    RATELIMIT_COST_CACHE_HIT = int(os.environ.get('RATELIMIT_COST_CACHE_HIT', 1))
+    RATELIMIT_COST_DEFAULT = 1
+    
+    # Срок хранения GET-ответов API промежуточными кэшами (Cache-Control: max-age, сек)
+    API_HTTP_MAX_AGE = int(os.environ.get('API_HTTP_MAX_AGE', 300))
+    # Сжатие ответов в кэше API: gzip или br (при установленном brotli), минимальный размер и уровень gzip
+    API_CACHE_ENCODING = os.environ.get('API_CACHE_ENCODING', 'gzip')
+    API_CACHE_COMPRESS_MIN_SIZE = int(os.environ.get('API_CACHE_COMPRESS_MIN_SIZE', 1024))
+    API_CACHE_COMPRESS_LEVEL = 6
+    
+    # Профилирование по запросу (/admin/profile); без ADMIN_TOKEN служебные маршруты отключены
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+    PROFILE_DEFAULT_SECONDS = 10  # Длительность сеанса по умолчанию (сек)
+    PROFILE_MAX_SECONDS = float(os.environ.get('PROFILE_MAX_SECONDS', 120))  # Максимальная длительность
+    PROFILE_SAMPLE_INTERVAL = 0.005  # Интервал выборки стеков (сек)
+    PROFILE_RESULT_TTL = int(os.environ.get('PROFILE_RESULT_TTL', 3600))  # Хранение результата сеанса (сек)
+    
+    # Время жизни отрицательных результатов поиска в кэше (сек): статьи нет, страница
+    # неоднозначности, временный сбой (таймаут загрузки)
+    NEGATIVE_CACHE_TTL = {
+        'not_found': int(os.environ.get('NEGATIVE_CACHE_TTL_NOT_FOUND', 600)),
+        'disambiguation': int(os.environ.get('NEGATIVE_CACHE_TTL_DISAMBIGUATION', 1800)),
+        'transient': int(os.environ.get('NEGATIVE_CACHE_TTL_TRANSIENT', 30)),
+    }
+    
+    # Настройки разбора страниц
+    PAGE_CACHE_SIZE = 32  # Количество разобранных страниц в памяти
     
     # Настройки логирования
     LOG_LEVEL = "INFO"
     LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
     LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+    LOG_ROTATE_WHEN = 'midnight'  # Ротация файла лога по времени
+    LOG_MAX_BYTES = 10 * 1024 * 1024  # ...и по размеру
+    LOG_BACKUP_COUNT = 14  # Количество хранимых старых файлов
+    # Отдельный файл лога на процесс (включается в gunicorn.conf.py для воркеров)
+    LOG_PER_PROCESS = os.environ.get('LOG_PER_PROCESS', '0').lower() in ('1', 'true', 'yes')
+    LOG_RATE_LIMIT = 20  # Сообщений кэша за интервал без ограничений
+    LOG_RATE_INTERVAL = 1.0  # Интервал ограничения частоты (сек)
+    LOG_SAMPLE_RATE = 100  # Сверх лимита записывается каждое N-е сообщение
+    
+    # Настройки истории поиска (SQLite)
+    HISTORY_BATCH_SIZE = 50  # Записей в одной транзакции
+    HISTORY_FLUSH_INTERVAL = 1.0  # Максимальная задержка записи буфера (сек)
+    HISTORY_SEGMENT_MAX_BYTES = 16 * 1024 * 1024  # Размер JSONL сегмента до ротации
+    HISTORY_SEGMENT_MAX_AGE = 3600  # Возраст JSONL сегмента до ротации (сек)
+    
+    # Настройки локального полнотекстового поиска (BM25)
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+    
+    # Настройки похожих статей
+    SIMILARITY_TEXT_DIM = 2 ** 18  # Размерность хешированных признаков текста (векторы разреженные)
+    SIMILARITY_LINK_DIM = 2 ** 16  # Размерность хешированных признаков ссылок
+    SIMILARITY_TEXT_WEIGHT = 0.7  # Вес текста относительно пересечения ссылок
+    
+    # Настройки фоновой записи
+    WRITER_QUEUE_SIZE = 1000  # Длина очереди; при заполнении запрос ждет (backpressure)
+    WRITER_BATCH_SIZE = 100  # Элементов в одном пакете записи
+    WRITER_PUT_TIMEOUT = 1.0  # Максимальное ожидание места в очереди (сек)
+    # CSV-выгрузка на каждый запрос /api/paragraphs и /api/links (по умолчанию выключена:
+    # статья и так сохраняется в хранилище, а выгрузка доступна через /api/export)
+    API_EXPORT_CSV = os.environ.get('API_EXPORT_CSV', '0').lower() in ('1', 'true', 'yes')
+    
+    # Прогрев кэша по истории поиска (cache_warmer.py)
+    WARM_TOP_N = 100  # Количество самых популярных запросов
+    WARM_CONCURRENCY = 4  # Одновременных прогревов (браузеров)
+    WARM_TIME_BUDGET = 600  # Ограничение длительности прогрева (сек)
+    WARM_HALF_LIFE_HOURS = 72  # Период полураспада веса запроса по давности
+    WARM_LOOKBACK_DAYS = 30  # Учитываемая глубина истории
+    
+    # Настройки обновления сохраненных статей
+    REFRESH_HTTP_TIMEOUT = 5  # Таймаут проверки ревизий через MediaWiki API (сек)
+    
+    # Границы корзин гистограмм длительностей (сек)
+    TIMING_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
     
     # Настройки пользовательского интерфейса
     MAX_PARAGRAPHS_DISPLAY = 10
@@ -1,8 +1,58 @@
-import json
 import csv
+import gzip
+import json
 import os
+import threading
+import zlib
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator
+
+from article_store import ArticleStore
+from history_db import HistoryDB
+from background_writer import BackgroundWriter
+from search_index import SearchIndex
+from timing import timed
+
+class _Echo:
+    """Псевдо-файл для csv.writer: возвращает строку вместо записи"""
+    
+    def write(self, value):
+        return value
+
+def iter_csv_lines(header: List[str], rows: Iterable[List[Any]]) -> Iterator[str]:
+    """Генератор строк CSV: первая строка доступна сразу, память не растет с объемом"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+def iter_jsonl_lines(records: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Генератор строк JSONL"""
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False, default=str) + "\n"
+
+def gzip_stream(chunks: Iterable[str], level: int = 6, flush_bytes: int = 64 * 1024) -> Iterator[bytes]:
+    """Потоковое gzip-сжатие; периодический sync flush, чтобы клиент получал данные без задержки"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    pending = 0
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        pending += len(data)
+        out = compressor.compress(data)
+        if pending >= flush_bytes:
+            out += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if out:
+            yield out
+    yield compressor.flush()
+
+def iter_content_paragraphs(content: Dict[str, Any]) -> Iterator[tuple]:
+    """Параграфы сохраненной страницы: (якорь раздела, номер, текст)"""
+    for section in content.get('paragraphs') or []:
+        if isinstance(section, str):
+            section = {'anchor': '', 'paragraphs': [section]}
+        for i, text in enumerate(section.get('paragraphs', []), 1):
+            yield section.get('anchor', ''), i, text
 
 class DataManager:
     """Менеджер для работы с данными"""
@@ -10,89 +60,189 @@ class DataManager:
     def __init__(self, output_dir: str = "output"):
         self.output_dir = output_dir
         self.ensure_output_dir()
+        self.article_store = ArticleStore(os.path.join(output_dir, 'articles'))
+        self.history = HistoryDB(os.path.join(output_dir, 'history.db'))
+        self.search_index = SearchIndex(os.path.join(output_dir, 'search_index.db'))
+        self._similarity = None
+        # Версия индекса хранилища и хеши статей, учтенные движком похожих статей
+        self._similarity_version = None
+        self._similarity_hashes = {}
+        self._similarity_lock = threading.Lock()
+        # Создается после HistoryDB: atexit фоновой записи регистрируется позже и срабатывает раньше -
+        # при выходе сначала сбрасывается очередь, затем база
+        self.writer = BackgroundWriter(os.path.join(output_dir, 'history'), on_batch=self.history.add_searches)
     
     def ensure_output_dir(self):
         """Создает директорию для выходных файлов"""
         if not os.path.exists(self.output_dir):
             os.makedirs(self.output_dir)
     
-    def save_search_history(self, query: str, results: List[Dict[str, Any]]):
-        """Сохраняет историю поиска"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{self.output_dir}/search_history_{timestamp}.json"
+    def save_search_history(self, query: str, results: List[Dict[str, Any]]) -> bool:
+        """
+        Ставит запись истории поиска в очередь фоновой записи (JSONL сегмент + база данных)
         
-        data = {
+        Returns:
+            True, если запись поставлена в очередь (раньше - путь к JSON-файлу записи; файла
+            больше нет, запись читается через history.recent_searches)
+        """
+        return self.writer.write({
             'timestamp': datetime.now().isoformat(),
             'query': query,
             'results': results
-        }
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        
+        })
+    
+    def submit(self, func, *args, **kwargs) -> bool:
+        """Выполняет запись (экспорт, сохранение страницы) в фоновом потоке"""
+        return self.writer.submit(func, *args, **kwargs)
+    
+    def flush(self):
+        """Дожидается завершения всех отложенных записей"""
+        self.writer.flush()
+        self.history.flush()
+    
+    def _export_filename(self, prefix: str, extension: str, compress: bool) -> str:
+        """Имя файла экспорта с меткой времени"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return f"{self.output_dir}/{prefix}_{timestamp}.{extension}" + ('.gz' if compress else '')
+    
+    @staticmethod
+    def _open_output(filename: str, compress: bool):
+        """Открывает файл экспорта (gzip при compress=True)"""
+        if compress:
+            return gzip.open(filename, 'wt', newline='', encoding='utf-8')
+        return open(filename, 'w', newline='', encoding='utf-8')
+    
+    @timed('export')
+    def _write_lines(self, lines: Iterable[str], filename: str, compress: bool) -> str:
+        """Пишет поток строк в файл, не накапливая его в памяти"""
+        with self._open_output(filename, compress) as f:
+            for line in lines:
+                f.write(line)
         return filename
     
-    def export_paragraphs_to_csv(self, paragraphs: List[str], filename: str = None):
-        """Экспортирует параграфы в CSV"""
+    def export_paragraphs_to_csv(self, paragraphs: Iterable[str], filename: str = None, compress: bool = False):
+        """Экспортирует параграфы в CSV (принимает любой итерируемый объект, в т.ч. генератор)"""
         if filename is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{self.output_dir}/paragraphs_{timestamp}.csv"
-        
-        with open(filename, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(['Index', 'Paragraph'])
-            for i, paragraph in enumerate(paragraphs, 1):
-                writer.writerow([i, paragraph])
-        
-        return filename
+            filename = self._export_filename('paragraphs', 'csv', compress)
+        rows = ([i, paragraph] for i, paragraph in enumerate(paragraphs, 1))
+        return self._write_lines(iter_csv_lines(['Index', 'Paragraph'], rows), filename, compress)
     
-    def export_links_to_csv(self, links: List[Dict[str, str]], filename: str = None):
-        """Экспортирует ссылки в CSV"""
+    def export_links_to_csv(self, links: Iterable[Dict[str, str]], filename: str = None, compress: bool = False):
+        """Экспортирует ссылки в CSV (принимает любой итерируемый объект, в т.ч. генератор)"""
         if filename is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{self.output_dir}/links_{timestamp}.csv"
-        
-        with open(filename, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(['Index', 'Text', 'URL'])
-            for i, link in enumerate(links, 1):
-                writer.writerow([i, link.get('text', ''), link.get('url', '')])
-        
-        return filename
+            filename = self._export_filename('links', 'csv', compress)
+        rows = ([i, link.get('text', ''), link.get('url', '')] for i, link in enumerate(links, 1))
+        return self._write_lines(iter_csv_lines(['Index', 'Text', 'URL'], rows), filename, compress)
     
-    def save_page_content(self, title: str, content: Dict[str, Any]):
-        """Сохраняет содержимое страницы"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        filename = f"{self.output_dir}/page_{safe_title}_{timestamp}.json"
-        
-        data = {
-            'timestamp': datetime.now().isoformat(),
-            'title': title,
-            'content': content
-        }
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+    def export_to_jsonl(self, records: Iterable[Dict[str, Any]], filename: str = None,
+                        prefix: str = 'records', compress: bool = False):
+        """Экспортирует записи в JSONL построчно"""
+        if filename is None:
+            filename = self._export_filename(prefix, 'jsonl', compress)
+        return self._write_lines(iter_jsonl_lines(records), filename, compress)
+    
+    def iter_stored_articles(self) -> Iterator[Dict[str, Any]]:
+        """Лениво читает статьи из хранилища по одной"""
+        for title in self.article_store.titles():
+            record = self.article_store.latest(title)
+            stored = self.article_store.get(record['hash'])
+            if stored is None:
+                continue
+            yield {
+                'title': title,
+                'hash': record['hash'],
+                'fetched_at': record['fetched_at'],
+                'content': stored['content']
+            }
+    
+    def iter_paragraph_rows(self) -> Iterator[List[Any]]:
+        """Строки [Title, Section, Index, Paragraph] по всем сохраненным статьям"""
+        for article in self.iter_stored_articles():
+            for anchor, i, text in iter_content_paragraphs(article['content']):
+                yield [article['title'], anchor, i, text]
+    
+    @timed('store')
+    def save_page_content(self, title: str, content: Dict[str, Any]) -> str:
+        """
+        Сохраняет содержимое страницы в хранилище статей (с дедупликацией)
         
-        return filename
+        Returns:
+            Хеш содержимого в хранилище (раньше - путь к JSON-файлу страницы; содержимое
+            читается через article_store.get(хеш) или article_store.get_latest(title))
+        """
+        content_hash = self.article_store.put(title, content)
+        self.history.add_page(title, content_hash)
+        self._index_article(title, content, content_hash)
+        return content_hash
+    
+    def _index_article(self, title: str, content: Dict[str, Any], content_hash: str) -> bool:
+        """Инкрементально обновляет полнотекстовый индекс (неизмененная статья пропускается)"""
+        paragraphs = (text for _, _, text in iter_content_paragraphs(content))
+        return self.search_index.index_document(title, paragraphs, content.get('url'), content_hash)
+    
+    def reindex_articles(self) -> int:
+        """Индексирует все статьи из хранилища; возвращает количество обновленных"""
+        updated = 0
+        for article in self.iter_stored_articles():
+            if self._index_article(article['title'], article['content'], article['hash']):
+                updated += 1
+        return updated
+    
+    @property
+    def similarity(self):
+        """
+        Движок похожих статей; строится из хранилища при первом обращении
+
+        При изменении индекса хранилища (запись этим или другим воркером) в движок
+        добавляются только статьи, хеш которых отличается от уже учтенного.
+        """
+        with self._similarity_lock:
+            if self._similarity is None:
+                from similarity import SimilarityEngine
+                self._similarity = SimilarityEngine()
+                self._similarity_hashes = {}
+            version = self.article_store.version()
+            if version != self._similarity_version:
+                self._sync_similarity()
+                self._similarity_version = version
+            return self._similarity
+
+    def _sync_similarity(self):
+        """Добавляет в движок новые и измененные статьи хранилища (под _similarity_lock)"""
+        for title in self.article_store.titles():
+            record = self.article_store.latest(title)
+            if record is None or self._similarity_hashes.get(title) == record['hash']:
+                continue
+            stored = self.article_store.get(record['hash'])
+            if stored is None:
+                continue
+            self._add_similarity(self._similarity, title, stored['content'])
+            self._similarity_hashes[title] = record['hash']
+    
+    @staticmethod
+    def _add_similarity(engine, title: str, content: Dict[str, Any]):
+        """Добавляет статью в формате хранилища (см. ParsedPage.to_content) в движок похожих статей"""
+        paragraphs = (text for _, _, text in iter_content_paragraphs(content))
+        links = [link.get('url', '') for link in content.get('links') or []]
+        engine.add(title, paragraphs, links)
+    
+    def related_articles(self, titles: List[str], limit: int = 10) -> Dict[str, List[Dict[str, Any]]]:
+        """Похожие статьи для нескольких сохраненных статей"""
+        return self.similarity.most_similar_batch(titles, limit)
+    
+    def search_local(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Поиск по сохраненным статьям без обращения к Wikipedia"""
+        return self.search_index.search(query, limit)
+    
+    def load_page_content(self, title: str, use_mmap: bool = False):
+        """Загружает последнюю сохраненную версию страницы"""
+        stored = self.article_store.get_latest(title, use_mmap=use_mmap)
+        return stored['content'] if stored else None
     
     def get_search_statistics(self) -> Dict[str, Any]:
         """Получает статистику поисков"""
-        stats = {
-            'total_searches': 0,
-            'total_pages_saved': 0,
-            'last_search': None
-        }
-        
-        if os.path.exists(self.output_dir):
-            files = os.listdir(self.output_dir)
-            stats['total_searches'] = len([f for f in files if f.startswith('search_history_')])
-            stats['total_pages_saved'] = len([f for f in files if f.startswith('page_')])
-            
-            if stats['total_searches'] > 0:
-                search_files = [f for f in files if f.startswith('search_history_')]
-                search_files.sort()
-                stats['last_search'] = search_files[-1]
-        
-        return stats
+        return self.history.get_statistics()
+    
+    def import_legacy_history(self) -> int:
+        """Импортирует старые файлы search_history_*.json из директории вывода"""
+        return self.history.import_json_history(self.output_dir)
@@ -6,14 +6,14 @@ Xvfb :99 -screen 0 1920x1080x24 > /dev/null 2>&1 &
 # Ждем запуска Xvfb
 sleep 2
 
-# Запускаем приложение
+# Запускаем приложение (API - под gunicorn: воркеры, метрики Prometheus по всем процессам)
 if [ "$1" = "api" ]; then
     echo "Starting API server..."
-    python api_server.py
+    exec gunicorn -c gunicorn.conf.py api_server:app
 elif [ "$1" = "cli" ]; then
     echo "Starting CLI application..."
-    python main.py
+    exec python main.py
 else
     echo "Starting API server by default..."
-    python api_server.py
+    exec gunicorn -c gunicorn.conf.py api_server:app
 fi
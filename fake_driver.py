@@ -0,0 +1,107 @@
+import math
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs, quote, urlsplit
+
+from config import Config
+from http_driver import HttpDriver
+from wiki_stub import MAIN_PAGE_HTML, load_pages, resolve_page
+
+_pages = None
+_pages_lock = threading.Lock()
+
+def _shared_pages() -> Dict[str, Dict[str, str]]:
+    """Сохраненные статьи загружаются один раз на процесс"""
+    global _pages
+    if _pages is None:
+        with _pages_lock:
+            if _pages is None:
+                _pages = load_pages(Config.FAKE_DRIVER_PAGES_DIR)
+    return _pages
+
+def latency_distribution(spec: str) -> Callable[[random.Random], float]:
+    """
+    Распределение задержки (сек) по описанию
+
+    Форматы: "0.5" или "const:0.5", "uniform:0.2,1.0", "normal:mean,stddev",
+    "lognormal:median,sigma", "exp:mean". Отрицательные значения обрезаются до 0.
+    """
+    kind, _, params = str(spec).partition(':')
+    if not params:
+        kind, params = 'const', kind
+    values = [float(value) for value in params.split(',')]
+    kind = kind.strip().lower()
+
+    mu = math.log(values[0]) if values[0] > 0 else float('-inf')
+    samplers = {
+        'const': lambda rng: values[0],
+        'uniform': lambda rng: rng.uniform(values[0], values[1]),
+        'normal': lambda rng: rng.gauss(values[0], values[1]),
+        'lognormal': lambda rng: rng.lognormvariate(mu, values[1]),
+        'exp': lambda rng: rng.expovariate(1.0 / values[0]) if values[0] > 0 else 0.0,
+    }
+    if kind not in samplers:
+        raise ValueError(f"Unknown latency distribution: {spec}")
+    sample = samplers[kind]
+    return lambda rng: max(0.0, sample(rng))
+
+class FakeDriver(HttpDriver):
+    """
+    Имитация браузера для нагрузочных тестов: статьи из benchmarks/pages в памяти,
+    задержки запуска, загрузки страниц и закрытия по заданным распределениям и отказы
+    с заданной вероятностью. Выбирается настройкой DRIVER_BACKEND=fake (см. main.create_driver).
+    """
+
+    def __init__(self, page_latency: Optional[str] = None, quit_latency: Optional[str] = None,
+                 failure_rate: Optional[float] = None, rng: Optional[random.Random] = None):
+        """
+        Инициализация
+
+        Args:
+            page_latency: Распределение задержки загрузки страницы (см. latency_distribution)
+            quit_latency: Распределение задержки закрытия
+            failure_rate: Вероятность таймаута загрузки страницы
+            rng: Генератор случайных чисел (для воспроизводимости)
+        """
+        super().__init__()
+        self.pages = _shared_pages()
+        self.rng = rng or random.Random()
+        self.page_latency = latency_distribution(page_latency or Config.FAKE_DRIVER_PAGE_LATENCY)
+        self.quit_latency = latency_distribution(quit_latency or Config.FAKE_DRIVER_QUIT_LATENCY)
+        self.failure_rate = Config.FAKE_DRIVER_PAGE_FAILURE_RATE if failure_rate is None else failure_rate
+
+    @classmethod
+    def launch(cls, launch_latency: Optional[str] = None, failure_rate: Optional[float] = None,
+               rng: Optional[random.Random] = None, **kwargs) -> 'FakeDriver':
+        """Запуск "браузера": задержка запуска и отказ с вероятностью failure_rate"""
+        rng = rng or random.Random()
+        time.sleep(latency_distribution(launch_latency or Config.FAKE_DRIVER_LAUNCH_LATENCY)(rng))
+        if failure_rate is None:
+            failure_rate = Config.FAKE_DRIVER_LAUNCH_FAILURE_RATE
+        if rng.random() < failure_rate:
+            from selenium.common.exceptions import WebDriverException
+            raise WebDriverException("Simulated browser launch failure")
+        return cls(rng=rng, **kwargs)
+
+    def get(self, url: str):
+        """Загружает страницу из памяти с имитацией задержки и отказов"""
+        time.sleep(self.page_latency(self.rng))
+        if self.rng.random() < self.failure_rate:
+            from selenium.common.exceptions import TimeoutException
+            raise TimeoutException(f"Simulated page load timeout: {url}")
+
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        params = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        # Остальные адреса - главная страница с формой поиска
+        _, source, redirect = resolve_page(self.pages, parts.path, params) or (200, MAIN_PAGE_HTML, None)
+        if redirect is not None:
+            url = f"{origin}/wiki/{quote(redirect)}"
+
+        self._load(url, source)
+
+    def quit(self):
+        time.sleep(self.quit_latency(self.rng))
+        super().quit()
@@ -0,0 +1,31 @@
+# Конфигурация gunicorn: gunicorn -c gunicorn.conf.py api_server:app
+import os
+import shutil
+
+from config import Config
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+# Потоки воркера: запросы ждут слот браузера в очереди своего класса (см. scheduler.py);
+# размер очереди bulk по умолчанию рассчитан от числа потоков
+threads = Config.SERVER_THREADS
+timeout = 120
+
+# Каждый воркер пишет и ротирует свой файл лога (logs/wikipedia_navigator.<pid>.log):
+# воркеры создаются fork от мастера и наследуют настройку
+Config.LOG_PER_PROCESS = True
+
+# Метрики Prometheus собираются из файлов всех воркеров (см. metrics.py);
+# переменная должна быть задана до импорта приложения
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join('logs', 'prometheus'))
+
+def on_starting(server):
+    """Очищает файлы метрик предыдущего запуска"""
+    directory = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+def child_exit(server, worker):
+    """Убирает значения livesum-метрик завершившегося воркера"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
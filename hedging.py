@@ -0,0 +1,221 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Optional
+
+from cache_manager import NegativeResult
+from config import Config
+from logger import get_logger
+from main import fetch_article, quit_driver
+from metrics import record_hedge
+from timing import percentile, registry
+
+logger = get_logger()
+
+# Гистограмма длительностей успешных загрузок статьи (для /stats; задержка второй попытки -
+# по окну последних замеров HedgedFetcher)
+FETCH_HISTOGRAM = 'article_fetch'
+
+class HedgeBudget:
+    """
+    Ограничение дополнительной нагрузки от вторых попыток
+
+    Каждый запрос пополняет баланс на ratio (не выше burst), вторая попытка расходует
+    единицу: в среднем дублируется не больше доли ratio запросов.
+    """
+
+    def __init__(self, ratio: Optional[float] = None, burst: Optional[float] = None):
+        self.ratio = Config.HEDGE_BUDGET_RATIO if ratio is None else ratio
+        self.burst = Config.HEDGE_BUDGET_BURST if burst is None else burst
+        self.balance = float(self.burst)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.balance = min(self.burst, self.balance + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Резервирует вторую попытку; False - бюджет исчерпан"""
+        with self._lock:
+            if self.balance < 1:
+                return False
+            self.balance -= 1
+            return True
+
+def is_final(result) -> bool:
+    """Окончательный результат: открытая статья или устойчивый отрицательный результат"""
+    if isinstance(result, NegativeResult):
+        return result.kind != 'transient'
+    return result is not None
+
+def _close(driver):
+    """Закрывает браузер отмененной попытки (зависшая загрузка страницы прерывается ошибкой)"""
+    try:
+        driver.quit()
+    except Exception as e:
+        logger.debug(f"Cancelled fetch driver quit failed: {e}")
+
+def _release(future: Future):
+    """Закрывает браузер, если отмененная попытка все же открыла статью"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    result = future.result()
+    if result is not None and not isinstance(result, NegativeResult):
+        try:
+            quit_driver(result)
+        except Exception as e:
+            logger.debug(f"Cancelled fetch cleanup failed: {e}")
+
+class Attempt:
+    """Попытка загрузки статьи в отдельном потоке"""
+
+    def __init__(self, fetch: Callable[..., Any], query: str, backend: Optional[str], label: str):
+        self.label = label
+        self.future = Future()
+        self.started = time.perf_counter()
+        self._driver = None
+        self._cancelled = False
+        self._lock = threading.Lock()
+        # Этапы попытки (driver_launch, navigation, ...) попадают в разбивку текущего запроса
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(self._run, fetch, query, backend),
+                         name=f"fetch-{label}", daemon=True).start()
+
+    def _run(self, fetch, query, backend):
+        try:
+            self.future.set_result(fetch(query, backend=backend, on_driver=self._attach))
+        except Exception as e:
+            self.future.set_exception(e)
+
+    def _attach(self, driver):
+        with self._lock:
+            self._driver = driver
+            cancelled = self._cancelled
+        if cancelled:
+            _close(driver)
+
+    def outcome(self):
+        """Результат завершенной попытки (исключение - как неудачный запуск браузера)"""
+        try:
+            return self.future.result()
+        except Exception as e:
+            logger.warning(f"Article fetch ({self.label}) failed: {e}")
+            return None
+
+    def cancel(self):
+        """Отменяет попытку: браузер закрывается в фоне, полученный позже результат освобождается"""
+        with self._lock:
+            self._cancelled = True
+            driver = None if self.future.done() else self._driver
+        if driver is not None:
+            threading.Thread(target=_close, args=(driver,), name=f"fetch-{self.label}-cancel", daemon=True).start()
+        self.future.add_done_callback(_release)
+
+class HedgedFetcher:
+    """
+    Загрузка статьи с дублированием медленных попыток
+
+    Если первая попытка не завершилась за перцентиль длительности последних window успешных
+    загрузок, запускается вторая (другой браузер или HEDGE_BACKEND) и берется первый окончательный
+    результат; оставшаяся попытка отменяется. Число вторых попыток ограничено HedgeBudget.
+    """
+
+    def __init__(self, fetch: Optional[Callable[..., Any]] = None, hedge_backend: Optional[str] = None,
+                 percentile: Optional[float] = None, min_samples: Optional[int] = None,
+                 default_delay: Optional[float] = None, min_delay: Optional[float] = None,
+                 budget: Optional[HedgeBudget] = None, histogram: str = FETCH_HISTOGRAM,
+                 window: Optional[int] = None):
+        """
+        Инициализация
+
+        Args:
+            fetch: fetch(query, backend, on_driver) - одна попытка (по умолчанию main.fetch_article)
+            hedge_backend: Источник драйвера второй попытки (None - как у первой)
+            percentile: Перцентиль длительности загрузки для задержки второй попытки
+            min_samples: Минимум замеров для расчета задержки по перцентилю
+            default_delay: Задержка, пока замеров недостаточно (сек)
+            min_delay: Нижняя граница задержки (сек)
+            budget: Бюджет вторых попыток
+            histogram: Имя гистограммы длительностей в timing.registry
+            window: Число последних успешных загрузок для расчета перцентиля
+        """
+        self.fetch_attempt = fetch or fetch_article
+        self.hedge_backend = hedge_backend if hedge_backend is not None else (Config.HEDGE_BACKEND or None)
+        self.percentile = percentile or Config.HEDGE_PERCENTILE
+        self.min_samples = Config.HEDGE_MIN_SAMPLES if min_samples is None else min_samples
+        self.default_delay = Config.HEDGE_DEFAULT_DELAY if default_delay is None else default_delay
+        self.min_delay = Config.HEDGE_MIN_DELAY if min_delay is None else min_delay
+        self.budget = budget or HedgeBudget()
+        self.histogram = histogram
+        self._durations = deque(maxlen=window or Config.HEDGE_WINDOW)
+        self._lock = threading.Lock()
+
+    def observe(self, duration: float):
+        """Длительность успешной загрузки (сек)"""
+        with self._lock:
+            self._durations.append(duration)
+        registry.observe(self.histogram, duration)
+
+    def delay(self) -> float:
+        """Задержка второй попытки: перцентиль длительности последних успешных загрузок"""
+        with self._lock:
+            durations = sorted(self._durations)
+        if len(durations) < self.min_samples:
+            return self.default_delay
+        return max(self.min_delay, percentile(durations, self.percentile))
+
+    def fetch(self, query: str):
+        """
+        Загружает статью
+
+        Returns:
+            Как main.fetch_article: драйвер, NegativeResult или None
+        """
+        self.budget.deposit()
+        attempts = [Attempt(self.fetch_attempt, query, None, 'primary')]
+        delay = self.delay()
+        if not wait([attempts[0].future], timeout=delay).done:
+            if self.budget.withdraw():
+                logger.info(f"Hedging fetch for {query!r}: no result after {delay:.2f}s")
+                record_hedge('launched')
+                attempts.append(Attempt(self.fetch_attempt, query, self.hedge_backend, 'hedge'))
+            else:
+                record_hedge('budget_exhausted')
+
+        winner, result, fallback = None, None, None
+        pending = list(attempts)
+        while pending and winner is None:
+            wait([attempt.future for attempt in pending], return_when=FIRST_COMPLETED)
+            for attempt in [attempt for attempt in pending if attempt.future.done()]:
+                pending.remove(attempt)
+                outcome = attempt.outcome()
+                if not is_final(outcome):
+                    # Временный сбой одной попытки - ждем другую
+                    fallback = fallback if fallback is not None else outcome
+                elif winner is None:
+                    self.observe(time.perf_counter() - attempt.started)
+                    winner, result = attempt, outcome
+                else:
+                    _release(attempt.future)
+
+        for attempt in pending:
+            attempt.cancel()
+        if winner is None:
+            return fallback
+        if winner.label == 'hedge':
+            record_hedge('won')
+        return result
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+def get_hedged_fetcher() -> HedgedFetcher:
+    """Общий HedgedFetcher процесса (создается при первом обращении)"""
+    global _fetcher
+    if _fetcher is None:
+        with _fetcher_lock:
+            if _fetcher is None:
+                _fetcher = HedgedFetcher()
+    return _fetcher
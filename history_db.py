@@ -0,0 +1,294 @@
+import argparse
+import atexit
+import glob
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import Config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS searches (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    query TEXT NOT NULL,
+    results TEXT NOT NULL,
+    UNIQUE (timestamp, query)
+);
+CREATE INDEX IF NOT EXISTS idx_searches_query ON searches (query);
+-- Последние поиски - по времени, а не по порядку вставки (импорт истории добавляет старые записи)
+CREATE INDEX IF NOT EXISTS idx_searches_timestamp ON searches (timestamp);
+
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    title TEXT NOT NULL,
+    content_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pages_title ON pages (title);
+
+CREATE TABLE IF NOT EXISTS fingerprints (
+    title TEXT PRIMARY KEY,
+    url TEXT,
+    revision_id INTEGER,
+    content_hash TEXT,
+    section_hashes TEXT NOT NULL,
+    checked_at TEXT NOT NULL,
+    changed_at TEXT
+);
+
+-- Счетчики обновляются триггерами, чтобы статистика не требовала COUNT(*)
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO counters (name, value) VALUES ('searches', 0), ('pages', 0);
+
+CREATE TRIGGER IF NOT EXISTS trg_searches_count AFTER INSERT ON searches
+BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'searches';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_pages_count AFTER INSERT ON pages
+BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'pages';
+END;
+"""
+
+# Открытые базы закрываются при выходе одним обработчиком atexit (регистрируется при первом открытии)
+_open_databases = set()
+_open_lock = threading.Lock()
+_atexit_registered = False
+
+def _close_all():
+    """Сбрасывает буферы и закрывает все открытые базы"""
+    with _open_lock:
+        databases = list(_open_databases)
+    for db in databases:
+        db.close()
+
+class HistoryDB:
+    """История поисков и сохраненных страниц в SQLite"""
+
+    def __init__(self, path: str = "output/history.db", batch_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None):
+        """
+        Инициализация базы истории
+
+        Args:
+            path: Путь к файлу базы данных
+            batch_size: Количество записей, накапливаемых перед вставкой
+            flush_interval: Максимальное время (сек) хранения записей в буфере
+        """
+        self.path = path
+        self.batch_size = batch_size or Config.HISTORY_BATCH_SIZE
+        self.flush_interval = flush_interval if flush_interval is not None else Config.HISTORY_FLUSH_INTERVAL
+        self._pending_searches = []
+        self._pending_pages = []
+        self._timer = None
+        self._lock = threading.RLock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._register()
+
+    def _register(self):
+        global _atexit_registered
+        with _open_lock:
+            _open_databases.add(self)
+            if not _atexit_registered:
+                atexit.register(_close_all)
+                _atexit_registered = True
+
+    def add_search(self, query: str, results: List[Dict[str, Any]], timestamp: Optional[str] = None):
+        """Добавляет поисковый запрос в буфер вставки"""
+        record = (timestamp or datetime.now().isoformat(), query,
+                  json.dumps(results, ensure_ascii=False, default=str))
+        with self._lock:
+            self._pending_searches.append(record)
+            self._maybe_flush()
+
+    def add_searches(self, records: Iterable[Dict[str, Any]]):
+        """Добавляет пакет поисковых запросов ({'timestamp', 'query', 'results'}) одной вставкой"""
+        rows = [(record.get('timestamp') or datetime.now().isoformat(), record['query'],
+                 json.dumps(record.get('results', []), ensure_ascii=False, default=str))
+                for record in records]
+        with self._lock:
+            self._pending_searches.extend(rows)
+            self.flush()
+
+    def add_page(self, title: str, content_hash: str, timestamp: Optional[str] = None):
+        """Добавляет запись о сохраненной странице в буфер вставки"""
+        with self._lock:
+            self._pending_pages.append((timestamp or datetime.now().isoformat(), title, content_hash))
+            self._maybe_flush()
+
+    def _maybe_flush(self):
+        """Сбрасывает буфер по размеру пакета; иначе первая запись в буфере запускает таймер сброса"""
+        pending = len(self._pending_searches) + len(self._pending_pages)
+        if pending >= self.batch_size or self.flush_interval <= 0:
+            self.flush()
+        elif self._timer is None:
+            # Записи не ждут следующей вставки: буфер сбрасывается не позже flush_interval
+            self._timer = threading.Timer(self.flush_interval, self.flush)
+            self._timer.name = 'history-flush'
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Записывает накопленные записи одной транзакцией"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._conn is None or (not self._pending_searches and not self._pending_pages):
+                return
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO searches (timestamp, query, results) VALUES (?, ?, ?)",
+                    self._pending_searches
+                )
+                self._conn.executemany(
+                    "INSERT INTO pages (timestamp, title, content_hash) VALUES (?, ?, ?)",
+                    self._pending_pages
+                )
+            self._pending_searches = []
+            self._pending_pages = []
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Статистика без сканирования таблиц: счетчики и последняя запись по индексу времени"""
+        with self._lock:
+            self.flush()
+            total_searches = self._counter('searches')
+            total_pages = self._counter('pages')
+            last = self._conn.execute(
+                "SELECT timestamp, query FROM searches ORDER BY timestamp DESC, id DESC LIMIT 1"
+            ).fetchone()
+        return {
+            'total_searches': total_searches,
+            'total_pages_saved': total_pages,
+            'last_search': last[0] if last else None,
+            'last_query': last[1] if last else None
+        }
+
+    def recent_searches(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Последние поисковые запросы"""
+        with self._lock:
+            self.flush()
+            rows = self._conn.execute(
+                "SELECT timestamp, query, results FROM searches ORDER BY timestamp DESC, id DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [{'timestamp': ts, 'query': query, 'results': json.loads(results)} for ts, query, results in rows]
+
+    def search_activity(self, since: Optional[str] = None) -> List[tuple]:
+        """Пары (запрос, время) всех поисков начиная с since (для ранжирования запросов)"""
+        with self._lock:
+            self.flush()
+            return self._conn.execute(
+                "SELECT query, timestamp FROM searches WHERE timestamp >= ? ORDER BY id", (since or '',)
+            ).fetchall()
+
+    def get_fingerprint(self, title: str) -> Optional[Dict[str, Any]]:
+        """Отпечаток статьи, записанный при последнем обновлении"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT title, url, revision_id, content_hash, section_hashes, checked_at, changed_at "
+                "FROM fingerprints WHERE title = ?", (title,)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ('title', 'url', 'revision_id', 'content_hash', 'section_hashes', 'checked_at', 'changed_at')
+        fingerprint = dict(zip(keys, row))
+        fingerprint['section_hashes'] = json.loads(fingerprint['section_hashes'])
+        return fingerprint
+
+    def set_fingerprint(self, title: str, url: Optional[str], revision_id: Optional[int], content_hash: str,
+                        section_hashes: Dict[str, str], changed: bool = True):
+        """Сохраняет отпечаток статьи после проверки"""
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO fingerprints (title, url, revision_id, content_hash, section_hashes, checked_at, changed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(title) DO UPDATE SET "
+                "url = excluded.url, revision_id = excluded.revision_id, content_hash = excluded.content_hash, "
+                "section_hashes = excluded.section_hashes, checked_at = excluded.checked_at, "
+                "changed_at = COALESCE(excluded.changed_at, fingerprints.changed_at)",
+                (title, url, revision_id, content_hash, json.dumps(section_hashes), now, now if changed else None)
+            )
+
+    def touch_fingerprint(self, title: str):
+        """Отмечает, что статья проверена и не изменилась"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE fingerprints SET checked_at = ? WHERE title = ?",
+                               (datetime.now().isoformat(), title))
+
+    def import_json_history(self, directory: str) -> int:
+        """
+        Разовый импорт старых файлов search_history_*.json
+
+        Args:
+            directory: Директория с файлами истории
+
+        Returns:
+            Количество импортированных записей (повторный импорт не создает дублей)
+        """
+        records = []
+        for filename in sorted(glob.glob(os.path.join(directory, 'search_history_*.json'))):
+            try:
+                with open(filename, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            records.append((data.get('timestamp', ''), data.get('query', ''),
+                            json.dumps(data.get('results', []), ensure_ascii=False, default=str)))
+        return self._insert_searches(records)
+
+    def _insert_searches(self, records: Iterable[tuple]) -> int:
+        """Пакетная вставка поисков; возвращает число фактически добавленных строк"""
+        with self._lock:
+            self.flush()
+            before = self._counter('searches')
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO searches (timestamp, query, results) VALUES (?, ?, ?)",
+                    records
+                )
+            return self._counter('searches') - before
+
+    def _counter(self, name: str) -> int:
+        row = self._conn.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def close(self):
+        """Сбрасывает буфер и закрывает соединение"""
+        with self._lock:
+            if self._conn is None:
+                return
+            self.flush()
+            self._conn.close()
+            self._conn = None
+        with _open_lock:
+            _open_databases.discard(self)
+
+def main():
+    parser = argparse.ArgumentParser(description="Импорт истории поиска в SQLite")
+    parser.add_argument('directory', nargs='?', default='output', help="Директория с search_history_*.json")
+    parser.add_argument('--db', default=None, help="Путь к базе данных (по умолчанию <directory>/history.db)")
+    args = parser.parse_args()
+
+    db = HistoryDB(args.db or os.path.join(args.directory, 'history.db'))
+    imported = db.import_json_history(args.directory)
+    db.close()
+    print(f"Импортировано записей: {imported}")
+
+if __name__ == '__main__':
+    main()
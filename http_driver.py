@@ -0,0 +1,164 @@
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode, urljoin
+
+import requests
+
+from config import Config
+from page_parser import PAGE_LOAD_ID_SCRIPT
+
+# Клавиша Enter в протоколе WebDriver (selenium.webdriver.common.keys.Keys.RETURN)
+RETURN_KEY = '\ue006'
+
+# Стратегии поиска selenium -> CSS-селектор
+_LOCATORS = {
+    'css selector': lambda value: value,
+    'tag name': lambda value: value,
+    'id': lambda value: f'[id="{value}"]',
+    'name': lambda value: f'[name="{value}"]',
+    'class name': lambda value: f'.{value}',
+}
+
+class HttpElement:
+    """Элемент страницы HttpDriver с подмножеством API WebElement"""
+
+    def __init__(self, driver: 'HttpDriver', tag):
+        self._driver = driver
+        self._tag = tag
+
+    @property
+    def tag_name(self) -> str:
+        return self._tag.name
+
+    @property
+    def text(self) -> str:
+        return self._tag.get_text(' ', strip=True)
+
+    def get_attribute(self, name: str) -> Optional[str]:
+        value = self._tag.get(name)
+        if isinstance(value, list):
+            value = ' '.join(value)
+        if name in ('href', 'src') and value is not None:
+            # Как и в браузере, ссылки возвращаются абсолютными
+            return urljoin(self._driver.current_url, value)
+        return value
+
+    def clear(self):
+        self._tag['value'] = ''
+
+    def send_keys(self, *values: str):
+        text = ''.join(values)
+        submit = RETURN_KEY in text
+        self._tag['value'] = (self._tag.get('value') or '') + text.replace(RETURN_KEY, '')
+        if submit:
+            self.submit()
+
+    def submit(self):
+        """Отправляет форму, содержащую элемент (GET)"""
+        form = self._tag.find_parent('form')
+        if form is None:
+            return
+        fields = {field['name']: field.get('value') or ''
+                  for field in form.find_all('input') if field.get('name')}
+        action = urljoin(self._driver.current_url, form.get('action') or '')
+        self._driver.get(f"{action}?{urlencode(fields)}")
+
+    def click(self):
+        if self._tag.name == 'a' and self._tag.get('href'):
+            self._driver.get(self.get_attribute('href'))
+        elif self._tag.name in ('button', 'input'):
+            self.submit()
+
+    def find_element(self, by: str, value: str) -> 'HttpElement':
+        return self._driver._find(self._tag, by, value, single=True)
+
+    def find_elements(self, by: str, value: str) -> List['HttpElement']:
+        return self._driver._find(self._tag, by, value)
+
+class HttpDriver:
+    """
+    Драйвер без браузера: загружает страницы через HTTP и реализует подмножество API
+    WebDriver, которое используют main.py и api_server.py (get, page_source, title,
+    current_url, find_element(s), отправка формы поиска).
+
+    Подходит для статических страниц - бенчмарков с wiki_stub.py и офлайн-разработки.
+    Выбирается настройкой DRIVER_BACKEND=http (см. main.create_driver).
+    """
+
+    def __init__(self, session: Optional[requests.Session] = None, timeout: Optional[float] = None):
+        self.session = session or requests.Session()
+        self.timeout = timeout or Config.PAGE_LOAD_TIMEOUT
+        self.current_url = 'about:blank'
+        self.page_source = '<html><head></head><body></body></html>'
+        self._soup = None
+        self.time_origin = time.time() * 1000
+        self.closed = False
+
+    def get(self, url: str):
+        """Загружает страницу (перенаправления выполняются автоматически)"""
+        response = self.session.get(url, timeout=self.timeout)
+        # Ответ 5xx - сбой upstream (как ошибка соединения), 4xx - обычная страница
+        if response.status_code >= 500:
+            response.raise_for_status()
+        self._load(response.url, response.text)
+
+    def _load(self, url: str, source: str):
+        """Делает страницу текущей; новое время начала навигации - как у браузера"""
+        self.current_url = url
+        self.page_source = source
+        self._soup = None
+        # Строго возрастает, даже если часы не сдвинулись между загрузками
+        self.time_origin = max(time.time() * 1000, self.time_origin + 0.001)
+
+    @property
+    def soup(self):
+        if self._soup is None:
+            from bs4 import BeautifulSoup
+            self._soup = BeautifulSoup(self.page_source, 'lxml')
+        return self._soup
+
+    @property
+    def title(self) -> str:
+        return self.soup.title.get_text(strip=True) if self.soup.title else ''
+
+    def _find(self, root, by: str, value: str, single: bool = False):
+        if by == 'link text':
+            tags = [tag for tag in root.find_all('a') if tag.get_text(strip=True) == value]
+        else:
+            locator = _LOCATORS.get(by)
+            if locator is None:
+                raise ValueError(f"Unsupported locator strategy: {by}")
+            tags = root.select(locator(value))
+        if single:
+            if not tags:
+                from selenium.common.exceptions import NoSuchElementException
+                raise NoSuchElementException(f"Unable to locate element: {by}={value}")
+            return HttpElement(self, tags[0])
+        return [HttpElement(self, tag) for tag in tags]
+
+    def find_element(self, by: str, value: str) -> HttpElement:
+        return self._find(self.soup, by, value, single=True)
+
+    def find_elements(self, by: str, value: str) -> List[HttpElement]:
+        return self._find(self.soup, by, value)
+
+    def execute_script(self, script: str, *args: Any) -> Any:
+        # JavaScript не выполняется (прокрутка к разделу и т.п. не нужны без окна);
+        # performance.timeOrigin отличает загрузки страниц для кэша page_parser
+        if script == PAGE_LOAD_ID_SCRIPT:
+            return self.time_origin
+        return None
+
+    def set_page_load_timeout(self, seconds: float):
+        self.timeout = seconds
+
+    def implicitly_wait(self, seconds: float):
+        pass
+
+    @property
+    def capabilities(self) -> Dict[str, Any]:
+        return {'browserName': 'http'}
+
+    def quit(self):
+        self.session.close()
+        self.closed = True
@@ -0,0 +1,343 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+import requests
+
+from config import Config
+from timing import percentile
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RESULTS_DIR = os.path.join(PROJECT_DIR, 'benchmarks', 'results')
+
+ENDPOINTS = {
+    'search': ('POST', '/api/search'),
+    'contents': ('POST', '/api/contents'),
+    'paragraphs': ('POST', '/api/paragraphs'),
+    'links': ('POST', '/api/links'),
+}
+DEFAULT_MIX = 'search=1,paragraphs=1,links=1'
+DEFAULT_QUERIES = ['Python', 'Selenium', 'Document Object Model']
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """'search=1,links=2' -> {'search': 1.0, 'links': 2.0}"""
+    mix = {}
+    for item in spec.split(','):
+        name, _, weight = item.strip().partition('=')
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint in mix: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+def parse_server_timing(header: Optional[str]) -> Dict[str, float]:
+    """'navigation;dur=12.5, total;dur=40.1' -> {'navigation': 12.5, 'total': 40.1} (мс)"""
+    stages = {}
+    for item in (header or '').split(','):
+        name, _, params = item.strip().partition(';')
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'dur':
+                try:
+                    stages[name] = float(value)
+                except ValueError:
+                    pass
+    return stages
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+class PooledWSGIServer(WSGIServer):
+    """
+    WSGI-сервер с фиксированным пулом потоков (аналог gunicorn --threads N в одном процессе)
+
+    Соединения сверх числа потоков ждут в очереди пула - это время видно клиенту
+    как разница между задержкой ответа и длительностью обработки (Server-Timing: total).
+    """
+
+    request_queue_size = 1024
+
+    def __init__(self, address, app, threads: int):
+        super().__init__(address, _QuietHandler)
+        self.set_app(app)
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='wsgi')
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+class InProcessTarget:
+    """api_server в текущем процессе: пул потоков, имитация браузера, данные во временной папке"""
+
+    def __init__(self, threads: int, rate_limit: bool):
+        import api_server
+        from data_manager import DataManager
+
+        self.api_server = api_server
+        self.output_dir = tempfile.mkdtemp(prefix='load_test_')
+        self.data_manager = DataManager(self.output_dir)
+        self._saved = (api_server.set_data_manager(self.data_manager), api_server.limiter.enabled)
+        api_server.limiter.enabled = rate_limit
+        api_server.reset_rate_limits()
+
+        self.server = PooledWSGIServer(('127.0.0.1', 0), api_server.app, threads)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, name='load-test-server', daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.data_manager.writer.close()
+        saved_data_manager, self.api_server.limiter.enabled = self._saved
+        self.api_server.set_data_manager(saved_data_manager)
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+class GunicornTarget:
+    """api_server под gunicorn (-w workers --threads threads) в отдельном процессе"""
+
+    def __init__(self, workers: int, threads: int, rate_limit: bool, env: Dict[str, str],
+                 startup_timeout: float = 60):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        self.output_dir = tempfile.mkdtemp(prefix='load_test_')
+        env = dict(os.environ, **env, RATELIMIT_ENABLED='1' if rate_limit else '0',
+                   PROMETHEUS_MULTIPROC_DIR=os.path.join(self.output_dir, 'prometheus'))
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-w', str(workers),
+             '--threads', str(threads), '-b', f'127.0.0.1:{port}', 'api_server:app'],
+            cwd=PROJECT_DIR, env=env)
+
+        deadline = time.monotonic() + startup_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with code {self.process.returncode}")
+            try:
+                requests.get(f"{self.url}/api/timings", timeout=1)
+                return
+            except requests.RequestException:
+                time.sleep(0.2)
+        self.close()
+        raise RuntimeError("gunicorn did not start in time")
+
+    def close(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+def run_stage(url: str, clients: int, duration: float, mix: Dict[str, float], queries: List[str],
+              timeout: float = 60, think_time: float = 0.0, seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Замкнутый цикл нагрузки: clients потоков шлют запросы друг за другом в течение duration секунд
+
+    Returns:
+        {'samples': [...], 'elapsed': секунды}
+    """
+    names, weights = list(mix), list(mix.values())
+    samples = []
+    samples_lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(index: int):
+        rng = random.Random(None if seed is None else seed + index)
+        session = requests.Session()
+        local = []
+        try:
+            while time.monotonic() < stop_at:
+                endpoint = rng.choices(names, weights)[0]
+                method, path = ENDPOINTS[endpoint]
+                start = time.perf_counter()
+                try:
+                    response = session.request(method, url + path, json={'query': rng.choice(queries)},
+                                               timeout=timeout)
+                    status = response.status_code
+                    server_ms = parse_server_timing(response.headers.get('Server-Timing')).get('total')
+                except requests.RequestException:
+                    status, server_ms = 0, None
+                local.append({'endpoint': endpoint, 'status': status,
+                              'latency': time.perf_counter() - start, 'server_ms': server_ms})
+                if think_time:
+                    time.sleep(rng.expovariate(1.0 / think_time))
+        finally:
+            session.close()
+            with samples_lock:
+                samples.extend(local)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {'samples': samples, 'elapsed': time.perf_counter() - started}
+
+def warm_up(url: str, mix: Dict[str, float], queries: List[str], timeout: float = 60):
+    """По одному запросу к каждому эндпоинту до замеров (ленивая инициализация, кэши)"""
+    for endpoint in mix:
+        method, path = ENDPOINTS[endpoint]
+        try:
+            requests.request(method, url + path, json={'query': queries[0]}, timeout=timeout)
+        except requests.RequestException:
+            pass
+
+def _latency_summary(values: List[float]) -> Dict[str, Optional[float]]:
+    ordered = sorted(values)
+    summary = {}
+    for key, q in (('p50', 50), ('p90', 90), ('p99', 99), ('p999', 99.9), ('max', 100)):
+        value = percentile(ordered, q)
+        summary[key] = round(value, 2) if value is not None else None
+    return summary
+
+def summarize_samples(samples: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    """Пропускная способность, хвостовые задержки, ожидание в очереди и отказы лимитера"""
+    ok = [s for s in samples if 200 <= s['status'] < 400]
+    rejected = [s for s in samples if s['status'] == 429]
+    errors = [s for s in samples if s['status'] == 0 or s['status'] >= 500]
+    answered = [s for s in samples if s['status']]
+    # Ожидание до начала обработки: задержка клиента минус длительность обработки в приложении
+    queue = [max(0.0, s['latency'] * 1000 - s['server_ms']) for s in answered if s['server_ms'] is not None]
+    statuses = {}
+    for s in samples:
+        statuses[str(s['status'])] = statuses.get(str(s['status']), 0) + 1
+    return {
+        'requests': len(samples),
+        'ok': len(ok),
+        'rate_limited': len(rejected),
+        'errors': len(errors),
+        'statuses': statuses,
+        'throughput_per_second': round(len(ok) / elapsed, 2) if elapsed else None,
+        'offered_per_second': round(len(samples) / elapsed, 2) if elapsed else None,
+        'latency_ms': _latency_summary([s['latency'] * 1000 for s in ok]),
+        'server_ms': _latency_summary([s['server_ms'] for s in ok if s['server_ms'] is not None]),
+        'queue_ms': _latency_summary(queue)
+    }
+
+def build_report(stage: Dict[str, Any], clients: int) -> Dict[str, Any]:
+    """Сводка этапа: целиком и по каждому эндпоинту"""
+    samples, elapsed = stage['samples'], stage['elapsed']
+    by_endpoint = {}
+    for sample in samples:
+        by_endpoint.setdefault(sample['endpoint'], []).append(sample)
+    return {
+        'clients': clients,
+        'elapsed_seconds': round(elapsed, 2),
+        'overall': summarize_samples(samples, elapsed),
+        'endpoints': {name: summarize_samples(items, elapsed) for name, items in sorted(by_endpoint.items())}
+    }
+
+def print_stage(report: Dict[str, Any]):
+    print(f"\nКлиентов: {report['clients']}, длительность {report['elapsed_seconds']} с")
+    print(f"  {'endpoint':<12} {'req':>6} {'ok/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'queue p99':>10} "
+          f"{'429':>6} {'err':>5}")
+    rows = [('all', report['overall'])] + list(report['endpoints'].items())
+    for name, stats in rows:
+        print(f"  {name:<12} {stats['requests']:>6} {stats['throughput_per_second'] or 0:>8.2f} "
+              f"{stats['latency_ms']['p50'] or 0:>9.1f} {stats['latency_ms']['p99'] or 0:>9.1f} "
+              f"{stats['queue_ms']['p99'] or 0:>10.1f} {stats['rate_limited']:>6} {stats['errors']:>5}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест api_server с имитацией браузера")
+    parser.add_argument('--clients', type=int, nargs='+', default=[50], help='Одновременных клиентов (этапы)')
+    parser.add_argument('--duration', type=float, default=30, help='Длительность этапа (сек)')
+    parser.add_argument('--threads', type=int, default=16, help='Потоков обработки на воркер')
+    parser.add_argument('--workers', type=int, default=0, help='Воркеров gunicorn (0 - сервер в этом процессе)')
+    parser.add_argument('--url', help='Адрес уже запущенного сервера (воркеры/потоки задаются им)')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='Доли эндпоинтов, например search=1,links=2')
+    parser.add_argument('--queries', default=','.join(DEFAULT_QUERIES), help='Запросы через запятую')
+    parser.add_argument('--think-time', type=float, default=0.0, help='Средняя пауза клиента между запросами')
+    parser.add_argument('--timeout', type=float, default=60, help='Таймаут запроса клиента (сек)')
+    parser.add_argument('--no-rate-limit', action='store_true', help='Отключить лимитер API')
+    parser.add_argument('--launch-latency', default=Config.FAKE_DRIVER_LAUNCH_LATENCY,
+                        help='Распределение запуска браузера, например lognormal:1.0,0.3')
+    parser.add_argument('--page-latency', default=Config.FAKE_DRIVER_PAGE_LATENCY,
+                        help='Распределение загрузки страницы')
+    parser.add_argument('--launch-failure-rate', type=float, default=Config.FAKE_DRIVER_LAUNCH_FAILURE_RATE,
+                        help='Доля отказов запуска браузера')
+    parser.add_argument('--page-failure-rate', type=float, default=Config.FAKE_DRIVER_PAGE_FAILURE_RATE,
+                        help='Доля таймаутов загрузки страницы')
+    parser.add_argument('--seed', type=int, help='Начальное значение генератора клиентов')
+    parser.add_argument('--output', help='Файл результатов JSON (по умолчанию benchmarks/results/...)')
+    args = parser.parse_args()
+
+    backend = {
+        'DRIVER_BACKEND': 'fake',
+        'NAVIGATION_DELAY': '0',
+        'FAKE_DRIVER_LAUNCH_LATENCY': args.launch_latency,
+        'FAKE_DRIVER_PAGE_LATENCY': args.page_latency,
+        'FAKE_DRIVER_LAUNCH_FAILURE_RATE': str(args.launch_failure_rate),
+        'FAKE_DRIVER_PAGE_FAILURE_RATE': str(args.page_failure_rate),
+    }
+    rate_limit = not args.no_rate_limit
+    if args.url:
+        target, url = None, args.url.rstrip('/')
+    elif args.workers:
+        target = GunicornTarget(args.workers, args.threads, rate_limit, backend)
+        url = target.url
+    else:
+        for name, value in backend.items():
+            setattr(Config, name, type(getattr(Config, name))(value))
+        target = InProcessTarget(args.threads, rate_limit)
+        url = target.url
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'url': url,
+            'workers': args.workers or (None if args.url else 1),
+            'threads': None if args.url else args.threads,
+            'rate_limit': rate_limit,
+            'mix': parse_mix(args.mix),
+            'backend': backend,
+            'duration': args.duration
+        },
+        'stages': []
+    }
+    queries = [query.strip() for query in args.queries.split(',') if query.strip()]
+    try:
+        warm_up(url, report['meta']['mix'], queries, args.timeout)
+        for clients in args.clients:
+            stage = run_stage(url, clients, args.duration, report['meta']['mix'], queries,
+                              args.timeout, args.think_time, args.seed)
+            report['stages'].append(build_report(stage, clients))
+            print_stage(report['stages'][-1])
+    finally:
+        if target is not None:
+            target.close()
+
+    output = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"load_test_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nРезультаты сохранены: {output}")
+
+if __name__ == '__main__':
+    main()
@@ -1,39 +1,185 @@
+import atexit
+import copy
 import logging
 import os
-from datetime import datetime
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+
+from config import Config
+
+LOGGER_NAME = 'wikipedia_navigator'
+
+_setup_lock = threading.Lock()
+_listener = None
+
+class SizedTimedRotatingFileHandler(TimedRotatingFileHandler):
+    """Ротация файла лога по времени (when) и по размеру (max_bytes)"""
+
+    def __init__(self, filename, max_bytes=0, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.max_bytes = max_bytes
+
+    def shouldRollover(self, record):
+        if super().shouldRollover(record):
+            return True
+        if self.max_bytes > 0 and self.stream is not None:
+            self.stream.seek(0, 2)
+            return self.stream.tell() + len(self.format(record)) + 1 >= self.max_bytes
+        return False
+
+    def rotation_filename(self, default_name):
+        # Несколько ротаций по размеру за один интервал не перезаписывают друг друга
+        name, index = default_name, 0
+        while os.path.exists(name):
+            index += 1
+            name = f"{default_name}.{index}"
+        return name
+
+class RateLimitFilter(logging.Filter):
+    """
+    Ограничение частоты сообщений: не больше burst записей за interval секунд,
+    сверх лимита проходит каждая sample-я запись. Предупреждения и ошибки не ограничиваются.
+    """
+
+    def __init__(self, burst=None, interval=None, sample=None):
+        super().__init__()
+        self.burst = burst or Config.LOG_RATE_LIMIT
+        self.interval = interval or Config.LOG_RATE_INTERVAL
+        self.sample = sample or Config.LOG_SAMPLE_RATE
+        self._window_start = time.monotonic()
+        self._count = 0
+        self._suppressed = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.interval:
+                self._window_start = now
+                self._count = 0
+            self._count += 1
+            over_limit = self._count - self.burst
+            if over_limit > 0 and over_limit % self.sample != 0:
+                self._suppressed += 1
+                return False
+            if self._suppressed:
+                # Сообщение записи не меняется (запись видят и другие обработчики и фильтры):
+                # число пропущенных дописывает SuppressedCountFormatter
+                record.suppressed = self._suppressed
+                self._suppressed = 0
+        return True
+
+class SuppressedCountFormatter(logging.Formatter):
+    """Дописывает к сообщению число сообщений, пропущенных RateLimitFilter перед этой записью"""
+
+    def formatMessage(self, record):
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            record = copy.copy(record)
+            record.message = f"{record.message} (пропущено похожих сообщений: {suppressed})"
+        return super().formatMessage(record)
+
+def log_filename():
+    """
+    Файл лога процесса
+
+    С LOG_PER_PROCESS (воркеры gunicorn, см. gunicorn.conf.py) у каждого процесса свой файл
+    logs/wikipedia_navigator.<pid>.log: ротация одного файла из нескольких процессов
+    теряет строки или пишет их в уже переименованный файл.
+    """
+    if Config.LOG_PER_PROCESS:
+        return os.path.join('logs', f'{LOGGER_NAME}.{os.getpid()}.log')
+    return os.path.join('logs', f'{LOGGER_NAME}.log')
+
+def _build_handlers():
+    """Обработчики, выполняющие ввод-вывод (работают в потоке QueueListener)"""
+    formatter = SuppressedCountFormatter(Config.LOG_FORMAT, Config.LOG_DATE_FORMAT)
+
+    file_handler = SizedTimedRotatingFileHandler(
+        log_filename(),
+        max_bytes=Config.LOG_MAX_BYTES,
+        when=Config.LOG_ROTATE_WHEN,
+        backupCount=Config.LOG_BACKUP_COUNT,
+        encoding='utf-8'
+    )
+    file_handler.setLevel(Config.LOG_LEVEL)
+
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.WARNING)
+
+    for handler in (file_handler, console_handler):
+        handler.setFormatter(formatter)
+    return file_handler, console_handler
 
 def setup_logger():
-    """Настройка системы логирования"""
+    """
+    Настройка системы логирования
+
+    Повторные вызовы возвращают уже настроенный логгер. Запросный поток только
+    кладет запись в очередь, запись в файл и консоль выполняет QueueListener.
+    """
+    global _listener
     # Создаем папку для логов если её нет
     if not os.path.exists('logs'):
         os.makedirs('logs')
-    
-    # Настраиваем формат логов
-    log_format = '%(asctime)s - %(levelname)s - %(message)s'
-    date_format = '%Y-%m-%d %H:%M:%S'
-    
-    # Создаем логгер
-    logger = logging.getLogger('wikipedia_navigator')
-    logger.setLevel(logging.INFO)
-    
-    # Создаем файловый обработчик
-    log_filename = f'logs/wikipedia_navigator_{datetime.now().strftime("%Y%m%d")}.log'
-    file_handler = logging.FileHandler(log_filename, encoding='utf-8')
-    file_handler.setLevel(logging.INFO)
-    
-    # Создаем консольный обработчик
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.WARNING)
-    
-    # Создаем форматтер
-    formatter = logging.Formatter(log_format, date_format)
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
-    
-    # Добавляем обработчики к логгеру
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    
+
+    logger = logging.getLogger(LOGGER_NAME)
+    with _setup_lock:
+        if _listener is not None:
+            return logger
+
+        logger.setLevel(Config.LOG_LEVEL)
+        log_queue = queue.SimpleQueue()
+        # Новый список вместо изменения текущего: его может перебирать callHandlers
+        logger.handlers = [QueueHandler(log_queue)]
+
+        _listener = QueueListener(log_queue, *_build_handlers(), respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+    return logger
+
+class _DeferredSetupHandler(logging.Handler):
+    """Настраивает логирование при первой записи и передает ей запись"""
+
+    def emit(self, record):
+        logger = setup_logger()
+        for handler in logger.handlers:
+            if handler is not self:
+                handler.handle(record)
+
+def get_logger():
+    """
+    Логгер приложения без затрат на импорт модуля
+
+    Папка логов, файлы и поток записи создаются при первом сообщении (см. setup_logger).
+    """
+    logger = logging.getLogger(LOGGER_NAME)
+    with _setup_lock:
+        if not logger.handlers:
+            logger.setLevel(Config.LOG_LEVEL)
+            logger.addHandler(_DeferredSetupHandler())
+    return logger
+
+def shutdown_logging():
+    """Дописывает очередь и останавливает поток записи"""
+    global _listener
+    with _setup_lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+def get_sampled_logger(name, burst=None, interval=None, sample=None):
+    """Дочерний логгер с ограничением частоты для сообщений на каждый запрос (кэш и т.п.)"""
+    get_logger()
+    logger = logging.getLogger(f'{LOGGER_NAME}.{name}')
+    if not any(isinstance(f, RateLimitFilter) for f in logger.filters):
+        logger.addFilter(RateLimitFilter(burst, interval, sample))
     return logger
 
 def log_search_query(logger, query):
@@ -1,112 +1,342 @@
-from selenium import webdriver
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
-from webdriver_manager.chrome import ChromeDriverManager
-from cache_manager import cache_search_results, cache_navigation_results
+import importlib
+from config import Config
+from cache_manager import cache_search_results, cache_navigation_results, NegativeResult
+from page_parser import get_parsed_page, page_kind
+from timing import timed
+from metrics import record_browser_launch, record_browser_quit
+from circuit_breaker import first_open, get_breaker, record_outcome, retry_call
+from urllib.parse import urlparse
+import math
 import time
 import sys
 
-def create_driver():
-    """Создает драйвер с улучшенными настройками"""
+# selenium и webdriver_manager импортируются при первом обращении (main.By, main.WebDriverWait, ...):
+# импорт api_server и запуск CLI не платят за них, пока не понадобится браузер
+_LAZY_IMPORTS = {
+    'webdriver': ('selenium.webdriver', None),
+    'Keys': ('selenium.webdriver.common.keys', 'Keys'),
+    'By': ('selenium.webdriver.common.by', 'By'),
+    'Service': ('selenium.webdriver.chrome.service', 'Service'),
+    'WebDriverWait': ('selenium.webdriver.support.ui', 'WebDriverWait'),
+    'EC': ('selenium.webdriver.support.expected_conditions', None),
+    'TimeoutException': ('selenium.common.exceptions', 'TimeoutException'),
+    'NoSuchElementException': ('selenium.common.exceptions', 'NoSuchElementException'),
+    'WebDriverException': ('selenium.common.exceptions', 'WebDriverException'),
+    'ChromeDriverManager': ('webdriver_manager.chrome', 'ChromeDriverManager'),
+    'requests': ('requests', None),
+}
+
+def __getattr__(name):
+    """Ленивый импорт имен из _LAZY_IMPORTS (PEP 562)"""
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attribute = _LAZY_IMPORTS[name]
+    module = importlib.import_module(module_name)
+    value = getattr(module, attribute) if attribute else module
+    globals()[name] = value
+    return value
+
+# Внутри модуля ленивые имена читаются как атрибуты: _lazy.By, _lazy.WebDriverWait
+_lazy = sys.modules[__name__]
+
+@timed('driver_launch')
+def create_driver(backend=None):
+    """Создает драйвер с улучшенными настройками (backend - источник драйвера, по умолчанию DRIVER_BACKEND)"""
+    backend = backend or Config.DRIVER_BACKEND
     try:
-        service = Service(ChromeDriverManager().install())
-        options = webdriver.ChromeOptions()
+        if backend == 'http':
+            from http_driver import HttpDriver
+            driver = HttpDriver()
+            record_browser_launch(success=True)
+            return driver
+        if backend == 'fake':
+            from fake_driver import FakeDriver
+            driver = FakeDriver.launch()
+            record_browser_launch(success=True)
+            return driver
+        if backend == 'remote':
+            from remote_driver import get_browser_pool
+            driver = get_browser_pool().create_driver()
+            driver.set_page_load_timeout(Config.PAGE_LOAD_TIMEOUT)
+            record_browser_launch(success=True)
+            return driver
+        
+        service = _lazy.Service(_lazy.ChromeDriverManager().install())
+        options = _lazy.webdriver.ChromeOptions()
         options.add_argument('--no-sandbox')
         options.add_argument('--disable-dev-shm-usage')
         options.add_argument('--disable-gpu')
         options.add_argument('--window-size=1920,1080')
         
-        driver = webdriver.Chrome(service=service, options=options)
+        driver = _lazy.webdriver.Chrome(service=service, options=options)
         driver.set_page_load_timeout(30)
         driver.implicitly_wait(10)
+        record_browser_launch(success=True)
         return driver
     except Exception as e:
+        record_browser_launch(success=False)
         print(f"Ошибка при инициализации браузера: {e}")
         print("Убедитесь, что у вас установлен Google Chrome")
         return None
 
+@timed('driver_quit')
+def quit_driver(driver):
+    """Закрывает браузер"""
+    try:
+        driver.quit()
+    finally:
+        record_browser_quit()
+
 @cache_search_results(ttl=3600)
 def search_wikipedia(query):
-    driver = create_driver()
+    """
+    Поиск статьи
+    
+    Временные сбои повторяются в пределах общего бюджета повторов (circuit_breaker.py);
+    при HEDGE_ENABLED медленная загрузка дублируется второй попыткой (hedging.py).
+    """
+    if Config.HEDGE_ENABLED:
+        from hedging import get_hedged_fetcher
+        fetch = get_hedged_fetcher().fetch
+    else:
+        fetch = fetch_article
+    return retry_call(lambda: fetch(query), should_retry_search)
+
+def should_retry_search(result):
+    """Повторять ли поиск: браузер не запустился или временный сбой (кроме отказа открытого автомата)"""
+    if result is None:
+        return True
+    return isinstance(result, NegativeResult) and result.kind == 'transient' and 'circuit' not in result.details
+
+def article_breakers(backend):
+    """Автоматы защиты загрузки статьи: (источник драйвера, upstream); (None, None) - отключены"""
+    if not Config.CIRCUIT_BREAKER_ENABLED:
+        return None, None
+    return get_breaker(f"backend:{backend}"), get_breaker(f"upstream:{urlparse(Config.WIKIPEDIA_URL).netloc}")
+
+def fetch_article(query, backend=None, on_driver=None):
+    """
+    Открывает статью по запросу (без кэша)
+    
+    Args:
+        query: Поисковый запрос
+        backend: Источник драйвера (по умолчанию DRIVER_BACKEND)
+        on_driver: Вызывается с драйвером сразу после запуска (для отмены попытки извне)
+    
+    Returns:
+        Драйвер с открытой статьей, NegativeResult или None (браузер не запустился)
+    """
+    backend = backend or Config.DRIVER_BACKEND
+    launcher, upstream = article_breakers(backend)
+    blocked = first_open(launcher, upstream)
+    if blocked is not None:
+        # Открытый автомат: быстрый отказ вместо запуска браузера и ожидания таймаутов
+        return NegativeResult('transient', f"Circuit {blocked.name} is open",
+                              {'circuit': blocked.name, 'retry_after': math.ceil(blocked.retry_after()) or 1})
+    
+    driver = create_driver(backend)
+    record_outcome(launcher, driver is not None)
     if driver is None:
+        record_outcome(upstream, None)
         return None
+    if on_driver is not None:
+        on_driver(driver)
     
     try:
-        driver.get("https://www.wikipedia.org/")
+        with timed('navigation'):
+            driver.get(Config.WIKIPEDIA_URL)
         
         # Ждем появления поисковой строки
-        wait = WebDriverWait(driver, 10)
-        search_box = wait.until(EC.presence_of_element_located((By.NAME, "search")))
+        with timed('wait'):
+            wait = _lazy.WebDriverWait(driver, 10)
+            search_box = wait.until(_lazy.EC.presence_of_element_located((_lazy.By.NAME, "search")))
         
-        search_box.clear()
-        search_box.send_keys(query)
-        search_box.send_keys(Keys.RETURN)
+        with timed('navigation'):
+            search_box.clear()
+            search_box.send_keys(query)
+            search_box.send_keys(_lazy.Keys.RETURN)
         
         # Ждем загрузки результатов
-        time.sleep(3)
+        with timed('wait'):
+            time.sleep(Config.NAVIGATION_DELAY)
+        
+        # Статьи нет или запрос неоднозначен - отрицательный результат кэшируется на короткий срок
+        kind = page_kind(driver.page_source)
+        record_outcome(upstream, True)
+        if kind == 'not_found':
+            quit_driver(driver)
+            return NegativeResult(kind, f"No article found for query: {query}")
+        if kind == 'disambiguation':
+            options = [link['text'] for link in get_parsed_page(driver).links[:Config.MAX_LINKS_DISPLAY]]
+            quit_driver(driver)
+            return NegativeResult(kind, f"Query is ambiguous: {query}", {'options': options})
         
         return driver
-    except TimeoutException:
-        print("Превышено время ожидания загрузки страницы")
-        driver.quit()
-        return None
     except Exception as e:
+        # Прочие ошибки (сбой браузера, отмена попытки hedging.py) не относятся к upstream
+        record_outcome(upstream, False if is_upstream_failure(e) else None)
+        quit_driver(driver)
+        if isinstance(e, _lazy.TimeoutException):
+            print("Превышено время ожидания загрузки страницы")
+            return NegativeResult('transient', "Page load timed out")
         print(f"Ошибка при поиске: {e}")
-        driver.quit()
-        return None
+        return NegativeResult('transient', f"Search failed: {e}")
+
+def is_upstream_failure(error):
+    """Сбой на стороне upstream: таймаут загрузки, ошибка соединения или DNS, ответ 5xx, net::ERR_* браузера"""
+    if isinstance(error, (_lazy.TimeoutException, _lazy.requests.ConnectionError, _lazy.requests.Timeout)):
+        return True
+    if isinstance(error, _lazy.requests.HTTPError):
+        return error.response is not None and error.response.status_code >= 500
+    return isinstance(error, _lazy.WebDriverException) and 'net::ERR_' in (error.msg or '')
 
-def print_paragraphs(driver):
-    paragraphs = driver.find_elements(By.TAG_NAME, "p")
-    for index, para in enumerate(paragraphs):
-        print(f"Параграф {index + 1}: {para.text}\n")
+def print_paragraphs(driver, section=None):
+    """Выводит параграфы статьи или только выбранного раздела"""
+    # Этап extraction замеряется только здесь или внутри get_parsed_page, без вложенного двойного учета
+    if section is None:
+        with timed('extraction'):
+            paragraphs = [para.text for para in driver.find_elements(_lazy.By.TAG_NAME, "p")]
+    else:
+        paragraphs = get_parsed_page(driver).get_section_paragraphs(section['anchor'])
+        print(f"Раздел {section['number']}. {section['title']}\n")
+    if not paragraphs:
+        print("Параграфы не найдены.")
+    for index, text in enumerate(paragraphs):
+        print(f"Параграф {index + 1}: {text}\n")
         
+@timed('extraction')
 def print_links(driver):
-    links = driver.find_elements(By.CSS_SELECTOR, "a[href^='/wiki/']")
+    links = driver.find_elements(_lazy.By.CSS_SELECTOR, "a[href^='/wiki/']")
     for index, link in enumerate(links):
         print(f"Ссылка {index + 1}: {link.text} - {link.get_attribute('href')}\n")
 
 def print_contents(driver):
     """Выводит содержание (оглавление) статьи"""
-    contents = driver.find_elements(By.CSS_SELECTOR, ".toc li")
+    contents = get_parsed_page(driver).sections
     if not contents:
         print("Содержание для этой статьи отсутствует.")
-    for index, item in enumerate(contents):
-        print(f"{index + 1}. {item.text}")
+    for item in contents:
+        indent = "  " * (item['level'] - 1)
+        print(f"{indent}{item['number']}. {item['title']}")
     return contents
 
 def go_to_section(driver, section_index):
-    """Переходит к выбранному разделу статьи"""
+    """Переходит к выбранному разделу статьи по якорю"""
     try:
-        contents = driver.find_elements(By.CSS_SELECTOR, ".toc li")
-        if not contents:
+        page = get_parsed_page(driver)
+        if not page.sections:
             print("Нет доступных разделов для перехода.")
-            return
+            return None
         
-        section = section_index.split('.')
-        main_section = int(section[0]) - 1
-        sub_section = int(section[1]) if len(section) > 1 else None
-        
-        if main_section >= len(contents):
+        section = page.find_section(section_index)
+        if section is None:
             print("Номер раздела вне диапазона.")
-            return
-        
-        link = contents[main_section].find_element(By.TAG_NAME, "a")
+            return None
         
-        if sub_section is not None:
-            sub_contents = link.find_elements(By.XPATH, ".//following-sibling::ul//a")
-            if sub_section - 1 >= len(sub_contents):
-                print("Номер подраздела вне диапазона.")
-                return
-            link = sub_contents[sub_section - 1]
-        
-        link.click()
-        time.sleep(2)
+        # Прокручиваем страницу к якорю раздела без повторного поиска по DOM
+        driver.execute_script(
+            "var el = document.getElementById(arguments[0]); if (el) { el.scrollIntoView(); }",
+            section['anchor']
+        )
+        return section
     except Exception as e:
         print(f"Ошибка при переходе к разделу: {e}")
+        return None
+
+# Локальный индекс открывается один раз за сеанс CLI (без хранилища, истории и фонового потока DataManager)
+_local_index = None
+
+def get_local_index():
+    """Полнотекстовый индекс сохраненных статей (output/search_index.db)"""
+    global _local_index
+    if _local_index is None:
+        from search_index import SearchIndex
+        _local_index = SearchIndex()
+    return _local_index
+
+def print_local_search(query, limit=10):
+    """Ищет по локальному индексу сохраненных статей"""
+    results = get_local_index().search(query, limit)
+    if not results:
+        print("В сохраненных статьях ничего не найдено.")
+    for index, result in enumerate(results):
+        print(f"{index + 1}. {result['title']} (релевантность {result['score']})")
+        if result['summary']:
+            print(f"   {result['summary']}\n")
+    return results
+
+# Результаты выбора раздела: выход из программы и возврат к поиску
+_EXIT = object()
+_BACK = object()
+
+def print_search_failure(result):
+    """Сообщение об отрицательном результате поиска"""
+    if result.kind == 'not_found':
+        print("Статья не найдена. Попробуйте другой запрос.")
+    elif result.kind == 'disambiguation':
+        print("Запрос неоднозначен. Возможные статьи: " + ", ".join(result.details.get('options', [])))
+    else:
+        print("Временная ошибка при поиске. Попробуйте позже.")
+
+def choose_section(driver):
+    """Выводит содержание статьи и переходит к выбранному разделу (раздел, None, _BACK или _EXIT)"""
+    contents = print_contents(driver)
+    if not contents:
+        return None
+    section_choice = input("Введите номер раздела, к которому хотите перейти (например, 1 или 2.1) или 'назад' для возврата: ")
+    if section_choice.lower() == "выход":
+        quit_driver(driver)
+        print("Выход из программы...")
+        return _EXIT
+    if section_choice.lower() == "назад":
+        return _BACK
+    return go_to_section(driver, section_choice)
+
+# Действия меню: принимают драйвер и текущий раздел, возвращают новый раздел или _EXIT
+
+def scroll_paragraphs(driver, section):
+    print_paragraphs(driver, section)
+    return section
+
+def follow_link(driver, section):
+    print_links(driver)
+    link_choice = input("Введите номер ссылки, по которой хотите перейти, 'назад' для возврата или 'выход' для завершения программы: ")
+    if link_choice.lower() == "выход":
+        quit_driver(driver)
+        print("Выход из программы...")
+        return _EXIT
+    if link_choice.lower() == "назад":
+        return section
+    if not link_choice.isdigit():
+        print("Некорректный ввод. Пожалуйста, введите правильный номер.")
+        return section
+    link_choice = int(link_choice) - 1
+    links = driver.find_elements(_lazy.By.CSS_SELECTOR, "a[href^='/wiki/']")
+    if link_choice >= len(links):
+        print("Номер ссылки вне диапазона.")
+        return section
+    links[link_choice].click()
+    time.sleep(3)
+    print("\nСодержание новой статьи:")
+    section = choose_section(driver)
+    return None if section is _BACK else section
+
+def exit_program(driver, section):
+    quit_driver(driver)
+    print("Выход из программы...")
+    return _EXIT
+
+def search_saved_articles(driver, section):
+    local_query = input("Введите запрос (фразы - в кавычках): ")
+    print_local_search(local_query)
+    return section
+
+MENU_ACTIONS = {
+    "1": scroll_paragraphs,
+    "2": follow_link,
+    "3": exit_program,
+    "4": search_saved_articles,
+}
 
 def main():
     query = input("Введите первоначальный поисковый запрос: ")
@@ -115,71 +345,32 @@ def main():
         return
     driver = search_wikipedia(query)
     
+    if isinstance(driver, NegativeResult):
+        print_search_failure(driver)
+        return main()
     if driver is None:
         print("Не удалось инициализировать браузер. Программа завершается.")
         return
     
     print("\nСодержание текущей статьи:")
-    contents = print_contents(driver)
-    
-    if contents:
-        section_choice = input("Введите номер раздела, к которому хотите перейти (например, 1 или 2.1) или 'назад' для возврата: ")
-        if section_choice.lower() == "выход":
-            print("Выход из программы...")
-            driver.quit()
-            return
-        elif section_choice.lower() == "назад":
-            return main()
-        else:
-            go_to_section(driver, section_choice)
+    current_section = choose_section(driver)
+    if current_section is _BACK:
+        return main()
     
-    while True:
+    while current_section is not _EXIT:
         print("\nЧто бы вы хотели сделать дальше?")
         print("1. Пролистать параграфы текущего раздела")
         print("2. Перейти на одну из связанных страниц")
         print("3. Выйти из программы")
+        print("4. Поиск по сохраненным статьям (без браузера)")
         
-        choice = input("Введите ваш выбор (1, 2 или 3): ")
+        choice = input("Введите ваш выбор (1, 2, 3 или 4): ")
         
-        if choice == "1":
-            print_paragraphs(driver)
-        elif choice == "2":
-            print_links(driver)
-            link_choice = input("Введите номер ссылки, по которой хотите перейти, 'назад' для возврата или 'выход' для завершения программы: ")
-            if link_choice.lower() == "выход":
-                driver.quit()
-                print("Выход из программы...")
-                break
-            elif link_choice.lower() == "назад":
-                continue
-            elif link_choice.isdigit():
-                link_choice = int(link_choice) - 1
-                links = driver.find_elements(By.CSS_SELECTOR, "a[href^='/wiki/']")
-                if link_choice < len(links):
-                    links[link_choice].click()
-                    time.sleep(3)
-                    print("\nСодержание новой статьи:")
-                    contents = print_contents(driver)
-                    if contents:
-                        section_choice = input("Введите номер раздела, к которому хотите перейти (например, 1 или 2.1) или 'назад' для возврата: ")
-                        if section_choice.lower() == "выход":
-                            driver.quit()
-                            print("Выход из программы...")
-                            break
-                        elif section_choice.lower() == "назад":
-                            continue
-                        else:
-                            go_to_section(driver, section_choice)
-                else:
-                    print("Номер ссылки вне диапазона.")
-            else:
-                print("Некорректный ввод. Пожалуйста, введите правильный номер.")
-        elif choice == "3":
-            driver.quit()
-            print("Выход из программы...")
-            break
-        else:
+        action = MENU_ACTIONS.get(choice)
+        if action is None:
             print("Некорректный выбор. Пожалуйста, попробуйте снова.")
+            continue
+        current_section = action(driver, current_section)
             
 if __name__ == "__main__":
     main()
@@ -0,0 +1,177 @@
+import os
+import threading
+from types import SimpleNamespace
+
+from config import Config
+from timing import add_observer
+
+# В gunicorn каждый воркер пишет значения в файлы PROMETHEUS_MULTIPROC_DIR,
+# а /metrics агрегирует их по всем процессам (см. gunicorn.conf.py)
+MULTIPROCESS = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+BUCKETS = Config.TIMING_BUCKETS
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+def _create_metrics() -> SimpleNamespace:
+    """Создает метрики Prometheus (prometheus_client импортируется здесь)"""
+    from prometheus_client import Counter, Gauge, Histogram
+
+    REQUESTS = Counter(
+        'wikinav_http_requests_total', 'HTTP requests by route, method and status',
+        ['route', 'method', 'status']
+    )
+    REQUEST_DURATION = Histogram(
+        'wikinav_http_request_duration_seconds', 'HTTP request latency by route',
+        ['route'], buckets=BUCKETS
+    )
+    REQUEST_ERRORS = Counter(
+        'wikinav_http_request_errors_total', 'HTTP requests that ended with status >= 500',
+        ['route']
+    )
+    CACHE_OPERATIONS = Counter(
+        'wikinav_cache_operations_total', 'Cache lookups by result (hit, miss, error)',
+        ['cache', 'result']
+    )
+    BROWSER_LAUNCHES = Counter(
+        'wikinav_browser_launches_total', 'Browser launches by result', ['result']
+    )
+    BROWSER_QUITS = Counter(
+        'wikinav_browser_quits_total', 'Browser shutdowns'
+    )
+    BROWSERS_ACTIVE = Gauge(
+        'wikinav_browsers_active', 'Browsers currently running', multiprocess_mode='livesum'
+    )
+    HEDGED_FETCHES = Counter(
+        'wikinav_hedged_fetches_total', 'Hedged article fetches (launched, won, budget_exhausted)', ['outcome']
+    )
+    CIRCUIT_STATE = Gauge(
+        'wikinav_circuit_state', 'Circuit breaker state (0 - closed, 1 - half-open, 2 - open)', ['circuit'],
+        multiprocess_mode='max'
+    )
+    CIRCUIT_REJECTIONS = Counter(
+        'wikinav_circuit_rejections_total', 'Calls rejected by an open circuit breaker', ['circuit']
+    )
+    SCHEDULER_QUEUE_DEPTH = Gauge(
+        'wikinav_scheduler_queue_depth', 'Requests waiting for a browser slot by priority class', ['priority'],
+        multiprocess_mode='livesum'
+    )
+    SCHEDULER_WAIT = Histogram(
+        'wikinav_scheduler_wait_seconds', 'Time waiting for a browser slot by priority class',
+        ['priority'], buckets=BUCKETS
+    )
+    SCHEDULER_REJECTIONS = Counter(
+        'wikinav_scheduler_rejections_total', 'Requests rejected by the scheduler (queue_full, timeout)',
+        ['priority', 'reason']
+    )
+    STAGE_DURATION = Histogram(
+        'wikinav_stage_duration_seconds', 'Duration of request stages (see timing.py)',
+        ['stage'], buckets=BUCKETS
+    )
+
+    # Длительности запуска/закрытия браузера берутся из этапов timing
+    BROWSER_STAGE_DURATIONS = {
+        'driver_launch': Histogram('wikinav_browser_launch_duration_seconds', 'Browser launch duration',
+                                   buckets=BUCKETS),
+        'driver_quit': Histogram('wikinav_browser_quit_duration_seconds', 'Browser shutdown duration',
+                                 buckets=BUCKETS),
+    }
+
+    return SimpleNamespace(
+        REQUESTS=REQUESTS, REQUEST_DURATION=REQUEST_DURATION, REQUEST_ERRORS=REQUEST_ERRORS,
+        CACHE_OPERATIONS=CACHE_OPERATIONS, BROWSER_LAUNCHES=BROWSER_LAUNCHES, BROWSER_QUITS=BROWSER_QUITS,
+        BROWSERS_ACTIVE=BROWSERS_ACTIVE, HEDGED_FETCHES=HEDGED_FETCHES, CIRCUIT_STATE=CIRCUIT_STATE,
+        CIRCUIT_REJECTIONS=CIRCUIT_REJECTIONS, SCHEDULER_QUEUE_DEPTH=SCHEDULER_QUEUE_DEPTH,
+        SCHEDULER_WAIT=SCHEDULER_WAIT, SCHEDULER_REJECTIONS=SCHEDULER_REJECTIONS,
+        STAGE_DURATION=STAGE_DURATION, BROWSER_STAGE_DURATIONS=BROWSER_STAGE_DURATIONS
+    )
+
+def _get() -> SimpleNamespace:
+    """
+    Метрики процесса; создаются при первой записи
+
+    prometheus_client тянет http.server, http.client и email - импорт metrics (а с ним
+    main и cache_manager) его не загружает, платит только первый учет.
+    """
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = _create_metrics()
+    return _metrics
+
+def _observe_stage(stage: str, duration: float):
+    """Получатель замеров timing: этапы попадают в гистограмму Prometheus"""
+    if stage.startswith('request:'):
+        return
+    metrics = _get()
+    metrics.STAGE_DURATION.labels(stage=stage).observe(duration)
+    histogram = metrics.BROWSER_STAGE_DURATIONS.get(stage)
+    if histogram is not None:
+        histogram.observe(duration)
+
+add_observer(_observe_stage)
+
+def observe_request(route: str, method: str, status: int, duration: float):
+    """Учитывает обработанный HTTP-запрос"""
+    metrics = _get()
+    metrics.REQUESTS.labels(route=route, method=method, status=str(status)).inc()
+    metrics.REQUEST_DURATION.labels(route=route).observe(duration)
+    if status >= 500:
+        metrics.REQUEST_ERRORS.labels(route=route).inc()
+
+def record_cache(result: str, cache: str = 'redis'):
+    """Учитывает обращение к кэшу: result = hit | miss | error"""
+    _get().CACHE_OPERATIONS.labels(cache=cache, result=result).inc()
+
+def record_browser_launch(success: bool):
+    """Учитывает запуск браузера"""
+    metrics = _get()
+    metrics.BROWSER_LAUNCHES.labels(result='success' if success else 'failure').inc()
+    if success:
+        metrics.BROWSERS_ACTIVE.inc()
+
+def record_browser_quit():
+    """Учитывает закрытие браузера"""
+    metrics = _get()
+    metrics.BROWSER_QUITS.inc()
+    metrics.BROWSERS_ACTIVE.dec()
+
+def record_hedge(outcome: str):
+    """Учитывает дублирование загрузки: outcome = launched | won | budget_exhausted"""
+    _get().HEDGED_FETCHES.labels(outcome=outcome).inc()
+
+CIRCUIT_STATE_VALUES = {'closed': 0, 'half_open': 1, 'open': 2}
+
+def record_circuit_state(circuit: str, state: str):
+    """Учитывает смену состояния автомата защиты (circuit_breaker.py)"""
+    _get().CIRCUIT_STATE.labels(circuit=circuit).set(CIRCUIT_STATE_VALUES[state])
+
+def record_circuit_rejection(circuit: str):
+    """Учитывает вызов, отклоненный открытым автоматом"""
+    _get().CIRCUIT_REJECTIONS.labels(circuit=circuit).inc()
+
+def record_queue_depth(priority: str, depth: int):
+    """Длина очереди класса приоритета (scheduler.py)"""
+    _get().SCHEDULER_QUEUE_DEPTH.labels(priority=priority).set(depth)
+
+def observe_queue_wait(priority: str, duration: float):
+    """Учитывает ожидание слота браузера"""
+    _get().SCHEDULER_WAIT.labels(priority=priority).observe(duration)
+
+def record_queue_rejection(priority: str, reason: str):
+    """Учитывает отказ планировщика: reason = queue_full | timeout"""
+    _get().SCHEDULER_REJECTIONS.labels(priority=priority, reason=reason).inc()
+
+def render_metrics():
+    """Текст в формате Prometheus exposition и его Content-Type"""
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, REGISTRY, generate_latest, multiprocess
+
+    _get()  # Метрики процесса регистрируются и до первой записи
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
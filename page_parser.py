@@ -0,0 +1,365 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional
+
+from config import Config
+from timing import timed
+
+HEADING_TAGS = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']
+
+# Контейнеры оглавления: Vector-2022 (боковая панель) и классическая тема
+TOC_CONTAINER_SELECTORS = ['#vector-toc', '#mw-panel-toc', '#toc', '.toc']
+TOC_NUMBER_SELECTOR = '.tocnumber, .vector-toc-numb'
+TOC_TOP_ANCHORS = ('', 'mw-content-text', 'top')
+
+REVISION_ID_RE = re.compile(r'"wgRevisionId"\s*:\s*(\d+)')
+
+# Страницы без статьи: "ничего не найдено" поиска и несуществующая статья
+NOT_FOUND_RE = re.compile(r'mw-search-nonefound|id="noarticletext"')
+# Страница неоднозначности: шаблон и категория MediaWiki (en и ru)
+DISAMBIGUATION_RE = re.compile(r'id="disambigbox"|\bmw-disambig\b|"wgCategories":\[[^\]]*'
+                               r'(?:[Dd]isambiguation pages|Страницы значений)')
+
+# Ключ индекса для параграфов до первого заголовка (вступление статьи)
+INTRO_ANCHOR = ''
+
+def _strip_fragment(url: str) -> str:
+    """Убирает якорь (#...) из URL"""
+    return url.split('#', 1)[0] if url else url
+
+def _node_text(node) -> str:
+    """Текст узла с одиночными пробелами: слова по краям вложенных тегов не склеиваются"""
+    return ' '.join(node.get_text().split())
+
+class ParsedPage:
+    """Разобранная статья: дерево оглавления и текст разделов без обращений к браузеру"""
+
+    def __init__(self, html: str, url: Optional[str] = None):
+        self.url = url
+        from bs4 import BeautifulSoup  # ленивый импорт: bs4/lxml нужны только при разборе
+        self.soup = BeautifulSoup(html or '', 'lxml')
+        self._toc = None
+        self._sections = None
+        self._headings = []
+        self._paragraph_index = None
+
+    @property
+    def title(self) -> str:
+        """Заголовок статьи"""
+        heading = self.soup.find(id='firstHeading') or self.soup.find('h1')
+        if heading is not None:
+            return heading.get_text(' ', strip=True)
+        return self.soup.title.get_text(strip=True) if self.soup.title else ''
+
+    @property
+    def revision_id(self) -> Optional[int]:
+        """Номер ревизии MediaWiki из конфигурации страницы (wgRevisionId)"""
+        for script in self.soup.find_all('script'):
+            match = REVISION_ID_RE.search(script.string or '')
+            if match:
+                return int(match.group(1))
+        return None
+
+    @property
+    def content_hash(self) -> str:
+        """
+        Отпечаток текста статьи: параграфы и отпечатки разделов, а не разметка
+
+        Сериализованный HTML меняется при каждой отрисовке (метки времени парсера, порядок
+        атрибутов, служебные ссылки), и неизмененная статья выглядела бы измененной.
+        """
+        digest = hashlib.sha256()
+        for text in self.iter_paragraph_text():
+            digest.update(text.encode('utf-8') + b'\n')
+        for anchor, section_hash in self.section_hashes().items():
+            digest.update(f"{anchor}:{section_hash}\n".encode('utf-8'))
+        return digest.hexdigest()
+
+    def section_hashes(self) -> Dict[str, str]:
+        """Отпечатки текста каждого раздела (без подразделов) по якорю"""
+        return {
+            anchor: hashlib.sha1("\n".join(paragraphs).encode('utf-8')).hexdigest()
+            for anchor, paragraphs in self.paragraph_index.items()
+        }
+
+    @property
+    def toc(self) -> List[Dict[str, Any]]:
+        """Вложенное дерево разделов (строится один раз на страницу)"""
+        if self._toc is None:
+            self._toc = self._parse_toc_container() or self._parse_headings()
+        return self._toc
+
+    @property
+    def sections(self) -> List[Dict[str, Any]]:
+        """Плоский список разделов в порядке оглавления"""
+        if self._sections is None:
+            self._sections = []
+            stack = list(reversed(self.toc))
+            while stack:
+                entry = stack.pop()
+                self._sections.append(entry)
+                stack.extend(reversed(entry['children']))
+        return self._sections
+
+    def find_section(self, number: str) -> Optional[Dict[str, Any]]:
+        """Находит раздел по номеру ("2" или "2.1")"""
+        number = (number or '').strip().rstrip('.')
+        for entry in self.sections:
+            if entry['number'] == number:
+                return entry
+        return None
+
+    def _parse_toc_container(self) -> List[Dict[str, Any]]:
+        """Разбирает оглавление страницы (Vector-2022 или классическое .toc)"""
+        for selector in TOC_CONTAINER_SELECTORS:
+            container = self.soup.select_one(selector)
+            if container is None:
+                continue
+            root = container.find('ul')
+            if root is None:
+                continue
+            tree = self._parse_toc_list(root, level=1, prefix='')
+            if tree:
+                return tree
+        return []
+
+    def _parse_toc_list(self, ul, level: int, prefix: str) -> List[Dict[str, Any]]:
+        """Рекурсивно разбирает список <ul> оглавления"""
+        entries = []
+        for li in ul.find_all('li', recursive=False):
+            link = li.find('a', recursive=False)
+            sub_list = li.find('ul', recursive=False)
+            if link is None:
+                continue
+
+            anchor = (link.get('href') or '').split('#', 1)[-1]
+            if anchor in TOC_TOP_ANCHORS:
+                # Пункт "(В начало)" в Vector-2022 - не раздел
+                continue
+
+            number_el = link.select_one(TOC_NUMBER_SELECTOR)
+            number = number_el.get_text(strip=True) if number_el is not None else ''
+            if not number:
+                number = f"{prefix}{len(entries) + 1}"
+
+            title = link.get_text(' ', strip=True)
+            if title.startswith(number):
+                title = title[len(number):].strip()
+
+            entry = {
+                'number': number,
+                'title': title,
+                'anchor': anchor,
+                'level': level,
+                'children': []
+            }
+            if sub_list is not None:
+                entry['children'] = self._parse_toc_list(sub_list, level + 1, f"{number}.")
+            entries.append(entry)
+        return entries
+
+    def _parse_headings(self) -> List[Dict[str, Any]]:
+        """Строит дерево разделов по заголовкам, если оглавления на странице нет"""
+        content = self.soup.find(id='mw-content-text') or self.soup
+        roots = []
+        stack = []
+        for heading in content.find_all(HEADING_TAGS[1:]):
+            headline = heading.find(class_='mw-headline')
+            anchor = self._heading_anchor(heading)
+            if not anchor:
+                continue
+
+            depth = int(heading.name[1])
+            while stack and stack[-1][0] >= depth:
+                stack.pop()
+            siblings = stack[-1][1]['children'] if stack else roots
+            prefix = f"{stack[-1][1]['number']}." if stack else ''
+
+            entry = {
+                'number': f"{prefix}{len(siblings) + 1}",
+                'title': (headline or heading).get_text(' ', strip=True),
+                'anchor': anchor,
+                'level': len(stack) + 1,
+                'children': []
+            }
+            siblings.append(entry)
+            stack.append((depth, entry))
+        return roots
+
+    def _heading_anchor(self, heading) -> Optional[str]:
+        """Возвращает якорь заголовка (новая и классическая разметка)"""
+        if heading.get('id'):
+            return heading['id']
+        headline = heading.find(class_='mw-headline')
+        return headline.get('id') if headline is not None else None
+
+    def _build_paragraph_index(self):
+        """Один проход по документу: каждый параграф относится к ближайшему заголовку выше"""
+        content = self.soup.find(id='mw-content-text') or self.soup
+        self._headings = []
+        self._paragraph_index = {INTRO_ANCHOR: []}
+        current = INTRO_ANCHOR
+        for node in content.find_all(['p'] + HEADING_TAGS[1:]):
+            if node.name == 'p':
+                text = _node_text(node)
+                if text:
+                    self._paragraph_index[current].append(text)
+                continue
+            anchor = self._heading_anchor(node)
+            if not anchor:
+                continue
+            current = anchor
+            self._headings.append((anchor, int(node.name[1])))
+            self._paragraph_index.setdefault(anchor, [])
+
+    @property
+    def paragraph_index(self) -> Dict[str, List[str]]:
+        """Параграфы, сгруппированные по якорю раздела (вступление - под ключом '')"""
+        if self._paragraph_index is None:
+            self._build_paragraph_index()
+        return self._paragraph_index
+
+    @property
+    def paragraphs(self) -> List[str]:
+        """Все параграфы статьи в порядке следования"""
+        result = list(self.paragraph_index[INTRO_ANCHOR])
+        for anchor, _ in self._headings:
+            result.extend(self._paragraph_index[anchor])
+        return result
+
+    def iter_paragraph_text(self) -> Iterator[str]:
+        """
+        Тексты параграфов по ходу обхода документа, без списка всех текстов
+
+        Пробелы между вложенными тегами сохраняются, как в WebElement.text (ответы API).
+        """
+        content = self.soup.find(id='mw-content-text') or self.soup
+        for node in content.find_all('p'):
+            text = _node_text(node)
+            if text:
+                yield text
+
+    def iter_links(self) -> Iterator[Dict[str, str]]:
+        """Внутренние ссылки статьи на другие страницы Wikipedia по одной"""
+        content = self.soup.find(id='mw-content-text') or self.soup
+        for link in content.select("a[href^='/wiki/']"):
+            text = link.get_text(strip=True)
+            if text:
+                yield {'text': text, 'url': link['href']}
+
+    @property
+    def links(self) -> List[Dict[str, str]]:
+        """Внутренние ссылки статьи на другие страницы Wikipedia"""
+        return list(self.iter_links())
+
+    def to_content(self) -> Dict[str, Any]:
+        """Содержимое статьи для сохранения в хранилище"""
+        index = self.paragraph_index
+        anchors = [INTRO_ANCHOR] + [anchor for anchor, _ in self._headings]
+        return {
+            'url': self.url,
+            'sections': [
+                {key: entry[key] for key in ('number', 'title', 'anchor', 'level')}
+                for entry in self.sections
+            ],
+            # Список, а не словарь: порядок разделов сохраняется при канонической сериализации
+            'paragraphs': [{'anchor': anchor, 'paragraphs': index[anchor]} for anchor in anchors],
+            'links': self.links
+        }
+
+    def resolve_section(self, section: str) -> Optional[Dict[str, Any]]:
+        """Находит раздел по номеру ("2.1") или по якорю"""
+        entry = self.find_section(section)
+        if entry is not None:
+            return entry
+        for entry in self.sections:
+            if entry['anchor'] == section:
+                return entry
+        return None
+
+    def get_section_paragraphs(self, anchor: str, include_subsections: bool = True) -> List[str]:
+        """Возвращает параграфы раздела из индекса сохраненной страницы"""
+        index = self.paragraph_index
+        if anchor not in index or anchor == INTRO_ANCHOR:
+            return list(index.get(anchor, []))
+        if not include_subsections:
+            return list(index[anchor])
+
+        paragraphs = []
+        level = None
+        for heading_anchor, heading_level in self._headings:
+            if level is None:
+                if heading_anchor == anchor:
+                    level = heading_level
+                    paragraphs.extend(index[heading_anchor])
+                continue
+            if heading_level <= level:
+                break
+            paragraphs.extend(index[heading_anchor])
+        return paragraphs
+
+    def get_section_text(self, anchor: str) -> str:
+        """Возвращает текст раздела одной строкой"""
+        return "\n\n".join(self.get_section_paragraphs(anchor))
+
+# Кэш разобранных страниц: (URL без якоря, идентификатор загрузки) -> ParsedPage
+_page_cache = OrderedDict()
+_page_cache_lock = threading.Lock()
+
+# Время начала навигации документа: свое у каждой загрузки страницы в браузере
+PAGE_LOAD_ID_SCRIPT = 'return performance.timeOrigin'
+
+def page_kind(html: str) -> str:
+    """Вид страницы по HTML без разбора: article, not_found или disambiguation"""
+    if NOT_FOUND_RE.search(html or ''):
+        return 'not_found'
+    if DISAMBIGUATION_RE.search(html or ''):
+        return 'disambiguation'
+    return 'article'
+
+def page_load_id(driver) -> Optional[Any]:
+    """
+    Идентификатор текущей загрузки страницы драйвера (None - определить нельзя)
+
+    Повторная загрузка того же URL дает новый идентификатор, поэтому кэш разобранных
+    страниц не отдает содержимое прошлой загрузки.
+    """
+    try:
+        return driver.execute_script(PAGE_LOAD_ID_SCRIPT)
+    except Exception:
+        return None
+
+def get_parsed_page(driver) -> ParsedPage:
+    """Возвращает разобранную текущую страницу драйвера (с кэшированием в пределах одной загрузки)"""
+    url = _strip_fragment(driver.current_url)
+    load_id = page_load_id(driver)
+    key = (url, load_id)
+    if load_id is not None:
+        with _page_cache_lock:
+            page = _page_cache.get(key)
+            if page is not None:
+                _page_cache.move_to_end(key)
+                return page
+
+    with timed('extraction'):
+        html = driver.page_source
+    with timed('parse'):
+        page = ParsedPage(html, url)
+    if load_id is not None:
+        with _page_cache_lock:
+            _page_cache[key] = page
+            while len(_page_cache) > Config.PAGE_CACHE_SIZE:
+                _page_cache.popitem(last=False)
+    return page
+
+def clear_page_cache(url: Optional[str] = None):
+    """Очищает кэш разобранных страниц (целиком или все загрузки одного URL)"""
+    with _page_cache_lock:
+        if url is None:
+            _page_cache.clear()
+            return
+        url = _strip_fragment(url)
+        for key in [key for key in _page_cache if key[0] == url]:
+            del _page_cache[key]
@@ -0,0 +1,263 @@
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Callable, Dict, Optional
+
+from config import Config
+
+PROFILE_MODES = ('sampling', 'cprofile')
+
+class ProfilerBusyError(RuntimeError):
+    """Сеанс профилирования уже выполняется"""
+
+def collapse_stack(frame, max_depth: int = 128) -> str:
+    """
+    Стек кадра в свернутом формате flamegraph.pl/speedscope: "корень;...;вершина"
+
+    Кадр записывается как "функция (файл:строка)"; путь к файлу сокращается до имени.
+    """
+    names = []
+    while frame is not None and len(names) < max_depth:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+class ProfileSession:
+    """
+    Сеанс профилирования запросов API на N секунд или N запросов
+
+    Режимы:
+        sampling - фоновый поток каждые interval секунд снимает стеки потоков, которые
+            сейчас обрабатывают запрос (sys._current_frames); запросы не замедляются
+        cprofile - cProfile включается на время обработки запроса; одновременно
+            профилируется один запрос, остальные выполняются без профилирования
+    """
+
+    def __init__(self, mode: str = 'sampling', seconds: Optional[float] = None,
+                 requests: Optional[int] = None, route: Optional[str] = None,
+                 interval: Optional[float] = None):
+        """
+        Инициализация
+
+        Args:
+            mode: sampling или cprofile
+            seconds: Длительность сеанса (не больше Config.PROFILE_MAX_SECONDS)
+            requests: Завершить после N профилированных запросов (не дольше seconds)
+            route: Профилировать только этот маршрут (endpoint Flask, например api_paragraphs)
+            interval: Интервал выборки стеков в режиме sampling (сек)
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        if requests is not None and requests < 1:
+            raise ValueError("requests must be positive")
+        self.id = uuid.uuid4().hex
+        self.mode = mode
+        self.seconds = min(float(seconds or Config.PROFILE_DEFAULT_SECONDS), Config.PROFILE_MAX_SECONDS)
+        self.requests = requests
+        self.route = route
+        self.interval = max(float(interval or Config.PROFILE_SAMPLE_INTERVAL), 0.001)
+
+        self.stacks = Counter()
+        self.stats = None
+        self.samples = 0
+        self.requests_profiled = 0
+        self.requests_skipped = 0
+        self.started_at = None
+        self.elapsed = 0.0
+
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._cprofile_lock = threading.Lock()
+        self._done = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def matches(self, route: Optional[str]) -> bool:
+        """Профилируется ли запрос маршрута (служебные маршруты admin_* - никогда)"""
+        if not route or route.startswith('admin_'):
+            return False
+        return self.route is None or route == self.route
+
+    def begin_request(self, route: Optional[str]) -> Any:
+        """Начало обработки запроса; возвращает метку для end_request или None"""
+        if self._done.is_set() or not self.matches(route):
+            return None
+        if self.mode == 'sampling':
+            ident = threading.get_ident()
+            with self._lock:
+                self._threads[ident] = route
+            return ident
+
+        # cProfile нельзя включить в двух потоках одновременно - лишние запросы пропускаются
+        if not self._cprofile_lock.acquire(blocking=False):
+            self.requests_skipped += 1
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Профилировщик уже включен другим инструментом
+            self._cprofile_lock.release()
+            self.requests_skipped += 1
+            return None
+        return profile
+
+    def end_request(self, token: Any):
+        """Конец обработки запроса, начатого begin_request"""
+        if token is None:
+            return
+        if self.mode == 'sampling':
+            with self._lock:
+                self._threads.pop(token, None)
+                self.requests_profiled += 1
+                count = self.requests_profiled
+        else:
+            token.disable()
+            self._cprofile_lock.release()
+            with self._lock:
+                if self.stats is None:
+                    self.stats = pstats.Stats(token)
+                else:
+                    self.stats.add(token)
+                self.requests_profiled += 1
+                count = self.requests_profiled
+        if self.requests is not None and count >= self.requests:
+            self._done.set()
+
+    def run(self):
+        """Выполняет сеанс: ждет истечения времени или N запросов"""
+        self.started_at = time.time()
+        start = time.perf_counter()
+        sampler = None
+        if self.mode == 'sampling':
+            sampler = threading.Thread(target=self._sample_loop, name='profiler-sampler', daemon=True)
+            sampler.start()
+        self._done.wait(self.seconds)
+        self._done.set()
+        if sampler is not None:
+            sampler.join()
+        self.elapsed = time.perf_counter() - start
+
+    def stop(self):
+        """Досрочно завершает сеанс"""
+        self._done.set()
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while not self._done.wait(self.interval):
+            with self._lock:
+                idents = [ident for ident in self._threads if ident != own]
+            if not idents:
+                continue
+            frames = sys._current_frames()
+            for ident in idents:
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.stacks[collapse_stack(frame)] += 1
+                    self.samples += 1
+            del frames
+
+    def collapsed(self) -> str:
+        """Стеки режима sampling в свернутом формате ("стек количество" в строке)"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def pstats_bytes(self) -> bytes:
+        """Результат режима cprofile в формате файла pstats (pstats.Stats(path), snakeviz)"""
+        return marshal.dumps(self.stats.stats if self.stats is not None else {})
+
+    def text_report(self, limit: int = 40, sort: str = 'cumulative') -> str:
+        """Текстовый отчет pstats, отсортированный по sort"""
+        if self.stats is None:
+            return "No requests profiled\n"
+        output = io.StringIO()
+        self.stats.stream = output
+        self.stats.sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+    def summary(self, top: int = 20) -> Dict[str, Any]:
+        """Сводка сеанса; для sampling - самые частые стеки"""
+        result = {
+            'mode': self.mode,
+            'route': self.route,
+            'seconds': round(self.elapsed, 3),
+            'requests_profiled': self.requests_profiled,
+            'requests_skipped': self.requests_skipped,
+        }
+        if self.mode == 'sampling':
+            result['interval'] = self.interval
+            result['samples'] = self.samples
+            result['top_stacks'] = [{'stack': stack.split(';'), 'samples': count}
+                                    for stack, count in self.stacks.most_common(top)]
+        return result
+
+_active_session = None
+_session_lock = threading.Lock()
+
+def active_session() -> Optional[ProfileSession]:
+    """Текущий сеанс профилирования (None - профилирование выключено)"""
+    return _active_session
+
+def _claim(session: ProfileSession):
+    global _active_session
+    with _session_lock:
+        if _active_session is not None:
+            raise ProfilerBusyError("Profiling session already running")
+        _active_session = session
+
+def _release():
+    global _active_session
+    with _session_lock:
+        _active_session = None
+
+def run_session(session: ProfileSession) -> ProfileSession:
+    """
+    Выполняет сеанс профилирования в текущем потоке
+
+    Одновременно допускается один сеанс на процесс; при gunicorn профилируется только
+    воркер, принявший запрос на профилирование.
+
+    Raises:
+        ProfilerBusyError: Другой сеанс уже выполняется
+    """
+    _claim(session)
+    try:
+        session.run()
+    finally:
+        _release()
+    return session
+
+def start_session(session: ProfileSession,
+                  on_finish: Optional[Callable[[ProfileSession], None]] = None) -> threading.Thread:
+    """
+    Запускает сеанс профилирования в фоновом потоке (поток запроса /admin/profile не ждет его)
+
+    Args:
+        session: Сеанс
+        on_finish: Вызывается с завершенным сеансом в фоновом потоке (сохранение результата)
+
+    Raises:
+        ProfilerBusyError: Другой сеанс уже выполняется (проверяется до запуска потока)
+    """
+    _claim(session)
+
+    def run():
+        try:
+            session.run()
+        finally:
+            _release()
+        if on_finish is not None:
+            on_finish(session)
+
+    thread = threading.Thread(target=run, name=f"profiler-{session.id[:8]}", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,213 @@
+import argparse
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from urllib.parse import unquote, urlsplit
+
+import requests
+
+from api_cache import invalidate_article
+from config import Config
+from logger import get_logger
+from page_parser import ParsedPage, clear_page_cache
+
+logger = get_logger()
+
+# MediaWiki API принимает до 50 заголовков в одном запросе
+REVISION_BATCH_SIZE = 50
+
+def _split_article_url(url: str):
+    """https://en.wikipedia.org/wiki/Python -> (https://en.wikipedia.org/w/api.php, 'Python')"""
+    parts = urlsplit(url)
+    if not parts.path.startswith('/wiki/'):
+        return None, None
+    return f"{parts.scheme}://{parts.netloc}/w/api.php", unquote(parts.path[len('/wiki/'):]).replace('_', ' ')
+
+def _query_revisions(api_url: str, names: List[str], timeout: float) -> Optional[Dict[str, Any]]:
+    """Один запрос action=query для пакета заголовков (None - запрос не удался)"""
+    try:
+        response = requests.get(api_url, params={
+            'action': 'query', 'prop': 'revisions', 'rvprop': 'ids',
+            'titles': '|'.join(names), 'redirects': 1, 'format': 'json', 'formatversion': 2
+        }, timeout=timeout)
+        response.raise_for_status()
+        return response.json().get('query', {})
+    except (requests.RequestException, ValueError) as e:
+        logger.warning(f"Revision check failed for {api_url}: {e}")
+        return None
+
+def _parse_revisions(data: Dict[str, Any], names: List[str]) -> Dict[str, int]:
+    """Номера ревизий из ответа action=query по запрошенным заголовкам"""
+    # Учитываем нормализацию заголовков и перенаправления
+    aliases = {name: name for name in names}
+    for mapping in data.get('normalized', []) + data.get('redirects', []):
+        for name, alias in aliases.items():
+            if alias == mapping['from']:
+                aliases[name] = mapping['to']
+    revids = {page['title']: page['revisions'][0]['revid'] for page in data.get('pages', []) if page.get('revisions')}
+    return {name: revids[alias] for name, alias in aliases.items() if alias in revids}
+
+def fetch_revision_ids(urls: Iterable[str], timeout: Optional[float] = None) -> Dict[str, int]:
+    """
+    Дешевая проверка: текущие номера ревизий через MediaWiki API, без браузера
+
+    Args:
+        urls: Адреса статей
+        timeout: Таймаут HTTP-запроса
+
+    Returns:
+        Словарь url -> номер ревизии (недоступные статьи отсутствуют)
+    """
+    timeout = timeout or Config.REFRESH_HTTP_TIMEOUT
+    by_api = {}
+    for url in urls:
+        api_url, title = _split_article_url(url)
+        if api_url:
+            by_api.setdefault(api_url, {})[title] = url
+
+    revisions = {}
+    for api_url, titles in by_api.items():
+        names = list(titles)
+        for start in range(0, len(names), REVISION_BATCH_SIZE):
+            chunk = names[start:start + REVISION_BATCH_SIZE]
+            data = _query_revisions(api_url, chunk, timeout)
+            if data is not None:
+                revisions.update((titles[name], revid) for name, revid in _parse_revisions(data, chunk).items())
+    return revisions
+
+def diff_sections(old: Dict[str, str], new: Dict[str, str]) -> Dict[str, List[str]]:
+    """Сравнивает отпечатки разделов"""
+    return {
+        'added': [anchor for anchor in new if anchor not in old],
+        'removed': [anchor for anchor in old if anchor not in new],
+        'modified': [anchor for anchor in new if anchor in old and old[anchor] != new[anchor]]
+    }
+
+class ArticleRefresher:
+    """Обновление сохраненных статей: повторное извлечение только при изменении"""
+
+    def __init__(self, data_manager, driver_factory: Optional[Callable] = None,
+                 revision_fetcher: Callable = fetch_revision_ids,
+                 cache_invalidator: Callable = invalidate_article):
+        """
+        Инициализация
+
+        Args:
+            data_manager: DataManager с хранилищем статей и историей
+            driver_factory: Функция создания драйвера (по умолчанию main.create_driver)
+            revision_fetcher: Функция получения номеров ревизий (url -> revid)
+            cache_invalidator: Функция удаления кэшированных ответов API статьи (адрес, заголовки, разделы)
+        """
+        self.data_manager = data_manager
+        self.driver_factory = driver_factory
+        self.revision_fetcher = revision_fetcher
+        self.cache_invalidator = cache_invalidator
+
+    def _load_page(self, url: str) -> Optional[ParsedPage]:
+        """Загружает статью в браузере и разбирает ее"""
+        factory, quit = self.driver_factory, None
+        if factory is None:
+            from main import create_driver, quit_driver
+            factory, quit = create_driver, quit_driver
+        driver = factory()
+        if driver is None:
+            return None
+        try:
+            driver.get(url)
+            return ParsedPage(driver.page_source, url)
+        finally:
+            if quit is not None:
+                quit(driver)
+            else:
+                driver.quit()
+
+    def refresh(self, articles: Dict[str, str]) -> List[Dict[str, Any]]:
+        """
+        Обновляет статьи
+
+        Args:
+            articles: Словарь title -> url
+
+        Returns:
+            Отчет по каждой статье: {'title', 'status', 'sections'}
+        """
+        history = self.data_manager.history
+        revisions = self.revision_fetcher(articles.values())
+        report = []
+
+        for title, url in articles.items():
+            old = history.get_fingerprint(title)
+            revision = revisions.get(url)
+            if old is not None and revision is not None and old['revision_id'] == revision:
+                history.touch_fingerprint(title)
+                report.append({'title': title, 'status': 'unchanged', 'sections': None})
+                continue
+
+            page = self._load_page(url)
+            if page is None:
+                report.append({'title': title, 'status': 'failed', 'sections': None})
+                continue
+
+            revision = revision or page.revision_id
+            section_hashes = page.section_hashes()
+            if old is not None and old['content_hash'] == page.content_hash:
+                history.set_fingerprint(title, url, revision, page.content_hash, section_hashes, changed=False)
+                report.append({'title': title, 'status': 'unchanged', 'sections': None})
+                continue
+
+            sections = diff_sections(old['section_hashes'] if old else {}, section_hashes)
+            self._apply_changes(title, page, sections)
+            history.set_fingerprint(title, url, revision, page.content_hash, section_hashes)
+            report.append({'title': title, 'status': 'changed' if old else 'new', 'sections': sections})
+        return report
+
+    def _invalidate_api_cache(self, title: str, page: ParsedPage):
+        """Удаляет ответы API, построенные по статье, из кэша, чтобы клиенты получили новую версию"""
+        # Заголовки - для записей кэша, сохраненных без множества ключей статьи
+        queries = [title, page.title, _split_article_url(page.url)[1]]
+        self.cache_invalidator(page.url, [query for query in dict.fromkeys(queries) if query], page.sections)
+
+    def _apply_changes(self, title: str, page: ParsedPage, sections: Dict[str, List[str]]):
+        """Сохраняет новую версию, сбрасывает кэши статьи и выгружает только измененные разделы"""
+        clear_page_cache(page.url)
+        self.data_manager.save_page_content(title, page.to_content())
+        self._invalidate_api_cache(title, page)
+
+        changed = sections['added'] + sections['modified']
+        if changed:
+            records = ({'title': title, 'anchor': anchor, 'paragraphs': page.paragraph_index[anchor]}
+                       for anchor in changed)
+            self.data_manager.export_to_jsonl(records, prefix='changed_sections')
+        logger.info(f"Article refreshed: {title} ({len(changed)} changed, {len(sections['removed'])} removed sections)")
+
+    def refresh_stored(self) -> List[Dict[str, Any]]:
+        """Обновляет все статьи из хранилища, у которых известен URL"""
+        articles = {}
+        for article in self.data_manager.iter_stored_articles():
+            url = article['content'].get('url')
+            if url:
+                articles[article['title']] = url
+        return self.refresh(articles)
+
+def main():
+    parser = argparse.ArgumentParser(description="Обновление сохраненных статей с проверкой изменений")
+    parser.add_argument('urls', nargs='*', help='Адреса статей (по умолчанию - все сохраненные)')
+    parser.add_argument('--output-dir', default='output', help='Директория данных')
+    args = parser.parse_args()
+
+    from data_manager import DataManager
+    data_manager = DataManager(args.output_dir)
+    refresher = ArticleRefresher(data_manager)
+    if args.urls:
+        report = refresher.refresh({_split_article_url(url)[1] or url: url for url in args.urls})
+    else:
+        report = refresher.refresh_stored()
+    data_manager.flush()
+
+    for item in report:
+        sections = item['sections']
+        details = ''
+        if sections:
+            details = f" (+{len(sections['added'])} ~{len(sections['modified'])} -{len(sections['removed'])})"
+        print(f"{item['title']}: {item['status']}{details}")
+
+if __name__ == '__main__':
+    main()
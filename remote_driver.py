@@ -0,0 +1,276 @@
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+from config import Config
+from logger import get_logger
+
+logger = get_logger()
+
+class NoBrowserCapacityError(RuntimeError):
+    """Нет доступного хоста со свободными слотами"""
+
+class BrowserHost:
+    """Удаленный WebDriver (Selenium Grid, selenium/standalone-chrome или webdriver_stub.py)"""
+
+    def __init__(self, url: str, capacity: int):
+        self.url = url.rstrip('/')
+        self.capacity = capacity
+        self.active = 0  # Сеансы, открытые этим процессом
+        self.remote_free = None  # Свободные слоты по /status (с учетом других API-узлов)
+        self.healthy = True
+        self.draining = False
+        self.failures = 0  # Подряд неудачных созданий сеанса
+        self.latency = None  # Сглаженная длительность создания сеанса (сек)
+        self.sessions_created = 0
+
+    @property
+    def free_slots(self) -> int:
+        free = self.capacity - self.active
+        if self.remote_free is not None:
+            free = min(free, self.remote_free)
+        return max(0, free)
+
+    @property
+    def available(self) -> bool:
+        return self.healthy and not self.draining and self.free_slots > 0
+
+    def load(self) -> float:
+        """Доля занятых слотов (для выбора наименее загруженного хоста)"""
+        return 1.0 - self.free_slots / self.capacity if self.capacity else 1.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'url': self.url,
+            'capacity': self.capacity,
+            'active': self.active,
+            'free_slots': self.free_slots,
+            'healthy': self.healthy,
+            'draining': self.draining,
+            'failures': self.failures,
+            'latency': round(self.latency, 4) if self.latency is not None else None,
+            'sessions_created': self.sessions_created,
+        }
+
+def parse_hosts(spec: str, default_capacity: Optional[int] = None) -> List[BrowserHost]:
+    """
+    Хосты из строки "http://a:4444|4,http://b:4444" (после | - число слотов)
+
+    Адрес - корень WebDriver (для Selenium Grid 4 - http://host:4444, для Grid 3 - .../wd/hub).
+    """
+    capacity = default_capacity or Config.REMOTE_DRIVER_CAPACITY
+    hosts = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        url, _, slots = item.partition('|')
+        hosts.append(BrowserHost(url, int(slots) if slots else capacity))
+    return hosts
+
+def _remote_session(url: str):
+    """Создает сеанс удаленного Chrome с настройками Config.CHROME_OPTIONS"""
+    from selenium import webdriver
+    options = webdriver.ChromeOptions()
+    for argument in Config.CHROME_OPTIONS:
+        options.add_argument(argument)
+    return webdriver.Remote(command_executor=url, options=options)
+
+class RemoteBrowserPool:
+    """
+    Маршрутизация сеансов по нескольким удаленным WebDriver
+
+    Новый сеанс открывается на исправном хосте с наименьшей долей занятых слотов (при
+    равенстве - с меньшей задержкой создания сеанса); при отказе пробуется следующий.
+    Хост, на котором подряд failure_threshold раз не удалось создать сеанс или который
+    не отвечает на /status, выводится из ротации: новые сеансы туда не направляются,
+    открытые завершаются как обычно. Фоновая проверка /status возвращает хост в ротацию
+    после восстановления и обновляет число свободных слотов.
+    """
+
+    def __init__(self, hosts: List[BrowserHost], failure_threshold: Optional[int] = None,
+                 health_interval: Optional[float] = None, status_timeout: Optional[float] = None,
+                 session_factory: Optional[Callable[[str], Any]] = None):
+        """
+        Инициализация
+
+        Args:
+            hosts: Хосты WebDriver
+            failure_threshold: Подряд неудачных созданий сеанса до вывода хоста из ротации
+            health_interval: Интервал фоновой проверки /status (сек, 0 - без проверки)
+            status_timeout: Таймаут запроса /status (сек)
+            session_factory: Создание сеанса по адресу хоста (по умолчанию webdriver.Remote)
+        """
+        if not hosts:
+            raise ValueError("At least one remote WebDriver host is required")
+        self.hosts = hosts
+        self.failure_threshold = failure_threshold or Config.REMOTE_DRIVER_FAILURE_THRESHOLD
+        self.health_interval = Config.REMOTE_DRIVER_HEALTH_INTERVAL if health_interval is None else health_interval
+        self.status_timeout = status_timeout or Config.REMOTE_DRIVER_STATUS_TIMEOUT
+        self.session_factory = session_factory or _remote_session
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._monitor = None
+
+    def host(self, url: str) -> BrowserHost:
+        url = url.rstrip('/')
+        for host in self.hosts:
+            if host.url == url:
+                return host
+        raise KeyError(url)
+
+    def acquire(self, exclude=()) -> BrowserHost:
+        """Резервирует слот на наименее загруженном доступном хосте"""
+        with self._lock:
+            candidates = [host for host in self.hosts if host.available and host not in exclude]
+            if not candidates:
+                raise NoBrowserCapacityError("No healthy remote WebDriver host with free slots")
+            host = min(candidates, key=lambda h: (h.load(), h.latency or 0.0))
+            host.active += 1
+            if host.remote_free is not None:
+                host.remote_free -= 1
+            return host
+
+    def release(self, host: BrowserHost):
+        """Освобождает слот после закрытия сеанса"""
+        with self._lock:
+            host.active = max(0, host.active - 1)
+            if host.remote_free is not None:
+                host.remote_free += 1
+
+    def record_success(self, host: BrowserHost, latency: float):
+        alpha = Config.REMOTE_DRIVER_LATENCY_ALPHA
+        with self._lock:
+            host.failures = 0
+            host.sessions_created += 1
+            host.latency = latency if host.latency is None else alpha * latency + (1 - alpha) * host.latency
+
+    def record_failure(self, host: BrowserHost, error: Exception):
+        with self._lock:
+            host.failures += 1
+            if host.failures >= self.failure_threshold and host.healthy:
+                host.healthy = False
+                logger.warning(f"Remote WebDriver {host.url} removed from rotation after "
+                               f"{host.failures} failures: {error}")
+
+    def drain(self, url: str, draining: bool = True):
+        """Выводит хост из ротации вручную (открытые сеансы не прерываются) или возвращает"""
+        self.host(url).draining = draining
+
+    def check_health(self):
+        """Проверяет /status всех хостов и обновляет исправность и свободные слоты"""
+        for host in self.hosts:
+            try:
+                response = requests.get(f"{host.url}/status", timeout=self.status_timeout)
+                value = response.json().get('value') or {}
+                nodes = value.get('nodes')
+                if nodes is not None:
+                    # Selenium Grid: готовность узлов и занятые слоты (включая сеансы других клиентов)
+                    ready = any(node.get('availability', 'UP') == 'UP' for node in nodes)
+                    remote_free = sum(1 for node in nodes for slot in node.get('slots', [])
+                                      if slot.get('session') is None)
+                else:
+                    ready, remote_free = bool(value.get('ready')), None
+                healthy = response.ok and ready
+            except (requests.RequestException, ValueError) as e:
+                healthy, remote_free = False, None
+                logger.debug(f"Remote WebDriver {host.url} status check failed: {e}")
+
+            with self._lock:
+                if healthy and not host.healthy:
+                    logger.warning(f"Remote WebDriver {host.url} is back in rotation")
+                elif not healthy and host.healthy:
+                    logger.warning(f"Remote WebDriver {host.url} removed from rotation: status check failed")
+                host.healthy = healthy
+                host.remote_free = remote_free
+                if healthy:
+                    host.failures = 0
+
+    def start_monitor(self):
+        """Запускает фоновую проверку /status (однократно)"""
+        with self._lock:
+            if self._monitor is not None or not self.health_interval:
+                return
+            self._monitor = threading.Thread(target=self._monitor_loop, name='webdriver-health', daemon=True)
+        self._monitor.start()
+
+    def _monitor_loop(self):
+        while not self._stop.wait(self.health_interval):
+            self.check_health()
+
+    def stop(self):
+        self._stop.set()
+        if self._monitor is not None:
+            self._monitor.join()
+
+    def create_driver(self):
+        """
+        Открывает сеанс на наименее загруженном хосте
+
+        Слот освобождается при driver.quit() (или при сборке мусора незакрытого драйвера).
+
+        Raises:
+            NoBrowserCapacityError: Нет хоста со свободными слотами
+            Exception: Ошибка создания сеанса на последнем опробованном хосте
+        """
+        self.start_monitor()
+        tried, last_error = [], None
+        while True:
+            try:
+                host = self.acquire(exclude=tried)
+            except NoBrowserCapacityError:
+                if last_error is not None:
+                    raise last_error
+                raise
+            tried.append(host)
+            start = time.perf_counter()
+            try:
+                driver = self.session_factory(host.url)
+            except Exception as e:
+                self.release(host)
+                self.record_failure(host, e)
+                last_error = e
+                continue
+            self.record_success(host, time.perf_counter() - start)
+            self._track(driver, host)
+            return driver
+
+    def _track(self, driver, host: BrowserHost):
+        """Освобождает слот хоста при закрытии драйвера"""
+        released = threading.Event()
+
+        def release_once():
+            if not released.is_set():
+                released.set()
+                self.release(host)
+
+        quit_session = driver.quit
+
+        def quit():
+            try:
+                quit_session()
+            finally:
+                release_once()
+
+        driver.quit = quit
+        driver.remote_host = host.url
+        weakref.finalize(driver, release_once)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [host.snapshot() for host in self.hosts]
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_browser_pool() -> RemoteBrowserPool:
+    """Пул удаленных WebDriver из Config.REMOTE_DRIVER_URLS (создается при первом обращении)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = RemoteBrowserPool(parse_hosts(Config.REMOTE_DRIVER_URLS))
+    return _pool
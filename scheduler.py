@@ -0,0 +1,181 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from config import Config
+from metrics import observe_queue_wait, record_queue_depth, record_queue_rejection
+from timing import record_stage
+
+class SchedulerRejected(RuntimeError):
+    """Очередь класса переполнена или ожидание слота превысило предел"""
+
+class _Waiter:
+    __slots__ = ('priority', 'enqueued', 'event', 'granted')
+
+    def __init__(self, priority: str):
+        self.priority = priority
+        self.enqueued = time.monotonic()
+        self.event = threading.Event()
+        self.granted = False
+
+class BrowserScheduler:
+    """
+    Планировщик браузерной работы по классам приоритета
+
+    Одновременно выполняется не больше slots запросов с браузером; остальные ждут в
+    очереди своего класса. Освободившийся слот получает класс с наименьшим виртуальным
+    временем (каждый слот увеличивает его на 1 / вес класса), поэтому при конкуренции
+    классы делят слоты пропорционально весам. Запрос, ждущий дольше starvation_seconds,
+    обслуживается первым независимо от весов.
+    """
+
+    def __init__(self, slots: Optional[int] = None, weights: Optional[Dict[str, float]] = None,
+                 starvation_seconds: Optional[float] = None, max_queue: Optional[Dict[str, int]] = None,
+                 max_wait: Optional[float] = None):
+        """
+        Инициализация
+
+        Args:
+            slots: Одновременных запросов с браузером
+            weights: Веса классов приоритета
+            starvation_seconds: Ожидание, после которого запрос обслуживается вне очереди весов
+            max_queue: Предельная длина очереди по классам
+            max_wait: Предельное ожидание слота (сек)
+        """
+        self.slots = slots or Config.SCHEDULER_SLOTS
+        self.weights = dict(weights or Config.SCHEDULER_WEIGHTS)
+        self.starvation_seconds = (Config.SCHEDULER_STARVATION_SECONDS if starvation_seconds is None
+                                   else starvation_seconds)
+        self.max_queue = dict(max_queue or Config.SCHEDULER_MAX_QUEUE)
+        self.max_wait = Config.SCHEDULER_MAX_WAIT if max_wait is None else max_wait
+        self.active = 0
+        self._queues = {priority: deque() for priority in self.weights}
+        self._passes = {priority: 0.0 for priority in self.weights}
+        self._virtual = 0.0
+        self._stats = {priority: {'active': 0, 'granted': 0, 'rejected': 0, 'timeouts': 0,
+                                  'wait_sum': 0.0, 'wait_max': 0.0} for priority in self.weights}
+        self._lock = threading.Lock()
+
+    def _charge(self, priority: str):
+        """Продвигает виртуальное время класса (простаивавший класс не получает накопленного запаса)"""
+        start = max(self._passes[priority], self._virtual)
+        self._passes[priority] = start + 1.0 / self.weights[priority]
+        self._virtual = start
+        self._stats[priority]['active'] += 1
+        self._stats[priority]['granted'] += 1
+
+    def _next(self) -> Optional[_Waiter]:
+        """Следующий ожидающий: голодающий дольше всех или класс с наименьшим виртуальным временем"""
+        waiting = [priority for priority, queue in self._queues.items() if queue]
+        if not waiting:
+            return None
+        oldest = min(waiting, key=lambda priority: self._queues[priority][0].enqueued)
+        if time.monotonic() - self._queues[oldest][0].enqueued >= self.starvation_seconds:
+            priority = oldest
+        else:
+            priority = min(waiting, key=lambda p: (max(self._passes[p], self._virtual), -self.weights[p]))
+        waiter = self._queues[priority].popleft()
+        record_queue_depth(priority, len(self._queues[priority]))
+        return waiter
+
+    def _observe_wait(self, priority: str, wait: float):
+        with self._lock:
+            stats = self._stats[priority]
+            stats['wait_sum'] += wait
+            stats['wait_max'] = max(stats['wait_max'], wait)
+        record_stage('queue_wait', wait)
+        observe_queue_wait(priority, wait)
+
+    def acquire(self, priority: str) -> float:
+        """
+        Ожидает слот
+
+        Returns:
+            Время ожидания (сек)
+
+        Raises:
+            SchedulerRejected: Очередь класса заполнена или слот не получен за max_wait
+        """
+        with self._lock:
+            if self.active < self.slots and not any(self._queues.values()):
+                self.active += 1
+                self._charge(priority)
+                waiter = None
+            elif len(self._queues[priority]) >= self.max_queue.get(priority, 0):
+                self._stats[priority]['rejected'] += 1
+                record_queue_rejection(priority, 'queue_full')
+                raise SchedulerRejected(f"Queue for {priority} requests is full")
+            else:
+                waiter = _Waiter(priority)
+                self._queues[priority].append(waiter)
+                record_queue_depth(priority, len(self._queues[priority]))
+        if waiter is None:
+            self._observe_wait(priority, 0.0)
+            return 0.0
+
+        if not waiter.event.wait(self.max_wait):
+            with self._lock:
+                if not waiter.granted:
+                    self._queues[priority].remove(waiter)
+                    record_queue_depth(priority, len(self._queues[priority]))
+                    self._stats[priority]['timeouts'] += 1
+                    record_queue_rejection(priority, 'timeout')
+                    raise SchedulerRejected(f"No browser slot for {priority} request within {self.max_wait:.0f}s")
+        wait = time.monotonic() - waiter.enqueued
+        self._observe_wait(priority, wait)
+        return wait
+
+    def release(self, priority: str):
+        """Освобождает слот: он передается следующему ожидающему"""
+        with self._lock:
+            self._stats[priority]['active'] -= 1
+            waiter = self._next()
+            if waiter is None:
+                self.active -= 1
+                return
+            waiter.granted = True
+            self._charge(waiter.priority)
+            waiter.event.set()
+
+    @contextmanager
+    def slot(self, priority: str):
+        """Контекст: выполнение с занятым слотом"""
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Состояние: занятые слоты, длина очередей и ожидание по классам"""
+        now = time.monotonic()
+        with self._lock:
+            classes = {}
+            for priority, queue in self._queues.items():
+                stats = self._stats[priority]
+                classes[priority] = {
+                    'weight': self.weights[priority],
+                    'queued': len(queue),
+                    'oldest_wait': round(now - queue[0].enqueued, 3) if queue else 0.0,
+                    'active': stats['active'],
+                    'granted': stats['granted'],
+                    'rejected': stats['rejected'],
+                    'timeouts': stats['timeouts'],
+                    'avg_wait': round(stats['wait_sum'] / stats['granted'], 4) if stats['granted'] else None,
+                    'max_wait': round(stats['wait_max'], 4),
+                }
+            return {'slots': self.slots, 'active': self.active, 'classes': classes}
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler() -> BrowserScheduler:
+    """Планировщик процесса (создается при первом обращении)"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = BrowserScheduler()
+    return _scheduler
@@ -0,0 +1,251 @@
+import argparse
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config import Config
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+PHRASE_RE = re.compile(r'"([^"]+)"')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc_id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL UNIQUE,
+    url TEXT,
+    content_hash TEXT,
+    length INTEGER NOT NULL,
+    summary TEXT
+);
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT PRIMARY KEY,
+    df INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    positions TEXT NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings (doc_id);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (name, value) VALUES ('doc_count', 0), ('total_length', 0);
+"""
+
+def tokenize(text: str) -> List[str]:
+    """Разбивает текст на токены в нижнем регистре"""
+    return TOKEN_RE.findall((text or '').lower())
+
+def parse_query(query: str) -> Tuple[List[str], List[List[str]]]:
+    """Выделяет из запроса отдельные термы и фразы в кавычках"""
+    phrases = [tokenize(phrase) for phrase in PHRASE_RE.findall(query)]
+    phrases = [phrase for phrase in phrases if phrase]
+    terms = tokenize(PHRASE_RE.sub(' ', query))
+    for phrase in phrases:
+        terms.extend(phrase)
+    return list(dict.fromkeys(terms)), phrases
+
+class SearchIndex:
+    """Инвертированный индекс с позициями и ранжированием BM25 поверх сохраненных статей"""
+
+    def __init__(self, path: str = "output/search_index.db", k1: Optional[float] = None, b: Optional[float] = None):
+        """
+        Инициализация индекса
+
+        Args:
+            path: Путь к файлу индекса
+            k1: Параметр насыщения частоты терма BM25
+            b: Параметр нормализации длины документа BM25
+        """
+        self.path = path
+        self.k1 = k1 if k1 is not None else Config.BM25_K1
+        self.b = b if b is not None else Config.BM25_B
+        self._lock = threading.RLock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def _meta(self, name: str) -> int:
+        row = self._conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def index_document(self, title: str, paragraphs: Iterable[str], url: Optional[str] = None,
+                       content_hash: Optional[str] = None) -> bool:
+        """
+        Добавляет или обновляет статью в индексе
+
+        Args:
+            title: Заголовок статьи (ключ документа)
+            paragraphs: Параграфы статьи
+            url: Адрес статьи
+            content_hash: Хеш содержимого; при совпадении переиндексация пропускается
+
+        Returns:
+            True если индекс изменился
+        """
+        paragraphs = [text for text in paragraphs if text]
+        positions = {}
+        offset = 0
+        for text in paragraphs:
+            tokens = tokenize(text)
+            for i, token in enumerate(tokens):
+                positions.setdefault(token, []).append(offset + i)
+            # Разрыв между параграфами, чтобы фраза не склеивалась через границу
+            offset += len(tokens) + 1
+        length = sum(len(p) for p in positions.values())
+
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT doc_id, content_hash FROM docs WHERE title = ?", (title,)).fetchone()
+            if row is not None and content_hash is not None and row[1] == content_hash:
+                return False
+            if row is not None:
+                self._remove(row[0])
+
+            cursor = self._conn.execute(
+                "INSERT INTO docs (title, url, content_hash, length, summary) VALUES (?, ?, ?, ?, ?)",
+                (title, url, content_hash, length, paragraphs[0][:300] if paragraphs else '')
+            )
+            doc_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT INTO postings (term, doc_id, tf, positions) VALUES (?, ?, ?, ?)",
+                [(term, doc_id, len(pos), json.dumps(pos)) for term, pos in positions.items()]
+            )
+            self._conn.executemany(
+                "INSERT INTO terms (term, df) VALUES (?, 1) ON CONFLICT(term) DO UPDATE SET df = df + 1",
+                [(term,) for term in positions]
+            )
+            self._conn.execute("UPDATE meta SET value = value + 1 WHERE name = 'doc_count'")
+            self._conn.execute("UPDATE meta SET value = value + ? WHERE name = 'total_length'", (length,))
+        return True
+
+    def _remove(self, doc_id: int):
+        """Удаляет документ из индекса (внутри транзакции)"""
+        length = self._conn.execute("SELECT length FROM docs WHERE doc_id = ?", (doc_id,)).fetchone()[0]
+        terms = [row[0] for row in self._conn.execute("SELECT term FROM postings WHERE doc_id = ?", (doc_id,))]
+        self._conn.executemany("UPDATE terms SET df = df - 1 WHERE term = ?", [(term,) for term in terms])
+        self._conn.execute("DELETE FROM terms WHERE df <= 0")
+        self._conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        self._conn.execute("DELETE FROM docs WHERE doc_id = ?", (doc_id,))
+        self._conn.execute("UPDATE meta SET value = value - 1 WHERE name = 'doc_count'")
+        self._conn.execute("UPDATE meta SET value = value - ? WHERE name = 'total_length'", (length,))
+
+    def remove_document(self, title: str) -> bool:
+        """Удаляет статью из индекса"""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT doc_id FROM docs WHERE title = ?", (title,)).fetchone()
+            if row is None:
+                return False
+            self._remove(row[0])
+        return True
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Поиск по индексу с ранжированием BM25
+
+        Args:
+            query: Запрос; фразы в кавычках должны встречаться подряд
+            limit: Максимальное количество результатов
+
+        Returns:
+            Список {'title', 'url', 'score', 'summary'} по убыванию релевантности
+        """
+        terms, phrases = parse_query(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            doc_count = self._meta('doc_count')
+            if doc_count == 0:
+                return []
+            avg_length = self._meta('total_length') / doc_count
+
+            scores = {}
+            postings = {}
+            for term in terms:
+                df_row = self._conn.execute("SELECT df FROM terms WHERE term = ?", (term,)).fetchone()
+                if df_row is None:
+                    if phrases and any(term in phrase for phrase in phrases):
+                        return []
+                    continue
+                idf = math.log((doc_count - df_row[0] + 0.5) / (df_row[0] + 0.5) + 1)
+                rows = self._conn.execute(
+                    "SELECT p.doc_id, p.tf, p.positions, d.length FROM postings p "
+                    "JOIN docs d ON d.doc_id = p.doc_id WHERE p.term = ?", (term,)
+                ).fetchall()
+                postings[term] = {}
+                for doc_id, tf, positions, length in rows:
+                    postings[term][doc_id] = positions
+                    norm = tf + self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+
+            for phrase in phrases:
+                scores = {doc_id: score for doc_id, score in scores.items()
+                          if self._has_phrase(postings, phrase, doc_id)}
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+            results = []
+            for doc_id, score in ranked:
+                title, url, summary = self._conn.execute(
+                    "SELECT title, url, summary FROM docs WHERE doc_id = ?", (doc_id,)
+                ).fetchone()
+                results.append({'title': title, 'url': url, 'score': round(score, 4), 'summary': summary})
+        return results
+
+    @staticmethod
+    def _has_phrase(postings: Dict[str, Dict[int, str]], phrase: List[str], doc_id: int) -> bool:
+        """Проверяет, что термы фразы идут подряд в документе"""
+        positions = []
+        for term in phrase:
+            encoded = postings.get(term, {}).get(doc_id)
+            if encoded is None:
+                return False
+            positions.append(set(json.loads(encoded)))
+        return any(all(start + i in positions[i] for i in range(1, len(phrase))) for start in positions[0])
+
+    def stats(self) -> Dict[str, int]:
+        """Размер индекса"""
+        with self._lock:
+            return {
+                'documents': self._meta('doc_count'),
+                'terms': self._conn.execute("SELECT COUNT(*) FROM terms").fetchone()[0]
+            }
+
+    def close(self):
+        """Закрывает соединение"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+def main():
+    parser = argparse.ArgumentParser(description="Поиск по сохраненным статьям без браузера")
+    parser.add_argument('query', nargs='?', help='Запрос; фразы указываются в кавычках')
+    parser.add_argument('--limit', type=int, default=10, help='Количество результатов')
+    parser.add_argument('--rebuild', action='store_true', help='Переиндексировать хранилище статей')
+    parser.add_argument('--output-dir', default='output', help='Директория данных')
+    args = parser.parse_args()
+
+    from data_manager import DataManager
+    data_manager = DataManager(args.output_dir)
+    if args.rebuild:
+        print(f"Проиндексировано статей: {data_manager.reindex_articles()}")
+    if args.query:
+        for index, result in enumerate(data_manager.search_index.search(args.query, args.limit), 1):
+            print(f"{index}. {result['title']} ({result['score']})\n   {result['summary']}\n")
+
+if __name__ == '__main__':
+    main()
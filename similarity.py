@@ -0,0 +1,175 @@
+import os
+import threading
+import zlib
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from config import Config
+from search_index import tokenize
+
+def _hash_features(items: Iterable[str], dim: int, signed: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """Хеширование признаков: разреженный вектор (индексы, значения) длины dim (crc32 стабилен между процессами)"""
+    counts = Counter()
+    for item in items:
+        h = zlib.crc32(item.encode('utf-8'))
+        counts[h % dim] += -1.0 if signed and (h >> 31) & 1 else 1.0
+    indices = np.fromiter((index for index, value in counts.items() if value), dtype=np.int32)
+    values = np.fromiter((value for value in counts.values() if value), dtype=np.float32)
+    return indices, values
+
+class SimilarityEngine:
+    """Похожие статьи: TF-IDF текста и пересечение ссылок, косинусная близость на разреженных матрицах (CSR)"""
+
+    def __init__(self, text_dim: Optional[int] = None, link_dim: Optional[int] = None,
+                 text_weight: Optional[float] = None):
+        """
+        Инициализация движка
+
+        Args:
+            text_dim: Размерность хешированных текстовых признаков
+            link_dim: Размерность хешированных признаков ссылок
+            text_weight: Вес текстовой близости (остальное - близость по ссылкам)
+        """
+        self.text_dim = text_dim or Config.SIMILARITY_TEXT_DIM
+        self.link_dim = link_dim or Config.SIMILARITY_LINK_DIM
+        self.text_weight = text_weight if text_weight is not None else Config.SIMILARITY_TEXT_WEIGHT
+
+        self.titles = []
+        self._rows = {}
+        # Строки матриц - разреженные векторы статей (индексы, значения); память - по числу признаков статьи
+        self._text = []
+        self._links = []
+        self._normalized = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.titles)
+
+    def add(self, title: str, paragraphs: Iterable[str], links: Iterable[str] = ()):
+        """
+        Добавляет или обновляет статью
+
+        Args:
+            title: Заголовок статьи
+            paragraphs: Параграфы статьи (итерируются один раз)
+            links: Адреса внутренних ссылок статьи
+        """
+        indices, counts = _hash_features((token for text in paragraphs for token in tokenize(text)), self.text_dim)
+        # Сублинейная частота терма: log(1 + |tf|) с сохранением знака хеша
+        text_vector = (indices, np.sign(counts) * np.log1p(np.abs(counts)))
+        link_indices, _ = _hash_features(set(links), self.link_dim, signed=False)
+        link_vector = (link_indices, np.ones(len(link_indices), dtype=np.float32))
+
+        with self._lock:
+            row = self._rows.get(title)
+            if row is None:
+                row = len(self.titles)
+                self._rows[title] = row
+                self.titles.append(title)
+                self._text.append(text_vector)
+                self._links.append(link_vector)
+            else:
+                self._text[row] = text_vector
+                self._links[row] = link_vector
+            self._normalized = None
+
+    @staticmethod
+    def _csr(rows: List[Tuple[np.ndarray, np.ndarray]], dim: int) -> sp.csr_matrix:
+        """CSR-матрица из разреженных строк"""
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(indices) for indices, _ in rows], out=indptr[1:])
+        if rows:
+            indices = np.concatenate([indices for indices, _ in rows])
+            data = np.concatenate([values for _, values in rows]).astype(np.float32)
+        else:
+            indices, data = np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        return sp.csr_matrix((data, indices, indptr), shape=(len(rows), dim))
+
+    def _matrices(self):
+        """Нормализованные матрицы TF-IDF и ссылок (пересчитываются после изменений)"""
+        if self._normalized is None:
+            text = self._csr(self._text, self.text_dim)
+            links = self._csr(self._links, self.link_dim)
+
+            df = np.bincount(text.indices, minlength=self.text_dim)
+            idf = np.log((1 + len(self.titles)) / (1 + df)) + 1.0
+            weighted = text @ sp.diags(idf.astype(np.float32))
+
+            self._normalized = (self._normalize(weighted), self._normalize(links))
+        return self._normalized
+
+    @staticmethod
+    def _normalize(matrix: sp.csr_matrix) -> sp.csr_matrix:
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sp.csr_matrix(sp.diags(1.0 / norms) @ matrix)
+
+    def most_similar_batch(self, titles: List[str], k: int = 10) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Top-k похожих статей для нескольких статей одним матричным умножением
+
+        Args:
+            titles: Заголовки статей из корпуса
+            k: Количество похожих статей для каждой
+
+        Returns:
+            Словарь title -> [{'title', 'score'}]; неизвестные статьи получают пустой список
+        """
+        with self._lock:
+            known = [title for title in titles if title in self._rows]
+            result = {title: [] for title in titles}
+            if not known or len(self.titles) < 2:
+                return result
+
+            text, links = self._matrices()
+            rows = np.array([self._rows[title] for title in known])
+            # Плотна только матрица близости запрошенных статей: len(titles) x размер корпуса
+            scores = (self.text_weight * (text[rows] @ text.T).toarray()
+                      + (1 - self.text_weight) * (links[rows] @ links.T).toarray())
+            # Статья не должна рекомендовать саму себя
+            scores[np.arange(len(rows)), rows] = -np.inf
+
+            k = min(k, len(self.titles) - 1)
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            for i, title in enumerate(known):
+                order = top[i][np.argsort(-scores[i, top[i]])]
+                result[title] = [
+                    {'title': self.titles[j], 'score': round(float(scores[i, j]), 4)}
+                    for j in order if scores[i, j] > 0
+                ]
+            return result
+
+    def most_similar(self, title: str, k: int = 10) -> List[Dict[str, Any]]:
+        """Top-k похожих статей для одной статьи"""
+        return self.most_similar_batch([title], k)[title]
+
+    def save(self, path: str):
+        """Сохраняет матрицы на диск (.npz, компоненты CSR)"""
+        with self._lock:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            arrays = {'titles': np.array(self.titles, dtype=str),
+                      'dims': np.array([self.text_dim, self.link_dim])}
+            for name, rows, dim in (('text', self._text, self.text_dim), ('links', self._links, self.link_dim)):
+                matrix = self._csr(rows, dim)
+                arrays.update({f"{name}_data": matrix.data, f"{name}_indices": matrix.indices,
+                               f"{name}_indptr": matrix.indptr})
+            np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> 'SimilarityEngine':
+        """Загружает матрицы, сохраненные методом save"""
+        with np.load(path) as data:
+            text_dim, link_dim = (int(dim) for dim in data['dims'])
+            engine = cls(text_dim=text_dim, link_dim=link_dim, **kwargs)
+            engine.titles = [str(title) for title in data['titles']]
+            engine._rows = {title: row for row, title in enumerate(engine.titles)}
+            for name in ('text', 'links'):
+                indptr, indices, values = data[f"{name}_indptr"], data[f"{name}_indices"], data[f"{name}_data"]
+                setattr(engine, f"_{name}", [(indices[start:end].copy(), values[start:end].copy())
+                                             for start, end in zip(indptr[:-1], indptr[1:])])
+        return engine
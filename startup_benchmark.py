@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+# Модули, которые не должны загружаться при импорте приложения (только при первом использовании)
+DEFAULT_FORBIDDEN = ['selenium', 'webdriver_manager', 'bs4', 'numpy']
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """
+    Разбор вывода python -X importtime
+
+    Returns:
+        Список {'module', 'self_us', 'cumulative_us', 'depth'} в порядке вывода
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            module = name.strip()
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            rows.append({'module': module, 'self_us': int(self_us), 'cumulative_us': int(cumulative_us),
+                         'depth': depth})
+        except ValueError:
+            continue
+    return rows
+
+def measure(module: str, runs: int = 5) -> Dict[str, Any]:
+    """
+    Измеряет время импорта модуля в отдельных процессах
+
+    Args:
+        module: Имя модуля проекта
+        runs: Количество запусков
+
+    Returns:
+        Медианное время процесса, время импорта, самые тяжелые зависимости и загруженные модули
+    """
+    code = f"import sys, json; import {module}; print(json.dumps(sorted(sys.modules)))"
+    wall, imports, loaded, rows = [], [], [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=PROJECT_DIR,
+                                capture_output=True, text=True, check=True)
+        wall.append(time.perf_counter() - start)
+        rows = parse_importtime(result.stderr)
+        target = [row for row in rows if row['module'] == module and row['depth'] == 0]
+        imports.append(target[-1]['cumulative_us'] / 1e6 if target else 0.0)
+        loaded = json.loads(result.stdout.strip().splitlines()[-1])
+
+    # importtime выводит зависимости перед модулем: берем строки после предыдущего модуля верхнего уровня
+    children = []
+    for row in rows:
+        if row['depth'] == 0:
+            if row['module'] == module:
+                break
+            children = []
+        elif row['depth'] == 1:
+            children.append(row)
+    heaviest = sorted(children, key=lambda row: -row['cumulative_us'])[:10]
+    return {
+        'module': module,
+        'runs': runs,
+        'process_seconds': round(statistics.median(wall), 4),
+        'import_seconds': round(statistics.median(imports), 4),
+        'heaviest': [{'module': row['module'], 'ms': round(row['cumulative_us'] / 1000, 1)} for row in heaviest],
+        'loaded_modules': loaded,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Время импорта модулей приложения (python -X importtime)")
+    parser.add_argument('modules', nargs='*', default=['api_server', 'main'], help='Модули для замера')
+    parser.add_argument('--runs', type=int, default=5, help='Количество запусков')
+    parser.add_argument('--max-seconds', type=float, help='Порог времени импорта (ошибка при превышении)')
+    parser.add_argument('--forbid', nargs='*', default=DEFAULT_FORBIDDEN,
+                        help='Модули, которые не должны загружаться при импорте')
+    parser.add_argument('--output', help='Сохранить результаты в JSON')
+    args = parser.parse_args()
+
+    failed = False
+    results = []
+    for module in args.modules:
+        result = measure(module, args.runs)
+        loaded = set(result.pop('loaded_modules'))
+        result['forbidden_loaded'] = [name for name in args.forbid if name in loaded]
+        results.append(result)
+
+        print(f"{module}: импорт {result['import_seconds'] * 1000:.0f} мс, "
+              f"процесс {result['process_seconds'] * 1000:.0f} мс")
+        for item in result['heaviest']:
+            print(f"  {item['module']:<30} {item['ms']:>8.1f} мс")
+        if result['forbidden_loaded']:
+            print(f"  загружены при импорте: {', '.join(result['forbidden_loaded'])}")
+            failed = True
+        if args.max_seconds is not None and result['import_seconds'] > args.max_seconds:
+            print(f"  превышен порог {args.max_seconds} с")
+            failed = True
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Общие заменители для тестов"""
+from unittest.mock import patch
+
+from config import Config
+
+class InMemoryRedis:
+    """Хранилище в памяти с интерфейсом redis.Redis: get/setex/exists/delete/sadd/smembers/expire/ping"""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        # Как настоящий клиент без decode_responses: строки хранятся байтами
+        self.data[key] = value.encode('utf-8') if isinstance(value, str) else value
+        self.ttls[key] = ttl
+        return True
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def delete(self, *keys):
+        deleted = [key for key in keys if key in self.data]
+        for key in deleted:
+            del self.data[key]
+            self.ttls.pop(key, None)
+        return len(deleted)
+
+    def sadd(self, key, *members):
+        values = self.data.setdefault(key, set())
+        added = [member.encode('utf-8') for member in members if member.encode('utf-8') not in values]
+        values.update(added)
+        return len(added)
+
+    def smembers(self, key):
+        return set(self.data.get(key, ()))
+
+    def expire(self, key, ttl):
+        if key not in self.data:
+            return False
+        self.ttls[key] = ttl
+        return True
+
+    def ping(self):
+        return True
+
+# Имитация браузера без задержек и отказов (см. fake_driver.py)
+FAST_FAKE_DRIVER = dict(FAKE_DRIVER_LAUNCH_LATENCY='0', FAKE_DRIVER_PAGE_LATENCY='0',
+                        FAKE_DRIVER_QUIT_LATENCY='0', FAKE_DRIVER_LAUNCH_FAILURE_RATE=0,
+                        FAKE_DRIVER_PAGE_FAILURE_RATE=0)
+
+def fake_backend_config(**overrides):
+    """patch.multiple для Config: DRIVER_BACKEND='fake' без задержек навигации и отказов"""
+    return patch.multiple(Config, **{'DRIVER_BACKEND': 'fake', 'NAVIGATION_DELAY': 0, **FAST_FAKE_DRIVER, **overrides})
@@ -0,0 +1,123 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+import shutil
+import threading
+from unittest.mock import patch
+
+from article_store import ArticleStore
+
+class TestArticleStore(unittest.TestCase):
+    """Тесты для хранилища статей"""
+
+    def setUp(self):
+        """Настройка перед каждым тестом"""
+        self.test_dir = tempfile.mkdtemp()
+        self.store = ArticleStore(self.test_dir, codec='zlib')
+
+    def tearDown(self):
+        """Очистка после каждого теста"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _count_blobs(self):
+        return sum(len(files) for _, _, files in os.walk(self.store.objects_dir))
+
+    def test_put_and_get(self):
+        """Тест сохранения и чтения статьи"""
+        content = {'paragraphs': ['Первый', 'Второй'], 'links': []}
+        digest = self.store.put('Python', content)
+
+        self.assertTrue(self.store.exists(digest))
+        self.assertEqual(self.store.get(digest)['content'], content)
+        self.assertEqual(self.store.get(digest, use_mmap=True)['content'], content)
+        self.assertIsNone(self.store.get('0' * 64))
+
+    def test_identical_content_deduplicated(self):
+        """Тест дедупликации одинакового содержимого"""
+        first = self.store.put('Python', {'paragraphs': ['text']})
+        second = self.store.put('Python', {'paragraphs': ['text']})
+        self.store.put('Python', {'paragraphs': ['changed']})
+
+        self.assertEqual(first, second)
+        self.assertEqual(self._count_blobs(), 2)
+        self.assertEqual(self.store.get_latest('Python')['content'], {'paragraphs': ['changed']})
+
+    def test_unchanged_content_not_reindexed(self):
+        """Тест: повторное сохранение того же содержимого не дописывает индекс"""
+        for _ in range(3):
+            self.store.put('Python', {'paragraphs': ['text']})
+        self.store.put('Python', {'paragraphs': ['changed']})
+
+        with open(self.store.index_path, encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+    def test_bloated_index_compacted_on_open(self):
+        """Тест: индекс с большим числом устаревших записей переписывается при открытии"""
+        for n in range(5):
+            self.store.put('Python', {'paragraphs': [str(n)]})
+
+        reopened = ArticleStore(self.test_dir, codec='zlib')
+
+        with open(reopened.index_path, encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), 1)
+        self.assertEqual(reopened.get_latest('Python')['content'], {'paragraphs': ['4']})
+
+    def test_blob_written_atomically(self):
+        """Тест: при сбое записи блоб не появляется, временный файл удаляется"""
+        with patch('os.fsync', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                self.store.put('Python', {'paragraphs': ['text']})
+
+        self.assertEqual(self._count_blobs(), 0)
+        digest = self.store.put('Python', {'paragraphs': ['text']})
+        self.assertEqual(self.store.get(digest)['content'], {'paragraphs': ['text']})
+
+    def test_index_reloaded(self):
+        """Тест восстановления индекса при повторном открытии"""
+        digest = self.store.put('Python', {'paragraphs': ['text']})
+        self.store.put('Java', {'paragraphs': ['text']})
+        self.store.compact_index()
+
+        reopened = ArticleStore(self.test_dir, codec='zlib')
+
+        self.assertEqual(reopened.latest('Python')['hash'], digest)
+        self.assertEqual(sorted(reopened.titles()), ['Java', 'Python'])
+        self.assertIn('fetched_at', reopened.latest('Java'))
+
+    def test_index_shared_between_instances(self):
+        """Тест: хранилище видит записи другого экземпляра (воркера) на том же каталоге"""
+        other = ArticleStore(self.test_dir, codec='zlib')
+        self.store.put('Python', {'paragraphs': ['text']})
+        self.assertEqual(other.titles(), ['Python'])
+
+        other.put('Python', {'paragraphs': ['changed']})
+        self.assertEqual(self.store.get_latest('Python')['content'], {'paragraphs': ['changed']})
+
+        self.store.compact_index()
+        other.put('Java', {'paragraphs': ['text']})
+        self.assertEqual(sorted(self.store.titles()), ['Java', 'Python'])
+
+    def test_compaction_keeps_concurrent_appends(self):
+        """Тест: сжатие индекса одним экземпляром не теряет записи, дописанные другими"""
+        writers = [ArticleStore(self.test_dir, codec='zlib') for _ in range(2)]
+
+        def write(store, prefix):
+            for n in range(30):
+                store.put(f"{prefix}{n}", {'paragraphs': [str(n)]})
+
+        threads = [threading.Thread(target=write, args=(store, prefix)) for store, prefix in zip(writers, 'AB')]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            self.store.compact_index()
+        for thread in threads:
+            thread.join(5)
+
+        reopened = ArticleStore(self.test_dir, codec='zlib')
+        self.assertEqual(len(reopened.titles()), 60)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import glob
+import json
+import tempfile
+import shutil
+import threading
+from unittest.mock import patch
+
+import background_writer
+from background_writer import BackgroundWriter
+
+class TestBackgroundWriter(unittest.TestCase):
+    """Тесты для фоновой записи"""
+
+    def setUp(self):
+        """Настройка перед каждым тестом"""
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Очистка после каждого теста"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _read_records(self):
+        records = []
+        for path in sorted(glob.glob(os.path.join(self.test_dir, '*.jsonl'))):
+            with open(path, encoding='utf-8') as f:
+                records.extend(json.loads(line) for line in f)
+        return records
+
+    def test_records_written_and_batched(self):
+        """Тест записи в JSONL и передачи пакетов обработчику"""
+        batches = []
+        writer = BackgroundWriter(self.test_dir, on_batch=batches.append)
+        for i in range(5):
+            self.assertTrue(writer.write({'query': f'q{i}'}))
+        writer.flush()
+        writer.close()
+
+        self.assertEqual([r['query'] for r in self._read_records()], [f'q{i}' for i in range(5)])
+        self.assertEqual(sum(len(batch) for batch in batches), 5)
+
+    def test_segment_rotation_by_size(self):
+        """Тест ротации сегментов по размеру"""
+        writer = BackgroundWriter(self.test_dir, batch_size=1, max_segment_bytes=10)
+        for i in range(3):
+            writer.write({'query': f'query number {i}'})
+            writer.flush()
+        writer.close()
+
+        self.assertEqual(len(glob.glob(os.path.join(self.test_dir, '*.jsonl'))), 3)
+
+    def test_backpressure_when_queue_full(self):
+        """Тест отказа после ожидания при переполненной очереди"""
+        release = threading.Event()
+        writer = BackgroundWriter(self.test_dir, queue_size=1, put_timeout=0.05)
+        writer.submit(release.wait)
+        # Ждем, пока поток заберет блокирующую задачу, и занимаем единственное место
+        while writer._queue.qsize():
+            pass
+        self.assertTrue(writer.write({'query': 'queued'}))
+
+        self.assertFalse(writer.write({'query': 'dropped'}))
+        self.assertEqual(writer.dropped, 1)
+
+        release.set()
+        writer.close()
+        self.assertEqual([r['query'] for r in self._read_records()], ['queued'])
+
+    def test_close_flushes_queue(self):
+        """Тест записи остатка очереди при остановке"""
+        done = []
+        writer = BackgroundWriter(self.test_dir)
+        writer.submit(done.append, 'job')
+        writer.write({'query': 'last'})
+        writer.close()
+
+        self.assertEqual(done, ['job'])
+        self.assertEqual(len(self._read_records()), 1)
+        self.assertFalse(writer.write({'query': 'after close'}))
+
+    def test_jobs_run_when_on_batch_fails(self):
+        """Тест: ошибка обработчика пакета не отменяет задачи из того же пакета"""
+        done = []
+
+        def failing_on_batch(records):
+            raise RuntimeError("db locked")
+
+        writer = BackgroundWriter(self.test_dir, on_batch=failing_on_batch)
+        release = threading.Event()
+        writer.submit(release.wait)
+        # Пока поток занят, запись и задача попадают в один пакет
+        while writer._queue.qsize():
+            pass
+        writer.write({'query': 'locked'})
+        writer.submit(done.append, 'job')
+        release.set()
+        writer.close()
+
+        self.assertEqual(done, ['job'])
+        self.assertEqual([r['query'] for r in self._read_records()], ['locked'])
+
+    def test_atexit_registered_once(self):
+        """Тест: один обработчик atexit на процесс, закрытые экземпляры не удерживаются"""
+        with patch.object(background_writer, '_atexit_registered', False), \
+                patch('background_writer.atexit.register') as register:
+            writers = [BackgroundWriter(os.path.join(self.test_dir, str(i))) for i in range(3)]
+            for writer in writers:
+                writer.close()
+
+        register.assert_called_once_with(background_writer._close_all)
+        self.assertFalse(any(writer in background_writer._open_writers for writer in writers))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import io
+import contextlib
+
+import requests
+
+import main
+from benchmark import summarize, compare, run_benchmarks, stub_environment
+from timing import percentile
+from config import Config
+from wiki_stub import WikiStubServer
+
+class TestWikiStub(unittest.TestCase):
+    """Тесты для локальной замены Wikipedia и драйвера без браузера"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.stub = WikiStubServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.stop()
+
+    def test_search_redirects_to_article(self):
+        """Тест перенаправления поиска на статью и страницы без результатов"""
+        response = requests.get(f"{self.stub.url}w/index.php", params={'search': 'selenium'}, timeout=5)
+        self.assertTrue(response.url.endswith('/wiki/Selenium_%28software%29'))
+        self.assertIn('wgRevisionId', response.text)
+
+        response = requests.get(f"{self.stub.url}w/index.php", params={'search': 'no such article'}, timeout=5)
+        self.assertIn('Search results', response.text)
+
+    def test_revisions_api(self):
+        """Тест ответа MediaWiki API с номерами ревизий"""
+        from refresh import fetch_revision_ids
+        url = self.stub.article_url('Document Object Model')
+
+        self.assertEqual(fetch_revision_ids([url]), {url: 1247003003})
+
+    def test_cli_functions_against_stub(self):
+        """Тест поиска и извлечения через DRIVER_BACKEND=http"""
+        with stub_environment(self.stub):
+            driver = main.search_wikipedia('Document Object Model')
+            self.assertIsNotNone(driver)
+            try:
+                self.assertEqual(driver.title, 'Document Object Model - Wikipedia')
+                with contextlib.redirect_stdout(io.StringIO()) as output:
+                    sections = main.print_contents(driver)
+                    main.print_links(driver)
+                self.assertEqual(sections[0]['title'], 'History')
+                self.assertIn(f"{self.stub.url}wiki/", output.getvalue())
+            finally:
+                main.quit_driver(driver)
+        self.assertEqual(Config.DRIVER_BACKEND, 'chrome')
+
+class TestBenchmark(unittest.TestCase):
+    """Тесты для сводок и сравнения результатов бенчмарков"""
+
+    def test_percentile_and_summary(self):
+        """Тест перцентилей и пропускной способности"""
+        self.assertEqual(percentile([1.0, 2.0, 3.0, 4.0, 5.0], 50), 3.0)
+        self.assertAlmostEqual(percentile([1.0, 2.0], 90), 1.9)
+        self.assertIsNone(percentile([], 50))
+
+        summary = summarize('case', [0.001] * 9 + [0.1], errors=1, elapsed=0.5)
+        self.assertEqual(summary['iterations'], 11)
+        self.assertEqual(summary['throughput_per_second'], 20.0)
+        self.assertEqual(summary['latency_ms']['p50'], 1.0)
+        self.assertEqual(summary['latency_ms']['max'], 100.0)
+
+    def test_compare(self):
+        """Тест сравнения с базовым прогоном"""
+        baseline = {'suites': {'cli': [summarize('search', [0.010] * 4, 0, 1.0)]}}
+        current = {'suites': {'cli': [summarize('search', [0.005] * 4, 0, 0.5), {'name': 'redis', 'skipped': '-'}]}}
+
+        rows = compare(baseline, current)
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['p50'], -50.0)
+        self.assertEqual(rows[0]['throughput'], 100.0)
+
+    def test_run_cli_suite(self):
+        """Тест прогона набора CLI против заглушки"""
+        report = run_benchmarks(['cli'], query='Selenium', iterations=2, warmup=0)
+
+        cases = {case['name']: case for case in report['suites']['cli']}
+        self.assertIn('search_wikipedia', cases)
+        self.assertIn('parse_page', cases)
+        self.assertEqual(cases['search_wikipedia']['errors'], 0)
+        self.assertEqual(report['meta']['iterations'], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from cache_warmer import CacheWarmer, api_search_warmer, rank_queries
+from config import Config
+from helpers import InMemoryRedis, fake_backend_config
+from history_db import HistoryDB
+
+NOW = datetime(2024, 5, 1, 12, 0, 0)
+
+def _ago(hours):
+    return (NOW - timedelta(hours=hours)).isoformat()
+
+class TestRankQueries(unittest.TestCase):
+    """Тесты для рейтинга запросов по частоте и давности"""
+
+    def test_frequency_and_recency(self):
+        """Тест: частые и недавние запросы выше, старые и пустые не учитываются"""
+        activity = ([('Python', _ago(1))] * 3 + [('Selenium', _ago(0))] +
+                    [('Old', _ago(24 * 30))] * 5 + [('  ', _ago(0)), ('Broken', 'not a date')])
+
+        ranked = rank_queries(activity, half_life_hours=72, now=NOW)
+
+        self.assertEqual([entry['query'] for entry in ranked], ['Python', 'Selenium', 'Old'])
+        self.assertEqual(ranked[0]['count'], 3)
+        self.assertEqual(ranked[0]['last_seen'], _ago(1))
+        self.assertAlmostEqual(ranked[1]['score'], 1.0)
+        self.assertEqual(len(rank_queries(activity, limit=1, now=NOW)), 1)
+
+    def test_search_activity(self):
+        """Тест выборки поисков из истории с начала окна"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        history = HistoryDB(os.path.join(directory, 'history.db'))
+        self.addCleanup(history.close)
+        history.add_search('Old', [], timestamp=_ago(24 * 60))
+        history.add_search('Python', [], timestamp=_ago(1))
+
+        self.assertEqual(history.search_activity(_ago(24)), [('Python', _ago(1))])
+        self.assertEqual(len(history.search_activity()), 2)
+
+class TestCacheWarmer(unittest.TestCase):
+    """Тесты для прогрева кэша"""
+
+    def setUp(self):
+        self.cache = set()
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def _warm(self, delay=0.05):
+        def warm(query):
+            with self.lock:
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+            time.sleep(delay)
+            with self.lock:
+                self.active -= 1
+            if query.startswith('fail'):
+                raise RuntimeError('browser crashed')
+            self.cache.add(query)
+            return 'warmed'
+        return warm
+
+    def test_bounded_concurrency_and_coverage(self):
+        """Тест ограничения параллелизма, пропуска закэшированных и покрытия"""
+        self.cache.add('cached')
+        ranked = [{'query': query, 'count': count, 'score': float(count)}
+                  for query, count in (('cached', 5), ('a', 3), ('fail', 1), ('b', 1), ('c', 1))]
+
+        report = CacheWarmer(self._warm(), self.cache.__contains__, concurrency=2, budget=10).run(
+            ranked, total_searches=20, total_score=20.0)
+
+        self.assertEqual(self.max_active, 2)
+        self.assertEqual((report['cached'], report['warmed'], report['failed'], report['skipped']), (1, 3, 1, 0))
+        self.assertEqual(report['statuses']['fail'], 'failed')
+        self.assertEqual(report['coverage'], 0.8)
+        self.assertEqual(report['traffic_coverage'], 0.5)
+
+    def test_time_budget(self):
+        """Тест: по истечении бюджета новые прогревы не начинаются"""
+        ranked = [{'query': f"q{index}", 'count': 1, 'score': 1.0} for index in range(10)]
+
+        report = CacheWarmer(self._warm(delay=0.2), self.cache.__contains__, concurrency=2, budget=0.1).run(ranked)
+
+        self.assertEqual(report['warmed'], 2)
+        self.assertEqual(report['skipped'], 8)
+        self.assertEqual(report['coverage'], 0.2)
+
+class TestApiSearchWarmer(unittest.TestCase):
+    """Тест прогрева кэша /api/search"""
+
+    def test_warm_api_search(self):
+        """Тест: ответ попадает в кэш по ключу обычного запроса, история не пополняется"""
+        import api_server
+        self.addCleanup(api_server.reset_rate_limits)
+        redis = InMemoryRedis()
+        with patch.object(api_server, 'redis_client', redis), \
+                patch.object(api_server.data_manager, 'save_search_history') as save_history, \
+                patch.object(api_server.limiter, 'enabled', True), \
+                patch.object(Config, 'RATELIMIT_COST_BROWSER', 100), \
+                fake_backend_config():
+            warm, is_cached, _ = api_search_warmer()
+            self.assertTrue(api_server.limiter.enabled)
+            self.assertFalse(is_cached('Selenium'))
+            self.assertEqual(warm('Selenium'), 'warmed')
+            self.assertTrue(is_cached('Selenium'))
+            self.assertEqual(warm('Qwertyuiop nonexistent'), 'negative')
+
+            # Клиент с другим форматированием JSON получает прогретый ответ
+            response = api_server.app.test_client().post(
+                '/api/search', data='{ "query" :  "Selenium" }', content_type='application/json')
+
+        self.assertEqual(response.get_json()['title'], 'Selenium (software) - Wikipedia')
+        save_history.assert_not_called()
+        # Ответ статьи и отрицательный результат (плюс множество ключей найденной статьи)
+        self.assertEqual(len([key for key in redis.data if key.startswith('api_search:')]), 2)
+
+    def test_warm_header_requires_admin_token(self):
+        """Тест: X-Cache-Warm без токена администратора не скрывает запрос из истории"""
+        import api_server
+        cases = [({'X-Cache-Warm': '1'}, 'secret', False),
+                 ({'X-Cache-Warm': '1', 'X-Admin-Token': 'wrong'}, 'secret', False),
+                 ({'X-Cache-Warm': '1', 'X-Admin-Token': 'secret'}, 'secret', True),
+                 ({'X-Cache-Warm': '1', 'X-Admin-Token': ''}, '', False)]
+        for headers, token, expected in cases:
+            with patch.object(Config, 'ADMIN_TOKEN', token), \
+                    api_server.app.test_request_context(headers=headers):
+                self.assertEqual(api_server.cache_warm_request(), expected, headers)
+        with api_server.app.test_request_context(environ_base={api_server.CACHE_WARM_ENVIRON_KEY: True}):
+            self.assertTrue(api_server.cache_warm_request())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,213 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+import time
+from unittest.mock import Mock, patch
+
+import circuit_breaker
+from cache_manager import NegativeResult
+from circuit_breaker import CircuitBreaker, RetryBudget, backoff_delay, retry_call
+from config import Config
+from helpers import InMemoryRedis
+
+class FakeClock:
+    """Управляемое время для автоматов и бюджета"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Тесты для автомата защиты"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker('upstream:test', failure_rate=0.5, min_calls=4, window=60,
+                                      open_seconds=30, half_open_probes=1, clock=self.clock)
+
+    def test_opens_on_failure_rate(self):
+        """Тест: автомат открывается при доле отказов не ниже порога и минимуме вызовов"""
+        for ok in (True, False, False):
+            self.breaker.record_success() if ok else self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'closed')
+
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, 'open')
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual(self.breaker.retry_after(), 30)
+
+    def test_old_outcomes_expire(self):
+        """Тест: отказы старше окна не учитываются"""
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.clock.now += 61
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, 'closed')
+        self.assertEqual(self.breaker.snapshot()['calls'], 1)
+
+    def test_half_open_probes(self):
+        """Тест: после паузы пропускается один пробный вызов; отказ открывает, успех закрывает"""
+        for _ in range(4):
+            self.breaker.record_failure()
+        self.clock.now += 30
+
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, 'half_open')
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'open')
+
+        self.clock.now += 30
+        self.assertTrue(self.breaker.allow())
+        self.breaker.cancel()
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, 'closed')
+        self.assertTrue(self.breaker.allow())
+
+class TestRetryBudget(unittest.TestCase):
+    """Тесты для бюджета повторов и задержек"""
+
+    def test_budget_refill(self):
+        """Тест: повторы ограничены запасом, пополнение - от запросов и со временем"""
+        clock = FakeClock()
+        budget = RetryBudget(ratio=0.5, min_per_second=0.1, burst=1, clock=clock)
+
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        budget.deposit()
+        self.assertTrue(budget.withdraw())
+        clock.now += 10
+        self.assertTrue(budget.withdraw())
+
+    def test_backoff_jitter(self):
+        """Тест: задержка в пределах экспоненциальной границы и не больше cap"""
+        rng = random.Random(1)
+        delays = [backoff_delay(attempt, base=0.5, cap=2, rng=rng) for attempt in (1, 2, 3, 4, 5)]
+
+        for attempt, delay in enumerate(delays, 1):
+            self.assertTrue(0 <= delay <= min(2, 0.5 * 2 ** (attempt - 1)))
+
+    def test_retry_call(self):
+        """Тест: повтор до успеха, без повтора при исчерпанном бюджете"""
+        sleeps = []
+        results = iter([None, None, 'driver'])
+        result = retry_call(lambda: next(results), lambda value: value is None, max_attempts=3,
+                            budget=RetryBudget(ratio=0, min_per_second=0, burst=5), sleep=sleeps.append)
+
+        self.assertEqual(result, 'driver')
+        self.assertEqual(len(sleeps), 2)
+
+        func = Mock(return_value=None)
+        retry_call(func, lambda value: value is None, max_attempts=3,
+                   budget=RetryBudget(ratio=0, min_per_second=0, burst=0), sleep=sleeps.append)
+        func.assert_called_once()
+
+class TestSearchProtection(unittest.TestCase):
+    """Тесты для автоматов и повторов при поиске статьи"""
+
+    def setUp(self):
+        circuit_breaker.reset_breakers()
+        self.addCleanup(circuit_breaker.reset_breakers)
+        patcher = patch.multiple(Config, CIRCUIT_BREAKER_ENABLED=True, CIRCUIT_MIN_CALLS=3, RETRY_BACKOFF_BASE=0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_open_circuit_fails_fast(self):
+        """Тест: после отказов запуска браузера поиск отклоняется сразу, без запуска"""
+        import main
+        with patch('main.create_driver', return_value=None) as create_driver, \
+                patch.object(Config, 'RETRY_MAX_ATTEMPTS', 1):
+            for _ in range(3):
+                self.assertIsNone(main.fetch_article('Python', backend='chrome'))
+            result = main.search_wikipedia('Python')
+
+        self.assertEqual(create_driver.call_count, 3)
+        self.assertEqual(result.kind, 'transient')
+        self.assertEqual(result.details['circuit'], 'backend:chrome')
+        self.assertGreater(result.details['retry_after'], 0)
+
+    def test_upstream_outage_opens_circuit(self):
+        """Тест: ошибки соединения с upstream открывают автомат upstream, сбой браузера - нет"""
+        import main
+        import requests
+        driver = Mock()
+        driver.get.side_effect = requests.ConnectionError('Name or service not known')
+        with patch('main.create_driver', return_value=driver), patch('main.quit_driver'):
+            for _ in range(3):
+                self.assertEqual(main.fetch_article('Python', backend='http').kind, 'transient')
+            result = main.fetch_article('Python', backend='http')
+
+        self.assertTrue(result.details['circuit'].startswith('upstream:'))
+
+    def test_upstream_failure_classification(self):
+        """Тест: к upstream относятся сеть, DNS, 5xx и net::ERR_*, но не 4xx и сбой браузера"""
+        import main
+        import requests
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+
+        def http_error(status):
+            response = requests.Response()
+            response.status_code = status
+            return requests.HTTPError(response=response)
+
+        failures = [requests.ConnectionError(), requests.Timeout(), http_error(503), TimeoutException(),
+                    WebDriverException('unknown error: net::ERR_NAME_NOT_RESOLVED')]
+        neutral = [http_error(404), WebDriverException('chrome not reachable'), RuntimeError('cancelled')]
+        for error in failures:
+            self.assertTrue(main.is_upstream_failure(error), error)
+        for error in neutral:
+            self.assertFalse(main.is_upstream_failure(error), error)
+
+    def test_transient_failure_retried(self):
+        """Тест: временный сбой повторяется, отказ открытого автомата - нет"""
+        import main
+        driver = Mock()
+        with patch('main.fetch_article', side_effect=[NegativeResult('transient', 'timeout'), driver]) as fetch:
+            self.assertIs(main.search_wikipedia('Python'), driver)
+        self.assertEqual(fetch.call_count, 2)
+
+        rejected = NegativeResult('transient', 'Circuit is open', {'circuit': 'upstream:test'})
+        with patch('main.fetch_article', return_value=rejected) as fetch:
+            self.assertIs(main.search_wikipedia('Python'), rejected)
+        fetch.assert_called_once()
+
+class TestStaleCache(unittest.TestCase):
+    """Тест выдачи устаревшего ответа кэша при сбое upstream"""
+
+    def test_stale_served_on_transient_failure(self):
+        """Тест: устаревший ответ вместо 503; без него - 503 с Retry-After автомата"""
+        import api_server
+        redis = InMemoryRedis()
+        body = b'{"query":"Python","results":["1. History"],"success":true}'
+        key = api_server.api_cache_key('api_contents', b'{"query": "Python"}')
+        redis.data[key] = api_server.pack_cached(body, time.time() - Config.API_CACHE_TTL - 60, 'identity',
+                                                 api_server.content_etag(body))
+        failure = NegativeResult('transient', 'Circuit upstream:www.wikipedia.org is open',
+                                 {'circuit': 'upstream:www.wikipedia.org', 'retry_after': 12})
+        self.addCleanup(setattr, api_server.limiter, 'enabled', Config.RATELIMIT_ENABLED)
+        api_server.limiter.enabled = False
+        client = api_server.app.test_client()
+        with patch.object(api_server, 'redis_client', redis), \
+                patch.object(api_server, 'search_wikipedia', return_value=failure):
+            stale = client.post('/api/contents', json={'query': 'Python'})
+            failed = client.post('/api/contents', json={'query': 'Selenium'})
+
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(stale.get_json()['results'], ['1. History'])
+        self.assertIn('110', stale.headers['Warning'])
+        self.assertEqual(failed.status_code, 503)
+        self.assertEqual(failed.headers['Retry-After'], '12')
+        # Отказ открытого автомата не кэшируется, устаревшая запись не перезаписана
+        self.assertEqual(len(redis.data), 1)
+
+if __name__ == '__main__':
+    unittest.main()
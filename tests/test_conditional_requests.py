@@ -0,0 +1,131 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gzip
+import json
+from unittest.mock import patch
+
+from config import Config
+from helpers import InMemoryRedis, fake_backend_config
+from page_parser import clear_page_cache
+
+class TestConditionalRequests(unittest.TestCase):
+    """Тесты для ETag, Last-Modified и условных GET-запросов API"""
+
+    @classmethod
+    def setUpClass(cls):
+        import api_server
+        cls.api = api_server
+
+    def setUp(self):
+        clear_page_cache()
+        self.client = self.api.app.test_client()
+        self.api.limiter.enabled = False
+        self.addCleanup(setattr, self.api.limiter, 'enabled', Config.RATELIMIT_ENABLED)
+        self.redis = InMemoryRedis()
+        for patcher in (patch.object(self.api, 'redis_client', self.redis),
+                        patch.object(self.api.data_manager, 'submit'),
+                        fake_backend_config()):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        search = patch.object(self.api, 'search_wikipedia', wraps=self.api.search_wikipedia)
+        self.search_calls = search.start()
+        self.addCleanup(search.stop)
+
+    def test_get_not_modified(self):
+        """Тест: GET с совпадающим ETag или If-Modified-Since - 304 без тела и без браузера"""
+        first = self.client.get('/api/contents?query=Selenium')
+        etag, modified = first.headers['ETag'], first.headers['Last-Modified']
+
+        by_etag = self.client.get('/api/contents?query=Selenium', headers={'If-None-Match': etag})
+        by_date = self.client.get('/api/contents?query=Selenium', headers={'If-Modified-Since': modified})
+        changed = self.client.get('/api/contents?query=Selenium', headers={'If-None-Match': '"stale"'})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('public', first.headers['Cache-Control'])
+        self.assertIn(f"max-age={Config.API_HTTP_MAX_AGE}", first.headers['Cache-Control'])
+        self.assertEqual((by_etag.status_code, by_date.status_code), (304, 304))
+        self.assertEqual(by_etag.get_data(), b'')
+        self.assertEqual(by_etag.headers['ETag'], etag)
+        # Ответ из кэша отдается без повторной сериализации JSON
+        self.assertNotIn('serialization', by_etag.headers['Server-Timing'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.get_json(), first.get_json())
+        self.assertEqual(self.search_calls.call_count, 1)
+
+    def test_rebuilt_entry_keeps_last_modified(self):
+        """Тест: пересобранная после TTL запись с тем же телом сохраняет Last-Modified"""
+        first = self.client.get('/api/contents?query=Selenium')
+        key, value = next(iter(self.redis.data.items()))
+        payload, stored, encoding, etag, _ = self.api.unpack_cached(value)
+        expired = stored - Config.API_CACHE_TTL - 60
+        self.redis.data[key] = self.api.pack_cached(payload, expired, encoding, etag)
+
+        rebuilt = self.client.get('/api/contents?query=Selenium')
+        conditional = self.client.get('/api/contents?query=Selenium',
+                                      headers={'If-Modified-Since': rebuilt.headers['Last-Modified']})
+
+        self.assertEqual(rebuilt.headers['ETag'], first.headers['ETag'])
+        self.assertEqual(self.api.unpack_cached(self.redis.data[key])[4], int(expired))
+        self.assertEqual(conditional.status_code, 304)
+        self.assertEqual(self.search_calls.call_count, 2)
+
+    def test_get_and_post_share_cache(self):
+        """Тест: GET-вариант и POST с теми же параметрами - один ответ и один ETag"""
+        post = self.client.post('/api/paragraphs', json={'query': 'Selenium'})
+        get = self.client.get('/api/paragraphs', query_string={'query': 'Selenium'})
+        other = self.client.get('/api/paragraphs', query_string={'query': 'Python'})
+
+        self.assertEqual(get.get_json(), post.get_json())
+        self.assertEqual(get.headers['ETag'], post.headers['ETag'])
+        self.assertNotIn('Cache-Control', post.headers)
+        self.assertNotEqual(other.headers['ETag'], get.headers['ETag'])
+        self.assertEqual(self.search_calls.call_count, 2)
+
+    def test_legacy_cache_entry(self):
+        """Тест: запись кэша без времени создания отдается с ETag и без Last-Modified"""
+        key = self.api.api_cache_key('api_contents', json.dumps({'query': 'Selenium'}).encode('utf-8'))
+        self.redis.data[key] = json.dumps({'success': True, 'query': 'Selenium', 'results': []})
+
+        response = self.client.get('/api/contents?query=Selenium')
+
+        self.assertEqual(response.get_json()['results'], [])
+        self.assertIn('ETag', response.headers)
+        self.assertNotIn('Last-Modified', response.headers)
+        self.search_calls.assert_not_called()
+
+    def test_compressed_payload(self):
+        """Тест: сжатая запись кэша отдается как есть клиенту с gzip и распакованной остальным"""
+        with patch.object(Config, 'API_CACHE_COMPRESS_MIN_SIZE', 0):
+            first = self.client.get('/api/contents?query=Selenium', headers={'Accept-Encoding': 'gzip'})
+            plain = self.client.get('/api/contents?query=Selenium')
+            again = self.client.get('/api/contents?query=Selenium',
+                                    headers={'Accept-Encoding': 'gzip, deflate', 'If-None-Match': first.headers['ETag']})
+
+        stored = next(iter(self.redis.data.values()))
+        self.assertEqual(stored.split(b' ')[1], b'gzip')
+        self.assertEqual(first.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', first.headers['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(first.get_data())), plain.get_json())
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertNotEqual(first.headers['ETag'], plain.headers['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(self.search_calls.call_count, 1)
+
+    def test_small_payload_not_compressed(self):
+        """Тест: ответ меньше порога хранится и отдается без сжатия"""
+        response = self.client.post('/api/search', json={'query': 'Selenium'}, headers={'Accept-Encoding': 'gzip'})
+
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(next(iter(self.redis.data.values())).split(b' ')[1], b'identity')
+
+    def test_brotli_entry_without_brotli(self):
+        """Тест: запись, сжатая brotli, на узле без brotli - промах кэша"""
+        with patch.object(self.api, 'brotli', None):
+            self.assertIsNone(self.api.unpack_cached(b'1700000000 br abc\n\x8b\x00'))
+        self.assertEqual(self.api.unpack_cached(b'1700000000\n{}'), (b'{}', 1700000000, 'identity', None, 1700000000))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+import time
+from unittest.mock import Mock, patch
+
+from cache_manager import NegativeResult
+from hedging import HedgeBudget, HedgedFetcher
+from helpers import fake_backend_config
+from timing import registry
+
+class SlowFetch:
+    """Попытки загрузки с заданной длительностью и результатом по источнику драйвера"""
+
+    def __init__(self, plan):
+        self.plan = plan  # backend -> (секунды, результат)
+        self.drivers = {}
+        self.calls = []
+        self.finished = threading.Event()
+
+    def __call__(self, query, backend=None, on_driver=None):
+        self.calls.append(backend)
+        delay, result = self.plan[backend]
+        driver = Mock(name=f"driver-{backend}")
+        self.drivers[backend] = driver
+        on_driver(driver)
+        time.sleep(delay)
+        if backend is None:
+            self.finished.set()
+        return driver if result == 'driver' else result
+
+class TestHedgedFetcher(unittest.TestCase):
+    """Тесты для дублирования медленной загрузки статьи"""
+
+    def _fetcher(self, fetch, **kwargs):
+        params = dict(hedge_backend='http', min_samples=1000, default_delay=0.05,
+                      budget=HedgeBudget(ratio=0.1, burst=1), histogram=f"test_fetch_{id(self)}")
+        params.update(kwargs)
+        return HedgedFetcher(fetch, **params)
+
+    def test_fast_primary_not_hedged(self):
+        """Тест: первая попытка успела до задержки - вторая не запускается"""
+        fetch = SlowFetch({None: (0, 'driver')})
+
+        result = self._fetcher(fetch, default_delay=1).fetch('Python')
+
+        self.assertIs(result, fetch.drivers[None])
+        self.assertEqual(fetch.calls, [None])
+
+    def test_hedge_wins_and_primary_cancelled(self):
+        """Тест: зависшая первая попытка отменяется, ответ - от второй, браузер первой закрыт"""
+        fetch = SlowFetch({None: (0.5, 'driver'), 'http': (0, 'driver')})
+
+        with patch('hedging.quit_driver') as quit_driver:
+            start = time.perf_counter()
+            result = self._fetcher(fetch).fetch('Python')
+            elapsed = time.perf_counter() - start
+            self.assertTrue(fetch.finished.wait(2))
+            time.sleep(0.05)
+
+        self.assertIs(result, fetch.drivers['http'])
+        self.assertLess(elapsed, 0.4)
+        self.assertEqual(fetch.calls, [None, 'http'])
+        fetch.drivers[None].quit.assert_called()
+        quit_driver.assert_called_once_with(fetch.drivers[None])
+
+    def test_transient_failure_waits_for_other_attempt(self):
+        """Тест: временный сбой второй попытки не прерывает первую"""
+        fetch = SlowFetch({None: (0.2, 'driver'), 'http': (0, NegativeResult('transient', 'timeout'))})
+
+        result = self._fetcher(fetch).fetch('Python')
+
+        self.assertIs(result, fetch.drivers[None])
+
+    def test_budget_caps_hedges(self):
+        """Тест: при исчерпанном бюджете вторая попытка не запускается"""
+        fetch = SlowFetch({None: (0.1, 'driver'), 'http': (0, 'driver')})
+        fetcher = self._fetcher(fetch, budget=HedgeBudget(ratio=0, burst=0))
+
+        self.assertIs(fetcher.fetch('Python'), fetch.drivers[None])
+        self.assertEqual(fetch.calls, [None])
+
+    def test_budget(self):
+        """Тест пополнения и расходования бюджета"""
+        budget = HedgeBudget(ratio=0.5, burst=1)
+
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        self.assertTrue(budget.withdraw())
+
+    def test_delay_from_percentile(self):
+        """Тест задержки по перцентилю длительности успешных загрузок"""
+        fetcher = self._fetcher(None, min_samples=10, default_delay=7, min_delay=0.5, percentile=90)
+        self.assertEqual(fetcher.delay(), 7)
+
+        for _ in range(10):
+            fetcher.observe(2.0)
+        self.assertTrue(0.5 <= fetcher.delay() <= 2.0)
+        self.assertEqual(registry.histogram(fetcher.histogram).count, 10)
+
+    def test_delay_follows_recent_window(self):
+        """Тест: ранние медленные загрузки вытесняются из окна и перестают влиять на задержку"""
+        fetcher = self._fetcher(None, min_samples=5, window=10, percentile=95, min_delay=0.1)
+        for _ in range(10):
+            fetcher.observe(30.0)
+        self.assertEqual(fetcher.delay(), 30.0)
+
+        for _ in range(10):
+            fetcher.observe(1.0)
+        self.assertEqual(fetcher.delay(), 1.0)
+
+    def test_search_wikipedia_hedged(self):
+        """Тест поиска через HedgedFetcher с имитацией браузера"""
+        import hedging
+        import main
+        fetcher = HedgedFetcher(default_delay=5)
+        with fake_backend_config(HEDGE_ENABLED=True), \
+                patch.object(hedging, '_fetcher', fetcher):
+            driver = main.search_wikipedia('Selenium')
+            self.addCleanup(main.quit_driver, driver)
+
+        self.assertEqual(driver.title, 'Selenium (software) - Wikipedia')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import tempfile
+import shutil
+import time
+from unittest.mock import patch
+
+import history_db
+from history_db import HistoryDB
+
+class TestHistoryDB(unittest.TestCase):
+    """Тесты для истории поиска в SQLite"""
+
+    def setUp(self):
+        """Настройка перед каждым тестом"""
+        self.test_dir = tempfile.mkdtemp()
+        self.db = HistoryDB(os.path.join(self.test_dir, 'history.db'), batch_size=3, flush_interval=60)
+
+    def tearDown(self):
+        """Очистка после каждого теста"""
+        self.db.close()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_wal_mode(self):
+        """Тест включения режима WAL"""
+        mode = self.db._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode.lower(), 'wal')
+
+    def test_batched_inserts(self):
+        """Тест накопления записей до размера пакета"""
+        self.db.add_search('a', [])
+        self.db.add_search('b', [])
+        self.assertEqual(self.db._counter('searches'), 0)
+
+        self.db.add_search('c', [])
+        self.assertEqual(self.db._counter('searches'), 3)
+
+    def test_statistics(self):
+        """Тест статистики по счетчикам"""
+        self.db.add_search('first', [], timestamp='2024-01-01T10:00:00')
+        self.db.add_search('second', [], timestamp='2024-01-01T11:00:00')
+        self.db.add_page('Python', 'abc')
+
+        stats = self.db.get_statistics()
+
+        self.assertEqual(stats['total_searches'], 2)
+        self.assertEqual(stats['total_pages_saved'], 1)
+        self.assertEqual(stats['last_search'], '2024-01-01T11:00:00')
+        self.assertEqual(stats['last_query'], 'second')
+
+    def test_import_json_history(self):
+        """Тест разового импорта старых JSON файлов истории"""
+        for i in range(2):
+            path = os.path.join(self.test_dir, f'search_history_2024010{i}_120000.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'timestamp': f'2024-01-0{i + 1}T12:00:00', 'query': f'q{i}', 'results': []}, f)
+
+        self.assertEqual(self.db.import_json_history(self.test_dir), 2)
+        self.assertEqual(self.db.import_json_history(self.test_dir), 0)
+        self.assertEqual(self.db.get_statistics()['total_searches'], 2)
+
+    def test_last_search_after_import(self):
+        """Тест: импорт старой истории после новых поисков не меняет последний поиск"""
+        self.db.add_search('live', [], timestamp='2024-06-01T12:00:00')
+        self.db.flush()
+        path = os.path.join(self.test_dir, 'search_history_20240101_120000.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'timestamp': '2024-01-01T12:00:00', 'query': 'legacy', 'results': []}, f)
+        self.db.import_json_history(self.test_dir)
+
+        stats = self.db.get_statistics()
+
+        self.assertEqual((stats['last_search'], stats['last_query']), ('2024-06-01T12:00:00', 'live'))
+        self.assertEqual([item['query'] for item in self.db.recent_searches()], ['live', 'legacy'])
+        plan = self.db._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT timestamp, query FROM searches ORDER BY timestamp DESC, id DESC LIMIT 1"
+        ).fetchall()
+        self.assertIn('idx_searches_timestamp', ' '.join(row[-1] for row in plan))
+
+    def test_timed_flush_without_next_insert(self):
+        """Тест: записи буфера сбрасываются по таймеру, не дожидаясь следующей вставки"""
+        db = HistoryDB(os.path.join(self.test_dir, 'timed.db'), batch_size=100, flush_interval=0.05)
+        self.addCleanup(db.close)
+        db.add_search('a', [])
+
+        deadline = time.monotonic() + 2
+        while db._counter('searches') == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(db._counter('searches'), 1)
+
+    def test_atexit_registered_once(self):
+        """Тест: один обработчик atexit на процесс, закрытые базы не удерживаются"""
+        with patch.object(history_db, '_atexit_registered', False), \
+                patch('history_db.atexit.register') as register:
+            dbs = [HistoryDB(os.path.join(self.test_dir, f'db{i}.db')) for i in range(3)]
+            for db in dbs:
+                db.close()
+
+        register.assert_called_once_with(history_db._close_all)
+        self.assertFalse(any(db in history_db._open_databases for db in dbs))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from fake_driver import FakeDriver, latency_distribution
+from helpers import fake_backend_config
+from load_test import (parse_mix, parse_server_timing, summarize_samples, build_report, run_stage,
+                       InProcessTarget)
+
+class TestFakeDriver(unittest.TestCase):
+    """Тесты для имитации браузера"""
+
+    def test_latency_distributions(self):
+        """Тест разбора распределений задержки"""
+        rng = random.Random(1)
+
+        self.assertEqual(latency_distribution('0.25')(rng), 0.25)
+        self.assertEqual(latency_distribution('const:0')(rng), 0.0)
+        self.assertTrue(0.1 <= latency_distribution('uniform:0.1,0.2')(rng) <= 0.2)
+        self.assertGreaterEqual(latency_distribution('normal:0,1')(rng), 0.0)
+        samples = sorted(latency_distribution('lognormal:0.5,0.3')(rng) for _ in range(501))
+        self.assertAlmostEqual(samples[250], 0.5, delta=0.05)
+        with self.assertRaises(ValueError):
+            latency_distribution('zipf:1')
+
+    def test_search_and_failures(self):
+        """Тест поиска по сохраненным статьям и имитации отказов"""
+        driver = FakeDriver(page_latency='0', quit_latency='0', failure_rate=0)
+        driver.get('https://www.wikipedia.org/w/index.php?search=python')
+
+        self.assertEqual(driver.current_url, 'https://www.wikipedia.org/wiki/Python_%28programming_language%29')
+        self.assertEqual(driver.title, 'Python (programming language) - Wikipedia')
+        self.assertTrue(driver.find_elements('tag name', 'p'))
+
+        failing = FakeDriver(page_latency='0', failure_rate=1)
+        with self.assertRaises(TimeoutException):
+            failing.get('https://www.wikipedia.org/')
+        with self.assertRaises(WebDriverException):
+            FakeDriver.launch(launch_latency='0', failure_rate=1)
+
+    def test_create_driver_backend(self):
+        """Тест выбора имитации браузера в create_driver"""
+        import main
+        with fake_backend_config():
+            driver = main.create_driver()
+
+        self.assertIsInstance(driver, FakeDriver)
+
+class TestLoadTest(unittest.TestCase):
+    """Тесты для нагрузочного теста API"""
+
+    def test_parsers(self):
+        """Тест разбора смеси эндпоинтов и Server-Timing"""
+        self.assertEqual(parse_mix('search=1,links=2.5'), {'search': 1.0, 'links': 2.5})
+        with self.assertRaises(ValueError):
+            parse_mix('unknown=1')
+        self.assertEqual(parse_server_timing('wait;dur=1.5, total;dur=40.0'), {'wait': 1.5, 'total': 40.0})
+        self.assertEqual(parse_server_timing(None), {})
+
+    def test_summary(self):
+        """Тест сводки: отказы лимитера, ошибки и время в очереди"""
+        samples = [
+            {'endpoint': 'links', 'status': 200, 'latency': 0.5, 'server_ms': 100.0},
+            {'endpoint': 'links', 'status': 200, 'latency': 0.3, 'server_ms': 100.0},
+            {'endpoint': 'search', 'status': 429, 'latency': 0.01, 'server_ms': 1.0},
+            {'endpoint': 'search', 'status': 0, 'latency': 60.0, 'server_ms': None},
+        ]
+
+        report = build_report({'samples': samples, 'elapsed': 2.0}, clients=4)
+
+        overall = report['overall']
+        self.assertEqual((overall['ok'], overall['rate_limited'], overall['errors']), (2, 1, 1))
+        self.assertEqual(overall['throughput_per_second'], 1.0)
+        self.assertEqual(report['endpoints']['links']['queue_ms']['max'], 400.0)
+        self.assertEqual(summarize_samples([], 1.0)['latency_ms']['p50'], None)
+
+    def test_in_process_stage(self):
+        """Тест короткого этапа нагрузки против сервера в этом процессе"""
+        with fake_backend_config():
+            target = InProcessTarget(threads=2, rate_limit=False)
+            try:
+                stage = run_stage(target.url, clients=3, duration=1.0, mix={'contents': 1},
+                                  queries=['Selenium'], timeout=10, seed=1)
+            finally:
+                target.close()
+
+        report = build_report(stage, clients=3)
+        self.assertGreater(report['overall']['ok'], 0)
+        self.assertEqual(report['overall']['errors'], 0)
+        self.assertIsNotNone(report['overall']['queue_ms']['p50'])
+
+if __name__ == '__main__':
+    unittest.main()
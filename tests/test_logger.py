@@ -0,0 +1,83 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+import tempfile
+import shutil
+from logging.handlers import QueueHandler
+from unittest.mock import patch
+
+from config import Config
+from logger import (log_filename, setup_logger, get_sampled_logger, RateLimitFilter, SizedTimedRotatingFileHandler,
+                    SuppressedCountFormatter)
+
+def _record(level=logging.INFO, msg='message'):
+    return logging.LogRecord('test', level, __file__, 1, msg, None, None)
+
+class TestLoggerSetup(unittest.TestCase):
+    """Тесты для настройки логирования"""
+
+    def test_setup_is_idempotent(self):
+        """Тест: повторная настройка не добавляет обработчики"""
+        logger = setup_logger()
+        setup_logger()
+        get_sampled_logger('cache')
+
+        self.assertEqual(len(logger.handlers), 1)
+        self.assertIsInstance(logger.handlers[0], QueueHandler)
+        self.assertEqual(len(get_sampled_logger('cache').filters), 1)
+
+    def test_rate_limit_filter(self):
+        """Тест ограничения частоты с выборкой сверх лимита"""
+        rate_filter = RateLimitFilter(burst=3, interval=60, sample=5)
+
+        passed = [rate_filter.filter(_record()) for _ in range(13)]
+
+        # 3 в пределах лимита, затем каждое 5-е
+        self.assertEqual(passed.count(True), 5)
+        self.assertTrue(rate_filter.filter(_record(logging.ERROR)))
+
+    def test_suppressed_count_reported(self):
+        """Тест: следующее пропущенное окно сообщает число подавленных сообщений"""
+        rate_filter = RateLimitFilter(burst=1, interval=60, sample=100)
+        rate_filter.filter(_record())
+        rate_filter.filter(_record())
+        rate_filter.filter(_record())
+
+        rate_filter._window_start -= 60
+        record = _record(msg='next')
+        self.assertTrue(rate_filter.filter(record))
+        self.assertEqual(record.getMessage(), 'next')
+        self.assertEqual(record.suppressed, 2)
+        formatter = SuppressedCountFormatter('%(levelname)s %(message)s')
+        self.assertEqual(formatter.format(record), 'INFO next (пропущено похожих сообщений: 2)')
+        self.assertEqual(formatter.format(_record(msg='other')), 'INFO other')
+
+    def test_size_rotation(self):
+        """Тест ротации файла по размеру"""
+        test_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(test_dir, 'test.log')
+            handler = SizedTimedRotatingFileHandler(path, max_bytes=200, when='midnight',
+                                                    backupCount=3, encoding='utf-8')
+            for i in range(20):
+                handler.emit(_record(msg=f'line {i} ' + 'x' * 20))
+            handler.close()
+
+            # Ротации в пределах одного интервала не затирают друг друга
+            self.assertEqual(len(os.listdir(test_dir)), 4)
+            self.assertLessEqual(os.path.getsize(path), 200)
+        finally:
+            shutil.rmtree(test_dir, ignore_errors=True)
+
+    def test_log_file_per_process(self):
+        """Тест: с LOG_PER_PROCESS у каждого процесса (воркера gunicorn) свой файл лога"""
+        with patch.object(Config, 'LOG_PER_PROCESS', False):
+            self.assertEqual(log_filename(), os.path.join('logs', 'wikipedia_navigator.log'))
+        with patch.object(Config, 'LOG_PER_PROCESS', True):
+            self.assertEqual(log_filename(), os.path.join('logs', f'wikipedia_navigator.{os.getpid()}.log'))
+
+if __name__ == '__main__':
+    unittest.main()
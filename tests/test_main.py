@@ -49,11 +49,12 @@ class TestWikipediaNavigator(unittest.TestCase):
             with patch('main.WebDriverWait') as mock_wait:
                 mock_create.return_value = self.mock_driver
                 mock_wait.return_value.until.return_value = self.mock_element
+                self.mock_driver.page_source = '<html><h1 id="firstHeading">Python</h1></html>'
                 
                 from main import search_wikipedia
                 driver = search_wikipedia("Python programming")
                 
-                self.assertIsNotNone(driver)
+                self.assertIs(driver, self.mock_driver)
                 self.mock_driver.get.assert_called_once_with("https://www.wikipedia.org/")
     
     def test_search_wikipedia_timeout(self):
@@ -67,7 +68,9 @@ class TestWikipediaNavigator(unittest.TestCase):
                 from main import search_wikipedia
                 result = search_wikipedia("test")
                 
-                self.assertIsNone(result)
+                # Таймаут - временный сбой, кэшируемый на короткий срок
+                self.assertFalse(result)
+                self.assertEqual(result.kind, 'transient')
     
     def test_search_wikipedia_driver_none(self):
         """Тест поиска с None драйвером"""
@@ -170,6 +173,24 @@ class TestWikipediaNavigator(unittest.TestCase):
                         # Проверяем, что функции были вызваны
                         self.assertTrue(mock_print_main.called)
 
+    def test_main_menu_dispatch(self):
+        """Тест выбора действий меню main"""
+        import main
+        inputs = ["Python", "1", "5", "4", "python", "3"]
+        with patch.object(main, 'search_wikipedia', return_value=self.mock_driver), \
+                patch.object(main, 'print_contents', return_value=[]), \
+                patch.object(main, 'print_paragraphs') as mock_paragraphs, \
+                patch.object(main, 'print_local_search') as mock_local_search, \
+                patch.object(main, 'quit_driver') as mock_quit, \
+                patch('builtins.input', side_effect=inputs), \
+                patch('builtins.print') as mock_print:
+            main.main()
+
+        mock_paragraphs.assert_called_once_with(self.mock_driver, None)
+        mock_local_search.assert_called_once_with("python")
+        mock_quit.assert_called_once_with(self.mock_driver)
+        mock_print.assert_any_call("Некорректный выбор. Пожалуйста, попробуйте снова.")
+
 class TestDataManager(unittest.TestCase):
     """Тесты для DataManager"""
     
@@ -188,17 +209,16 @@ class TestDataManager(unittest.TestCase):
     
     def test_save_search_history(self):
         """Тест сохранения истории поиска"""
-        with patch('builtins.open', create=True) as mock_open:
-            mock_file = Mock()
-            mock_open.return_value.__enter__.return_value = mock_file
-            
-            query = "test query"
-            results = [{"title": "Test", "url": "https://test.com"}]
-            
-            filename = self.data_manager.save_search_history(query, results)
-            
-            self.assertIsNotNone(filename)
-            mock_file.write.assert_called()
+        query = "test query"
+        results = [{"title": "Test", "url": "https://test.com"}]
+        
+        queued = self.data_manager.save_search_history(query, results)
+        self.data_manager.flush()
+        
+        self.assertTrue(queued)
+        recent = self.data_manager.history.recent_searches(1)
+        self.assertEqual(recent[0]['query'], query)
+        self.assertEqual(recent[0]['results'], results)
     
     def test_export_paragraphs_to_csv(self):
         """Тест экспорта параграфов в CSV"""
@@ -224,6 +244,64 @@ class TestDataManager(unittest.TestCase):
             self.assertIsNotNone(filename)
             mock_file.write.assert_called()
     
+    def test_export_paragraphs_from_generator_gzip(self):
+        """Тест потокового экспорта генератора в gzip"""
+        import gzip
+        
+        paragraphs = (f"Параграф {i}" for i in range(1, 4))
+        filename = self.data_manager.export_paragraphs_to_csv(paragraphs, compress=True)
+        
+        self.assertTrue(filename.endswith('.csv.gz'))
+        with gzip.open(filename, 'rt', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[0], 'Index,Paragraph')
+        self.assertEqual(lines[3], '3,Параграф 3')
+    
+    def test_iter_csv_lines_is_lazy(self):
+        """Тест: заголовок CSV доступен до чтения строк"""
+        from data_manager import iter_csv_lines
+        
+        def rows():
+            raise AssertionError("rows consumed too early")
+            yield []
+        
+        lines = iter_csv_lines(['Index', 'Text'], rows())
+        self.assertEqual(next(lines), 'Index,Text\r\n')
+    
+    def test_gzip_stream_roundtrip(self):
+        """Тест потокового gzip-сжатия"""
+        import gzip
+        from data_manager import gzip_stream
+        
+        chunks = [f"line {i}\n" for i in range(1000)]
+        data = b"".join(gzip_stream(iter(chunks), flush_bytes=1024))
+        
+        self.assertEqual(gzip.decompress(data).decode('utf-8'), "".join(chunks))
+    
+    def test_iter_paragraph_rows(self):
+        """Тест построчного чтения параграфов из хранилища"""
+        self.data_manager.save_page_content('Python', {
+            'paragraphs': [{'anchor': '', 'paragraphs': ['Intro']},
+                           {'anchor': 'History', 'paragraphs': ['One', 'Two']}]
+        })
+        
+        rows = list(self.data_manager.iter_paragraph_rows())
+        
+        self.assertEqual(rows, [['Python', '', 1, 'Intro'], ['Python', 'History', 1, 'One'],
+                                ['Python', 'History', 2, 'Two']])
+    
+    def test_saved_page_is_searchable(self):
+        """Тест инкрементальной индексации при сохранении страницы"""
+        self.data_manager.save_page_content('Python', {
+            'url': '/wiki/Python',
+            'paragraphs': [{'anchor': '', 'paragraphs': ['Python is a programming language']}]
+        })
+        
+        results = self.data_manager.search_local('"programming language"')
+        
+        self.assertEqual(results[0]['title'], 'Python')
+        self.assertEqual(self.data_manager.reindex_articles(), 0)
+    
     def test_save_page_content(self):
         """Тест сохранения содержимого страницы"""
         with patch('builtins.open', create=True) as mock_open:
@@ -260,6 +338,19 @@ class TestCacheManager(unittest.TestCase):
             from cache_manager import CacheManager
             self.cache_manager = CacheManager()
     
+    def test_redis_settings_from_config(self):
+        """Тест: хост из Config, короткий таймаут и без повторов (как у кэша api_server)"""
+        from config import Config
+        with patch('redis.Redis') as mock_redis, patch.object(Config, 'REDIS_HOST', 'cache-host'):
+            from cache_manager import CacheManager
+            CacheManager()
+        
+        kwargs = mock_redis.call_args.kwargs
+        self.assertEqual(kwargs['host'], 'cache-host')
+        self.assertEqual(kwargs['socket_timeout'], Config.REDIS_SOCKET_TIMEOUT)
+        self.assertEqual(kwargs['socket_connect_timeout'], Config.REDIS_SOCKET_TIMEOUT)
+        self.assertEqual(kwargs['retry']._retries, 0)
+    
     def test_generate_key(self):
         """Тест генерации ключа кэша"""
         key = self.cache_manager._generate_key("test", "arg1", kwarg1="value1")
@@ -0,0 +1,73 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest.mock import Mock
+
+from prometheus_client import REGISTRY
+
+import metrics
+from timing import record_stage
+
+def _value(name, labels=None):
+    return REGISTRY.get_sample_value(name, labels or {}) or 0.0
+
+class TestMetrics(unittest.TestCase):
+    """Тесты для метрик Prometheus"""
+
+    def test_observe_request(self):
+        """Тест счетчиков запросов, ошибок и гистограммы задержек"""
+        labels = {'route': 'api_test', 'method': 'POST', 'status': '500'}
+        before = _value('wikinav_http_requests_total', labels)
+        errors = _value('wikinav_http_request_errors_total', {'route': 'api_test'})
+
+        metrics.observe_request('api_test', 'POST', 500, 0.2)
+
+        self.assertEqual(_value('wikinav_http_requests_total', labels), before + 1)
+        self.assertEqual(_value('wikinav_http_request_errors_total', {'route': 'api_test'}), errors + 1)
+        self.assertGreaterEqual(_value('wikinav_http_request_duration_seconds_count', {'route': 'api_test'}), 1)
+
+    def test_cache_and_browser_counters(self):
+        """Тест учета кэша, браузеров и длительностей из timing"""
+        hits = _value('wikinav_cache_operations_total', {'cache': 'redis', 'result': 'hit'})
+        active = _value('wikinav_browsers_active')
+        launches = _value('wikinav_browser_launch_duration_seconds_count')
+
+        metrics.record_cache('hit')
+        metrics.record_browser_launch(success=True)
+        record_stage('driver_launch', 1.5)
+
+        self.assertEqual(_value('wikinav_cache_operations_total', {'cache': 'redis', 'result': 'hit'}), hits + 1)
+        self.assertEqual(_value('wikinav_browsers_active'), active + 1)
+        self.assertEqual(_value('wikinav_browser_launch_duration_seconds_count'), launches + 1)
+
+        metrics.record_browser_quit()
+        self.assertEqual(_value('wikinav_browsers_active'), active)
+
+    def test_quit_driver_records_quit(self):
+        """Тест учета закрытия браузера в quit_driver"""
+        from main import quit_driver
+        quits = _value('wikinav_browser_quits_total')
+        driver = Mock()
+
+        quit_driver(driver)
+
+        driver.quit.assert_called_once()
+        self.assertEqual(_value('wikinav_browser_quits_total'), quits + 1)
+
+    def test_metrics_endpoint(self):
+        """Тест эндпоинта /metrics"""
+        from api_server import app
+        client = app.test_client()
+
+        client.get('/metrics')
+        response = client.get('/metrics')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        body = response.get_data(as_text=True)
+        self.assertIn('wikinav_http_requests_total{method="GET",route="metrics_endpoint",status="200"}', body)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+from unittest.mock import Mock, patch
+
+from cache_manager import CacheManager, NegativeResult, cache_result, cache_search_results
+from config import Config
+from helpers import InMemoryRedis, fake_backend_config
+from page_parser import clear_page_cache, page_kind
+from wiki_stub import load_pages, search_results_html
+
+DISAMBIGUATION_HTML = """<html><head><title>Mercury - Wikipedia</title>
+<script>RLCONF={"wgCategories":["Disambiguation pages","Place name disambiguation pages"]};</script></head>
+<body><h1 id="firstHeading">Mercury</h1><div id="mw-content-text">
+<p><b>Mercury</b> may refer to:</p>
+<ul><li><a href="/wiki/Mercury_(planet)">Mercury (planet)</a></li>
+<li><a href="/wiki/Mercury_(element)">Mercury (element)</a></li></ul>
+<div id="disambigbox" class="metadata plainlinks dmbox"></div></div></body></html>"""
+
+class TestNegativeResult(unittest.TestCase):
+    """Тесты для отрицательных результатов поиска"""
+
+    def test_page_kind(self):
+        """Тест распознавания статьи, страницы "ничего не найдено" и неоднозначности"""
+        article = next(iter(load_pages().values()))['html']
+
+        self.assertEqual(page_kind(article), 'article')
+        self.assertEqual(page_kind(search_results_html('Pythn')), 'not_found')
+        self.assertEqual(page_kind(DISAMBIGUATION_HTML), 'disambiguation')
+
+    def test_result_semantics(self):
+        """Тест: ложен как None, сохраняется и восстанавливается из кэша, TTL по виду"""
+        result = NegativeResult('disambiguation', 'ambiguous', {'options': ['A', 'B']})
+
+        self.assertFalse(result)
+        self.assertEqual(result.ttl, Config.NEGATIVE_CACHE_TTL['disambiguation'])
+        self.assertEqual(NegativeResult.from_cache(json.loads(json.dumps(result.to_cache()))), result)
+        self.assertIsNone(NegativeResult.from_cache({'title': 'Python'}))
+        with self.assertRaises(ValueError):
+            NegativeResult('gone')
+
+    def test_cache_result_decorator(self):
+        """Тест кэширования отрицательного результата декоратором на срок по его виду"""
+        with patch('redis.Redis') as mock_redis:
+            mock_redis.return_value = Mock()
+            manager = CacheManager()
+        manager.redis_client = InMemoryRedis()
+        calls = []
+
+        @cache_result(prefix='negative-test', ttl=3600)
+        def search(query):
+            calls.append(query)
+            return NegativeResult('not_found', f"No article: {query}")
+
+        with patch('cache_manager.get_cache_manager', return_value=manager):
+            first = search('Pythn')
+            second = search('Pythn')
+
+        self.assertEqual(calls, ['Pythn'])
+        self.assertEqual(first, second)
+        self.assertEqual(list(manager.redis_client.ttls.values()), [Config.NEGATIVE_CACHE_TTL['not_found']])
+
+    def test_circuit_rejection_not_cached(self):
+        """Тест: отказ открытого автомата не кэшируется декоратором"""
+        with patch('redis.Redis') as mock_redis:
+            mock_redis.return_value = Mock()
+            manager = CacheManager()
+        manager.redis_client = InMemoryRedis()
+        calls = []
+
+        @cache_result(prefix='circuit-test', ttl=3600)
+        def search(query):
+            calls.append(query)
+            return NegativeResult('transient', 'Circuit is open', {'circuit': 'upstream:test', 'retry_after': 5})
+
+        with patch('cache_manager.get_cache_manager', return_value=manager):
+            search('Python')
+            search('Python')
+
+        self.assertEqual(calls, ['Python', 'Python'])
+        self.assertEqual(manager.redis_client.data, {})
+
+    def test_search_cache_skips_drivers(self):
+        """Тест: кэш поиска не сохраняет найденную статью (драйвер), только отрицательные результаты"""
+        with patch('redis.Redis') as mock_redis:
+            mock_redis.return_value = Mock()
+            manager = CacheManager()
+        manager.redis_client = InMemoryRedis()
+        drivers = []
+
+        @cache_search_results(ttl=3600)
+        def search(query):
+            drivers.append(Mock(name=f"driver-{query}"))
+            return drivers[-1]
+
+        with patch('cache_manager.get_cache_manager', return_value=manager):
+            first = search('Selenium')
+            second = search('Selenium')
+
+        self.assertIs(first, drivers[0])
+        self.assertIs(second, drivers[1])
+        self.assertEqual(manager.redis_client.data, {})
+
+class TestSearchNegativeResults(unittest.TestCase):
+    """Тесты для отрицательных результатов search_wikipedia"""
+
+    def setUp(self):
+        clear_page_cache()
+
+    def test_not_found_with_fake_driver(self):
+        """Тест: страница "ничего не найдено" - not_found, браузер закрывается"""
+        import main
+        with fake_backend_config(), \
+                patch('main.quit_driver', wraps=main.quit_driver) as quit_driver:
+            result = main.search_wikipedia('Qwertyuiop nonexistent')
+
+        self.assertIsInstance(result, NegativeResult)
+        self.assertEqual(result.kind, 'not_found')
+        quit_driver.assert_called_once()
+
+    def test_disambiguation_options(self):
+        """Тест: страница неоднозначности - disambiguation с вариантами статей"""
+        import main
+        driver = Mock(page_source=DISAMBIGUATION_HTML, current_url='https://en.wikipedia.org/wiki/Mercury')
+        with patch('main.create_driver', return_value=driver), patch('main.WebDriverWait'), \
+                patch.object(Config, 'NAVIGATION_DELAY', 0):
+            result = main.search_wikipedia('Mercury')
+
+        self.assertEqual(result.kind, 'disambiguation')
+        self.assertEqual(result.details['options'], ['Mercury (planet)', 'Mercury (element)'])
+        driver.quit.assert_called_once()
+
+class TestApiNegativeCache(unittest.TestCase):
+    """Тесты для отрицательных результатов в API"""
+
+    @classmethod
+    def setUpClass(cls):
+        import api_server
+        cls.api = api_server
+
+    def setUp(self):
+        self.client = self.api.app.test_client()
+        self.api.limiter.enabled = False
+        self.redis = InMemoryRedis()
+        patcher = patch.object(self.api, 'redis_client', self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.api.limiter.enabled = Config.RATELIMIT_ENABLED
+
+    def test_negative_results_cached_by_kind(self):
+        """Тест: статусы ответов по виду результата и повтор из кэша без поиска"""
+        results = {
+            'Pythn': NegativeResult('not_found', 'No article found'),
+            'Mercury': NegativeResult('disambiguation', 'Query is ambiguous', {'options': ['Mercury (planet)']}),
+            'Slow': NegativeResult('transient', 'Page load timed out'),
+        }
+        search = Mock(side_effect=lambda query: results[query])
+        with patch.object(self.api, 'search_wikipedia', search):
+            responses = {query: [self.client.post('/api/search', json={'query': query}) for _ in range(2)]
+                         for query in results}
+
+        self.assertEqual(search.call_count, 3)
+        for query, status in (('Pythn', 404), ('Mercury', 404), ('Slow', 503)):
+            first, second = responses[query]
+            self.assertEqual(first.status_code, status)
+            self.assertEqual(second.status_code, status)
+            self.assertEqual(first.get_json(), second.get_json())
+            self.assertEqual(first.get_json()['reason'], results[query].kind)
+        self.assertEqual(responses['Mercury'][1].get_json()['options'], ['Mercury (planet)'])
+        self.assertEqual(responses['Slow'][1].headers['Retry-After'], str(Config.NEGATIVE_CACHE_TTL['transient']))
+        self.assertEqual(sorted(self.redis.ttls.values()), sorted(Config.NEGATIVE_CACHE_TTL.values()))
+
+    def test_browser_failure_not_cached(self):
+        """Тест: ошибка запуска браузера не кэшируется"""
+        with patch.object(self.api, 'search_wikipedia', return_value=None):
+            response = self.client.post('/api/search', json={'query': 'Python'})
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(self.redis.data, {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,228 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import types
+from unittest.mock import Mock, patch
+
+from config import Config
+from http_driver import HttpDriver
+from page_parser import ParsedPage, get_parsed_page, clear_page_cache
+
+LEGACY_HTML = """
+<html><body>
+<h1 id="firstHeading">Python</h1>
+<div id="mw-content-text">
+  <div id="toc" class="toc"><ul>
+    <li class="toclevel-1"><a href="#History"><span class="tocnumber">1</span> <span class="toctext">History</span></a>
+      <ul>
+        <li class="toclevel-2"><a href="#Early"><span class="tocnumber">1.1</span> <span class="toctext">Early</span></a></li>
+      </ul>
+    </li>
+    <li class="toclevel-1"><a href="#Syntax"><span class="tocnumber">2</span> <span class="toctext">Syntax</span></a></li>
+  </ul></div>
+  <p>Intro</p>
+  <h2><span class="mw-headline" id="History">History</span></h2>
+  <p>History text</p>
+  <h3><span class="mw-headline" id="Early">Early</span></h3>
+  <p>Early text</p>
+  <h2><span class="mw-headline" id="Syntax">Syntax</span></h2>
+  <p>Syntax text</p>
+</div>
+</body></html>
+"""
+
+VECTOR_2022_HTML = """
+<html><body>
+<nav id="vector-toc"><ul id="mw-panel-toc-list">
+  <li id="toc-mw-content-text" class="vector-toc-list-item vector-toc-level-1">
+    <a class="vector-toc-link" href="#"><div class="vector-toc-text">(Top)</div></a>
+  </li>
+  <li id="toc-History" class="vector-toc-list-item vector-toc-level-1">
+    <a class="vector-toc-link" href="#History">
+      <div class="vector-toc-text"><span class="vector-toc-numb">1</span><span>History</span></div>
+    </a>
+    <ul id="toc-History-sublist" class="vector-toc-list">
+      <li id="toc-Early" class="vector-toc-list-item vector-toc-level-2">
+        <a class="vector-toc-link" href="#Early">
+          <div class="vector-toc-text"><span class="vector-toc-numb">1.1</span><span>Early</span></div>
+        </a>
+      </li>
+    </ul>
+  </li>
+</ul></nav>
+<div id="mw-content-text"><div class="mw-parser-output">
+  <p>Intro</p>
+  <div class="mw-heading mw-heading2"><h2 id="History">History</h2></div>
+  <p>History text</p>
+  <div class="mw-heading mw-heading3"><h3 id="Early">Early</h3></div>
+  <p>Early text</p>
+</div></div>
+</body></html>
+"""
+
+class TestParsedPage(unittest.TestCase):
+    """Тесты для разбора оглавления и разделов"""
+
+    def test_legacy_toc_tree(self):
+        """Тест разбора классического оглавления .toc"""
+        page = ParsedPage(LEGACY_HTML)
+
+        self.assertEqual([entry['number'] for entry in page.sections], ['1', '1.1', '2'])
+        self.assertEqual(page.toc[0]['title'], 'History')
+        self.assertEqual(page.toc[0]['children'][0]['anchor'], 'Early')
+        self.assertEqual(page.toc[0]['children'][0]['level'], 2)
+
+    def test_vector_2022_toc_tree(self):
+        """Тест разбора боковой панели Vector-2022"""
+        page = ParsedPage(VECTOR_2022_HTML)
+
+        self.assertEqual([entry['anchor'] for entry in page.sections], ['History', 'Early'])
+        self.assertEqual(page.find_section('1.1')['title'], 'Early')
+        self.assertIsNone(page.find_section('3'))
+
+    def test_toc_from_headings(self):
+        """Тест построения дерева по заголовкам при отсутствии оглавления"""
+        html = VECTOR_2022_HTML.replace('vector-toc', 'no-toc')
+        page = ParsedPage(html)
+
+        self.assertEqual([entry['number'] for entry in page.sections], ['1', '1.1'])
+
+    def test_section_paragraphs(self):
+        """Тест извлечения текста раздела из сохраненной страницы"""
+        for html in (LEGACY_HTML, VECTOR_2022_HTML):
+            page = ParsedPage(html)
+            self.assertEqual(page.get_section_paragraphs('History'), ['History text', 'Early text'])
+            self.assertEqual(page.get_section_text('Early'), 'Early text')
+            self.assertEqual(page.get_section_paragraphs('Missing'), [])
+
+    def test_paragraph_index(self):
+        """Тест индекса параграфов по якорям разделов"""
+        page = ParsedPage(LEGACY_HTML)
+
+        self.assertEqual(page.paragraph_index[''], ['Intro'])
+        self.assertEqual(page.paragraph_index['Syntax'], ['Syntax text'])
+        self.assertEqual(page.get_section_paragraphs('History', include_subsections=False), ['History text'])
+        self.assertEqual(page.paragraphs, ['Intro', 'History text', 'Early text', 'Syntax text'])
+
+    def test_paragraph_index_inline_markup(self):
+        """Тест: слова вокруг вложенных <a>/<b> не склеиваются в индексе параграфов"""
+        page = ParsedPage('<div id="mw-content-text"><h2 id="About">About</h2>'
+                          '<p><b>Python</b> is a <a href="/wiki/HL">high-level</a>, <a href="/wiki/GP">general-purpose</a>\n'
+                          '<a href="/wiki/PL">programming language</a>.</p></div>')
+
+        expected = ['Python is a high-level, general-purpose programming language.']
+        self.assertEqual(page.get_section_paragraphs('About'), expected)
+        self.assertEqual(page.to_content()['paragraphs'][1]['paragraphs'], expected)
+        self.assertEqual(page.paragraphs, list(page.iter_paragraph_text()))
+
+    def test_content_hash_ignores_markup(self):
+        """Тест: отпечаток не зависит от служебной разметки отрисовки, но меняется с текстом"""
+        rerendered = LEGACY_HTML.replace('<p>Intro</p>', '<p class="render-1">Intro</p><!-- NewPP limit report -->')
+        edited = LEGACY_HTML.replace('History text', 'Updated history')
+
+        self.assertEqual(ParsedPage(rerendered).content_hash, ParsedPage(LEGACY_HTML).content_hash)
+        self.assertNotEqual(ParsedPage(edited).content_hash, ParsedPage(LEGACY_HTML).content_hash)
+
+    def test_resolve_section(self):
+        """Тест поиска раздела по номеру или якорю"""
+        page = ParsedPage(VECTOR_2022_HTML)
+
+        self.assertEqual(page.resolve_section('1.1')['anchor'], 'Early')
+        self.assertEqual(page.resolve_section('History')['number'], '1')
+        self.assertIsNone(page.resolve_section('Missing'))
+
+    def test_get_parsed_page_cached(self):
+        """Тест кэширования разобранной страницы по URL"""
+        clear_page_cache()
+        driver = Mock()
+        driver.current_url = "https://en.wikipedia.org/wiki/Python"
+        driver.page_source = LEGACY_HTML
+        driver.execute_script.return_value = 1000.0
+
+        first = get_parsed_page(driver)
+        driver.current_url = "https://en.wikipedia.org/wiki/Python#Syntax"
+        second = get_parsed_page(driver)
+
+        self.assertIs(first, second)
+        self.assertEqual(first.title, 'Python')
+
+    def test_get_parsed_page_new_load(self):
+        """Тест: повторная загрузка того же URL разбирается заново, без идентификатора загрузки - без кэша"""
+        clear_page_cache()
+        driver = HttpDriver()
+        driver._load("https://en.wikipedia.org/wiki/Python", LEGACY_HTML)
+        first = get_parsed_page(driver)
+        self.assertIs(get_parsed_page(driver), first)
+
+        driver._load("https://en.wikipedia.org/wiki/Python", VECTOR_2022_HTML)
+        second = get_parsed_page(driver)
+        self.assertIsNot(second, first)
+        self.assertEqual([entry['anchor'] for entry in second.sections], ['History', 'Early'])
+
+        driver.execute_script = Mock(side_effect=Exception('no JavaScript'))
+        self.assertIsNot(get_parsed_page(driver), get_parsed_page(driver))
+
+    def test_iter_paragraph_text_and_links(self):
+        """Тест генераторов параграфов и ссылок: пробелы вокруг вложенных тегов сохраняются"""
+        page = ParsedPage('<div id="mw-content-text"><p>Python is <b>a</b> <a href="/wiki/Language">language</a></p>'
+                          '<p> </p><a href="/wiki/Guido">Guido</a><a href="#top">top</a></div>')
+
+        paragraphs = page.iter_paragraph_text()
+
+        self.assertNotIsInstance(paragraphs, list)
+        self.assertEqual(list(paragraphs), ['Python is a language'])
+        self.assertEqual([link['url'] for link in page.iter_links()], ['/wiki/Language', '/wiki/Guido'])
+        self.assertEqual(page.links, list(page.iter_links()))
+
+class TestApiStreamingExport(unittest.TestCase):
+    """Тест: API передает экспорту генераторы, а не списки"""
+
+    def test_exports_receive_generators(self):
+        """Тест: /api/paragraphs и /api/links экспортируют генераторами, ответ - первые элементы"""
+        import api_server
+        clear_page_cache()
+        html = LEGACY_HTML.replace('<p>Syntax text</p>', '<p>Syntax <a href="/wiki/Grammar">text</a></p>')
+        driver = Mock(current_url='https://en.wikipedia.org/wiki/Python', page_source=html)
+        self.addCleanup(setattr, api_server.limiter, 'enabled', Config.RATELIMIT_ENABLED)
+        api_server.limiter.enabled = False
+        client = api_server.app.test_client()
+        with patch.object(api_server, 'search_wikipedia', return_value=driver), \
+                patch.object(api_server, 'get_data_manager') as get_data_manager, \
+                patch.object(api_server, 'redis_client', Mock(get=Mock(return_value=None))), \
+                patch.object(Config, 'API_EXPORT_CSV', True):
+            paragraphs = client.post('/api/paragraphs', json={'query': 'Python'}).get_json()
+            links = client.post('/api/links', json={'query': 'Python'}).get_json()
+
+        submits = [call.args for call in get_data_manager.return_value.submit.call_args_list
+                   if call.args[0] is not get_data_manager.return_value.save_page_content]
+        self.assertEqual(len(submits), 2)
+        self.assertTrue(all(isinstance(args[1], types.GeneratorType) for args in submits))
+        self.assertEqual(paragraphs['results'], ['Intro', 'History text', 'Early text', 'Syntax text'])
+        self.assertEqual(list(submits[0][1]), paragraphs['results'])
+        self.assertEqual(links['results'], [{'text': 'text', 'url': 'https://en.wikipedia.org/wiki/Grammar'}])
+
+    def test_csv_export_opt_in(self):
+        """Тест: по умолчанию запросы /api/paragraphs и /api/links не создают CSV-файлов"""
+        import api_server
+        clear_page_cache()
+        driver = Mock(current_url='https://en.wikipedia.org/wiki/Python', page_source=LEGACY_HTML)
+        self.addCleanup(setattr, api_server.limiter, 'enabled', Config.RATELIMIT_ENABLED)
+        api_server.limiter.enabled = False
+        client = api_server.app.test_client()
+        with patch.object(api_server, 'search_wikipedia', return_value=driver), \
+                patch.object(api_server, 'get_data_manager') as get_data_manager, \
+                patch.object(api_server, 'redis_client', Mock(get=Mock(return_value=None))), \
+                patch.object(Config, 'API_EXPORT_CSV', False):
+            client.post('/api/paragraphs', json={'query': 'Python'})
+            client.post('/api/links', json={'query': 'Python'})
+
+        manager = get_data_manager.return_value
+        submitted = [call.args[0] for call in manager.submit.call_args_list]
+        self.assertNotIn(manager.export_paragraphs_to_csv, submitted)
+        self.assertNotIn(manager.export_links_to_csv, submitted)
+        self.assertIn(manager.save_page_content, submitted)
+
+if __name__ == '__main__':
+    unittest.main()
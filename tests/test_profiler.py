@@ -0,0 +1,160 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pstats
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+import profiler
+from config import Config
+from helpers import InMemoryRedis
+
+def busy_request(session, route, seconds):
+    """Имитация обработки запроса: работа процессора в течение seconds"""
+    token = session.begin_request(route)
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+    session.end_request(token)
+
+def wait_for_session():
+    deadline = time.time() + 5
+    while profiler.active_session() is None and time.time() < deadline:
+        time.sleep(0.01)
+    return profiler.active_session()
+
+class TestProfileSession(unittest.TestCase):
+    """Тесты для сеансов профилирования"""
+
+    def test_sampling_collects_request_stacks(self):
+        """Тест выборки стеков только потоков, обрабатывающих запрос"""
+        session = profiler.ProfileSession('sampling', seconds=5, requests=1, interval=0.002)
+        worker = threading.Thread(target=busy_request, args=(session, 'api_paragraphs', 0.2))
+        worker.start()
+        profiler.run_session(session)
+        worker.join()
+
+        self.assertEqual(session.requests_profiled, 1)
+        self.assertGreater(session.samples, 0)
+        self.assertLess(session.elapsed, 5)
+        lines = session.collapsed().splitlines()
+        self.assertTrue(all('busy_request' in line for line in lines))
+        self.assertTrue(lines[0].rsplit(' ', 1)[1].isdigit())
+        self.assertIsNone(profiler.active_session())
+
+    def test_route_filter(self):
+        """Тест фильтра маршрута и исключения служебных маршрутов"""
+        session = profiler.ProfileSession('sampling', route='api_links')
+
+        self.assertTrue(session.matches('api_links'))
+        self.assertFalse(session.matches('api_search'))
+        self.assertFalse(profiler.ProfileSession().matches('admin_profile'))
+        self.assertIsNone(session.begin_request('api_search'))
+
+    def test_cprofile_pstats(self):
+        """Тест cProfile: объединение запросов и файл pstats"""
+        session = profiler.ProfileSession('cprofile', seconds=5, requests=2)
+        for _ in range(2):
+            busy_request(session, 'api_search', 0.01)
+        profiler.run_session(session)
+
+        self.assertEqual(session.requests_profiled, 2)
+        self.assertIn('builtins.sum', session.text_report())
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'profile.pstats')
+            with open(path, 'wb') as f:
+                f.write(session.pstats_bytes())
+            functions = {name for _, _, name in pstats.Stats(path).stats}
+        self.assertIn('<built-in method builtins.sum>', functions)
+
+    def test_cprofile_one_request_at_a_time(self):
+        """Тест: одновременно профилируется один запрос"""
+        session = profiler.ProfileSession('cprofile')
+        first = session.begin_request('api_search')
+        second = session.begin_request('api_search')
+        session.end_request(second)
+        session.end_request(first)
+
+        self.assertIsNotNone(first)
+        self.assertIsNone(second)
+        self.assertEqual(session.requests_skipped, 1)
+        self.assertEqual(session.requests_profiled, 1)
+
+    def test_limits_and_busy(self):
+        """Тест ограничения длительности, проверки параметров и единственного сеанса"""
+        with patch.object(Config, 'PROFILE_MAX_SECONDS', 0.1):
+            session = profiler.ProfileSession(seconds=60)
+        self.assertEqual(session.seconds, 0.1)
+        with self.assertRaises(ValueError):
+            profiler.ProfileSession('perf')
+
+        running = profiler.ProfileSession(seconds=5)
+        thread = threading.Thread(target=profiler.run_session, args=(running,))
+        thread.start()
+        wait_for_session()
+        with self.assertRaises(profiler.ProfilerBusyError):
+            profiler.run_session(profiler.ProfileSession(seconds=1))
+        running.stop()
+        thread.join()
+
+class TestProfileEndpoint(unittest.TestCase):
+    """Тесты для маршрута /admin/profile"""
+
+    @classmethod
+    def setUpClass(cls):
+        from api_server import app, limiter
+        cls.app = app
+        cls.limiter = limiter
+
+    def setUp(self):
+        self.client = self.app.test_client()
+        self.limiter.enabled = False
+
+    def tearDown(self):
+        self.limiter.enabled = Config.RATELIMIT_ENABLED
+
+    def test_disabled_and_forbidden(self):
+        """Тест: без ADMIN_TOKEN маршрут отключен, с неверным токеном - запрещен"""
+        with patch.object(Config, 'ADMIN_TOKEN', ''):
+            self.assertEqual(self.client.post('/admin/profile').status_code, 404)
+        with patch.object(Config, 'ADMIN_TOKEN', 'secret'):
+            response = self.client.post('/admin/profile', headers={'X-Admin-Token': 'wrong'})
+            self.assertEqual(response.status_code, 403)
+            response = self.client.post('/admin/profile?format=pstats',
+                                        headers={'Authorization': 'Bearer secret'})
+            self.assertEqual(response.status_code, 400)
+
+    def test_profile_requests(self):
+        """Тест: сеанс выполняется в фоне, результат отдается по идентификатору сеанса"""
+        headers = {'X-Admin-Token': 'secret'}
+        with patch.object(Config, 'ADMIN_TOKEN', 'secret'), \
+                patch('api_server.redis_client', InMemoryRedis()):
+            started = self.client.post(
+                '/admin/profile?mode=cprofile&requests=1&seconds=5&route=api_timings&format=json', headers=headers)
+            self.assertEqual(started.status_code, 202)
+            location = started.headers['Location']
+            self.assertEqual(location, started.get_json()['result'])
+            self.assertEqual(self.client.get(location, headers=headers).status_code, 202)
+            self.assertEqual(self.client.post('/admin/profile', headers=headers).status_code, 409)
+
+            self.client.get('/api/stats')
+            self.assertEqual(self.client.get('/api/timings').status_code, 200)
+            deadline = time.time() + 5
+            response = self.client.get(location, headers=headers)
+            while response.status_code == 202 and time.time() < deadline:
+                time.sleep(0.01)
+                response = self.client.get(location, headers=headers)
+            unknown = self.client.get('/admin/profile/missing', headers=headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['profile']['requests_profiled'], 1)
+        self.assertEqual(response.headers['X-Profile-Requests'], '1')
+        self.assertEqual(unknown.status_code, 404)
+        self.assertIsNone(profiler.active_session())
+
+if __name__ == '__main__':
+    unittest.main()
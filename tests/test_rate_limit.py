@@ -0,0 +1,70 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest.mock import patch
+
+from config import Config
+from helpers import InMemoryRedis, fake_backend_config
+from page_parser import clear_page_cache
+
+class TestRequestCost(unittest.TestCase):
+    """Тесты для лимитов API в единицах стоимости запроса"""
+
+    @classmethod
+    def setUpClass(cls):
+        import api_server
+        cls.api = api_server
+
+    def setUp(self):
+        clear_page_cache()
+        self.client = self.api.app.test_client()
+        self.api.limiter.enabled = True
+        self.addCleanup(setattr, self.api.limiter, 'enabled', Config.RATELIMIT_ENABLED)
+        self.api.reset_rate_limits()
+        self.addCleanup(self.api.reset_rate_limits)
+        for patcher in (patch.object(self.api, 'redis_client', InMemoryRedis()),
+                        fake_backend_config()):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _search(self, query):
+        return self.client.post('/api/search', json={'query': query})
+
+    def test_cache_hit_cheaper_than_browser(self):
+        """Тест: запуск браузера расходует RATELIMIT_COST_BROWSER единиц, ответ из кэша - RATELIMIT_COST_CACHE_HIT"""
+        quota = 10 * Config.RATELIMIT_COST_BROWSER
+        first = self._search('Selenium')
+        second = self._search('Selenium')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(int(first.headers['X-RateLimit-Limit']), quota)
+        self.assertEqual(int(first.headers['X-RateLimit-Remaining']), quota - Config.RATELIMIT_COST_BROWSER)
+        self.assertEqual(int(second.headers['X-RateLimit-Remaining']),
+                         quota - Config.RATELIMIT_COST_BROWSER - Config.RATELIMIT_COST_CACHE_HIT)
+
+    def test_browser_work_exhausts_quota(self):
+        """Тест: после исчерпания квоты запусками браузера отклоняются и запросы из кэша"""
+        with patch.object(Config, 'RATELIMIT_COST_BROWSER', 50):
+            responses = [self._search(query) for query in ('Selenium', 'Python', 'Selenium')]
+
+        self.assertEqual([response.status_code for response in responses], [200, 200, 429])
+
+    def test_monitoring_endpoints_exempt(self):
+        """Тест: /metrics и /health не ограничиваются лимитом по умолчанию (50 в час)"""
+        for path in ('/metrics', '/health'):
+            statuses = {self.client.get(path).status_code for _ in range(60)}
+            self.assertEqual(statuses, {200}, path)
+
+    def test_charge_request(self):
+        """Тест выбора стоимости по этапам запроса"""
+        with self.api.app.test_request_context():
+            self.assertEqual(self.api.charge_request([('driver_launch', 1.0), ('parse', 0.1)]),
+                             Config.RATELIMIT_COST_BROWSER)
+            self.assertEqual(self.api.charge_request([('parse', 0.1)]), Config.RATELIMIT_COST_DEFAULT)
+            self.api.g.cache_hit = True
+            self.assertEqual(self.api.charge_request([]), Config.RATELIMIT_COST_CACHE_HIT)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+import shutil
+from functools import partial
+from unittest.mock import Mock, patch
+
+from api_cache import invalidate_article
+from config import Config
+from data_manager import DataManager
+from helpers import InMemoryRedis
+from refresh import ArticleRefresher, diff_sections, fetch_revision_ids
+
+URL = "https://en.wikipedia.org/wiki/Python_(language)"
+
+PAGE_TEMPLATE = """
+<html><head><script>RLCONF={{"wgRevisionId":{revision}}};</script></head><body>
+<h1 id="firstHeading">Python</h1>
+<div id="mw-content-text">
+  <p>Intro</p>
+  <h2 id="History">History</h2><p>{history}</p>
+  <h2 id="Syntax">Syntax</h2><p>Syntax text</p>
+</div></body></html>
+"""
+
+class TestArticleRefresher(unittest.TestCase):
+    """Тесты для обновления статей с проверкой изменений"""
+
+    def setUp(self):
+        """Настройка перед каждым тестом"""
+        self.test_dir = tempfile.mkdtemp()
+        self.data_manager = DataManager(self.test_dir)
+        self.revisions = {URL: 1}
+        self.html = PAGE_TEMPLATE.format(revision=1, history='Old history')
+        self.driver_factory = Mock(side_effect=self._make_driver)
+        self.cache_invalidator = Mock()
+        self.refresher = ArticleRefresher(self.data_manager, driver_factory=self.driver_factory,
+                                          revision_fetcher=lambda urls: dict(self.revisions),
+                                          cache_invalidator=self.cache_invalidator)
+
+    def tearDown(self):
+        """Очистка после каждого теста"""
+        self.data_manager.flush()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _make_driver(self):
+        driver = Mock()
+        driver.page_source = self.html
+        driver.current_url = URL
+        return driver
+
+    def test_unchanged_revision_skips_browser(self):
+        """Тест: та же ревизия - браузер не запускается"""
+        first = self.refresher.refresh({'Python': URL})
+        second = self.refresher.refresh({'Python': URL})
+
+        self.assertEqual(first[0]['status'], 'new')
+        self.assertEqual(second[0]['status'], 'unchanged')
+        self.assertEqual(self.driver_factory.call_count, 1)
+
+    def test_changed_sections_detected(self):
+        """Тест определения измененных разделов"""
+        self.refresher.refresh({'Python': URL})
+        self.revisions[URL] = 2
+        self.html = PAGE_TEMPLATE.format(revision=2, history='New history')
+
+        report = self.refresher.refresh({'Python': URL})
+
+        self.assertEqual(report[0]['status'], 'changed')
+        self.assertEqual(report[0]['sections'], {'added': [], 'removed': [], 'modified': ['History']})
+        self.assertEqual(self.data_manager.history.get_fingerprint('Python')['revision_id'], 2)
+        self.assertEqual(self.data_manager.search_local('new history')[0]['title'], 'Python')
+        url, queries, sections = self.cache_invalidator.call_args[0]
+        self.assertEqual(url, URL)
+        self.assertEqual(queries, ['Python', 'Python (language)'])
+        self.assertEqual([entry['anchor'] for entry in sections], ['History', 'Syntax'])
+
+    def test_diff_sections(self):
+        """Тест сравнения отпечатков разделов"""
+        diff = diff_sections({'a': '1', 'b': '2'}, {'b': '3', 'c': '4'})
+        self.assertEqual(diff, {'added': ['c'], 'removed': ['a'], 'modified': ['b']})
+
+    def test_fetch_revision_ids_batched(self):
+        """Тест пакетной проверки ревизий с нормализацией заголовков"""
+        response = Mock()
+        response.json.return_value = {'query': {
+            'normalized': [{'from': 'Python (language)', 'to': 'Python (programming language)'}],
+            'pages': [{'title': 'Python (programming language)', 'revisions': [{'revid': 42}]}]
+        }}
+        with patch('refresh.requests.get', return_value=response) as mock_get:
+            revisions = fetch_revision_ids([URL])
+
+        self.assertEqual(revisions, {URL: 42})
+        mock_get.assert_called_once()
+        self.assertEqual(mock_get.call_args[0][0], "https://en.wikipedia.org/w/api.php")
+
+class TestRefreshApiCache(unittest.TestCase):
+    """Тест сброса кэша ответов API при обновлении статьи"""
+
+    def setUp(self):
+        import api_server
+        self.api = api_server
+        self.client = api_server.app.test_client()
+        api_server.limiter.enabled = False
+        self.addCleanup(setattr, api_server.limiter, 'enabled', Config.RATELIMIT_ENABLED)
+        self.redis = InMemoryRedis()
+        self.test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.test_dir, True)
+        self.data_manager = DataManager(self.test_dir)
+        self.addCleanup(self.data_manager.flush)
+        self.revisions = {URL: 1}
+        self.html = PAGE_TEMPLATE.format(revision=1, history='Old history')
+        for patcher in (patch.object(api_server, 'redis_client', self.redis),
+                        patch.object(api_server, 'store_article'),
+                        patch.object(api_server, 'quit_driver'),
+                        patch.object(api_server, 'get_data_manager', return_value=self.data_manager),
+                        patch.object(api_server, 'search_wikipedia', side_effect=lambda query: self._make_driver())):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.refresher = ArticleRefresher(self.data_manager, driver_factory=self._make_driver,
+                                          revision_fetcher=lambda urls: dict(self.revisions),
+                                          cache_invalidator=partial(invalidate_article, client=self.redis))
+
+    def _make_driver(self):
+        driver = Mock()
+        driver.page_source = self.html
+        driver.current_url = URL
+        driver.title = 'Python - Wikipedia'
+        return driver
+
+    def test_refreshed_article_served_with_new_etag(self):
+        """Тест: после обновления статьи кэш API сброшен, ответ - новая версия с новым ETag"""
+        self.refresher.refresh({'Python': URL})
+        first = self.client.get('/api/paragraphs?query=Python')
+        cached = self.client.post('/api/paragraphs', json={'query': 'Python'})
+        section = self.client.get('/api/paragraphs?query=Python&section=History')
+
+        self.revisions[URL] = 2
+        self.html = PAGE_TEMPLATE.format(revision=2, history='New history')
+        self.refresher.refresh({'Python': URL})
+        refreshed = self.client.post('/api/paragraphs', json={'query': 'Python'})
+        refreshed_section = self.client.get('/api/paragraphs?query=Python&section=History')
+
+        self.assertEqual(cached.headers['ETag'], first.headers['ETag'])
+        self.assertIn('Old history', first.get_json()['results'])
+        self.assertIn('New history', refreshed.get_json()['results'])
+        self.assertNotEqual(refreshed.headers['ETag'], first.headers['ETag'])
+        self.assertEqual(refreshed_section.get_json()['results'], ['New history'])
+        self.assertNotEqual(refreshed_section.headers['ETag'], section.headers['ETag'])
+        self.assertEqual(self.api.search_wikipedia.call_count, 4)
+
+    def test_other_queries_and_search_invalidated(self):
+        """Тест: сбрасываются ответы на любой запрос, который привел к статье, и ответы /api/search"""
+        self.refresher.refresh({'Python': URL})
+        alias = self.client.get('/api/paragraphs?query=python+lang')
+        search = self.client.post('/api/search', json={'query': 'python lang'})
+        self.assertEqual(self.client.get('/api/paragraphs?query=python+lang').headers['ETag'], alias.headers['ETag'])
+
+        self.revisions[URL] = 2
+        self.html = PAGE_TEMPLATE.format(revision=2, history='New history')
+        self.refresher.refresh({'Python': URL})
+        refreshed = self.client.get('/api/paragraphs?query=python+lang')
+        searched = self.client.post('/api/search', json={'query': 'python lang'})
+
+        self.assertIn('New history', refreshed.get_json()['results'])
+        self.assertNotEqual(refreshed.headers['ETag'], alias.headers['ETag'])
+        self.assertEqual(search.status_code, 200)
+        self.assertEqual(self.api.search_wikipedia.call_count, 4)
+        self.assertEqual(searched.status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import socket
+import subprocess
+import time
+from unittest.mock import patch
+
+import requests
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+
+import remote_driver
+from config import Config
+from helpers import FAST_FAKE_DRIVER, fake_backend_config
+from remote_driver import NoBrowserCapacityError, RemoteBrowserPool, parse_hosts
+from webdriver_stub import WebDriverError, WebDriverStubServer
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+class TestRemoteBrowserPool(unittest.TestCase):
+    """Тесты для маршрутизации сеансов по удаленным WebDriver"""
+
+    def setUp(self):
+        patcher = fake_backend_config()
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.stubs = [WebDriverStubServer(capacity).start() for capacity in (2, 2, 1)]
+        self.pool = RemoteBrowserPool(parse_hosts(','.join(f"{stub.url}|{stub.capacity}" for stub in self.stubs)),
+                                      failure_threshold=2, health_interval=0)
+        self.drivers = []
+
+    def tearDown(self):
+        for driver in self.drivers:
+            driver.quit()
+        for stub in self.stubs:
+            stub.stop()
+
+    def _create(self):
+        driver = self.pool.create_driver()
+        self.drivers.append(driver)
+        return driver
+
+    def test_parse_hosts(self):
+        """Тест разбора списка хостов"""
+        hosts = parse_hosts('http://a:4444/|8, http://b:4444/wd/hub', default_capacity=3)
+
+        self.assertEqual([(host.url, host.capacity) for host in hosts],
+                         [('http://a:4444', 8), ('http://b:4444/wd/hub', 3)])
+
+    def test_least_loaded_routing(self):
+        """Тест выбора наименее загруженного хоста и освобождения слотов"""
+        hosts = [self._create().remote_host for _ in range(5)]
+        urls = [stub.url for stub in self.stubs]
+
+        self.assertEqual(hosts[:3], urls)
+        self.assertEqual(sorted(hosts[3:]), sorted(urls[:2]))
+        self.assertEqual([len(stub.sessions) for stub in self.stubs], [2, 2, 1])
+        with self.assertRaises(NoBrowserCapacityError):
+            self.pool.create_driver()
+
+        self.drivers.pop(2).quit()
+        self.assertEqual(self.pool.host(urls[2]).free_slots, 1)
+        self.assertEqual(self._create().remote_host, urls[2])
+
+    def test_remote_session_commands(self):
+        """Тест поиска статьи через сеанс удаленного WebDriver"""
+        driver = self._create()
+        driver.get('https://www.wikipedia.org/')
+        search_box = driver.find_element(By.NAME, 'search')
+        search_box.clear()
+        search_box.send_keys('python')
+        search_box.send_keys(Keys.RETURN)
+
+        self.assertEqual(driver.title, 'Python (programming language) - Wikipedia')
+        link = driver.find_elements(By.CSS_SELECTOR, "a[href^='/wiki/']")[0]
+        self.assertTrue(link.get_attribute('href').startswith('https://www.wikipedia.org/wiki/'))
+
+    def test_unknown_command(self):
+        """Тест: команда вне таблицы маршрутов - ошибка unknown command с кодом 404"""
+        stub = self.stubs[0]
+        session_id = stub.new_session()['sessionId']
+        self.addCleanup(stub.delete_session, session_id)
+
+        with self.assertRaises(WebDriverError) as context:
+            stub.command('GET', f"/session/{session_id}/window/rect", {})
+        self.assertEqual((context.exception.error, context.exception.status), ('unknown command', 404))
+        with self.assertRaises(WebDriverError) as context:
+            stub.command('GET', '/session/missing/title', {})
+        self.assertEqual(context.exception.error, 'invalid session id')
+
+    def test_failing_host_removed_from_rotation(self):
+        """Тест вывода из ротации хоста, на котором не создаются сеансы"""
+        failing = self.stubs[0]
+        failing.driver_factory = lambda: (_ for _ in ()).throw(RuntimeError('Chrome crashed'))
+        host = self.pool.host(failing.url)
+
+        self.assertEqual(self._create().remote_host, self.stubs[1].url)
+        self.assertEqual(host.failures, 1)
+        self._create()
+        self.assertFalse(host.healthy)
+        self.assertNotEqual(self._create().remote_host, failing.url)
+        with self.assertRaises(NoBrowserCapacityError):
+            self.pool.create_driver()
+
+        # /status отвечает - хост возвращается в ротацию
+        self.pool.check_health()
+        self.assertTrue(host.healthy)
+        self.assertEqual(host.failures, 0)
+
+    def test_health_check_and_drain(self):
+        """Тест проверки /status: недоступный и выводимый из работы хосты"""
+        driver = self._create()
+        self.stubs[0].ready = False
+        self.stubs[2].stop()
+        self.stubs.pop(2)
+        self.pool.check_health()
+
+        snapshot = {host['url']: host for host in self.pool.snapshot()}
+        self.assertFalse(snapshot[self.stubs[0].url]['healthy'])
+        self.assertTrue(snapshot[self.stubs[1].url]['healthy'])
+        self.assertEqual(len([host for host in snapshot.values() if not host['healthy']]), 2)
+        self.assertEqual(self._create().remote_host, self.stubs[1].url)
+        # Открытые сеансы выводимого хоста продолжают работать
+        driver.get('https://www.wikipedia.org/')
+        self.assertEqual(driver.title, 'Wikipedia')
+
+        self.pool.drain(self.stubs[1].url)
+        with self.assertRaises(NoBrowserCapacityError):
+            self.pool.create_driver()
+
+    def test_create_driver_backend(self):
+        """Тест выбора удаленного WebDriver в create_driver"""
+        import main
+        with patch.object(Config, 'DRIVER_BACKEND', 'remote'), patch.object(remote_driver, '_pool', self.pool):
+            driver = main.create_driver()
+            self.drivers.append(driver)
+
+        self.assertEqual(driver.remote_host, self.stubs[0].url)
+
+class TestWebDriverStubProcesses(unittest.TestCase):
+    """Тест маршрутизации по нескольким процессам-заменителям WebDriver"""
+
+    def test_routing_across_processes(self):
+        env = dict(os.environ, **{key: str(value) for key, value in FAST_FAKE_DRIVER.items()})
+        ports = [_free_port(), _free_port()]
+        processes = [subprocess.Popen([sys.executable, 'webdriver_stub.py', '--port', str(port), '--capacity', '1'],
+                                      cwd=PROJECT_DIR, env=env, stdout=subprocess.DEVNULL)
+                     for port in ports]
+        try:
+            urls = [f"http://127.0.0.1:{port}" for port in ports]
+            deadline = time.time() + 15
+            while time.time() < deadline:
+                try:
+                    if all(requests.get(f"{url}/status", timeout=1).ok for url in urls):
+                        break
+                except requests.RequestException:
+                    time.sleep(0.1)
+
+            pool = RemoteBrowserPool(parse_hosts(','.join(urls), default_capacity=1), health_interval=0)
+            pool.check_health()
+            drivers = [pool.create_driver() for _ in urls]
+
+            self.assertEqual(sorted(driver.remote_host for driver in drivers), sorted(urls))
+            for driver in drivers:
+                driver.quit()
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,214 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from cache_manager import NegativeResult
+from config import Config
+from scheduler import BrowserScheduler, SchedulerRejected
+
+class TestBrowserScheduler(unittest.TestCase):
+    """Тесты для планировщика браузерной работы"""
+
+    def _scheduler(self, **kwargs):
+        params = dict(slots=1, weights={'interactive': 4, 'bulk': 1}, starvation_seconds=60,
+                      max_queue={'interactive': 100, 'bulk': 100}, max_wait=10)
+        params.update(kwargs)
+        return BrowserScheduler(**params)
+
+    def _enqueue(self, scheduler, priorities, order, rejected=None):
+        """Ставит запросы в очередь по одному (порядок постановки детерминирован)"""
+        threads = []
+        for priority in priorities:
+            queued = sum(item['queued'] for item in scheduler.snapshot()['classes'].values())
+
+            def work(priority=priority):
+                try:
+                    with scheduler.slot(priority):
+                        order.append(priority)
+                except SchedulerRejected:
+                    if rejected is None:
+                        raise
+                    rejected.append(priority)
+            thread = threading.Thread(target=work)
+            thread.start()
+            threads.append(thread)
+            while sum(item['queued'] for item in scheduler.snapshot()['classes'].values()) == queued:
+                time.sleep(0.001)
+        return threads
+
+    def test_weighted_fair_sharing(self):
+        """Тест: при конкуренции слоты делятся по весам, bulk не вытесняется полностью"""
+        scheduler = self._scheduler()
+        order = []
+        scheduler.acquire('bulk')
+        threads = self._enqueue(scheduler, ['interactive'] * 8 + ['bulk'] * 4, order)
+
+        scheduler.release('bulk')
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(order[:10], ['interactive'] * 5 + ['bulk'] + ['interactive'] * 3 + ['bulk'])
+        snapshot = scheduler.snapshot()
+        self.assertEqual(snapshot['active'], 0)
+        self.assertEqual(snapshot['classes']['interactive']['granted'], 8)
+        self.assertGreater(snapshot['classes']['bulk']['max_wait'], 0)
+
+    def test_starvation_protection(self):
+        """Тест: запрос, ждущий дольше предела, обслуживается раньше более приоритетных"""
+        scheduler = self._scheduler(starvation_seconds=0.05)
+        order = []
+        scheduler.acquire('interactive')
+        threads = self._enqueue(scheduler, ['bulk'], order)
+        time.sleep(0.1)
+        threads += self._enqueue(scheduler, ['interactive'] * 3, order)
+
+        scheduler.release('interactive')
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(order[0], 'bulk')
+
+    def test_queue_limits(self):
+        """Тест отказа при заполненной очереди и по истечении ожидания"""
+        scheduler = self._scheduler(max_queue={'interactive': 100, 'bulk': 1}, max_wait=0.05)
+        scheduler.acquire('interactive')
+        rejected = []
+        threads = self._enqueue(scheduler, ['bulk'], [], rejected)
+
+        with self.assertRaises(SchedulerRejected):
+            scheduler.acquire('bulk')
+        with self.assertRaises(SchedulerRejected):
+            scheduler.acquire('interactive')
+        for thread in threads:
+            thread.join(5)
+
+        classes = scheduler.snapshot()['classes']
+        # Запрос в очереди bulk тоже не дождался слота
+        self.assertEqual(rejected, ['bulk'])
+        self.assertEqual(classes['bulk']['timeouts'], 1)
+        self.assertEqual(classes['bulk']['rejected'], 1)
+        self.assertEqual(classes['interactive']['timeouts'], 1)
+        self.assertEqual(classes['interactive']['queued'], 0)
+
+class TestApiScheduling(unittest.TestCase):
+    """Тесты для классов приоритета запросов API"""
+
+    @classmethod
+    def setUpClass(cls):
+        import api_server
+        cls.api = api_server
+
+    def setUp(self):
+        self.client = self.api.app.test_client()
+        self.api.limiter.enabled = False
+        self.addCleanup(setattr, self.api.limiter, 'enabled', Config.RATELIMIT_ENABLED)
+        self.scheduler = BrowserScheduler(slots=1, weights={'interactive': 4, 'bulk': 1},
+                                          max_queue={'interactive': 0, 'bulk': 0})
+        patcher = patch.object(self.api, 'get_scheduler', return_value=self.scheduler)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_request_priority(self):
+        """Тест: без ключа - класс по умолчанию (interactive), X-Priority может его понизить"""
+        cases = [({'X-Priority': 'bulk'}, 'bulk'),
+                 ({'X-Priority': 'interactive'}, 'interactive'),
+                 ({'X-Priority': 'urgent'}, 'interactive'),
+                 ({}, 'interactive')]
+        with patch.multiple(Config, API_KEY_CLASSES={}, SCHEDULER_DEFAULT_CLASS='interactive'):
+            for headers, priority in cases:
+                with self.api.app.test_request_context(headers=headers):
+                    self.assertEqual(self.api.request_priority(), priority)
+
+    def test_cache_warm_request_is_bulk(self):
+        """Тест: прогрев кэша в процессе сервера выполняется с приоритетом bulk"""
+        with patch.multiple(Config, API_KEY_CLASSES={}, SCHEDULER_DEFAULT_CLASS='interactive'):
+            with self.api.app.test_request_context(environ_base={self.api.CACHE_WARM_ENVIRON_KEY: True},
+                                                   headers={'X-Priority': 'interactive'}):
+                self.assertEqual(self.api.request_priority(), 'bulk')
+
+    def test_priority_header_cannot_raise_class(self):
+        """Тест: X-Priority не повышает класс ключа или класс по умолчанию"""
+        cases = [({'X-Priority': 'interactive'}, 'bulk'),
+                 ({'X-API-Key': 'ui-key'}, 'interactive'),
+                 ({'X-API-Key': 'ui-key', 'X-Priority': 'bulk'}, 'bulk'),
+                 ({'X-API-Key': 'batch-key', 'X-Priority': 'interactive'}, 'bulk'),
+                 ({'X-API-Key': 'unknown', 'X-Priority': 'interactive'}, 'bulk')]
+        with patch.multiple(Config, API_KEY_CLASSES={'batch-key': 'bulk', 'ui-key': 'interactive'},
+                            SCHEDULER_DEFAULT_CLASS='bulk'):
+            for headers, priority in cases:
+                with self.api.app.test_request_context(headers=headers):
+                    self.assertEqual(self.api.request_priority(), priority)
+        # Без заданных ключей - так же
+        with patch.multiple(Config, API_KEY_CLASSES={}, SCHEDULER_DEFAULT_CLASS='bulk'):
+            with self.api.app.test_request_context(headers={'X-Priority': 'interactive'}):
+                self.assertEqual(self.api.request_priority(), 'bulk')
+
+    def test_interactive_served_when_bulk_saturates_threads(self):
+        """Тест: bulk-нагрузка не занимает все потоки сервера, interactive получает следующий слот"""
+        self.scheduler = BrowserScheduler()  # Размеры слотов и очередей - по умолчанию из Config
+        self.assertLess(self.scheduler.slots + self.scheduler.max_queue['bulk'], Config.SERVER_THREADS)
+        gate = threading.Semaphore(0)
+        started = []
+
+        def search(query):
+            started.append(query)
+            gate.acquire(timeout=5)
+            return NegativeResult('not_found', f"No article for {query}")
+
+        def post(query, priority):
+            return self.client.post('/api/links', json={'query': query}, headers={'X-Priority': priority})
+
+        def state():
+            return self.scheduler.snapshot()['classes']
+
+        def wait_for(condition):
+            deadline = time.monotonic() + 5
+            while not condition() and time.monotonic() < deadline:
+                time.sleep(0.005)
+            self.assertTrue(condition())
+
+        bulk_total = Config.SERVER_THREADS * 2
+        with patch.object(self.api, 'get_scheduler', return_value=self.scheduler), \
+                patch.object(self.api, 'search_wikipedia', side_effect=search), \
+                patch.object(Config, 'API_KEY_CLASSES', {}), \
+                ThreadPoolExecutor(max_workers=Config.SERVER_THREADS) as server:
+            bulk = [server.submit(post, f"bulk-{n}", 'bulk') for n in range(bulk_total)]
+            accepted = self.scheduler.slots + self.scheduler.max_queue['bulk']
+            wait_for(lambda: state()['bulk']['rejected'] == bulk_total - accepted)
+            interactive = server.submit(post, 'interactive', 'interactive')
+            wait_for(lambda: state()['interactive']['queued'] == 1)
+
+            gate.release()
+            wait_for(lambda: len(started) == self.scheduler.slots + 1)
+            for _ in range(accepted):
+                gate.release()
+            statuses = [future.result(5).status_code for future in bulk]
+
+        self.assertEqual(started[self.scheduler.slots], 'interactive')
+        self.assertEqual(interactive.result(5).status_code, 404)
+        self.assertEqual(statuses.count(503), bulk_total - accepted)
+        self.assertEqual(statuses.count(404), accepted)
+
+    def test_overloaded_response(self):
+        """Тест: без свободного слота и места в очереди - 503, состояние в /api/scheduler"""
+        self.scheduler.acquire('interactive')
+        self.addCleanup(self.scheduler.release, 'interactive')
+        with patch.object(self.api, 'search_wikipedia') as search:
+            response = self.client.post('/api/links', json={'query': 'Python'}, headers={'X-Priority': 'bulk'})
+        state = self.client.get('/api/scheduler').get_json()['scheduler']
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.get_json()['priority'], 'bulk')
+        self.assertIn('Retry-After', response.headers)
+        search.assert_not_called()
+        self.assertEqual(state['active'], 1)
+        self.assertEqual(state['classes']['bulk']['rejected'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+import shutil
+from unittest.mock import patch
+
+from search_index import SearchIndex, parse_query, tokenize
+
+class TestSearchIndex(unittest.TestCase):
+    """Тесты для локального полнотекстового индекса"""
+
+    def setUp(self):
+        """Настройка перед каждым тестом"""
+        self.test_dir = tempfile.mkdtemp()
+        self.index = SearchIndex(os.path.join(self.test_dir, 'index.db'))
+        self.index.index_document('Python', ['Python is a programming language.', 'Guido van Rossum created it.'],
+                                  url='/wiki/Python', content_hash='h1')
+        self.index.index_document('Java', ['Java is a programming language too.', 'Coffee from Java island.'],
+                                  url='/wiki/Java', content_hash='h2')
+        self.index.index_document('Кофе', ['Кофе - напиток из зерен.'], content_hash='h3')
+
+    def tearDown(self):
+        """Очистка после каждого теста"""
+        self.index.close()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_tokenize_and_parse_query(self):
+        """Тест токенизации и разбора фраз"""
+        self.assertEqual(tokenize('Кофе, Java!'), ['кофе', 'java'])
+        terms, phrases = parse_query('island "programming language"')
+        self.assertEqual(terms, ['island', 'programming', 'language'])
+        self.assertEqual(phrases, [['programming', 'language']])
+
+    def test_bm25_ranking(self):
+        """Тест ранжирования: редкий терм весомее частого"""
+        results = self.index.search('guido language')
+
+        self.assertEqual(results[0]['title'], 'Python')
+        self.assertEqual(results[0]['url'], '/wiki/Python')
+        self.assertEqual({r['title'] for r in results}, {'Python', 'Java'})
+
+    def test_phrase_search(self):
+        """Тест поиска фразы по позициям"""
+        self.assertEqual([r['title'] for r in self.index.search('"java island"')], ['Java'])
+        self.assertEqual(self.index.search('"language island"'), [])
+        # Фраза не склеивается через границу параграфов
+        self.assertEqual(self.index.search('"language guido"'), [])
+
+    def test_incremental_update(self):
+        """Тест переиндексации измененной статьи и пропуска неизменной"""
+        self.assertFalse(self.index.index_document('Python', ['ignored'], content_hash='h1'))
+        self.assertTrue(self.index.index_document('Python', ['Snakes only'], content_hash='h4'))
+
+        self.assertEqual(self.index.search('guido'), [])
+        self.assertEqual([r['title'] for r in self.index.search('snakes')], ['Python'])
+        self.assertEqual(self.index.stats()['documents'], 3)
+
+        self.assertTrue(self.index.remove_document('Кофе'))
+        self.assertEqual(self.index.search('напиток'), [])
+
+class TestLocalSearchCli(unittest.TestCase):
+    """Тест локального поиска из CLI"""
+
+    def test_index_opened_once(self):
+        """Тест: повторный поиск использует тот же индекс, DataManager не создается"""
+        import main
+        self.addCleanup(setattr, main, '_local_index', None)
+        main._local_index = None
+        with patch('search_index.SearchIndex') as index_class, patch('data_manager.DataManager') as data_manager:
+            index_class.return_value.search.return_value = []
+            main.print_local_search('python')
+            main.print_local_search('java')
+
+        index_class.assert_called_once_with()
+        self.assertEqual(index_class.return_value.search.call_count, 2)
+        data_manager.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
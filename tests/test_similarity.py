@@ -0,0 +1,129 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+import shutil
+from unittest.mock import patch
+
+from config import Config
+from data_manager import DataManager
+from similarity import SimilarityEngine
+
+class TestSimilarityEngine(unittest.TestCase):
+    """Тесты для движка похожих статей"""
+
+    def setUp(self):
+        """Настройка перед каждым тестом"""
+        self.engine = SimilarityEngine(text_dim=1024, link_dim=256, text_weight=0.5)
+        self.engine.add('Python', ['Python programming language interpreter'], ['/wiki/Guido', '/wiki/Java'])
+        self.engine.add('Java', ['Java programming language virtual machine'], ['/wiki/JVM', '/wiki/Python'])
+        self.engine.add('Ruby', ['Ruby programming language interpreter'], ['/wiki/Guido', '/wiki/Java'])
+        self.engine.add('Coffee', ['Coffee beverage beans roast'], ['/wiki/Brazil'])
+
+    def test_most_similar(self):
+        """Тест top-k по косинусной близости"""
+        related = self.engine.most_similar('Python', k=2)
+
+        self.assertEqual(related[0]['title'], 'Ruby')
+        self.assertEqual(len(related), 2)
+        self.assertNotIn('Python', [item['title'] for item in related])
+
+    def test_batch_and_unknown(self):
+        """Тест пакетного запроса с неизвестной статьей"""
+        result = self.engine.most_similar_batch(['Python', 'Coffee', 'Unknown'], k=3)
+
+        self.assertEqual(result['Unknown'], [])
+        self.assertEqual(result['Python'][0]['title'], 'Ruby')
+        # Несвязанная статья не получает рекомендаций с нулевой близостью
+        self.assertTrue(all(item['score'] > 0 for item in result['Coffee']))
+
+    def test_incremental_add_and_update(self):
+        """Тест инкрементального добавления и обновления статьи"""
+        for i in range(20):
+            self.engine.add(f'Article {i}', [f'unique words number {i}'])
+        self.engine.add('Ruby', ['Gemstone red mineral'], [])
+
+        self.assertEqual(len(self.engine), 24)
+        self.assertNotEqual(self.engine.most_similar('Python', k=1)[0]['title'], 'Ruby')
+
+    def test_save_and_load(self):
+        """Тест сохранения и загрузки матриц"""
+        test_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(test_dir, 'similarity.npz')
+            self.engine.save(path)
+            loaded = SimilarityEngine.load(path, text_weight=0.5)
+
+            self.assertEqual(loaded.titles, self.engine.titles)
+            self.assertEqual(loaded.most_similar('Python', 2), self.engine.most_similar('Python', 2))
+        finally:
+            shutil.rmtree(test_dir, ignore_errors=True)
+
+    def test_rows_are_sparse(self):
+        """Тест: память строки - по числу признаков статьи, а не по размерности"""
+        engine = SimilarityEngine()
+        engine.add('Python', ['Python programming language'], ['/wiki/Guido'])
+
+        text, links = engine._matrices()
+        self.assertEqual(text.shape, (1, engine.text_dim))
+        self.assertEqual(text.nnz, 3)
+        self.assertEqual(links.nnz, 1)
+
+class TestDataManagerSimilarity(unittest.TestCase):
+    """Тесты для движка похожих статей DataManager"""
+
+    def setUp(self):
+        """Настройка перед каждым тестом"""
+        self.test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.test_dir, True)
+
+    @staticmethod
+    def _content(text):
+        return {'paragraphs': [{'anchor': '', 'paragraphs': [text]}], 'links': []}
+
+    def test_articles_saved_by_other_worker(self):
+        """Тест: статьи, сохраненные другим воркером после построения движка, учитываются"""
+        worker = DataManager(self.test_dir)
+        other = DataManager(self.test_dir)
+        self.addCleanup(worker.flush)
+        self.addCleanup(other.flush)
+        worker.save_page_content('Python', self._content('Python programming language interpreter'))
+        self.assertEqual(worker.related_articles(['Python'])['Python'], [])
+
+        other.save_page_content('Ruby', self._content('Ruby programming language interpreter'))
+        worker.save_page_content('Coffee', self._content('Coffee beverage beans roast'))
+
+        related = worker.related_articles(['Python'], limit=1)['Python']
+        self.assertEqual(related[0]['title'], 'Ruby')
+        self.assertEqual(len(worker.similarity), 3)
+
+    def test_unchanged_store_not_rescanned(self):
+        """Тест: без новых записей хранилище не перечитывается"""
+        manager = DataManager(self.test_dir)
+        self.addCleanup(manager.flush)
+        manager.save_page_content('Python', self._content('Python programming language'))
+        engine = manager.similarity
+
+        with patch.object(manager.article_store, 'get') as get:
+            self.assertIs(manager.similarity, engine)
+        get.assert_not_called()
+
+class TestRelatedApi(unittest.TestCase):
+    """Тесты для /api/related"""
+
+    def test_titles_string(self):
+        """Тест: titles строкой - одна статья, а не список символов"""
+        import api_server
+        self.addCleanup(setattr, api_server.limiter, 'enabled', Config.RATELIMIT_ENABLED)
+        api_server.limiter.enabled = False
+        with patch.object(api_server, 'get_data_manager') as get_data_manager:
+            get_data_manager.return_value.related_articles.return_value = {'Python': [{'title': 'Ruby', 'score': 0.5}]}
+            response = api_server.app.test_client().post('/api/related', json={'titles': 'Python'})
+
+        get_data_manager.return_value.related_articles.assert_called_once_with(['Python'], 10)
+        self.assertEqual(response.get_json()['results'], [{'title': 'Ruby', 'score': 0.5}])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import subprocess
+import tempfile
+import shutil
+
+from startup_benchmark import parse_importtime, PROJECT_DIR
+
+class TestStartup(unittest.TestCase):
+    """Тесты для быстрого запуска (ленивые импорты и отложенная инициализация)"""
+
+    def test_import_is_lazy(self):
+        """Тест: импорт main и cache_manager не загружает selenium/bs4/prometheus_client и не создает logs/"""
+        work_dir = tempfile.mkdtemp()
+        try:
+            code = ("import sys, json, main, cache_manager; "
+                    "print(json.dumps([m for m in ('selenium', 'webdriver_manager', 'bs4', 'redis', "
+                    "'prometheus_client') "
+                    "if m in sys.modules]))")
+            env = dict(os.environ, PYTHONPATH=PROJECT_DIR)
+            result = subprocess.run([sys.executable, '-c', code], cwd=work_dir, env=env,
+                                    capture_output=True, text=True, timeout=60, check=True)
+
+            self.assertEqual(json.loads(result.stdout.strip()), [])
+            self.assertFalse(os.path.exists(os.path.join(work_dir, 'logs')))
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def test_api_server_import_starts_nothing(self):
+        """Тест: импорт api_server не открывает SQLite, не создает output/ и не запускает потоки"""
+        work_dir = tempfile.mkdtemp()
+        try:
+            # Разовый таймер очистки in-memory хранилища limits завершается через 10 мс
+            code = ("import json, threading, time, api_server; time.sleep(0.2); "
+                    "print(json.dumps([t.name for t in threading.enumerate()]))")
+            env = dict(os.environ, PYTHONPATH=PROJECT_DIR)
+            result = subprocess.run([sys.executable, '-c', code], cwd=work_dir, env=env,
+                                    capture_output=True, text=True, timeout=60, check=True)
+
+            self.assertEqual(json.loads(result.stdout.strip().splitlines()[-1]), ['MainThread'])
+            self.assertFalse(os.path.exists(os.path.join(work_dir, 'output')))
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def test_production_modules_skip_benchmark(self):
+        """Тест: hedging и api_server не импортируют бенчмарк и заглушку Wikipedia"""
+        code = ("import sys, json, hedging, api_server; "
+                "print(json.dumps([m for m in ('benchmark', 'wiki_stub') if m in sys.modules]))")
+        env = dict(os.environ, PYTHONPATH=PROJECT_DIR)
+        result = subprocess.run([sys.executable, '-c', code], cwd=PROJECT_DIR, env=env,
+                                capture_output=True, text=True, timeout=60, check=True)
+
+        self.assertEqual(json.loads(result.stdout.strip().splitlines()[-1]), [])
+
+    def test_lazy_attribute(self):
+        """Тест ленивого имени модуля main"""
+        import main
+        from selenium.webdriver.common.by import By
+
+        self.assertIs(main.By, By)
+        # Подмодули (EC) импортируются целиком
+        self.assertTrue(callable(main.EC.presence_of_element_located))
+        with self.assertRaises(AttributeError):
+            main.missing_attribute
+
+    def test_parse_importtime(self):
+        """Тест разбора вывода -X importtime"""
+        stderr = ("import time: self [us] | cumulative | imported package\n"
+                  "import time:       100 |        100 |     json.decoder\n"
+                  "import time:       200 |        300 |   json\n"
+                  "import time:      1000 |       1300 | app\n")
+
+        rows = parse_importtime(stderr)
+
+        self.assertEqual([row['module'] for row in rows], ['json.decoder', 'json', 'app'])
+        self.assertEqual([row['depth'] for row in rows], [2, 1, 0])
+        self.assertEqual(rows[2]['cumulative_us'], 1300)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timing import (Histogram, TimingRegistry, timed, registry, start_request, finish_request,
+                    server_timing_header)
+
+class TestTiming(unittest.TestCase):
+    """Тесты для замеров длительностей этапов"""
+
+    def setUp(self):
+        """Настройка перед каждым тестом"""
+        registry.reset()
+
+    def test_histogram_percentiles(self):
+        """Тест оценки перцентилей по корзинам"""
+        histogram = Histogram([0.1, 1, 10])
+        for value in [0.05] * 90 + [5] * 10:
+            histogram.observe(value)
+
+        self.assertEqual(histogram.count, 100)
+        self.assertLessEqual(histogram.percentile(50), 0.1)
+        self.assertGreater(histogram.percentile(99), 1)
+        self.assertLessEqual(histogram.percentile(100), 5)
+        self.assertIsNone(Histogram().percentile(50))
+
+    def test_timed_context_and_decorator(self):
+        """Тест замера как контекстного менеджера и декоратора"""
+        @timed('decorated')
+        def work():
+            return 42
+
+        with timed('block'):
+            pass
+        self.assertEqual(work(), 42)
+        work()
+
+        snapshot = registry.snapshot()
+        self.assertEqual(snapshot['block']['count'], 1)
+        self.assertEqual(snapshot['decorated']['count'], 2)
+
+    def test_request_breakdown(self):
+        """Тест разбивки по этапам текущего запроса"""
+        with timed('outside'):
+            pass
+        token = start_request()
+        with timed('navigation'):
+            pass
+        with timed('navigation'):
+            pass
+        stages = finish_request(token)
+
+        self.assertEqual([stage for stage, _ in stages], ['navigation', 'navigation'])
+        header = server_timing_header(stages)
+        self.assertTrue(header.startswith('navigation;dur='))
+        self.assertEqual(header.count('navigation'), 1)
+
+    def test_section_paragraphs_extraction_counted_once(self):
+        """Тест: параграфы раздела - один этап extraction (внутри get_parsed_page), без внешнего"""
+        import contextlib
+        import io
+        from unittest.mock import Mock
+        import main
+        from page_parser import clear_page_cache
+        clear_page_cache()
+        driver = Mock(current_url='https://en.wikipedia.org/wiki/Python',
+                      page_source='<div id="mw-content-text"><h2 id="History">History</h2><p>Text</p></div>')
+        token = start_request()
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.print_paragraphs(driver, {'number': '1', 'title': 'History', 'anchor': 'History'})
+        stages = [stage for stage, _ in finish_request(token)]
+
+        self.assertEqual(stages.count('extraction'), 1)
+
+    def test_registry_snapshot_sorted(self):
+        """Тест сводки реестра"""
+        local = TimingRegistry()
+        local.observe('b', 0.2)
+        local.observe('a', 0.1)
+
+        self.assertEqual(list(local.snapshot()), ['a', 'b'])
+        self.assertEqual(local.snapshot()['a']['avg'], 0.1)
+
+if __name__ == '__main__':
+    unittest.main()
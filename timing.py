@@ -0,0 +1,161 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import ContextDecorator
+from typing import Any, Dict, List, Optional
+
+from config import Config
+
+# Длительности этапов текущего запроса: [(этап, секунды), ...]
+_request_stages = contextvars.ContextVar('request_stages', default=None)
+
+# Дополнительные получатели замеров (например, экспорт метрик): func(stage, duration)
+_observers = []
+
+def percentile(sorted_samples: List[float], q: float) -> Optional[float]:
+    """Перцентиль (0..100) отсортированной выборки с линейной интерполяцией"""
+    if not sorted_samples:
+        return None
+    position = (len(sorted_samples) - 1) * q / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_samples) - 1)
+    return sorted_samples[lower] + (sorted_samples[upper] - sorted_samples[lower]) * (position - lower)
+
+class Histogram:
+    """Гистограмма длительностей с фиксированными границами корзин"""
+
+    def __init__(self, buckets: Optional[List[float]] = None):
+        self.buckets = list(buckets or Config.TIMING_BUCKETS)
+        self.counts = [0] * (len(self.buckets) + 1)  # последняя корзина - +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """Добавляет наблюдение"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Оценка перцентиля (0..100) по корзинам с линейной интерполяцией"""
+        with self._lock:
+            if self.count == 0:
+                return None
+            rank = q / 100.0 * self.count
+            cumulative = 0
+            for index, bucket_count in enumerate(self.counts):
+                if bucket_count and cumulative + bucket_count >= rank:
+                    lower = self.buckets[index - 1] if index > 0 else 0.0
+                    upper = self.buckets[index] if index < len(self.buckets) else self.max
+                    fraction = (rank - cumulative) / bucket_count
+                    return min(lower + (upper - lower) * fraction, self.max)
+                cumulative += bucket_count
+            return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Сводка: количество, среднее, перцентили (в секундах)"""
+        summary = {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'avg': round(self.sum / self.count, 6) if self.count else None,
+            'max': round(self.max, 6)
+        }
+        for q in (50, 90, 99):
+            value = self.percentile(q)
+            summary[f'p{q}'] = round(value, 6) if value is not None else None
+        return summary
+
+class TimingRegistry:
+    """Реестр гистограмм по имени этапа"""
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str) -> Histogram:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram())
+        return histogram
+
+    def observe(self, name: str, duration: float):
+        self.histogram(name).observe(duration)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: histogram.snapshot() for name, histogram in sorted(self._histograms.items())}
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+
+registry = TimingRegistry()
+
+class timed(ContextDecorator):
+    """
+    Замер длительности этапа: контекстный менеджер или декоратор
+
+    Пример:
+        with timed('navigation'):
+            driver.get(url)
+
+        @timed('export')
+        def export(...): ...
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._starts = threading.local()
+
+    def __enter__(self):
+        stack = getattr(self._starts, 'stack', None)
+        if stack is None:
+            stack = self._starts.stack = []
+        stack.append(time.perf_counter())
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._starts.stack.pop()
+        record_stage(self.stage, duration)
+        return False
+
+def record_stage(stage: str, duration: float):
+    """Записывает длительность этапа в гистограмму и в разбивку текущего запроса"""
+    registry.observe(stage, duration)
+    for observer in _observers:
+        observer(stage, duration)
+    stages = _request_stages.get()
+    if stages is not None:
+        stages.append((stage, duration))
+
+def add_observer(observer):
+    """Подписывает функцию observer(stage, duration) на все замеры"""
+    if observer not in _observers:
+        _observers.append(observer)
+
+def start_request():
+    """Начинает сбор разбивки по этапам для текущего запроса"""
+    return _request_stages.set([])
+
+def finish_request(token=None) -> List[tuple]:
+    """Завершает сбор и возвращает [(этап, секунды), ...] текущего запроса"""
+    stages = _request_stages.get() or []
+    if token is not None:
+        _request_stages.reset(token)
+    else:
+        _request_stages.set(None)
+    return stages
+
+def server_timing_header(stages: List[tuple]) -> str:
+    """Заголовок Server-Timing (длительности в миллисекундах, одинаковые этапы суммируются)"""
+    totals = {}
+    for stage, duration in stages:
+        totals[stage] = totals.get(stage, 0.0) + duration
+    return ", ".join(f"{stage};dur={duration * 1000:.1f}" for stage, duration in totals.items())
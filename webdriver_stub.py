@@ -0,0 +1,291 @@
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+# Ключ ссылки на элемент в протоколе W3C WebDriver
+ELEMENT_KEY = 'element-6066-11e4-a52e-4f735466cecf'
+
+_SESSION = r'/session/(?P<session_id>[^/]+)'
+_ELEMENT = _SESSION + r'/element/(?P<element_id>[^/]+)'
+
+# Свойства страницы и элемента, которые отдают команды GET
+_PAGE_PROPERTIES = {'url': 'current_url', 'title': 'title', 'source': 'page_source'}
+_ELEMENT_PROPERTIES = {'text': 'text', 'name': 'tag_name'}
+
+class WebDriverError(Exception):
+    """Ошибка команды WebDriver (код ошибки протокола и HTTP-статус)"""
+
+    def __init__(self, error: str, message: str, status: int = 500):
+        super().__init__(message)
+        self.error = error
+        self.status = status
+
+def _default_factory():
+    from fake_driver import FakeDriver
+    return FakeDriver.launch()
+
+class WebDriverStubServer:
+    """
+    Сервер, совместимый с протоколом W3C WebDriver, для локальной проверки удаленного
+    драйвера (remote_driver.py) без Selenium Grid и Chrome
+
+    Каждый сеанс - HttpDriver/FakeDriver: страницы загружаются без браузера, команды
+    поиска элементов, навигации и отправки формы выполняются над разобранным HTML.
+    Число одновременных сеансов ограничено capacity; /status сообщает готовность и
+    занятые слоты в формате Selenium Grid.
+    """
+
+    def __init__(self, capacity: int = 4, host: str = '127.0.0.1', port: int = 0,
+                 driver_factory: Optional[Callable] = None, create_latency: float = 0.0):
+        """
+        Инициализация
+
+        Args:
+            capacity: Максимум одновременных сеансов
+            host: Адрес для прослушивания
+            port: Порт (0 - любой свободный)
+            driver_factory: Создание драйвера сеанса (по умолчанию FakeDriver.launch)
+            create_latency: Дополнительная задержка создания сеанса (сек)
+        """
+        self.capacity = capacity
+        self.driver_factory = driver_factory or _default_factory
+        self.create_latency = create_latency
+        self.ready = True
+        self.sessions = {}
+        self.sessions_created = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def status(self) -> dict:
+        with self._lock:
+            busy = list(self.sessions)
+        slots = [{'session': session_id} for session_id in busy]
+        slots += [{'session': None}] * max(0, self.capacity - len(busy))
+        return {'ready': self.ready,
+                'message': 'ready' if self.ready else 'draining',
+                'nodes': [{'availability': 'UP' if self.ready else 'DRAINING', 'slots': slots}]}
+
+    def start(self) -> 'WebDriverStubServer':
+        """Запускает сервер в фоновом потоке"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name='webdriver-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        """Останавливает сервер и закрывает сеансы"""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            sessions, self.sessions = list(self.sessions.values()), {}
+        for session in sessions:
+            session['driver'].quit()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    # Команды сеанса
+
+    def new_session(self) -> dict:
+        with self._lock:
+            if not self.ready:
+                raise WebDriverError('session not created', 'Host is draining')
+            if len(self.sessions) >= self.capacity:
+                raise WebDriverError('session not created', 'No free browser slots')
+            session_id = uuid.uuid4().hex
+            self.sessions[session_id] = None  # Слот занят на время запуска
+        try:
+            if self.create_latency:
+                time.sleep(self.create_latency)
+            driver = self.driver_factory()
+        except Exception as e:
+            with self._lock:
+                self.sessions.pop(session_id, None)
+            raise WebDriverError('session not created', str(e))
+        with self._lock:
+            self.sessions[session_id] = {'driver': driver, 'elements': {}}
+            self.sessions_created += 1
+        return {'sessionId': session_id, 'capabilities': dict(driver.capabilities, browserName='chrome')}
+
+    def delete_session(self, session_id: str):
+        with self._lock:
+            session = self.sessions.pop(session_id, None)
+        if session:
+            session['driver'].quit()
+
+    def _session(self, session_id: str) -> dict:
+        session = self.sessions.get(session_id)
+        if not session:
+            raise WebDriverError('invalid session id', f"Unknown session: {session_id}", 404)
+        return session
+
+    def _element(self, session: dict, element_id: str):
+        element = session['elements'].get(element_id)
+        if element is None:
+            raise WebDriverError('no such element', f"Unknown element: {element_id}", 404)
+        return element
+
+    def _reference(self, session: dict, element) -> dict:
+        element_id = uuid.uuid4().hex
+        session['elements'][element_id] = element
+        return {ELEMENT_KEY: element_id}
+
+    def _find(self, session: dict, root, body: dict, single: bool):
+        from selenium.common.exceptions import NoSuchElementException
+        try:
+            if single:
+                return self._reference(session, root.find_element(body['using'], body['value']))
+            return [self._reference(session, element) for element in root.find_elements(body['using'], body['value'])]
+        except NoSuchElementException as e:
+            raise WebDriverError('no such element', str(e), 404)
+        except ValueError as e:
+            raise WebDriverError('invalid selector', str(e), 400)
+
+    def _execute(self, session: dict, body: dict):
+        script, args = body.get('script', ''), body.get('args') or []
+        # WebElement.get_attribute выполняется через JS-атом getAttribute
+        if 'getAttribute' in script and len(args) == 2 and isinstance(args[0], dict):
+            return self._element(session, args[0].get(ELEMENT_KEY)).get_attribute(args[1])
+        return session['driver'].execute_script(script, *args)
+
+    # Обработчики команд (см. ROUTES): тело запроса и параметры из пути
+
+    def _navigate(self, body: dict, session_id: str):
+        from selenium.common.exceptions import TimeoutException
+        session = self._session(session_id)
+        try:
+            session['driver'].get(body['url'])
+        except TimeoutException as e:
+            raise WebDriverError('timeout', str(e))
+        session['elements'].clear()
+
+    def _page_property(self, body: dict, session_id: str, prop: str):
+        return getattr(self._session(session_id)['driver'], _PAGE_PROPERTIES[prop])
+
+    def _set_timeouts(self, body: dict, session_id: str):
+        self._session(session_id)
+
+    def _find_in_page(self, body: dict, session_id: str, kind: str):
+        session = self._session(session_id)
+        return self._find(session, session['driver'], body, single=kind == 'element')
+
+    def _execute_sync(self, body: dict, session_id: str):
+        return self._execute(self._session(session_id), body)
+
+    def _find_in_element(self, body: dict, session_id: str, element_id: str, kind: str):
+        session = self._session(session_id)
+        return self._find(session, self._element(session, element_id), body, single=kind == 'element')
+
+    def _element_property(self, body: dict, session_id: str, element_id: str, prop: str):
+        return getattr(self._element(self._session(session_id), element_id), _ELEMENT_PROPERTIES[prop])
+
+    def _element_attribute(self, body: dict, session_id: str, element_id: str, name: str):
+        return self._element(self._session(session_id), element_id).get_attribute(name)
+
+    def _element_action(self, body: dict, session_id: str, element_id: str, action: str):
+        element = self._element(self._session(session_id), element_id)
+        if action == 'value':
+            element.send_keys(body.get('text', ''))
+        else:
+            getattr(element, action)()
+
+    def command(self, method: str, path: str, body: dict):
+        """Выполняет команду протокола и возвращает значение поля value ответа"""
+        for (route_method, pattern), handler in ROUTES.items():
+            match = re.fullmatch(pattern, path)
+            if match and route_method == method:
+                return handler(self, body, **match.groupdict())
+        raise WebDriverError('unknown command', f"{method} {path}", 404)
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _handle(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b''
+                try:
+                    body = json.loads(raw) if raw else {}
+                    status, payload = 200, {'value': stub.command(self.command, self.path.rstrip('/') or '/', body)}
+                except WebDriverError as e:
+                    status, payload = e.status, {'value': {'error': e.error, 'message': str(e), 'stacktrace': ''}}
+                except Exception as e:
+                    status, payload = 500, {'value': {'error': 'unknown error', 'message': str(e), 'stacktrace': ''}}
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_DELETE = _handle
+
+        return Handler
+
+# Команды протокола: (метод, шаблон пути) -> обработчик
+ROUTES = {
+    ('GET', '/status'): lambda stub, body: stub.status(),
+    ('POST', '/session'): lambda stub, body: stub.new_session(),
+    ('DELETE', _SESSION): lambda stub, body, session_id: stub.delete_session(session_id),
+    ('POST', _SESSION + '/url'): WebDriverStubServer._navigate,
+    ('GET', _SESSION + '/(?P<prop>url|title|source)'): WebDriverStubServer._page_property,
+    ('GET', _SESSION + '/timeouts'): WebDriverStubServer._set_timeouts,
+    ('POST', _SESSION + '/timeouts'): WebDriverStubServer._set_timeouts,
+    ('POST', _SESSION + '/(?P<kind>elements?)'): WebDriverStubServer._find_in_page,
+    ('POST', _SESSION + '/execute/sync'): WebDriverStubServer._execute_sync,
+    ('POST', _ELEMENT + '/(?P<kind>elements?)'): WebDriverStubServer._find_in_element,
+    ('GET', _ELEMENT + '/(?P<prop>text|name)'): WebDriverStubServer._element_property,
+    ('GET', _ELEMENT + '/attribute/(?P<name>[^/]+)'): WebDriverStubServer._element_attribute,
+    ('POST', _ELEMENT + '/(?P<action>clear|click|value)'): WebDriverStubServer._element_action,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Заменитель удаленного WebDriver (сеансы без браузера)")
+    parser.add_argument('--host', default='127.0.0.1', help='Адрес')
+    parser.add_argument('--port', type=int, default=4444, help='Порт')
+    parser.add_argument('--capacity', type=int, default=4, help='Одновременных сеансов')
+    parser.add_argument('--backend', choices=['fake', 'http'], default='fake',
+                        help='fake - статьи из benchmarks/pages, http - загрузка по WIKIPEDIA_URL')
+    args = parser.parse_args()
+
+    factory = None
+    if args.backend == 'http':
+        from http_driver import HttpDriver
+        factory = HttpDriver
+    server = WebDriverStubServer(args.capacity, args.host, args.port, factory)
+    print(f"WebDriver stub: {server.url} (слотов: {args.capacity}, backend: {args.backend})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+import argparse
+import html
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from page_parser import REVISION_ID_RE
+
+# Сохраненные статьи: benchmarks/pages/<Заголовок_статьи>.html
+DEFAULT_PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'pages')
+
+MAIN_PAGE_HTML = """<!DOCTYPE html>
+<html lang="en"><head><meta charset="UTF-8"><title>Wikipedia</title></head>
+<body>
+<h1 id="firstHeading">Wikipedia</h1>
+<form action="/w/index.php" id="search-form">
+<input type="search" name="search" id="searchInput" autofocus>
+<input type="hidden" name="title" value="Special:Search">
+<button type="submit">Search</button>
+</form>
+</body></html>
+"""
+
+def _normalize_title(title: str) -> str:
+    """'python (programming language)' -> 'python_(programming_language)' для сравнения"""
+    return title.strip().replace(' ', '_').lower()
+
+def load_pages(pages_dir: Optional[str] = None) -> Dict[str, Dict[str, str]]:
+    """Сохраненные статьи: нормализованный заголовок -> {'title', 'html'}"""
+    pages_dir = pages_dir or DEFAULT_PAGES_DIR
+    pages = {}
+    for name in sorted(os.listdir(pages_dir)):
+        if not name.endswith('.html'):
+            continue
+        title = name[:-len('.html')]
+        with open(os.path.join(pages_dir, name), encoding='utf-8') as f:
+            pages[_normalize_title(title)] = {'title': title, 'html': f.read()}
+    return pages
+
+def get_page(pages: Dict[str, Dict[str, str]], title: str) -> Optional[Dict[str, str]]:
+    """Статья по заголовку из адреса /wiki/<Заголовок>"""
+    return pages.get(_normalize_title(unquote(title)))
+
+def find_article(pages: Dict[str, Dict[str, str]], query: str) -> Optional[Dict[str, str]]:
+    """Статья по точному заголовку, иначе первая, заголовок которой начинается с запроса"""
+    key = _normalize_title(query)
+    if key in pages:
+        return pages[key]
+    for normalized, page in pages.items():
+        if normalized.startswith(key):
+            return page
+    return None
+
+def search_results_html(query: str) -> str:
+    """Страница "ничего не найдено" поиска Wikipedia"""
+    return (f'<html><head><title>Search results - Wikipedia</title></head><body>'
+            f'<h1 id="firstHeading">Search results</h1>'
+            f'<p class="mw-search-nonefound">There were no results matching the query '
+            f'{html.escape(query)}.</p></body></html>')
+
+NOT_FOUND_HTML = '<html><body><h1 id="firstHeading">Not found</h1></body></html>'
+
+def resolve_page(pages: Dict[str, Dict[str, str]], path: str,
+                 params: Dict[str, str]) -> Optional[Tuple[int, str, Optional[str]]]:
+    """
+    Страница по адресу: главная, /wiki/<Заголовок> или результат поиска /w/index.php?search=
+
+    Returns:
+        (статус, HTML, заголовок статьи, на которую поиск перенаправляет) или None - адрес не страница
+    """
+    if path in ('/', '/wiki/Main_Page'):
+        return 200, MAIN_PAGE_HTML, None
+    if path.startswith('/wiki/'):
+        page = get_page(pages, path[len('/wiki/'):])
+        return (200, page['html'], None) if page else (404, NOT_FOUND_HTML, None)
+    if path == '/w/index.php' and 'search' in params:
+        page = find_article(pages, params['search'])
+        if page is None:
+            return 200, search_results_html(params['search']), None
+        return 302, page['html'], page['title']
+    return None
+
+class WikiStubServer:
+    """
+    Локальная замена Wikipedia для бенчмарков и тестов без сети
+
+    Отдает главную страницу с формой поиска, /w/index.php?search= (перенаправление
+    на статью или страница результатов), /wiki/<Заголовок> из сохраненных HTML и
+    /w/api.php?action=query&prop=revisions для проверки ревизий (см. refresh.py).
+    """
+
+    def __init__(self, pages_dir: Optional[str] = None, host: str = '127.0.0.1', port: int = 0,
+                 latency: float = 0.0):
+        """
+        Инициализация
+
+        Args:
+            pages_dir: Директория с сохраненными статьями
+            host: Адрес для прослушивания
+            port: Порт (0 - любой свободный)
+            latency: Искусственная задержка каждого ответа (сек)
+        """
+        self.pages_dir = pages_dir or DEFAULT_PAGES_DIR
+        self.latency = latency
+        self.pages = load_pages(self.pages_dir)
+        self.requests_served = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """Базовый адрес сервера (аналог https://www.wikipedia.org/)"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def article_url(self, title: str) -> str:
+        return f"{self.url}wiki/{quote(title.replace(' ', '_'))}"
+
+    def find_article(self, query: str) -> Optional[Dict[str, str]]:
+        return find_article(self.pages, query)
+
+    def revision_id(self, page: Dict[str, str]) -> Optional[int]:
+        match = REVISION_ID_RE.search(page['html'])
+        return int(match.group(1)) if match else None
+
+    def api_response(self, params: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        """Ответ /w/api.php: только action=query&prop=revisions"""
+        if params.get('action') != 'query' or params.get('prop') != 'revisions':
+            return 400, {'error': 'unsupported'}
+        pages = []
+        for title in params.get('titles', '').split('|'):
+            page = get_page(self.pages, title)
+            if page is None:
+                pages.append({'title': title, 'missing': True})
+            else:
+                pages.append({'title': page['title'].replace('_', ' '),
+                              'revisions': [{'revid': self.revision_id(page)}]})
+        return 200, {'query': {'pages': pages}}
+
+    def start(self) -> 'WikiStubServer':
+        """Запускает сервер в фоновом потоке"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name='wiki-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Обслуживает запросы в текущем потоке (для запуска из командной строки)"""
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        """Останавливает сервер"""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                stub.requests_served += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                parts = urlsplit(self.path)
+                params = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+
+                if parts.path == '/w/api.php':
+                    status, payload = stub.api_response(params)
+                    self._send(status, json.dumps(payload), 'application/json')
+                    return
+                resolved = resolve_page(stub.pages, parts.path, params)
+                if resolved is None:
+                    self._send(404, 'Not found', 'text/plain')
+                    return
+                status, body, redirect = resolved
+                if redirect is not None:
+                    self.send_response(302)
+                    self.send_header('Location', f"/wiki/{quote(redirect)}")
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self._send(status, body)
+
+            def _send(self, status, body, content_type='text/html; charset=utf-8'):
+                data = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальная замена Wikipedia с сохраненными статьями")
+    parser.add_argument('--host', default='127.0.0.1', help='Адрес')
+    parser.add_argument('--port', type=int, default=8081, help='Порт')
+    parser.add_argument('--pages-dir', default=DEFAULT_PAGES_DIR, help='Директория сохраненных статей')
+    parser.add_argument('--latency', type=float, default=0.0, help='Задержка ответа (сек)')
+    args = parser.parse_args()
+
+    server = WikiStubServer(args.pages_dir, args.host, args.port, args.latency)
+    print(f"Wikipedia stub: {server.url} ({len(server.pages)} статей)")
+    print(f"Для приложения: WIKIPEDIA_URL={server.url} DRIVER_BACKEND=http")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()